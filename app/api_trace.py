@@ -0,0 +1,154 @@
+from __future__ import annotations
+import hashlib
+import os
+import random
+import time
+from collections import deque
+from contextvars import ContextVar
+from typing import NamedTuple
+
+# --------------------------------------------------------------------------- #
+#              ثبت تک‌تک درخواست‌های Bot API و هزینهٔ هر هندلر                #
+# --------------------------------------------------------------------------- #
+# ApiMetricsMiddleware (app/session.py) پس از هر درخواست ApiTrace.record را صدا
+# می‌زند. نمونه‌ها در یک deque با maxlen نگه داشته می‌شوند (append در CPython
+# اتمی است و قدیمی‌ترین رکورد خودبه‌خود بیرون می‌افتد؛ قفل لازم نیست).
+# تجمیع «به تفکیک متد» و «به تفکیک هندلرِ آغازگر» برای همهٔ درخواست‌ها انجام
+# می‌شود؛ نمونه‌برداری (sample) فقط روی رکوردهای خام حلقه اثر دارد.
+#
+# اطلاعاتی که لایهٔ میان‌افزار مستقیم نمی‌بیند با ContextVar می‌رسد (همه در
+# همان task درخواست تنظیم می‌شوند):
+#   CURRENT_HANDLER ← میان‌افزار متریک هندلرها / میان‌افزار وب
+#   API_ATTEMPT     ← حلقه‌های تکرار (مثل RateLimiter)؛ ۰ = تلاش اول
+#   PAYLOAD_SIZE    ← PreparedMarkupSession.build_form_data
+#
+# chat_id خام در حلقه نمی‌ماند: فقط یک هش کلیددار (کلید تصادفی هر پردازه)
+# ذخیره می‌شود؛ درخواست‌های یک چت هنوز کنار هم دیده می‌شوند ولی خود شناسه نه.
+
+CURRENT_HANDLER: ContextVar[str] = ContextVar("current_handler", default="-")
+API_ATTEMPT: ContextVar[int] = ContextVar("api_attempt", default=0)
+PAYLOAD_SIZE: ContextVar[int] = ContextVar("payload_size", default=0)
+
+_CHAT_KEY = os.urandom(16)
+
+
+def chat_ref(chat_id: int | str | None) -> str | None:
+    """شناسهٔ مستعار و پایدار (در همین پردازه) برای یک چت"""
+    if chat_id is None:
+        return None
+    return hashlib.blake2b(str(chat_id).encode(), digest_size=6, key=_CHAT_KEY).hexdigest()
+
+
+class ApiCall(NamedTuple):
+    ts: float
+    method: str
+    chat: str | None  # chat_ref(chat_id)
+    handler: str
+    latency: float
+    payload: int
+    retries: int
+    outcome: str  # "ok" یا نام کلاس استثنا
+
+
+class _Agg:
+    __slots__ = ("calls", "errors", "latency", "payload", "retries", "methods")
+
+    def __init__(self) -> None:
+        self.calls = 0
+        self.errors = 0
+        self.latency = 0.0
+        self.payload = 0
+        self.retries = 0
+        self.methods: dict[str, int] = {}
+
+    def add(self, call: ApiCall) -> None:
+        self.calls += 1
+        self.errors += call.outcome != "ok"
+        self.latency += call.latency
+        self.payload += call.payload
+        self.retries += call.retries > 0
+        self.methods[call.method] = self.methods.get(call.method, 0) + 1
+
+    def as_dict(self) -> dict:
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "retried": self.retries,
+            "latency_total_ms": round(self.latency * 1e3, 3),
+            "latency_avg_ms": round(self.latency * 1e3 / self.calls, 3) if self.calls else 0.0,
+            "payload_bytes": self.payload,
+        }
+
+
+class ApiTrace:
+    def __init__(self, capacity: int = 2048, sample: float = 1.0) -> None:
+        self.ring: deque[ApiCall] = deque(maxlen=capacity)
+        self.sample = sample
+        self.by_method: dict[str, _Agg] = {}
+        self.by_handler: dict[str, _Agg] = {}
+
+    def configure(self, *, capacity: int, sample: float) -> None:
+        """تنظیم اندازهٔ حلقه و نرخ نمونه‌برداری (از تنظیمات، هنگام ساخت Bot)"""
+        self.ring = deque(self.ring, maxlen=max(capacity, 1))
+        self.sample = min(max(sample, 0.0), 1.0)
+
+    def record(
+        self,
+        method: str,
+        chat_id: int | str | None,
+        latency: float,
+        outcome: str,
+    ) -> ApiCall:
+        call = ApiCall(
+            time.time(),
+            method,
+            chat_ref(chat_id),
+            CURRENT_HANDLER.get(),
+            latency,
+            PAYLOAD_SIZE.get(),
+            API_ATTEMPT.get(),
+            outcome,
+        )
+        agg = self.by_method.get(method)
+        if agg is None:
+            agg = self.by_method[method] = _Agg()
+        agg.add(call)
+        agg = self.by_handler.get(call.handler)
+        if agg is None:
+            agg = self.by_handler[call.handler] = _Agg()
+        agg.add(call)
+        if self.sample >= 1.0 or random.random() < self.sample:
+            self.ring.append(call)
+        return call
+
+    def snapshot(self, *, recent: int = 50, invocations: dict[str, int] | None = None) -> dict:
+        """
+        خلاصه برای /debug/api-calls. invocations: تعداد اجرای هر هندلر؛ اگر
+        داده شود، میانگین درخواست به‌ازای هر اجرا (مثلاً برای cb_finish) هم
+        محاسبه می‌شود.
+        """
+        handlers = {}
+        for name, agg in sorted(self.by_handler.items(), key=lambda kv: -kv[1].calls):
+            row = agg.as_dict()
+            row["methods"] = dict(sorted(agg.methods.items(), key=lambda kv: -kv[1]))
+            runs = (invocations or {}).get(name)
+            if runs:
+                row["invocations"] = runs
+                row["calls_per_invocation"] = round(agg.calls / runs, 2)
+                row["methods_per_invocation"] = {
+                    m: round(n / runs, 2) for m, n in row["methods"].items()
+                }
+            handlers[name] = row
+        return {
+            "capacity": self.ring.maxlen,
+            "sample": self.sample,
+            "by_method": {
+                m: agg.as_dict()
+                for m, agg in sorted(self.by_method.items(), key=lambda kv: -kv[1].calls)
+            },
+            "by_handler": handlers,
+            "recent": [c._asdict() for c in list(self.ring)[-recent:]] if recent > 0 else [],
+        }
+
+
+API_TRACE = ApiTrace()
@@ -0,0 +1,147 @@
+from __future__ import annotations
+import heapq
+from bisect import bisect_left, bisect_right
+from pathlib import Path
+
+from .normalize import search_key
+from .storage import arecord_car_model, list_car_models, record_car_model
+
+# --------------------------------------------------------------------------- #
+#            ایندکس پیشوندی مدل‌های خودرو (پیشنهاد خودکار فیلد car)            #
+# --------------------------------------------------------------------------- #
+# آرایهٔ مرتبِ (کلید، شناسهٔ مدل) با bisect؛ برای هر مدل، کلیدِ از ابتدای هر
+# کلمه هم ثبت می‌شود تا «206» هم «پژو 206» را پیدا کند. کلیدها با search_key
+# نرمال می‌شوند (ي/ك عربی، آ، ارقام فارسی، نیم‌فاصله و حروف بزرگ یکسان).
+# افزودن مدل جدید درج در جای مرتب است (بدون بازسازی کل ایندکس).
+
+SEED_FILE = Path(__file__).resolve().parent / "data" / "car_models.txt"
+
+# پیشوندهای کوتاه بازهٔ بزرگی دارند؛ نتیجه‌شان تا تغییر بعدی ایندکس کش می‌شود
+_CACHED_PREFIX_LEN = 2
+_MAX = "\U0010ffff"
+
+# امتیاز هر مدل یک عدد صحیح است: (-تعداد << _ID_BITS) | شناسه؛ کوچک‌تر = بهتر.
+# این‌طور رتبه‌بندی بازه با heapq.nsmallest روی اعداد (بدون تابع key پایتونی)
+# انجام می‌شود و در تساوی، مدل قدیمی‌تر (فهرست اولیه) جلوتر است.
+_ID_BITS = 24
+_ID_MASK = (1 << _ID_BITS) - 1
+
+
+class PrefixIndex:
+    def __init__(self) -> None:
+        # دو آرایهٔ موازی، مرتب بر اساس کلید: کلید و امتیاز مدلِ صاحب کلید
+        self._keys: list[str] = []
+        self._scores: list[int] = []
+        self._ids: dict[str, int] = {}
+        self.names: list[str] = []
+        self.counts: list[int] = []
+        self._key_of: list[list[str]] = []
+        self._cache: dict[tuple[str, int], list[str]] = {}
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def _register(self, name: str, count: int) -> tuple[int, list[str]] | None:
+        """ثبت مدل جدید (شناسه و کلیدهایش) یا افزایش وزن مدل موجود (None)"""
+        key = search_key(name)
+        if not key:
+            return None
+        mid = self._ids.get(key)
+        if mid is not None:
+            self.counts[mid] += count
+            return None
+        mid = self._ids[key] = len(self.names)
+        self.names.append(" ".join(name.split()))
+        self.counts.append(count)
+        words = key.split(" ")
+        keys = [" ".join(words[i:]) for i in range(len(words))]
+        self._key_of.append(keys)
+        return mid, keys
+
+    def _score(self, mid: int) -> int:
+        return (-self.counts[mid] << _ID_BITS) | mid
+
+    def _rescore(self, mid: int, old: int) -> None:
+        """به‌روزرسانی امتیاز مدل در همهٔ کلیدهایش (پس از تغییر تعداد)"""
+        new = self._score(mid)
+        for k in self._key_of[mid]:
+            i = bisect_left(self._keys, k)
+            while self._scores[i] != old:
+                i += 1
+            self._scores[i] = new
+
+    def add(self, name: str, count: int = 1) -> None:
+        """افزودن مدل یا افزایش وزن آن (نام نمایشی: اولین املای دیده‌شده)"""
+        self._cache.clear()
+        mid = self._ids.get(search_key(name))
+        old = self._score(mid) if mid is not None else None
+        new = self._register(name, count)
+        if new is None:
+            if mid is not None:
+                self._rescore(mid, old)
+            return
+        mid, keys = new
+        score = self._score(mid)
+        for k in keys:
+            i = bisect_right(self._keys, k)
+            self._keys.insert(i, k)
+            self._scores.insert(i, score)
+
+    def extend(self, items) -> None:
+        """افزودن دسته‌ای (name, count)؛ یک بار مرتب‌سازی به‌جای درج تک‌تک"""
+        self._cache.clear()
+        for name, count in items:
+            self._register(name, count)
+        entries = sorted(
+            (k, self._score(mid)) for mid, keys in enumerate(self._key_of) for k in keys
+        )
+        self._keys = [k for k, _ in entries]
+        self._scores = [s for _, s in entries]
+
+    def suggest(self, prefix: str, limit: int = 10) -> list[str]:
+        """پرتکرارترین مدل‌هایی که یکی از کلمه‌هایشان با prefix شروع می‌شود"""
+        q = search_key(prefix)
+        if not q or limit <= 0:
+            return []
+        cache_key = (q, limit)
+        if len(q) <= _CACHED_PREFIX_LEN and cache_key in self._cache:
+            return self._cache[cache_key]
+
+        lo = bisect_left(self._keys, q)
+        hi = bisect_left(self._keys, q + _MAX, lo)
+        best = heapq.nsmallest(limit, set(self._scores[lo:hi]))
+        out = [self.names[s & _ID_MASK] for s in best]
+
+        if len(q) <= _CACHED_PREFIX_LEN:
+            self._cache[cache_key] = out
+        return out
+
+
+def _seed_models(path: Path = SEED_FILE) -> list[str]:
+    if not path.exists():
+        return []
+    lines = path.read_text(encoding="utf-8").splitlines()
+    return [ln.strip() for ln in lines if ln.strip() and not ln.lstrip().startswith("#")]
+
+
+def build_car_index() -> PrefixIndex:
+    """ایندکس از فهرست اولیه + تاریخچهٔ آگهی‌های منتشرشده"""
+    index = PrefixIndex()
+    index.extend((name, 1) for name in _seed_models())
+    index.extend(list_car_models().items())
+    return index
+
+
+CAR_INDEX = build_car_index()
+
+
+def record_published_car(name: str) -> None:
+    """ثبت نام خودروی آگهی منتشرشده در تاریخچه و ایندکس (افزایشی)"""
+    if record_car_model(name):
+        CAR_INDEX.add(name, 1)
+
+
+async def arecord_published_car(name: str) -> None:
+    """مثل record_published_car؛ نوشتن فایل روی رشتهٔ انباره، ایندکس روی حلقه"""
+    if await arecord_car_model(name):
+        CAR_INDEX.add(name, 1)
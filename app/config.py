@@ -1,13 +1,23 @@
+import logging
 import os
 from dataclasses import dataclass
 from dotenv import load_dotenv
 from aiogram import Bot, Dispatcher
-from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.telegram import TelegramAPIServer
 
 from . import storage
+from .api_trace import API_TRACE
+from .health import OUTBOUND_HEALTH, UPDATES_HEALTH
+from .loop_monitor import LOOP_MONITOR
+from .session import ApiMetricsMiddleware, PreparedMarkupSession
+from .spans import SLOW_LOG
+from .state_backend import PER_REPLICA_STORES, build_backend, set_backend
+from .update_log import UPDATE_RECORDER
 
 load_dotenv()
 
+log = logging.getLogger(__name__)
+
 
 @dataclass(frozen=True)
 class Settings:
@@ -18,7 +28,41 @@ class Settings:
     )
     TARGET_GROUP_ID: int = int(os.getenv("TARGET_GROUP_ID", "0") or "0")
     PROXY_URL: str = (os.getenv("PROXY_URL") or "").strip()
+    # آدرس پایهٔ Bot API (خالی = api.telegram.org)؛ مثلاً http://127.0.0.1:8081
+    # برای سرور محلی tools/fake_api.py یا telegram-bot-api خودمیزبان
+    TELEGRAM_API_BASE: str = (os.getenv("TELEGRAM_API_BASE") or "").strip().rstrip("/")
     WEBAPP_URL: str = (os.getenv("WEBAPP_URL") or "").strip()
+    # آدرس عمومی همین سرور aiohttp؛ اگر تنظیم شود فرم از /webapp/ سرو می‌شود
+    PUBLIC_BASE_URL: str = (os.getenv("PUBLIC_BASE_URL") or "").strip()
+    # نگه‌داشتن نسخهٔ فشردهٔ فایل‌های webapp/ در حافظه (0 = خواندن از دیسک)
+    WEBAPP_HOT_COPY: bool = (os.getenv("WEBAPP_HOT_COPY") or "1").strip() != "0"
+    # چتی که عکس‌های آپلودشده از WebApp برای گرفتن file_id به آن فرستاده می‌شوند
+    # (0 = چت خود کاربر)
+    STAGING_CHAT_ID: int = int(os.getenv("STAGING_CHAT_ID", "0") or "0")
+    # خالی = درون‌حافظه‌ای؛ redis://… برای اجرای چند نسخه پشت وب‌هوک
+    STATE_BACKEND_URL: str = (os.getenv("STATE_BACKEND_URL") or "").strip()
+    # اگر تنظیم شود، /metrics فقط با «Authorization: Bearer <token>» پاسخ می‌دهد
+    METRICS_TOKEN: str = (os.getenv("METRICS_TOKEN") or "").strip()
+    # حلقهٔ رکوردهای درخواست‌های Bot API (/debug/api-calls): ظرفیت و نرخ نمونه‌برداری
+    API_TRACE_SIZE: int = int(os.getenv("API_TRACE_SIZE", "2048") or "2048")
+    API_TRACE_SAMPLE: float = float(os.getenv("API_TRACE_SAMPLE", "1") or "1")
+    # آپدیت‌های کندتر از این (میلی‌ثانیه) در /tmp/bot_data/slow_updates.jsonl ثبت می‌شوند
+    SLOW_UPDATE_MS: float = float(os.getenv("SLOW_UPDATE_MS", "1000") or "1000")
+    # کاوشگر تأخیر حلقهٔ asyncio: فاصلهٔ نمونه‌برداری و آستانهٔ p99 برای «آماده»
+    LOOP_LAG_INTERVAL_MS: float = float(os.getenv("LOOP_LAG_INTERVAL_MS", "50") or "50")
+    LOOP_LAG_READY_MS: float = float(os.getenv("LOOP_LAG_READY_MS", "1000") or "1000")
+    # حالت عیب‌یابی: ثبت پشتهٔ هر callback که حلقه را بیش از LOOP_BLOCK_MS نگه دارد
+    LOOP_BLOCK_DEBUG: bool = (os.getenv("LOOP_BLOCK_DEBUG") or "0").strip() == "1"
+    LOOP_BLOCK_MS: float = float(os.getenv("LOOP_BLOCK_MS", "100") or "100")
+    # /readyz: حداکثر خطای پیاپی getUpdates، کهنگی مجاز آخرین getUpdates موفق
+    # (ثانیه) و حداکثر عمق صف ارسال
+    READY_MAX_FETCH_ERRORS: int = int(os.getenv("READY_MAX_FETCH_ERRORS", "3") or "3")
+    READY_FETCH_STALE_S: float = float(os.getenv("READY_FETCH_STALE_S", "60") or "60")
+    READY_MAX_OUTBOUND: int = int(os.getenv("READY_MAX_OUTBOUND", "500") or "500")
+    # ضبط آپدیت‌های ورودی (ناشناس) برای بازپخش با tools/replay.py؛ خالی = خاموش.
+    # با نمک ثابت، شبه‌شناسهٔ هر کاربر میان اجراها یکسان می‌ماند
+    UPDATE_LOG_PATH: str = (os.getenv("UPDATE_LOG_PATH") or "").strip()
+    UPDATE_LOG_SALT: str = (os.getenv("UPDATE_LOG_SALT") or "").strip()
 
 
 SETTINGS = Settings()
@@ -46,10 +90,34 @@ def build_bot_and_dispatcher():
         default_id=SETTINGS.TARGET_GROUP_ID,
     )
 
+    # ---------------- انبارهٔ وضعیتِ حین اجرا ---------------- #
+    backend = build_backend(SETTINGS.STATE_BACKEND_URL)
+    set_backend(backend)
+    if backend.shared:
+        log.warning(
+            "STATE_BACKEND_URL is shared, but these stores stay per replica (/tmp/bot_data): %s",
+            ", ".join(PER_REPLICA_STORES),
+        )
+
     # ---------------- ساخت Bot و Dispatcher ---------------- #
-    session = (
-        AiohttpSession(proxy=SETTINGS.PROXY_URL) if SETTINGS.PROXY_URL else None
+    session = PreparedMarkupSession(proxy=SETTINGS.PROXY_URL or None)
+    if SETTINGS.TELEGRAM_API_BASE:
+        session.api = TelegramAPIServer.from_base(SETTINGS.TELEGRAM_API_BASE)
+    session.middleware(ApiMetricsMiddleware())
+    API_TRACE.configure(capacity=SETTINGS.API_TRACE_SIZE, sample=SETTINGS.API_TRACE_SAMPLE)
+    SLOW_LOG.configure(threshold_ms=SETTINGS.SLOW_UPDATE_MS)
+    LOOP_MONITOR.configure(
+        interval_ms=SETTINGS.LOOP_LAG_INTERVAL_MS,
+        block_debug=SETTINGS.LOOP_BLOCK_DEBUG,
+        block_ms=SETTINGS.LOOP_BLOCK_MS,
+        ready_lag_ms=SETTINGS.LOOP_LAG_READY_MS,
+    )
+    UPDATES_HEALTH.configure(
+        max_fetch_errors=SETTINGS.READY_MAX_FETCH_ERRORS,
+        fetch_stale=SETTINGS.READY_FETCH_STALE_S,
     )
+    OUTBOUND_HEALTH.max_queue = SETTINGS.READY_MAX_OUTBOUND
+    UPDATE_RECORDER.configure(path=SETTINGS.UPDATE_LOG_PATH, salt=SETTINGS.UPDATE_LOG_SALT)
     bot = Bot(token=SETTINGS.BOT_TOKEN, session=session)
     dp = Dispatcher()
 
@@ -1,15 +1,16 @@
 from aiogram import Router
 
-from .admin_panel import router as admin_router
+from . import admin_panel  # noqa: F401  (ثبت دکمه‌ها در جدول TEXT_DISPATCH)
 from .membership import router as membership_router
 from .publish_flow import router as publish_router
 from .start import router as start_router
+from .text_dispatch import router as text_dispatch_router
 from .user_flow import router as user_flow_router
 
 router = Router()
 
-# ترتیب مهم است: هندلرهای ادمین معمولاً بالاتر هستند
-router.include_router(admin_router)
+# ترتیب مهم است: پیش‌مسیریابی متن (دکمه‌های پنل ادمین و ورودی‌های انتظار) بالاتر است
+router.include_router(text_dispatch_router)
 router.include_router(start_router)
 router.include_router(membership_router)
 router.include_router(publish_router)
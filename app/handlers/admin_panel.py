@@ -1,11 +1,14 @@
 from __future__ import annotations
 import re
 
-from aiogram import Router, types, F
+from aiogram import types
 
 from ..config import SETTINGS
+from ..normalize import clean_text
+from ..web import dashboard_url, webapp_url
 from ..keyboards import (
     admin_root_kb,
+    admin_dashboard_kb,
     admin_admins_kb,
     admin_allowed_kb,
     admin_my_channels_kb,
@@ -13,15 +16,18 @@ from ..keyboards import (
     start_keyboard,
 )
 from ..storage import (
-    list_admins, add_admin, remove_admin, is_admin, is_owner,
-    list_allowed_channels, add_allowed_channel, remove_allowed_channel,
-    list_required_channels, add_required_channel, remove_required_channel,
-    add_destination,
-    list_destinations, set_active_destination, get_active_id_and_title, remove_destination, get_active_destination,
+    list_admins, aadd_admin, aremove_admin, is_owner,
+    alist_allowed_channels, aadd_allowed_channel, aremove_allowed_channel,
+    alist_required_channels, aadd_required_channel, aremove_required_channel,
+    aadd_destination,
+    alist_destinations, aset_active_destination, aget_active_id_and_title, aremove_destination, aget_active_destination,
 )
+from ..middlewares.identity import Identity
 from .state import ADMIN_WAIT_INPUT, ACCESS_CH_WAIT, MEMBERS_CH_WAIT, DEST_WAIT
+from .text_dispatch import TEXT_DISPATCH
 
-router = Router()
+# دکمه‌ها و ورودی‌های انتظارِ این بخش در جدول TEXT_DISPATCH ثبت می‌شوند
+# (نه روی یک Router)؛ مسیریابی‌شان با یک جست‌وجو انجام می‌شود.
 
 # --------------------------------------------------------------------------- #
 #                             کمکى‌ها / Helpers                               #
@@ -33,7 +39,7 @@ def _extract_public_tme_username_from_link(text: str) -> str | None:
     joinchat/+ و t.me/c/... پشتیبانی نمی‌شوند.
     خروجی نمونه: '@username'
     """
-    t = (text or "").strip()
+    t = clean_text(text or "").strip()
     m = re.search(r"(?:https?://)?t\.me/([^ \n]+)", t)
     if not m:
         return None
@@ -48,53 +54,68 @@ def _extract_public_tme_username_from_link(text: str) -> str | None:
 #                             ریشهٔ پنل مدیریتی                               #
 # --------------------------------------------------------------------------- #
 
-@router.message(F.text == "⚙️ پنل مدیریتی")
-async def admin_panel_root_msg(message: types.Message):
-    if not is_admin(message.from_user.id):
+@TEXT_DISPATCH.button("⚙️ پنل مدیریتی")
+async def admin_panel_root_msg(message: types.Message, identity: Identity):
+    if not identity.is_admin:
         await message.answer("دسترسی ندارید.")
         return
-    kb = admin_root_kb(is_owner(message.from_user.id))
+    kb = admin_root_kb(identity.is_owner)
     await message.answer("پنل مدیریتی:", reply_markup=kb)
 
 
-@router.message(F.text == "🔙 بازگشت")
-async def admin_back_to_main_menu(message: types.Message):
-    if not is_admin(message.from_user.id):
+@TEXT_DISPATCH.button("🗂 صف بررسی")
+async def admin_review_dashboard(message: types.Message, identity: Identity):
+    if not identity.is_admin:
         await message.answer("دسترسی ندارید.")
         return
-    if not SETTINGS.WEBAPP_URL:
-        await message.answer("WEBAPP_URL در .env تنظیم نشده است.")
+    url = dashboard_url()
+    if not url:
+        await message.answer("داشبورد فقط وقتی فعال است که PUBLIC_BASE_URL در .env تنظیم شده باشد.")
         return
-    kb = start_keyboard(SETTINGS.WEBAPP_URL, True)
+    await message.answer(
+        "آگهی‌های در انتظار بررسی را یک‌جا ببینید و تایید/رد کنید:",
+        reply_markup=admin_dashboard_kb(url),
+    )
+
+
+@TEXT_DISPATCH.button("🔙 بازگشت")
+async def admin_back_to_main_menu(message: types.Message, identity: Identity):
+    if not identity.is_admin:
+        await message.answer("دسترسی ندارید.")
+        return
+    if not webapp_url():
+        await message.answer("WEBAPP_URL (یا PUBLIC_BASE_URL) در .env تنظیم نشده است.")
+        return
+    kb = start_keyboard(True)
     await message.answer("بازگشت به منوی اصلی ربات:", reply_markup=kb)
 
 
-@router.message(F.text == "🔙 بازگشت به پنل")
-async def admin_back_to_panel(message: types.Message):
-    if not is_admin(message.from_user.id):
+@TEXT_DISPATCH.button("🔙 بازگشت به پنل")
+async def admin_back_to_panel(message: types.Message, identity: Identity):
+    if not identity.is_admin:
         await message.answer("دسترسی ندارید.")
         return
-    kb = admin_root_kb(is_owner(message.from_user.id))
+    kb = admin_root_kb(identity.is_owner)
     await message.answer("بازگشت به پنل مدیریتی.", reply_markup=kb)
 
 # --------------------------------------------------------------------------- #
 #                           بخش «مدیریت ادمین‌ها»                              #
 # --------------------------------------------------------------------------- #
 
-@router.message(F.text == "👤 مدیریت ادمین‌ها")
-async def admin_manage_admins_root(message: types.Message):
-    if not is_admin(message.from_user.id):
+@TEXT_DISPATCH.button("👤 مدیریت ادمین‌ها")
+async def admin_manage_admins_root(message: types.Message, identity: Identity):
+    if not identity.is_admin:
         await message.answer("دسترسی ندارید.")
         return
     
-    user_is_owner = is_owner(message.from_user.id)
+    user_is_owner = identity.is_owner
     kb = admin_admins_kb(user_is_owner)
     
     await message.answer("مدیریت ادمین‌ها:", reply_markup=kb)
 
-@router.message(F.text == "📋 لیست ادمین‌ها")
-async def admin_list_msg(message: types.Message):
-    if not is_admin(message.from_user.id):
+@TEXT_DISPATCH.button("📋 لیست ادمین‌ها")
+async def admin_list_msg(message: types.Message, identity: Identity):
+    if not identity.is_admin:
         await message.answer("دسترسی ندارید.")
         return
 
@@ -122,40 +143,37 @@ async def admin_list_msg(message: types.Message):
 
     await message.answer("\n".join(lines))
 
-@router.message(F.text == "➕ افزودن ادمین")
-async def admin_add_msg(message: types.Message):
-    if not is_owner(message.from_user.id):
+@TEXT_DISPATCH.button("➕ افزودن ادمین")
+async def admin_add_msg(message: types.Message, identity: Identity):
+    if not identity.is_owner:
         await message.answer("⛔ دسترسی ندارید (فقط مالک اصلی).")
         return
     ADMIN_WAIT_INPUT[message.from_user.id] = {"mode": "add"}
     await message.answer("آیدی عددی کاربر را ارسال کنید تا ادمین شود:")
 
-@router.message(F.text == "🗑 حذف ادمین")
-async def admin_remove_msg(message: types.Message):
-    if not is_owner(message.from_user.id):
+@TEXT_DISPATCH.button("🗑 حذف ادمین")
+async def admin_remove_msg(message: types.Message, identity: Identity):
+    if not identity.is_owner:
         await message.answer("⛔ دسترسی ندارید (فقط مالک اصلی).")
         return
     ADMIN_WAIT_INPUT[message.from_user.id] = {"mode": "remove"}
     await message.answer("آیدی عددی ادمین را ارسال کنید تا حذف شود:")
 
-@router.message(
-    F.text.regexp(r"^\d{4,}$"),
-    F.from_user.id.func(lambda uid: uid in ADMIN_WAIT_INPUT)
-)
-async def admin_id_input(message: types.Message):
+@TEXT_DISPATCH.wait(ADMIN_WAIT_INPUT.kind, pattern=r"\d{4,}")
+async def admin_id_input(message: types.Message, identity: Identity):
     w = ADMIN_WAIT_INPUT.get(message.from_user.id)
-    if not w or not is_owner(message.from_user.id):
+    if not w or not identity.is_owner:
         return
 
     uid = int(message.text.strip())
     mode = w["mode"]
 
     if mode == "add":
-        ok = add_admin(uid)
+        ok = await aadd_admin(uid)
         await message.reply("✅ اضافه شد." if ok else "ℹ️ قبلاً ادمین بوده.")
 
     elif mode == "remove":
-        ok = remove_admin(uid)
+        ok = await aremove_admin(uid)
         await message.reply("🗑 حذف شد." if ok else "⚠️ امکان حذف نیست/یافت نشد.")
 
     ADMIN_WAIT_INPUT.pop(message.from_user.id, None)
@@ -165,9 +183,9 @@ async def admin_id_input(message: types.Message):
 #                       بخش «کانال‌های مجاز ارسال» (OWNER)                     #
 # --------------------------------------------------------------------------- #
 
-@router.message(F.text == "📡 مدیریت کانال‌های مجاز")
-async def admin_manage_allowed_root(message: types.Message):
-    if not is_owner(message.from_user.id):
+@TEXT_DISPATCH.button("📡 مدیریت کانال‌های مجاز")
+async def admin_manage_allowed_root(message: types.Message, identity: Identity):
+    if not identity.is_owner:
         await message.answer(
             "⛔ شما در حال حاضر به این بخش دسترسی ندارید.\nبرای فعال‌سازی دسترسی، با مدیر اصلی هماهنگ کنید."
         )
@@ -175,12 +193,12 @@ async def admin_manage_allowed_root(message: types.Message):
     kb = admin_allowed_kb()
     await message.answer("مدیریت کانال‌ها و گروه‌های مجاز:", reply_markup=kb)
 
-@router.message(F.text == "📋 لیست کانال‌های مجاز")
-async def list_allowed_channels_msg(message: types.Message):
-    if not is_owner(message.from_user.id):
+@TEXT_DISPATCH.button("📋 لیست کانال‌های مجاز")
+async def list_allowed_channels_msg(message: types.Message, identity: Identity):
+    if not identity.is_owner:
         await message.answer("⛔ شما در حال حاضر به این بخش دسترسی ندارید.")
         return
-    ids = list_allowed_channels()
+    ids = await alist_allowed_channels()
     if not ids:
         await message.answer("هیچ کانال/گروه مجازی ثبت نشده است.")
         return
@@ -190,24 +208,24 @@ async def list_allowed_channels_msg(message: types.Message):
         lines.append(f"- {cid}{flag}")
     await message.answer("\n".join(lines))
 
-@router.message(F.text == "➕ افزودن کانال مجاز")
-async def add_allowed_channel_start(message: types.Message):
-    if not is_owner(message.from_user.id):
+@TEXT_DISPATCH.button("➕ افزودن کانال مجاز")
+async def add_allowed_channel_start(message: types.Message, identity: Identity):
+    if not identity.is_owner:
         await message.answer("⛔ شما در حال حاضر به این بخش دسترسی ندارید.")
         return
     ACCESS_CH_WAIT[message.from_user.id] = {"mode": "add"}
     await message.answer("لطفاً لینک عمومی کانال/گروه را بفرستید (مثال: https://t.me/testchannel).")
 
-@router.message(F.text == "🗑 حذف کانال مجاز")
-async def remove_allowed_channel_start(message: types.Message):
-    if not is_owner(message.from_user.id):
+@TEXT_DISPATCH.button("🗑 حذف کانال مجاز")
+async def remove_allowed_channel_start(message: types.Message, identity: Identity):
+    if not identity.is_owner:
         await message.answer("⛔ شما در حال حاضر به این بخش دسترسی ندارید.")
         return
     ACCESS_CH_WAIT[message.from_user.id] = {"mode": "remove"}
     await message.answer("لطفاً لینک عمومی کانال/گروه برای حذف را بفرستید (مثال: https://t.me/testchannel).")
 
-@router.message(F.text, F.from_user.id.func(lambda uid: uid in ACCESS_CH_WAIT))
-async def access_channel_flow(message: types.Message):
+@TEXT_DISPATCH.wait(ACCESS_CH_WAIT.kind)
+async def access_channel_flow(message: types.Message, identity: Identity):
     st = ACCESS_CH_WAIT.get(message.from_user.id)
     if not st:
         return
@@ -230,9 +248,9 @@ async def access_channel_flow(message: types.Message):
 
     mode = st["mode"]
     if mode == "add":
-        ok = add_allowed_channel(cid)
+        ok = await aadd_allowed_channel(cid)
         if ok:
-            add_destination(cid, title)
+            await aadd_destination(cid, title)
             await message.reply(f"✅ کانال مجاز اضافه شد.\nchat_id: {cid}\nعنوان: {title or ref}")
         else:
             await message.reply("ℹ️ این کانال قبلاً در لیست بود.")
@@ -240,7 +258,7 @@ async def access_channel_flow(message: types.Message):
         if int(cid) == int(SETTINGS.TARGET_GROUP_ID):
             await message.reply("⛔ امکان حذف «کانال اصلی» وجود ندارد.")
         else:
-            ok = remove_allowed_channel(cid)
+            ok = await aremove_allowed_channel(cid)
             await message.reply("🗑 حذف شد." if ok else "ℹ️ چنین کانالی در لیست نبود.")
     ACCESS_CH_WAIT.pop(message.from_user.id, None)
 
@@ -248,20 +266,20 @@ async def access_channel_flow(message: types.Message):
 #                       بخش «کانال‌های من» (عضویت اجباری)                      #
 # --------------------------------------------------------------------------- #
 
-@router.message(F.text == "📣 کانال‌های من")
-async def admin_my_channels_root(message: types.Message):
-    if not is_owner(message.from_user.id):
+@TEXT_DISPATCH.button("📣 کانال‌های من")
+async def admin_my_channels_root(message: types.Message, identity: Identity):
+    if not identity.is_owner:
         await message.answer("⛔ شما در حال حاضر به این بخش دسترسی ندارید.")
         return
     kb = admin_my_channels_kb()
     await message.answer("مدیریت کانال‌هایی که عضویت کاربران عادی در آن‌ها الزامی است:", reply_markup=kb)
 
-@router.message(F.text == "📋 لیست کانال‌های من")
-async def list_my_channels_msg(message: types.Message):
-    if not is_owner(message.from_user.id):
+@TEXT_DISPATCH.button("📋 لیست کانال‌های من")
+async def list_my_channels_msg(message: types.Message, identity: Identity):
+    if not identity.is_owner:
         await message.answer("⛔ شما در حال حاضر به این بخش دسترسی ندارید.")
         return
-    items = list_required_channels()
+    items = await alist_required_channels()
     if not items:
         await message.answer("هنوز هیچ کانالی ثبت نشده است.")
         return
@@ -277,24 +295,24 @@ async def list_my_channels_msg(message: types.Message):
         lines.append(f"- {cid}{' - ' + title if title else ''}{suffix}")
     await message.answer("\n".join(lines))
 
-@router.message(F.text == "➕ افزودن کانال من")
-async def add_my_channel_start(message: types.Message):
-    if not is_owner(message.from_user.id):
+@TEXT_DISPATCH.button("➕ افزودن کانال من")
+async def add_my_channel_start(message: types.Message, identity: Identity):
+    if not identity.is_owner:
         await message.answer("⛔ شما در حال حاضر به این بخش دسترسی ندارید.")
         return
     MEMBERS_CH_WAIT[message.from_user.id] = {"mode": "add"}
     await message.answer("لطفاً لینک عمومی کانال/گروه را بفرستید (مثال: https://t.me/testchannel).")
 
-@router.message(F.text == "🗑 حذف کانال من")
-async def remove_my_channel_start(message: types.Message):
-    if not is_owner(message.from_user.id):
+@TEXT_DISPATCH.button("🗑 حذف کانال من")
+async def remove_my_channel_start(message: types.Message, identity: Identity):
+    if not identity.is_owner:
         await message.answer("⛔ شما در حال حاضر به این بخش دسترسی ندارید.")
         return
     MEMBERS_CH_WAIT[message.from_user.id] = {"mode": "remove"}
     await message.answer("لطفاً لینک عمومی کانال/گروه برای حذف را بفرستید (مثال: https://t.me/testchannel).")
 
-@router.message(F.text, F.from_user.id.func(lambda uid: uid in MEMBERS_CH_WAIT))
-async def my_channels_flow(message: types.Message):
+@TEXT_DISPATCH.wait(MEMBERS_CH_WAIT.kind)
+async def my_channels_flow(message: types.Message, identity: Identity):
     st = MEMBERS_CH_WAIT.get(message.from_user.id)
     if not st:
         return
@@ -317,7 +335,7 @@ async def my_channels_flow(message: types.Message):
 
     mode = st["mode"]
     if mode == "add":
-        ok = add_required_channel(cid, title=title, username=username)
+        ok = await aadd_required_channel(cid, title=title, username=username)
         if ok:
             await message.reply(f"✅ اضافه شد.\nchat_id: {cid}\nعنوان: {title or username}")
         else:
@@ -326,7 +344,7 @@ async def my_channels_flow(message: types.Message):
         if int(cid) == int(SETTINGS.TARGET_GROUP_ID):
             await message.reply("⛔ امکان حذف «کانال اصلی» وجود ندارد.")
         else:
-            ok = remove_required_channel(cid)
+            ok = await aremove_required_channel(cid)
             await message.reply("🗑 حذف شد." if ok else "ℹ️ چنین کانالی ثبت نشده است.")
     MEMBERS_CH_WAIT.pop(message.from_user.id, None)
 
@@ -334,13 +352,13 @@ async def my_channels_flow(message: types.Message):
 #                           بخش «مقصدها» (OWNER)                               #
 # --------------------------------------------------------------------------- #
 
-@router.message(F.text == "🎯 مدیریت مقصدها")
-async def destinations_root(message: types.Message):
-    if not is_owner(message.from_user.id):
+@TEXT_DISPATCH.button("🎯 مدیریت مقصدها")
+async def destinations_root(message: types.Message, identity: Identity):
+    if not identity.is_owner:
         await message.answer("⛔ شما در حال حاضر به این بخش دسترسی ندارید.")
         return
 
-    aid, title = get_active_id_and_title()
+    aid, title = await aget_active_id_and_title()
     kb = admin_destinations_kb()
 
     # تلاش برای دریافت یوزرنیم مقصد فعال
@@ -359,14 +377,14 @@ async def destinations_root(message: types.Message):
         reply_markup=kb,
     )
 
-@router.message(F.text == "📋 لیست مقصدها")
-async def destinations_list(message: types.Message):
-    if not is_owner(message.from_user.id):
+@TEXT_DISPATCH.button("📋 لیست مقصدها")
+async def destinations_list(message: types.Message, identity: Identity):
+    if not identity.is_owner:
         await message.answer("⛔ شما در حال حاضر به این بخش دسترسی ندارید.")
         return
 
-    items = list_destinations()
-    aid = get_active_destination()
+    items = await alist_destinations()
+    aid = await aget_active_destination()
 
     if not items:
         await message.answer("هیچ مقصدی ثبت نشده است.")
@@ -392,36 +410,36 @@ async def destinations_list(message: types.Message):
 
     await message.answer("\n".join(lines))
 
-@router.message(F.text == "➕ افزودن مقصد")
-async def destinations_add_start(message: types.Message):
-    if not is_owner(message.from_user.id):
+@TEXT_DISPATCH.button("➕ افزودن مقصد")
+async def destinations_add_start(message: types.Message, identity: Identity):
+    if not identity.is_owner:
         await message.answer("⛔ شما در حال حاضر به این بخش دسترسی ندارید.")
         return
 
     DEST_WAIT[message.from_user.id] = {"mode": "add"}
     await message.answer("لینک عمومی مقصد را بفرستید (مثال: https://t.me/testchannel).")
 
-@router.message(F.text == "✅ انتخاب مقصد فعال")
-async def destinations_set_active_start(message: types.Message):
-    if not is_owner(message.from_user.id):
+@TEXT_DISPATCH.button("✅ انتخاب مقصد فعال")
+async def destinations_set_active_start(message: types.Message, identity: Identity):
+    if not identity.is_owner:
         await message.answer("⛔ شما در حال حاضر به این بخش دسترسی ندارید.")
         return
 
     DEST_WAIT[message.from_user.id] = {"mode": "set_active"}
     await message.answer("لینک عمومی مقصد را بفرستید تا به عنوان مقصد فعال انتخاب شود.")
 
-@router.message(F.text == "🗑 حذف مقصد")
-async def destinations_remove_start(message: types.Message):
-    if not is_owner(message.from_user.id):
+@TEXT_DISPATCH.button("🗑 حذف مقصد")
+async def destinations_remove_start(message: types.Message, identity: Identity):
+    if not identity.is_owner:
         await message.answer("⛔ شما در حال حاضر به این بخش دسترسی ندارید.")
         return
 
     DEST_WAIT[message.from_user.id] = {"mode": "remove"}
     await message.answer("لینک عمومی مقصد را بفرستید تا حذف شود.")
 
-@router.message(F.text, F.from_user.id.func(lambda uid: uid in DEST_WAIT))
-async def destinations_flow(message: types.Message):
-    if not is_owner(message.from_user.id):
+@TEXT_DISPATCH.wait(DEST_WAIT.kind)
+async def destinations_flow(message: types.Message, identity: Identity):
+    if not identity.is_owner:
         return
 
     st = DEST_WAIT.get(message.from_user.id)
@@ -444,26 +462,26 @@ async def destinations_flow(message: types.Message):
     mode = st.get("mode")
 
     if mode == "add":
-        ok = add_destination(cid, title)
+        ok = await aadd_destination(cid, title)
         await message.reply("✅ مقصد اضافه شد." if ok else "ℹ️ قبلاً وجود داشت (در صورت نیاز عنوان بروزرسانی شد).")
 
     elif mode == "set_active":
-        ok = set_active_destination(cid)
+        ok = await aset_active_destination(cid)
         if ok:
             await message.reply(f"✅ مقصد فعال شد: {cid} — {title or ref}")
         else:
-            add_destination(cid, title)
-            ok2 = set_active_destination(cid)
+            await aadd_destination(cid, title)
+            ok2 = await aset_active_destination(cid)
             await message.reply(f"✅ مقصد فعال شد: {cid} — {title or ref}" if ok2 else "❌ خطا در فعال‌سازی مقصد.")
 
     elif mode == "remove":
-        ok = remove_destination(cid)
+        ok = await aremove_destination(cid)
         await message.reply("🗑 حذف شد." if ok else "ℹ️ چنین مقصدی وجود نداشت.")
 
     DEST_WAIT.pop(message.from_user.id, None)
 
     # بازگشت به پنل مقصدها با نمایش اطلاعات کامل
-    aid, t = get_active_id_and_title()
+    aid, t = await aget_active_id_and_title()
     extra_info = ""
     if aid:
         try:
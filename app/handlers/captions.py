@@ -0,0 +1,143 @@
+from __future__ import annotations
+from functools import lru_cache
+
+from aiogram import html
+
+from ..normalize import to_persian_digits
+
+# --------------------------------------------------------------------------- #
+#                  رندر کپشن‌ها از قطعه‌های از پیش ساخته‌شده                  #
+# --------------------------------------------------------------------------- #
+# کپشن از چند قطعه ساخته می‌شود؛ بخش‌های ثابت یک بار در زمان import ساخته
+# می‌شوند و هر قطعهٔ پویا بر اساس مقدار فیلدهایش کش می‌شود. پس در ویرایش
+# قیمت/توضیح یا ارسال برای چند ادمین، فقط قسمتِ تغییرکرده دوباره رندر می‌شود.
+# خروجی باید بایت‌به‌بایت با نسخهٔ قبلی یکی باشد (bench/bench_captions.py).
+
+_CACHE_SIZE = 2048
+
+# نام و شماره تماس (دستی)
+# contact_1_name = "حاجی اسماعیلی"
+# contact_1_phone = "09121513089"
+_CONTACT_2_NAME = "کیوان"
+_CONTACT_2_PHONE = "09127475355"
+
+_FOOTER_STATIC = "\n".join([
+    "",
+    "☎️ <b>تماس:</b>",
+    # f"{contact_1_name} - \u200e{contact_1_phone}\u200e",
+    f"{_CONTACT_2_NAME} - \u200e{_CONTACT_2_PHONE}\u200e",
+    "───────────────────",
+])
+
+_ADMIN_REVIEW_HEAD = "🧪 <b>موارد نیازمند بررسی:</b>"
+_ADMIN_SUMMARY_HEAD = "\n".join(["—" * 10, "📋 <b>خلاصه آگهی</b>"])
+
+
+def to_persian_year(year_str: str) -> str:
+    """
+    تبدیل سال به فارسی.
+    """
+    return to_persian_digits(year_str)
+
+
+q = lru_cache(maxsize=_CACHE_SIZE)(html.quote)
+
+
+def _ins_text(insurance) -> str:
+    return f"{insurance} ماه" if insurance else "—"
+
+
+# ----------------------------- کپشن کانال ---------------------------------- #
+
+@lru_cache(maxsize=_CACHE_SIZE)
+def _head(category: str, car: str, year: str, color: str) -> str:
+    return "\n".join([
+        f"🏷 <b>{q(category)}</b>",
+        q(car),
+        f"\u200F{to_persian_year(year)}\u200F",  # راست‌چین
+        q(color),
+    ])
+
+
+@lru_cache(maxsize=_CACHE_SIZE)
+def _specs(km: str, insurance, gear) -> str:
+    return "\n".join([
+        f"کارکرد: {q(km)} کیلومتر",
+        f"مهلت بیمه: {q(_ins_text(insurance))}",
+        f"گیربکس: {q(gear or '—')}",
+    ])
+
+
+@lru_cache(maxsize=_CACHE_SIZE)
+def _footer(number: int, jdate: str) -> str:
+    return f"{_FOOTER_STATIC}\n🔖 <b>آگهی شماره #{number}</b>\n📅 <i>{jdate}</i>"
+
+
+def build_caption(
+    form: dict,
+    number: int,
+    jdate: str,
+    *,
+    show_price: bool,
+    show_desc: bool,
+) -> str:
+    parts = [_head(form["category"], form["car"], form["year"], form["color"])]
+
+    # قیمت زیر رنگ
+    if show_price and form.get("price_words"):
+        parts.append(f"قیمت: {q(form['price_words'])}")
+
+    parts.append(_specs(form["km"], form.get("insurance"), form.get("gear")))
+
+    # توضیحات
+    if show_desc and (form.get("desc") or "").strip():
+        parts.append(f"\n<b>توضیحات:</b>\n{q(form['desc'])}")
+
+    parts.append(_footer(number, jdate))
+    return "\n".join(parts)
+
+
+# ----------------------------- کپشن ادمین‌ها -------------------------------- #
+
+@lru_cache(maxsize=_CACHE_SIZE)
+def _admin_contact(phone: str | None, username: str | None) -> str:
+    uname = (username or "").lstrip("@")
+    return "\n".join([
+        f"📞 {q(phone or '—')}",
+        f"👤 @{q(uname)}" if uname else "👤 بدون نام کاربری",
+        "",
+        _ADMIN_REVIEW_HEAD,
+    ])
+
+
+@lru_cache(maxsize=_CACHE_SIZE)
+def _admin_summary(car: str, year: str, color: str, km: str, insurance, gear) -> str:
+    return "\n".join([
+        _ADMIN_SUMMARY_HEAD,
+        f"نام خودرو: {q(car)}",
+        f"سال/رنگ/کارکرد: {q(year)} / {q(color)} / {q(km)}km",
+        f"بیمه/گیربکس: {q(_ins_text(insurance))} / {q(gear or '—')}",
+    ])
+
+
+def admin_caption(
+    form: dict,
+    number: int,
+    jdate: str,
+    *,
+    phone: str | None = None,
+    username: str | None = None,
+) -> str:
+    """
+    همه ادمین‌ها شماره و یوزرنیم رو می‌بینن
+    """
+    return "\n".join([
+        _admin_contact(phone, username),
+        f"💵 قیمت: {q(form.get('price_words') or '—')}",
+        f"📝 توضیحات:\n{q(form.get('desc') or '—')}",
+        _admin_summary(
+            form["car"], form["year"], form["color"], form["km"],
+            form.get("insurance"), form.get("gear"),
+        ),
+        f"\n🗓️ <i>{jdate}</i> • ⏱ #{number}",
+    ])
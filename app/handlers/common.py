@@ -3,55 +3,34 @@ import jdatetime
 
 from aiogram import html
 
+from ..normalize import (
+    clean_text,
+    contains_persian_digits,
+    normalize,
+    normalize_digits,
+)
+
 __all__ = [
     "to_jalali",
     "contains_persian_digits",
     "price_words",
+    "parse_price",
+    "million_to_toman",
     "_price_million_to_toman_str",
     "_parse_admin_price",
 ]
 
 # ---------------------------- helpers ---------------------------------------
 
+_PRICE_RX = re.compile(r"\d+(\.\d{1,3})?")
+
+
 def to_jalali(date_iso: str) -> str:
     y, m, d = map(int, date_iso.split("-"))
     j = jdatetime.date.fromgregorian(year=y, month=m, day=d)
     return f"{j.year}/{j.month:02d}/{j.day:02d}"
 
 
-def contains_persian_digits(s: str) -> bool:
-    return bool(re.search(r"[\u06F0-\u06F9\u0660-\u0669]", s or ""))
-
-
-def normalize_digits(s: str) -> str:
-    """تبدیل ارقام فارسی و عربی به لاتین"""
-    if not s:
-        return ""
-    persian = "۰۱۲۳۴۵۶۷۸۹"
-    arabic = "٠١٢٣٤٥٦٧٨٩"
-    trans = {ord(p): str(i) for i, p in enumerate(persian)}
-    trans.update({ord(a): str(i) for i, a in enumerate(arabic)})
-    return s.translate(trans)
-
-
-def clean_text(s: str) -> str:
-    """حذف تمام کاراکترهای مخفی تلگرام که regex را خراب می‌کند"""
-    if not s:
-        return ""
-    hidden = [
-        "\u200f",  # RTL mark
-        "\u200e",  # LTR mark
-        "\u202a",  # LRE
-        "\u202b",  # RLE
-        "\u202c",  # PDF
-        "\u202d",  # LRO
-        "\u202e",  # RLO
-    ]
-    for h in hidden:
-        s = s.replace(h, "")
-    return s
-
-
 def price_words(num: int) -> str:
     if num >= 100_000_000_000:
         num = 100_000_000_000
@@ -73,16 +52,28 @@ def price_words(num: int) -> str:
     return " و ".join(parts) + " تومان"
 
 
+def million_to_toman(value: str) -> int:
+    return int(round(float(value) * 1_000_000))
+
+
+def parse_price(raw: str) -> int | None:
+    """
+    قیمت بر حسب میلیون (80، 120.5، ۲۵۰۰، 12,5) → تومان؛ نامعتبر ← None.
+    همان قاعدهٔ فیلد price فرم (form_schema) و ویرایش قیمت توسط ادمین.
+    """
+    s = normalize(str(raw or ""), decimal=True).strip()
+    if not _PRICE_RX.fullmatch(s):
+        return None
+    return million_to_toman(s)
+
+
 # تبدیل ورودی million به تومان
 def _price_million_to_toman_str(raw: str) -> tuple[bool, int]:
-    s = clean_text(normalize_digits(raw or "")).replace(" ", "")
-    s = s.replace(",", ".").replace("\u066B", ".")
-    if not s:
+    s = str(raw or "").replace(" ", "")
+    if not normalize(s, decimal=True):
         return True, 0
-    if not re.fullmatch(r"\d+(\.\d{1,3})?", s):
-        return False, 0
-    v = float(s)
-    return True, int(round(v * 1_000_000))
+    toman = parse_price(s)
+    return (True, toman) if toman is not None else (False, 0)
 
 
 def _parse_admin_price(text: str) -> tuple[bool, int]:
@@ -95,19 +86,5 @@ def _parse_admin_price(text: str) -> tuple[bool, int]:
         12500
     با اعشار 1 تا 3 رقم مجاز است.
     """
-
-    # نرمال‌سازی و حذف کاراکترهای مخفی
-    s = normalize_digits(clean_text(text or "")).strip()
-    s = s.replace(",", ".").replace("\u066B", ".")
-
-    # فقط اجازه اعداد صحیح یا اعشاری
-    if not re.fullmatch(r"\d+(\.\d{1,3})?", s):
-        return False, 0
-
-    try:
-        million = float(s)
-    except:
-        return False, 0
-
-    toman = int(round(million * 1_000_000))
-    return True, toman
+    toman = parse_price(text)
+    return (True, toman) if toman is not None else (False, 0)
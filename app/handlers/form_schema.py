@@ -0,0 +1,127 @@
+from __future__ import annotations
+import re
+from dataclasses import dataclass, field as dc_field
+
+from ..normalize import normalize_payload, table
+from .common import _PRICE_RX, million_to_toman, price_words
+
+# --------------------------------------------------------------------------- #
+#               شِمای فرم آگهی + اعتبارسنجی از پیش کامپایل‌شده                #
+# --------------------------------------------------------------------------- #
+# همهٔ قواعد فرم از همین‌جا خوانده می‌شوند؛ الگوها یک بار در زمان import
+# کامپایل می‌شوند و جدول‌های نرمال‌سازی از app.normalize می‌آیند.
+
+_NUMERIC = table()                          # ارقام → لاتین + حذف نویسه‌های مخفی
+_PRICE = table(decimal=True)                # مثل بالا + جداکنندهٔ اعشار → «.»
+_WORDS = table(digits=False, letters=True)  # حذف نویسه‌های مخفی + حروف عربی → فارسی
+_NAME = table(letters=True)                 # نام خودرو: هر دو
+
+
+@dataclass(frozen=True, slots=True)
+class Field:
+    """
+    یک فیلد فرم.
+    pattern  ← الگوی fullmatch (None یعنی بدون اعتبارسنجی)
+    required ← اگر False باشد مقدار خالی معتبر است
+    table    ← جدول str.translate برای نرمال‌سازی پیش از بررسی (normalize_payload)
+    keys     ← نام‌های ورودی در payload (اولین مقدار غیرخالی برداشته می‌شود)
+    """
+    name: str
+    pattern: str | None = None
+    error: str = ""
+    required: bool = True
+    table: dict | None = None
+    keys: tuple[str, ...] = ()
+    rx: re.Pattern | None = dc_field(init=False, default=None, compare=False)
+
+    def __post_init__(self) -> None:
+        object.__setattr__(self, "rx", re.compile(self.pattern) if self.pattern else None)
+        if not self.keys:
+            object.__setattr__(self, "keys", (self.name,))
+
+    def check(self, value: str) -> str | None:
+        if self.rx is None or (not value and not self.required):
+            return None
+        return None if self.rx.fullmatch(value) else self.error
+
+
+AD_FORM: tuple[Field, ...] = (
+    Field("category", table=_WORDS),
+    Field(
+        "car",
+        r"[آ-یA-Za-z0-9\u06F0-\u06F9\u0660-\u0669\s]{2,40}",
+        "نام خودرو نامعتبر است.",
+        table=_NAME,
+    ),
+    Field(
+        "year",
+        r"(1[34]\d{2}|20[012]\d)",
+        "سال ساخت باید ۴ رقم باشد (مثلاً 1403 یا 2024).",
+        table=_NUMERIC,
+    ),
+    Field("color", r"[آ-ی\s]{1,12}", "رنگ باید حروف فارسی باشد.", table=_WORDS),
+    Field("km", r"\d{1,6}", "کارکرد نامعتبر است.", table=_NUMERIC),
+    Field("insurance", r"\d{1,2}", "مهلت بیمه نامعتبر است.", required=False, table=_NUMERIC),
+    Field("gear", table=_WORDS),
+    Field("desc"),
+    Field("phone", r"09\d{9}", "شماره تماس باید ۱۱ رقم باشد.", table=_NUMERIC),
+    Field(
+        "price",
+        _PRICE_RX.pattern,
+        "فرمت قیمت صحیح نیست.",
+        table=_PRICE,
+        keys=("million_price", "price"),
+    ),
+)
+
+
+def _normalize_plan(schema: tuple[Field, ...]) -> tuple[dict, dict]:
+    """(spec, aliases) برای normalize_payload"""
+    spec = {f.name: f.table for f in schema}
+    aliases = {f.name: f.keys for f in schema if f.keys != (f.name,)}
+    return spec, aliases
+
+
+_AD_FORM_PLAN = _normalize_plan(AD_FORM)
+
+
+@dataclass(slots=True)
+class FormResult:
+    ok: bool
+    errors: dict[str, str]
+    form: dict | None
+
+    @property
+    def first_error(self) -> str | None:
+        return next(iter(self.errors.values()), None)
+
+
+def validate_form(payload: dict, schema: tuple[Field, ...] = AD_FORM) -> FormResult:
+    """
+    یک گذر نرمال‌سازی + اعتبارسنجی روی همهٔ فیلدها.
+    خطاها به ترتیب فیلدهای شِما و به‌صورت {نام فیلد: پیام} برمی‌گردند.
+    """
+    if not isinstance(payload, dict):
+        payload = {}
+
+    # همهٔ فیلدها یک‌جا با normalize_payload نرمال می‌شوند، سپس هر الگو بررسی می‌شود
+    spec, aliases = _AD_FORM_PLAN if schema is AD_FORM else _normalize_plan(schema)
+    values = normalize_payload(payload, spec, aliases)
+    errors: dict[str, str] = {}
+    for f in schema:
+        err = f.check(values[f.name])
+        if err:
+            errors[f.name] = err
+
+    if errors:
+        return FormResult(False, errors, None)
+
+    toman = million_to_toman(values.pop("price"))
+    form = {
+        **values,
+        "username": "",
+        "photos": [],
+        "price_num": toman,
+        "price_words": price_words(toman),
+    }
+    return FormResult(True, {}, form)
@@ -4,12 +4,12 @@ from aiogram.filters import CommandStart
 from ..config import SETTINGS
 from ..keyboards import start_keyboard
 from ..storage import (
-    get_required_channel_ids,
-    list_required_channels,
+    aget_required_channel_ids,
+    alist_required_channels,
     is_channel_allowed,
-    is_admin,
-    add_required_channel,
+    aadd_required_channel,
 )
+from ..middlewares.identity import Identity, remember_membership, resolve_identity
 from .common import to_jalali
 
 router = Router()
@@ -17,16 +17,21 @@ router = Router()
 # --------------------------------------------------------------------------- #
 #                     بررسی دقیقِ عضویت در همهٔ کانال‌ها                      #
 # --------------------------------------------------------------------------- #
-async def _user_is_member(bot: Bot, user_id: int) -> bool:
+async def _user_is_member(
+    bot: Bot, user_id: int, identity: Identity | None = None
+) -> bool:
     """
     True  ← اگر کاربر (یا ادمین) در *همه* کانال‌های اجباری عضو باشد
     False ← در غیر این صورت
     در صورت هرگونه خطا در واکشی وضعیت عضویت، نتیجه را False در نظر می‌گیریم.
+    اگر identity (از IdentityMiddleware) داده شود، نقش و نتیجهٔ کش‌شده دوباره خوانده نمی‌شوند.
     """
-    if is_admin(user_id):
+    if identity is None:
+        identity = await resolve_identity(user_id)
+    if identity.is_member:
         return True
 
-    channel_ids = get_required_channel_ids()
+    channel_ids = await aget_required_channel_ids()
     if not channel_ids and SETTINGS.TARGET_GROUP_ID:
         channel_ids = [SETTINGS.TARGET_GROUP_ID]
 
@@ -42,6 +47,7 @@ async def _user_is_member(bot: Bot, user_id: int) -> bool:
         except Exception:
             return False                # نتوانستیم وضعیت را بگیریم → احتیاطاً False
 
+    await remember_membership(user_id, True)
     return True                          # در همه کانال‌ها عضو است
 
 # --------------------------------------------------------------------------- #
@@ -50,7 +56,7 @@ async def _user_is_member(bot: Bot, user_id: int) -> bool:
 async def build_join_kb(bot: Bot) -> types.InlineKeyboardMarkup:
     rows: list[list[types.InlineKeyboardButton]] = []
 
-    for ch in list_required_channels():
+    for ch in await alist_required_channels():
         cid       = int(ch.get("id", 0))
         username  = (ch.get("username") or "").lstrip("@")
         title     = ch.get("title") or username
@@ -68,7 +74,7 @@ async def build_join_kb(bot: Bot) -> types.InlineKeyboardMarkup:
                     username = fetched_username
 
                 if fetched_title or fetched_username:
-                    add_required_channel(
+                    await aadd_required_channel(
                         cid,
                         title=fetched_title or title,
                         username=fetched_username or username,
@@ -106,15 +112,15 @@ async def build_join_kb(bot: Bot) -> types.InlineKeyboardMarkup:
 #           بقیهٔ کد (cb_check_membership و …) بدون تغییر باقی می‌ماند        #
 # --------------------------------------------------------------------------- #
 @router.callback_query(F.data == "check_membership")
-async def cb_check_membership(call: types.CallbackQuery):
+async def cb_check_membership(call: types.CallbackQuery, identity: Identity):
     uid = call.from_user.id
-    if is_admin(uid):
-        kb = start_keyboard(SETTINGS.WEBAPP_URL, True)
+    if identity.is_admin:
+        kb = start_keyboard(True)
         await call.message.answer("شما ادمین هستید و نیازی به چک عضویت ندارید.", reply_markup=kb)
         await call.answer()
         return
 
-    ok = await _user_is_member(call.bot, uid)
+    ok = await _user_is_member(call.bot, uid, identity)
     if not ok:
         await call.answer("هنوز در همهٔ کانال‌ها عضو نیستید.", show_alert=True)
         await call.message.answer(
@@ -123,7 +129,7 @@ async def cb_check_membership(call: types.CallbackQuery):
         )
         return
 
-    kb = start_keyboard(SETTINGS.WEBAPP_URL, False)
+    kb = start_keyboard(False)
     await call.message.answer("✅ عضویت شما تایید شد. حالا می‌توانید فرم آگهی را پر کنید.", reply_markup=kb)
     await call.answer()
 
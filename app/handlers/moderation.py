@@ -0,0 +1,299 @@
+from __future__ import annotations
+import asyncio
+from typing import Any, Awaitable, Callable, Literal
+
+from aiogram import Bot
+from aiogram.exceptions import TelegramRetryAfter
+from aiogram.methods import (
+    DeleteMessage,
+    EditMessageCaption,
+    EditMessageText,
+    SendMessage,
+    TelegramMethod,
+)
+
+from ..api_trace import API_ATTEMPT
+from ..car_index import arecord_published_car
+from ..metrics import OUTBOUND_QUEUE
+from .captions import build_caption
+from .state import claim_pending, load_pending, restore_pending
+
+# --------------------------------------------------------------------------- #
+#          اعمال/رد یک آگهی (مشترک بین دکمه‌های ادمین و API داشبورد)          #
+# --------------------------------------------------------------------------- #
+# done    ← انجام شد
+# missing ← آگهی در صف نبود (ادمین دیگری زودتر اقدام کرده)
+# failed  ← ارسال/ادیت پست شکست خورد و آگهی به صف برگشت
+
+Outcome = Literal["done", "missing", "failed"]
+
+# اجرای یک متد Bot API؛ برای یک آگهی خود bot، برای عملیات دسته‌ای RateLimiter
+Send = Callable[[TelegramMethod], Awaitable[Any]]
+
+PUBLISHED_TEXT = "✅ تغییرات روی پست اعمال شد"
+REJECTED_TEXT = "❌ این آگهی توسط ادمین رد شد."
+
+
+def _post_edit(info: dict) -> tuple[TelegramMethod, str]:
+    """متد ویرایش پست اصلی با کپشن نهایی (و خود کپشن برای فالبک)"""
+    form = info["form"]
+    grp  = info["grp"]
+    needs = info["needs"]
+
+    show_price = not needs.get("price") or bool(form.get("price_words"))
+    show_desc  = not needs.get("desc")  or bool(form.get("desc"))
+
+    caption = build_caption(
+        form,
+        grp["number"],
+        grp["jdate"],
+        show_price=show_price,
+        show_desc=show_desc
+    )
+    if grp["has_photos"]:
+        method = EditMessageCaption(
+            chat_id=grp["chat_id"],
+            message_id=grp["msg_id"],
+            caption=caption,
+            parse_mode="HTML",
+        )
+    else:
+        method = EditMessageText(
+            chat_id=grp["chat_id"],
+            message_id=grp["msg_id"],
+            text=caption,
+            parse_mode="HTML",
+        )
+    return method, caption
+
+
+def _panel_edits(info: dict, text: str) -> list[EditMessageText]:
+    """
+    بستن پیام‌های پنل بررسی نزد همهٔ ادمین‌ها.
+    ویرایش متن بدون reply_markup دکمه‌ها را هم برمی‌دارد (یک درخواست به‌جای دو).
+    """
+    return [
+        EditMessageText(chat_id=admin_chat_id, message_id=admin_msg_id, text=text)
+        for admin_chat_id, admin_msg_id in info.get("admin_msgs", [])
+    ]
+
+
+async def _publish_claimed(send: Send, token: str, info: dict) -> Outcome:
+    """
+    آگهی فقط وقتی به صف برمی‌گردد که هیچ‌چیز منتشر نشده باشد (ساخت کپشن،
+    ویرایش پست و فالبک همه شکست خورده‌اند)؛ پس از انتشار هیچ خطایی آن را
+    دوباره به صف نمی‌برد.
+    """
+    try:
+        method, caption = _post_edit(info)
+    except Exception:
+        await restore_pending(token, info)
+        return "failed"
+    try:
+        await send(method)
+    except Exception:
+        try:
+            # ✅ فالبک باید به همان مقصد واقعی برود (نه SETTINGS ثابت)
+            await send(SendMessage(chat_id=info["grp"]["chat_id"], text=caption, parse_mode="HTML"))
+        except Exception:
+            await restore_pending(token, info)
+            return "failed"
+    # فقط نام خودروی آگهیِ تاییدشده پیشنهاد تکمیل خودکار می‌شود (نه ردشده‌ها)؛
+    # شکست آن نتیجهٔ انتشار را عوض نمی‌کند
+    try:
+        await arecord_published_car(info["form"]["car"])
+    except Exception:
+        pass
+    return "done"
+
+
+async def _reject_claimed(send: Send, info: dict) -> Outcome:
+    grp = info.get("grp", {})
+    chat_id = grp.get("chat_id")
+    msg_id = grp.get("msg_id")
+
+    # حذف پست اصلی
+    if chat_id and msg_id:
+        try:
+            await send(DeleteMessage(chat_id=chat_id, message_id=msg_id))
+        except Exception:
+            pass
+    return "done"
+
+
+async def _claim_for(action: str, token: str) -> dict | None:
+    if action == "publish":
+        # آگهیِ هنوز نهایی‌نشده (بدون grp) اصلاً برداشته نمی‌شود؛ برداشتن و
+        # بازگرداندن پنجره‌ای می‌ساخت که آگهی در آن از صف غایب بود و نوشتن
+        # grp در cb_finish شکست می‌خورد. grp پس از ثبت هیچ‌وقت حذف نمی‌شود.
+        info, _ = await load_pending(token)
+        if info is None or "grp" not in info:
+            return None
+    # برداشت اتمی: اگر ادمین دیگری (یا نسخهٔ دیگری از ربات) زودتر اقدام کرده باشد None
+    info = await claim_pending(token)
+    if info and action == "publish" and "grp" not in info:
+        # هنوز توسط کاربر نهایی نشده؛ دست نمی‌زنیم
+        await restore_pending(token, info)
+        return None
+    return info
+
+
+async def _close_quietly(send: Send, methods: list[EditMessageText]) -> None:
+    for m in methods:
+        try:
+            await send(m)
+        except Exception:
+            pass
+
+
+async def publish_ad(bot: Bot, token: str) -> Outcome:
+    info = await _claim_for("publish", token)
+    if not info:
+        return "missing"
+    outcome = await _publish_claimed(bot, token, info)
+    if outcome == "done":
+        await _close_quietly(bot, _panel_edits(info, PUBLISHED_TEXT))
+    return outcome
+
+
+async def reject_ad(bot: Bot, token: str) -> Outcome:
+    info = await _claim_for("reject", token)
+    if not info:
+        return "missing"
+    await _reject_claimed(bot, info)
+    # قفل کردن پیام‌های ادمین
+    await _close_quietly(bot, _panel_edits(info, REJECTED_TEXT))
+    return "done"
+
+
+# --------------------------------------------------------------------------- #
+#                      بررسی دسته‌ای با درخواست‌های هم‌زمان                    #
+# --------------------------------------------------------------------------- #
+# تلگرام حدود ۳۰ درخواست در ثانیه برای کل ربات و حدود یک پیام در ثانیه در هر
+# چت را تحمل می‌کند؛ بیش از آن 429 (RetryAfter) می‌دهد. RateLimiter هر دو سقف
+# را با رزرو «نوبت زمانی» رعایت می‌کند (بین خواندن و نوشتن نوبت await نیست،
+# پس نوبت‌ها بدون قفل یکتا هستند) و پس از RetryAfter همان درخواست را تکرار
+# می‌کند. تعداد درخواست‌های در جریان هم با یک Semaphore محدود است؛ نوبت
+# «پس از» گرفتن Semaphore رزرو می‌شود، وگرنه نوبت درخواست‌هایی که پشت
+# Semaphore منتظر مانده‌اند منقضی می‌شد و همه با هم فرستاده می‌شدند.
+
+BULK_RATE = 25            # درخواست در ثانیه برای کل ربات
+BULK_CHAT_INTERVAL = 1.0  # فاصلهٔ حداقل دو درخواست در یک چت (ثانیه)
+BULK_CONCURRENCY = 8
+BULK_RETRIES = 3
+
+
+class RateLimiter:
+    def __init__(
+        self,
+        bot: Bot,
+        *,
+        rate: float = BULK_RATE,
+        chat_interval: float = BULK_CHAT_INTERVAL,
+        concurrency: int = BULK_CONCURRENCY,
+    ) -> None:
+        self.bot = bot
+        self._interval = 1.0 / rate
+        self._chat_interval = chat_interval
+        self._sem = asyncio.Semaphore(concurrency)
+        self._next = 0.0
+        self._chat_next: dict[int | str, float] = {}
+
+    async def _slot(self, chat_id: int | str | None) -> None:
+        loop = asyncio.get_running_loop()
+        now = loop.time()
+        at = now
+        if chat_id is not None:
+            at = max(at, self._chat_next.get(chat_id, 0.0))
+            self._chat_next[chat_id] = at + self._chat_interval
+        at = max(at, self._next)
+        self._next = at + self._interval
+        if at > now:
+            await asyncio.sleep(at - now)
+
+    async def __call__(self, method: TelegramMethod) -> Any:
+        chat_id = getattr(method, "chat_id", None)
+        for attempt in range(BULK_RETRIES + 1):
+            OUTBOUND_QUEUE.inc()
+            try:
+                await self._sem.acquire()
+                try:
+                    await self._slot(chat_id)
+                except BaseException:
+                    self._sem.release()
+                    raise
+            finally:
+                OUTBOUND_QUEUE.dec()
+            ctx = API_ATTEMPT.set(attempt)
+            try:
+                return await self.bot(method)
+            except TelegramRetryAfter as e:
+                if attempt == BULK_RETRIES:
+                    raise
+                wait = e.retry_after
+            finally:
+                API_ATTEMPT.reset(ctx)
+                self._sem.release()
+            # همهٔ درخواست‌های بعدی این چت هم عقب می‌افتند
+            loop = asyncio.get_running_loop()
+            if chat_id is not None:
+                self._chat_next[chat_id] = max(self._chat_next.get(chat_id, 0.0), loop.time() + wait)
+            await asyncio.sleep(wait)
+
+
+Progress = Callable[[str, Outcome], Awaitable[None]]
+
+
+async def bulk_moderate(
+    bot: Bot,
+    action: Literal["publish", "reject"],
+    tokens: list[str],
+    *,
+    on_progress: Progress | None = None,
+    limiter: RateLimiter | None = None,
+) -> dict[str, Outcome]:
+    """
+    انتشار/رد دسته‌ای آگهی‌ها در سه مرحله:
+      ۱) برداشت هم‌زمان همهٔ آگهی‌ها از صف (تا ادمین دیگری هم‌زمان اقدام نکند)
+      ۲) ویرایش/حذف پست‌ها به‌صورت دسته‌ای و هم‌زمان؛ پس از هر آگهی on_progress
+      ۳) بستن پنل‌های بررسی ادمین‌ها، باز هم یک‌جا و هم‌زمان
+    """
+    send = limiter or RateLimiter(bot)
+    tokens = list(dict.fromkeys(tokens))
+    claimed = await asyncio.gather(*(_claim_for(action, t) for t in tokens))
+
+    async def report(token: str, outcome: Outcome) -> None:
+        # خطای گزارش (مثلاً کلاینت NDJSON قطع شده) نباید آگهی‌های برداشته‌شده
+        # را نیمه‌کاره رها کند؛ کار دسته تا آخر ادامه می‌یابد
+        if on_progress is None:
+            return
+        try:
+            await on_progress(token, outcome)
+        except Exception:
+            pass
+
+    results: dict[str, Outcome] = {}
+    for token, info in zip(tokens, claimed):
+        if info is None:
+            results[token] = "missing"
+            await report(token, "missing")
+
+    async def apply(token: str, info: dict) -> None:
+        # بازگرداندن به صف (فقط وقتی چیزی منتشر نشده) کار خود _publish_claimed است
+        if action == "publish":
+            outcome = await _publish_claimed(send, token, info)
+        else:
+            outcome = await _reject_claimed(send, info)
+        results[token] = outcome
+        await report(token, outcome)
+
+    todo = [(t, info) for t, info in zip(tokens, claimed) if info is not None]
+    await asyncio.gather(*(apply(t, info) for t, info in todo), return_exceptions=True)
+
+    text = PUBLISHED_TEXT if action == "publish" else REJECTED_TEXT
+    await asyncio.gather(*(
+        _close_quietly(send, [m])
+        for t, info in todo if results.get(t) == "done"
+        for m in _panel_edits(info, text)
+    ))
+    return {t: results.get(t, "failed") for t in tokens}
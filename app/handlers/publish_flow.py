@@ -1,14 +1,17 @@
 from __future__ import annotations
 from aiogram import Router, types, F
 
-import re  # ← لازم برای regex جدید
-
 from ..config import SETTINGS
 from ..keyboards import admin_review_kb
-from ..storage import is_admin
-from .state import PENDING, ADMIN_EDIT_WAIT
-from .common import normalize_digits  # ← برای تبدیل ارقام فارسی
-from .user_flow import build_caption, price_words
+from ..middlewares.identity import Identity
+from .state import (
+    ADMIN_EDIT_WAIT,
+    load_pending,
+    update_pending,
+)
+from .text_dispatch import TEXT_DISPATCH
+from .common import parse_price, price_words
+from .moderation import publish_ad, reject_ad
 
 router = Router()
 
@@ -17,13 +20,14 @@ router = Router()
 # --------------------------------------------------------------------------- #
 
 @router.callback_query(F.data.startswith("edit_price:"))
-async def cb_edit_price(call: types.CallbackQuery):
-    if not is_admin(call.from_user.id):
+async def cb_edit_price(call: types.CallbackQuery, identity: Identity):
+    if not identity.is_admin:
         await call.answer("شما ادمین نیستید.", show_alert=True)
         return
 
     token = call.data.split(":", 1)[1]
-    if token not in PENDING:
+    info, _ = await load_pending(token)
+    if info is None:
         await call.answer("درخواست یافت نشد.", show_alert=True)
         return
 
@@ -38,13 +42,14 @@ async def cb_edit_price(call: types.CallbackQuery):
 
 
 @router.callback_query(F.data.startswith("edit_desc:"))
-async def cb_edit_desc(call: types.CallbackQuery):
-    if not is_admin(call.from_user.id):
+async def cb_edit_desc(call: types.CallbackQuery, identity: Identity):
+    if not identity.is_admin:
         await call.answer("شما ادمین نیستید.", show_alert=True)
         return
 
     token = call.data.split(":", 1)[1]
-    if token not in PENDING:
+    info, _ = await load_pending(token)
+    if info is None:
         await call.answer("درخواست یافت نشد.", show_alert=True)
         return
 
@@ -54,57 +59,45 @@ async def cb_edit_desc(call: types.CallbackQuery):
     await call.answer()
 
 
-@router.message(F.text, F.from_user.id.func(lambda uid: uid in ADMIN_EDIT_WAIT))
-async def on_admin_text_edit(message: types.Message):
+@TEXT_DISPATCH.wait(ADMIN_EDIT_WAIT.kind)
+async def on_admin_text_edit(message: types.Message, identity: Identity):
     w = ADMIN_EDIT_WAIT.get(message.from_user.id)
-    if not w or not is_admin(message.from_user.id):
+    if not w or not identity.is_admin:
         return
 
     token, field = w["token"], w["field"]
-    info = PENDING.get(token)
-
-    if not info:
-        ADMIN_EDIT_WAIT.pop(message.from_user.id, None)
-        await message.reply("درخواست یافت نشد.")
-        return
-
-    form = info["form"]
 
     # ------------------- ویرایش قیمت -------------------
     if field == "price":
 
-        # 1) تبدیل ارقام فارسی → لاتین
-        raw = normalize_digits(message.text or "").replace(",", ".").strip()
-
-        # 2) همان regex فرم اولیه
-        if not re.fullmatch(r"\d+(\.\d{1,3})?", raw):
+        # همان قاعدهٔ فیلد قیمت در فرم اولیه (ارقام فارسی، اعشار تا ۳ رقم)
+        n_toman = parse_price(message.text)
+        if n_toman is None:
             await message.reply("❌ قیمت نامعتبر است.\nمثال: 80 یا 120.5 یا 2500")
             return
 
-        # 3) تبدیل به float
-        try:
-            million = float(raw)
-        except:
-            await message.reply("❌ فرمت عددی صحیح نیست.")
-            return
-
-        # 4) تبدیل به تومان
-        n_toman = int(round(million * 1_000_000))
-
-        # 5) ساخت price_words مثل فرم
-        form["price_num"] = n_toman
-        form["price_words"] = price_words(n_toman)
-
-        await message.reply(f"💰 قیمت جدید ثبت شد: «{form['price_words']}»")
+        # ساخت price_words مثل فرم
+        changes = {"price_num": n_toman, "price_words": price_words(n_toman)}
+        done = f"💰 قیمت جدید ثبت شد: «{changes['price_words']}»"
 
     # ------------------- ویرایش توضیحات -------------------
-    elif field == "desc":
-        form["desc"] = message.text.strip()
-        await message.reply("📝 توضیحات به‌روزرسانی شد.")
+    else:
+        changes = {"desc": message.text.strip()}
+        done = "📝 توضیحات به‌روزرسانی شد."
 
     # پاک‌کردن وضعیت انتظار
     ADMIN_EDIT_WAIT.pop(message.from_user.id, None)
 
+    # در تعارض نسخه (مثلاً عکس هم‌زمان کاربر) دوباره خوانده و اعمال می‌شود؛
+    # None یعنی ادمین دیگری هم‌زمان منتشر/رد کرد و ویرایش به صف برنمی‌گردد
+    info = await update_pending(token, lambda i: i["form"].update(changes))
+    if info is None:
+        await message.reply("درخواست یافت نشد یا پیش‌تر بررسی شده است.")
+        return
+
+    form = info["form"]
+    await message.reply(done)
+
     # نمایش پنل دوباره
     await message.answer(
         "ویرایش/اعمال:\n"
@@ -126,72 +119,20 @@ async def show_hidden(message: types.Message):
 
 
 @router.callback_query(F.data.startswith("publish:"))
-async def cb_publish(call: types.CallbackQuery):
-    if not is_admin(call.from_user.id):
+async def cb_publish(call: types.CallbackQuery, identity: Identity):
+    if not identity.is_admin:
         await call.answer("شما ادمین نیستید.", show_alert=True)
         return
 
     token = call.data.split(":", 1)[1]
-    info = PENDING.get(token)
+    outcome = await publish_ad(call.bot, token)
 
-    if not info:
+    if outcome == "missing":
         await call.answer("درخواست یافت نشد.", show_alert=True)
         return
-
-    form = info["form"]
-    grp  = info["grp"]
-    needs = info["needs"]
-
-    show_price = not needs.get("price") or bool(form.get("price_words"))
-    show_desc  = not needs.get("desc")  or bool(form.get("desc"))
-
-    caption = build_caption(
-        form,
-        grp["number"],
-        grp["jdate"],
-        show_price=show_price,
-        show_desc=show_desc
-    )
-
-    # اعمال و ویرایش پست اصلی
-    try:
-        if grp["has_photos"]:
-            await call.bot.edit_message_caption(
-                chat_id=grp["chat_id"],
-                message_id=grp["msg_id"],
-                caption=caption,
-                parse_mode="HTML",
-            )
-        else:
-            await call.bot.edit_message_text(
-                chat_id=grp["chat_id"],
-                message_id=grp["msg_id"],
-                text=caption,
-                parse_mode="HTML",
-            )
-    except Exception:
-        try:
-            # ✅ فالبک باید به همان مقصد واقعی برود (نه SETTINGS ثابت)
-            await call.bot.send_message(grp["chat_id"], caption, parse_mode="HTML")
-        except Exception:
-            await call.answer("خطا در ارسال/ادیت پست.", show_alert=True)
-            return
-
-    # بستن صفحهٔ ادمین‌ها
-    for admin_chat_id, admin_msg_id in info["admin_msgs"]:
-        try:
-            await call.bot.edit_message_reply_markup(
-                chat_id=admin_chat_id,
-                message_id=admin_msg_id,
-                reply_markup=None
-            )
-            await call.bot.edit_message_text(
-                chat_id=admin_chat_id,
-                message_id=admin_msg_id,
-                text="✅ تغییرات روی پست اعمال شد"
-            )
-        except Exception:
-            pass
+    if outcome == "failed":
+        await call.answer("خطا در ارسال/ادیت پست.", show_alert=True)
+        return
 
     await call.answer("اعمال شد.")
 
@@ -201,57 +142,22 @@ async def cb_publish(call: types.CallbackQuery):
     except Exception:
         pass
 
-    # حذف از حالت pending
-    PENDING.pop(token, None)
-
 
 # --------------------------------------------------------------------------- #
 #                              رد کردن / حذف پست                              #
 # --------------------------------------------------------------------------- #
 
 @router.callback_query(F.data.startswith("reject:"))
-async def cb_reject(call: types.CallbackQuery):
-    if not is_admin(call.from_user.id):
+async def cb_reject(call: types.CallbackQuery, identity: Identity):
+    if not identity.is_admin:
         await call.answer("شما ادمین نیستید.", show_alert=True)
         return
 
     token = call.data.split(":", 1)[1]
-    info = PENDING.get(token)
-
-    if not info:
+    if await reject_ad(call.bot, token) == "missing":
         await call.answer("درخواست یافت نشد.", show_alert=True)
         return
 
-    grp = info.get("grp", {})
-    chat_id = grp.get("chat_id")
-    msg_id = grp.get("msg_id")
-
-    # حذف پست اصلی
-    if chat_id and msg_id:
-        try:
-            await call.bot.delete_message(chat_id=chat_id, message_id=msg_id)
-        except:
-            pass
-
-    # قفل کردن پیام‌های ادمین
-    for admin_chat_id, admin_msg_id in info.get("admin_msgs", []):
-        try:
-            await call.bot.edit_message_reply_markup(
-                chat_id=admin_chat_id,
-                message_id=admin_msg_id,
-                reply_markup=None
-            )
-            await call.bot.edit_message_text(
-                chat_id=admin_chat_id,
-                message_id=admin_msg_id,
-                text="❌ این آگهی توسط ادمین رد شد."
-            )
-        except:
-            pass
-
-    # حذف از حافظه
-    PENDING.pop(token, None)
-
     await call.answer("آگهی حذف شد.", show_alert=True)
 
     try:
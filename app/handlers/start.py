@@ -1,24 +1,24 @@
 from aiogram import Router, types
 from aiogram.filters import CommandStart
 
-from ..config import SETTINGS
+from ..web import webapp_url
 from ..keyboards import start_keyboard
 from .membership import _user_is_member, build_join_kb
-from ..storage import is_admin
+from ..middlewares.identity import Identity
 from .state import *
 
 router = Router()
 
 
 @router.message(CommandStart())
-async def on_start(message: types.Message):
-    if not SETTINGS.WEBAPP_URL:
-        await message.answer("WEBAPP_URL در .env تنظیم نشده است.")
+async def on_start(message: types.Message, identity: Identity):
+    if not webapp_url():
+        await message.answer("WEBAPP_URL (یا PUBLIC_BASE_URL) در .env تنظیم نشده است.")
         return
 
     # حالت ۱: اگر کاربر ادمین باشد
-    if is_admin(message.from_user.id):
-        kb = start_keyboard(SETTINGS.WEBAPP_URL, True)
+    if identity.is_admin:
+        kb = start_keyboard(True)
         await message.answer(
             "به ربات بانک خودرو خوش آمدید 🌹\n\nبرای ثبت آگهی یا ورود به پنل، از دکمه‌های زیر استفاده کنید:",
             reply_markup=kb
@@ -26,7 +26,7 @@ async def on_start(message: types.Message):
         return
 
     # ----------- بررسی عضویت در کانال‌های اجباری ------------- #
-    if not await _user_is_member(message.bot, message.from_user.id):
+    if not await _user_is_member(message.bot, message.from_user.id, identity):
         await message.answer(
             "⛔ برای استفاده از ربات، ابتدا در همهٔ کانال‌های زیر عضو شوید و سپس روی «🔁 بررسی عضویت» بزنید:",
             reply_markup=await build_join_kb(message.bot),
@@ -34,7 +34,7 @@ async def on_start(message: types.Message):
         return
 
     # حالت ۲: اگر کاربر عادی باشد و عضویتش تایید شده باشد
-    kb = start_keyboard(SETTINGS.WEBAPP_URL, False)
+    kb = start_keyboard(False)
     await message.answer(
         "به ربات بانک خودرو خوش آمدید 🌹\n\nبرای ثبت آگهی، دکمه زیر را بزنید:", 
         reply_markup=kb
@@ -4,26 +4,229 @@ from __future__ import annotations
 وضعیت‌های سراسریِ حینِ اجرا (در یک فایل مجزا)
 """
 
+from collections.abc import Callable, MutableMapping
+from datetime import date
+from typing import Iterator
+
+from ..state_backend import get_backend
+from ..storage import acurrent_daily_number, anext_daily_number
+
 # تعداد مجاز عکس‌های هر آگهی
 MAX_PHOTOS = 3
 
+# مهلت انتظار (ثانیه) برای رسیدن بقیهٔ عکس‌های یک آلبوم
+MEDIA_GROUP_DELAY = 0.8
+
 # نگهداری آگهی‌های در انتظار بررسی
 PENDING: dict[str, dict] = {}
 
 # وضعیت کاربر هنگام ارسال عکس‌ها
 PHOTO_WAIT: dict[int, dict] = {}
 
+# عکس‌های آلبومِ در حال تجمیع (کلید: media_group_id)
+MEDIA_GROUP_BUF: dict[str, dict] = {}
+
+# رکورد واحدِ «منتظر ورودی متنی» برای هر کاربر: {"kind": …, سایر فیلدها}
+# هر کاربر در هر لحظه حداکثر در یک وضعیت انتظار است.
+INPUT_WAIT: dict[int, dict] = {}
+
+
+class _InputWaitView(MutableMapping):
+    """
+    نمای یک نوع انتظار روی INPUT_WAIT؛ رفتار یک dict معمولی را دارد
+    تا کدهای قبلی (uid in DEST_WAIT، DEST_WAIT[uid] = …، pop) دست نخورند.
+    """
+
+    def __init__(self, kind: str) -> None:
+        self.kind = kind
+
+    def __getitem__(self, uid: int) -> dict:
+        st = INPUT_WAIT[uid]
+        if st.get("kind") != self.kind:
+            raise KeyError(uid)
+        return st
+
+    def __setitem__(self, uid: int, value: dict) -> None:
+        INPUT_WAIT[uid] = dict(value, kind=self.kind)
+
+    def __delitem__(self, uid: int) -> None:
+        self[uid]
+        del INPUT_WAIT[uid]
+
+    def __iter__(self) -> Iterator[int]:
+        return (uid for uid, st in list(INPUT_WAIT.items()) if st.get("kind") == self.kind)
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+
 # وضعیت ویرایش قیمت/توضیح توسط ادمین
-ADMIN_EDIT_WAIT: dict[int, dict] = {}
+ADMIN_EDIT_WAIT = _InputWaitView("admin_edit")
 
 # وضعیت افزودن/حذف ادمین (منتظر ورودی)
-ADMIN_WAIT_INPUT: dict[int, dict] = {}
+ADMIN_WAIT_INPUT = _InputWaitView("admin_input")
 
 # وضعیت افزودن/حذف «کانال‌های مجاز ارسال» (📡 مدیریت کانال‌های مجاز)
-ACCESS_CH_WAIT: dict[int, dict] = {}
+ACCESS_CH_WAIT = _InputWaitView("access_ch")
 
 # وضعیت افزودن/حذف «کانال‌های من» (کانال‌های عضویت اجباری)
-MEMBERS_CH_WAIT: dict[int, dict] = {}
+MEMBERS_CH_WAIT = _InputWaitView("members_ch")
 
 # وضعیت افزودن/حذف/انتخاب «مقصدها»
-DEST_WAIT: dict[int, dict] = {}
+DEST_WAIT = _InputWaitView("dest")
+
+# همهٔ وضعیت‌های انتظارِ کاربر؛ برای همگام‌سازی با انبارهٔ مشترک
+WAIT_STATES: dict[str, dict[int, dict]] = {
+    "photo": PHOTO_WAIT,
+    "input": INPUT_WAIT,
+}
+
+
+async def save_photo_wait(uid: int) -> None:
+    """
+    نوشتن وضعیت «انتظار عکس» کاربر در انبارهٔ مشترک، بیرون از چرخهٔ آپدیت
+    (مثلاً از API وب). درون هندلرها SharedStateMiddleware این کار را می‌کند.
+    """
+    backend = get_backend()
+    if not backend.shared:
+        return
+    cur = await backend.get("wait", uid)
+    rec = dict(cur.value) if cur else {}
+    if uid in PHOTO_WAIT:
+        rec["photo"] = PHOTO_WAIT[uid]
+    else:
+        rec.pop("photo", None)
+    # با شرط نسخه، تا رکوردی که هم‌زمان نسخهٔ دیگری نوشته بازنویسی نشود
+    version = cur.version if cur else 0
+    if rec:
+        await backend.put("wait", uid, rec, expected=version)
+    elif cur:
+        await backend.delete("wait", uid, expected=version)
+
+
+# --------------------------------------------------------------------------- #
+#       آگهی‌های در انتظار در انبارهٔ وضعیت (مشترک بین نسخه‌های ربات)         #
+# --------------------------------------------------------------------------- #
+# در حالت تک‌نسخه PENDING خودِ منبع داده است؛ در حالت مشترک فقط کپی محلی است
+# و هر خواندن از انباره تازه می‌شود.
+
+async def load_pending(token: str) -> tuple[dict | None, int]:
+    """
+    آگهی و نسخهٔ آن در انباره؛ نسخه باید به save_pending برگردانده شود.
+    در حالت تک‌نسخه نسخه همیشه 0 است.
+    """
+    backend = get_backend()
+    if not backend.shared:
+        return PENDING.get(token), 0
+
+    cur = await backend.get("pending", token)
+    if cur is None:
+        PENDING.pop(token, None)
+        return None, 0
+    PENDING[token] = cur.value
+    return cur.value, cur.version
+
+
+async def list_pending() -> dict[str, dict]:
+    """همهٔ آگهی‌های در انتظار (در حالت مشترک، تازه از انباره)"""
+    backend = get_backend()
+    if not backend.shared:
+        return dict(PENDING)
+
+    out: dict[str, dict] = {}
+    for token in await backend.keys("pending"):
+        cur = await backend.get("pending", token)
+        if cur is not None:
+            out[token] = PENDING[token] = cur.value
+    return out
+
+
+async def save_pending(token: str, info: dict, version: int) -> int | None:
+    """
+    نوشتن تغییرات آگهی فقط اگر از زمان load_pending (نسخهٔ version) دست
+    نخورده باشد؛ version=0 یعنی ساخت آگهی تازه. نسخهٔ جدید برمی‌گردد و None
+    یعنی آگهی در این فاصله برداشته (یا تغییر داده) شده است: همان «قبلاً
+    بررسی شد» — نوشتن دوباره، آگهیِ منتشرشده را به صف برمی‌گرداند.
+    برای «خواندن دوباره و اعمال دوباره» در تعارض: update_pending.
+    """
+    backend = get_backend()
+    if not backend.shared:
+        return version if PENDING.get(token) is info else None
+
+    new_version = await backend.put("pending", token, info, expected=version)
+    if new_version is None:
+        PENDING.pop(token, None)
+        return None
+    PENDING[token] = info
+    return new_version
+
+
+# تعداد تلاش update_pending وقتی نسخهٔ آگهی هم‌زمان عوض شده است
+PENDING_RETRIES = 5
+
+
+class PendingConflict(Exception):
+    """update_pending پس از PENDING_RETRIES تلاش هنوز به تعارض نسخه خورد"""
+
+
+async def update_pending(
+    token: str,
+    change: Callable[[dict], bool | None],
+    info: dict | None = None,
+    version: int = 0,
+) -> dict | None:
+    """
+    اعمال change روی آگهی و نوشتن آن با شرط نسخه؛ در تعارض (مثلاً دو عکس
+    هم‌زمان) آگهی دوباره خوانده و change دوباره روی نسخهٔ تازه اعمال می‌شود،
+    پس change باید فقط به خود info تکیه کند. info/version: نتیجهٔ
+    load_pending اگر فراخواننده آن را از قبل دارد.
+
+    خروجی: info (نوشته‌شده؛ یا بدون نوشتن اگر change مقدار False برگرداند)،
+    None اگر آگهی دیگر در صف نیست (بررسی یا حذف شده).
+    """
+    for _ in range(PENDING_RETRIES):
+        if info is None:
+            info, version = await load_pending(token)
+            if info is None:
+                return None
+        if change(info) is False:
+            return info
+        if await save_pending(token, info, version) is not None:
+            return info
+        info = None
+    raise PendingConflict(token)
+
+
+async def claim_pending(token: str) -> dict | None:
+    """
+    برداشتن اتمی آگهی از صف بررسی، پیش از انتشار/رد.
+    فقط یک نسخه از ربات برنده می‌شود؛ بقیه None می‌گیرند.
+    """
+    backend = get_backend()
+    if not backend.shared:
+        return PENDING.pop(token, None)
+
+    cur = await backend.get("pending", token)
+    if cur is None or not await backend.delete("pending", token, expected=cur.version):
+        PENDING.pop(token, None)
+        return None
+    PENDING.pop(token, None)
+    return cur.value
+
+
+async def restore_pending(token: str, info: dict) -> None:
+    """بازگرداندن آگهیِ برداشته‌شده وقتی انتشار/رد شکست خورد."""
+    PENDING[token] = info
+    backend = get_backend()
+    if backend.shared:
+        await backend.put("pending", token, info, expected=0)
+
+
+async def next_ad_number() -> tuple[int, str]:
+    """شمارهٔ بعدی آگهی؛ در حالت مشترک از شمارندهٔ انباره."""
+    backend = get_backend()
+    if not backend.shared:
+        return await anext_daily_number()
+
+    num = await backend.incr("counter", "ad_number", initial=await acurrent_daily_number())
+    return num, date.today().isoformat()
@@ -0,0 +1,81 @@
+from __future__ import annotations
+import re
+from typing import Any, Awaitable, Callable
+
+from aiogram import Router, F, types
+
+from ..middlewares.identity import Identity
+from .state import INPUT_WAIT
+
+TextHandler = Callable[[types.Message, Identity], Awaitable[Any]]
+
+# --------------------------------------------------------------------------- #
+#         پیش‌مسیریابی پیام‌های متنی: دکمه‌های کیبورد + ورودی‌های انتظار       #
+# --------------------------------------------------------------------------- #
+# به‌جای عبور هر پیام از ده‌ها فیلتر F.text == "…" و F.from_user.id.func(…)،
+# متن دکمه با یک جست‌وجوی دیکشنری و وضعیت انتظار با یک نگاه به INPUT_WAIT
+# پیدا می‌شود. اگر هیچ‌کدام نبود (یا پیام یک دستور بود)، پیام به روترهای
+# بعدی می‌رود.
+
+
+class TextDispatch:
+    def __init__(self) -> None:
+        self.buttons: dict[str, TextHandler] = {}
+        self.waits: dict[str, tuple[TextHandler, re.Pattern | None]] = {}
+
+    def button(self, text: str):
+        """ثبت هندلر برای متن دقیق یک دکمه"""
+        def deco(fn: TextHandler) -> TextHandler:
+            if text in self.buttons:
+                raise RuntimeError(f"دکمهٔ تکراری در جدول مسیریابی: {text}")
+            self.buttons[text] = fn
+            return fn
+        return deco
+
+    def wait(self, kind: str, *, pattern: str | None = None):
+        """
+        ثبت هندلر برای کاربری که در وضعیت انتظار kind است.
+        اگر pattern داده شود، فقط متن‌های منطبق (fullmatch) پذیرفته می‌شوند.
+        """
+        def deco(fn: TextHandler) -> TextHandler:
+            if kind in self.waits:
+                raise RuntimeError(f"وضعیت انتظار تکراری: {kind}")
+            self.waits[kind] = (fn, re.compile(pattern) if pattern else None)
+            return fn
+        return deco
+
+    def resolve(self, message: types.Message) -> TextHandler | None:
+        text = message.text
+        handler = self.buttons.get(text)
+        if handler is not None:
+            return handler
+
+        # دستورها (/start، …) هرگز ورودی انتظار نیستند و به روترهای بعدی می‌روند
+        if text.startswith("/"):
+            return None
+        st = INPUT_WAIT.get(message.from_user.id)
+        if st is None:
+            return None
+        route = self.waits.get(st.get("kind"))
+        if route is None:
+            return None
+        handler, pattern = route
+        if pattern is not None and not pattern.fullmatch(text):
+            return None
+        return handler
+
+    async def filter(self, message: types.Message) -> bool | dict[str, Any]:
+        handler = self.resolve(message)
+        return {"text_route": handler} if handler is not None else False
+
+
+TEXT_DISPATCH = TextDispatch()
+
+router = Router(name="text_dispatch")
+
+
+@router.message(F.text, TEXT_DISPATCH.filter)
+async def dispatch_text(
+    message: types.Message, text_route: TextHandler, identity: Identity
+):
+    await text_route(message, identity)
@@ -1,174 +1,44 @@
 from __future__ import annotations
+import asyncio
 import json
-import re
+import time
 from uuid import uuid4
 
 from aiogram import Router, F, html, types, Bot
+from aiogram.exceptions import TelegramAPIError
 from aiogram.utils.media_group import MediaGroupBuilder
 
 from ..config import SETTINGS
-from ..keyboards import user_finish_kb, admin_review_kb
+from ..keyboards import FORM_BUTTON, admin_review_kb, form_kb, user_finish_kb
 from ..storage import (
-    next_daily_number,
     list_admins,
-    is_admin,
-    is_owner,
-    get_active_destination,
+    aget_active_destination,
     get_active_id_and_title,
 )
 from .state import (
     MAX_PHOTOS,
+    MEDIA_GROUP_BUF,
+    MEDIA_GROUP_DELAY,
     PENDING,
     PHOTO_WAIT,
+    claim_pending,
+    load_pending,
+    next_ad_number,
+    save_pending,
+    update_pending,
 )
+from ..middlewares.identity import Identity
+from ..web import webapp_url
+from .text_dispatch import TEXT_DISPATCH
 from .membership import _user_is_member, build_join_kb
-from .common import (
-    contains_persian_digits,
-    price_words,
-    to_jalali,
-)
+from .captions import admin_caption, build_caption, to_persian_digits, to_persian_year
+from .common import to_jalali
+from .form_schema import validate_form
+from ..spans import add_span
 
 router = Router()
 
 
-# --------------------------------------------------------------------------- #
-#                         توابع کمکی محلی                                     #
-# --------------------------------------------------------------------------- #
-
-def normalize_digits(s: str) -> str:
-    """
-    تبدیل ارقام فارسی/عربی به لاتین.
-    """
-    if not s:
-        return ""
-    persian = "۰۱۲۳۴۵۶۷۸۹"
-    arabic = "٠١٢٣٤٥٦٧٨٩"
-    trans_table = {ord(p): str(i) for i, p in enumerate(persian)}
-    trans_table.update({ord(a): str(i) for i, a in enumerate(arabic)})
-    return s.translate(trans_table)
-
-
-def to_persian_digits(s: str) -> str:
-    """
-    تبدیل اعداد لاتین به فارسی.
-    """
-    if not s:
-        return ""
-    persian = "۰۱۲۳۴۵۶۷۸۹"
-    return "".join(persian[int(c)] if c.isdigit() else c for c in s)
-
-
-def to_persian_year(year_str: str) -> str:
-    """
-    تبدیل سال به فارسی.
-    """
-    return to_persian_digits(year_str)
-
-
-# --------------------------------------------------------------------------- #
-#                         کپشن اصلی (کانال مقصد)                             #
-# --------------------------------------------------------------------------- #
-
-def build_caption(
-    form: dict,
-    number: int,
-    jdate: str,
-    *,
-    show_price: bool,
-    show_desc: bool,
-) -> str:
-    ins_text = f"{form.get('insurance')} ماه" if form.get("insurance") else "—"
-    
-    # نام و شماره تماس (دستی)
-    # contact_1_name = "حاجی اسماعیلی"
-    # contact_1_phone = "09121513089"
-    contact_2_name = "کیوان"
-    contact_2_phone = "09127475355"
-    
-    # سال: فقط به فارسی تبدیل
-    year_display = to_persian_year(form['year'])
-    
-    parts = [
-        f"🏷 <b>{html.quote(form['category'])}</b>",
-        f"{html.quote(form['car'])}",
-        f"\u200F{year_display}\u200F",  # راست‌چین
-        f"{html.quote(form['color'])}",
-    ]
-    
-    # قیمت زیر رنگ
-    if show_price and form.get("price_words"):
-        parts.append(f"قیمت: {html.quote(form['price_words'])}")
-    
-    parts.extend([
-        f"کارکرد: {html.quote(form['km'])} کیلومتر",
-        f"مهلت بیمه: {html.quote(ins_text)}",
-        f"گیربکس: {html.quote(form.get('gear') or '—')}",
-    ])
-    
-    # توضیحات
-    if show_desc and (form.get("desc") or "").strip():
-        parts.append("")
-        parts.append(f"<b>توضیحات:</b>")
-        parts.append(f"{html.quote(form['desc'])}")
-    
-    parts.append("")
-    parts.append(f"☎️ <b>تماس:</b>")
-    # parts.append(f"{contact_1_name} - \u200e{contact_1_phone}\u200e")
-    parts.append(f"{contact_2_name} - \u200e{contact_2_phone}\u200e")
-    
-    parts.append("───────────────────")
-    parts.append(f"🔖 <b>آگهی شماره #{number}</b>")
-    parts.append(f"📅 <i>{jdate}</i>")
-    
-    return "\n".join(parts)
-
-
-
-# --------------------------------------------------------------------------- #
-#                         کپشن مخصوص ادمین‌ها                                 #
-# --------------------------------------------------------------------------- #
-
-def admin_caption(
-    form: dict,
-    number: int,
-    jdate: str,
-    *,
-    phone: str | None = None,
-    username: str | None = None,
-) -> str:
-    """
-    همه ادمین‌ها شماره و یوزرنیم رو می‌بینن
-    """
-    ins_text = f"{form.get('insurance')} ماه" if form.get("insurance") else "—"
-    
-    lines: list[str] = []
-    
-    # اطلاعات تماس برای همه ادمین‌ها
-    lines.append(f"📞 {html.quote(phone or '—')}")
-    uname = (username or "").lstrip("@")
-    lines.append(f"👤 @{html.quote(uname)}" if uname else "👤 بدون نام کاربری")
-    lines.append("")
-    
-    lines.append("🧪 <b>موارد نیازمند بررسی:</b>")
-    lines.append(f"💵 قیمت: {html.quote(form.get('price_words') or '—')}")
-    lines.append(f"📝 توضیحات:\n{html.quote(form.get('desc') or '—')}")
-    lines.append("—" * 10)
-    
-    lines.append("📋 <b>خلاصه آگهی</b>")
-    lines.append(f"نام خودرو: {html.quote(form['car'])}")
-    lines.append(
-        f"سال/رنگ/کارکرد: "
-        f"{html.quote(form['year'])} / {html.quote(form['color'])} / {html.quote(form['km'])}km"
-    )
-    lines.append(
-        f"بیمه/گیربکس: {html.quote(ins_text)} / {html.quote(form.get('gear') or '—')}"
-    )
-    
-    lines.append(f"\n🗓️ <i>{jdate}</i> • ⏱ #{number}")
-    
-    return "\n".join(lines)
-
-
 # --------------------------------------------------------------------------- #
 #                         اعتبارسنجی و نرمال‌سازی فرم                         #
 # --------------------------------------------------------------------------- #
@@ -176,102 +46,38 @@ def admin_caption(
 def validate_and_normalize(
     payload: dict,
 ) -> tuple[bool, str | None, dict | None]:
-    cat = (payload.get("category") or "").strip()
-    car = (payload.get("car") or "").strip()
-    year = (payload.get("year") or "").strip()
-    color = (payload.get("color") or "").strip()
-    km = (payload.get("km") or "").strip()
-    ins = (payload.get("insurance") or "").strip()
-    gear = (payload.get("gear") or "").strip()
-    desc = (payload.get("desc") or "").strip()
-    phone = (payload.get("phone") or "").strip()
-    
-    price_raw = str(
-        payload.get("million_price")
-        or payload.get("price")
-        or ""
-    ).strip()
-    
-    # نرمال‌سازی ارقام
-    year = normalize_digits(year)
-    km = normalize_digits(km)
-    ins = normalize_digits(ins)
-    phone = normalize_digits(phone)
-    price_raw = normalize_digits(price_raw)
-    price_raw = price_raw.replace(",", ".").replace("\u066B", ".").replace("\u066C", ".")
-    
-    # چک کردن ارقام فارسی باقیمانده
-    if (
-        contains_persian_digits(year)
-        or contains_persian_digits(km)
-        or contains_persian_digits(ins)
-        or contains_persian_digits(phone)
-        or contains_persian_digits(price_raw)
-    ):
-        return False, "لطفاً فقط از اعداد لاتین استفاده کنید.", None
-    
-    # نام خودرو
-    if not re.fullmatch(r"[آ-یA-Za-z0-9\u06F0-\u06F9\u0660-\u0669\s]{2,40}", car):
-        return False, "نام خودرو نامعتبر است.", None
-    
-    # سال: شمسی (1300-1430) یا میلادی (2000-2029)
-    if not re.fullmatch(r"(1[34]\d{2}|20[012]\d)", year):
-        return False, "سال ساخت باید ۴ رقم باشد (مثلاً 1403 یا 2024).", None
-    
-    # رنگ
-    if not re.fullmatch(r"[آ-ی\s]{1,12}", color):
-        return False, "رنگ باید حروف فارسی باشد.", None
-    
-    # کارکرد
-    if not re.fullmatch(r"\d{1,6}", km):
-        return False, "کارکرد نامعتبر است.", None
-    
-    # بیمه
-    if ins and not re.fullmatch(r"\d{1,2}", ins):
-        return False, "مهلت بیمه نامعتبر است.", None
-    
-    # شماره تماس
-    if not re.fullmatch(r"09\d{9}", phone):
-        return False, "شماره تماس باید ۱۱ رقم باشد.", None
-    
-    # قیمت
-    if not re.fullmatch(r"\d+(\.\d{1,3})?", price_raw):
-        return False, "فرمت قیمت صحیح نیست.", None
-    
-    try:
-        million_val = float(price_raw)
-    except ValueError:
-        return False, "قیمت نامعتبر است.", None
-    
-    toman = int(million_val * 1_000_000)
-    price_text = price_words(toman)
-    
-    form = {
-        "category": cat,
-        "car": car,
-        "year": year,
-        "color": color,
-        "km": km,
-        "insurance": ins,
-        "gear": gear,
-        "desc": desc,
-        "phone": phone,
-        "username": "",
-        "photos": [],
-        "price_num": toman,
-        "price_words": price_text,
-    }
-    
-    return True, None, form
+    """
+    سازگاری با امضای قبلی؛ قواعد در form_schema.AD_FORM هستند.
+    فقط اولین خطا برگردانده می‌شود (خطاهای کامل: validate_form).
+    """
+    res = validate_form(payload)
+    if not res.ok:
+        return False, res.first_error, None
+    return True, None, res.form
 
 
 # --------------------------------------------------------------------------- #
 #                         دریافت فرم WebApp                                   #
 # --------------------------------------------------------------------------- #
 
+@TEXT_DISPATCH.button(FORM_BUTTON)
+async def on_form_button(message: types.Message, identity: Identity):
+    """فرم از دکمهٔ شیشه‌ای باز می‌شود تا initData داشته باشد (ارسال با /api/form)"""
+    if not webapp_url():
+        await message.answer("WEBAPP_URL (یا PUBLIC_BASE_URL) در .env تنظیم نشده است.")
+        return
+    if not identity.is_admin and not await _user_is_member(message.bot, message.from_user.id, identity):
+        await message.answer(
+            "⛔ ابتدا در کانال‌های موردنیاز عضو شوید، سپس دوباره اقدام کنید.",
+            reply_markup=await build_join_kb(message.bot),
+        )
+        return
+    await message.answer("برای ثبت آگهی، فرم را باز کنید:", reply_markup=form_kb(webapp_url()))
+
+
 @router.message(F.web_app_data)
-async def on_webapp_data(message: types.Message):
-    if not await _user_is_member(message.bot, message.from_user.id):
+async def on_webapp_data(message: types.Message, identity: Identity):
+    if not await _user_is_member(message.bot, message.from_user.id, identity):
         await message.answer(
             "⛔ ابتدا در کانال‌های موردنیاز عضو شوید، سپس دوباره اقدام کنید.",
             reply_markup=await build_join_kb(message.bot),
@@ -283,26 +89,57 @@ async def on_webapp_data(message: types.Message):
     except Exception:
         data = {}
     
-    ok, err, form = validate_and_normalize(data)
-    if not ok:
-        await message.answer(err or "اطلاعات نامعتبر است.")
+    res = validate_form(data)
+    if not res.ok:
+        # همهٔ خطاها یک‌جا، تا کاربر مجبور به چند بار ارسال نشود
+        await message.answer("\n".join(f"• {e}" for e in res.errors.values()))
         return
     
-    form["username"] = message.from_user.username or ""
-    
+    await accept_form(message.bot, message.from_user, res.form)
+
+
+async def accept_form(
+    bot: Bot, user: types.User, form: dict, *, photos: list[str] | None = None
+) -> str:
+    """
+    ثبت فرمِ معتبر به‌عنوان آگهی در انتظار و شروع مرحلهٔ عکس.
+    مشترک بین sendData (on_webapp_data) و API وب (app/web/form_api.py)؛
+    photos: file_id عکس‌هایی که همراه فرم از WebApp آپلود شده‌اند.
+    """
+    form["username"] = user.username or ""
+    form["photos"] = list(photos or [])[:MAX_PHOTOS]
+    remain = MAX_PHOTOS - len(form["photos"])
+
     token = uuid4().hex
-    PENDING[token] = {
+    info = PENDING[token] = {
         "form": form,
-        "user_id": message.from_user.id,
+        "user_id": user.id,
         "admin_msgs": [],
+        "created_at": time.time(),
     }
-    PHOTO_WAIT[message.from_user.id] = {"token": token, "remain": MAX_PHOTOS}
-    
-    await message.answer(
-        "فرم شما ذخیره شد ✅\n"
-        "اکنون می‌توانید تا 3 عکس ارسال کنید، در غیر اینصورت \"تایید نهایی\" را بزنید تا آگهی شما در کانال منتشر شود.",
-        reply_markup=user_finish_kb(token),
-    )
+    await save_pending(token, info, 0)
+    PHOTO_WAIT[user.id] = {"token": token, "remain": remain}
+
+    if not form["photos"]:
+        text = (
+            "فرم شما ذخیره شد ✅\n"
+            f"اکنون می‌توانید تا {to_persian_digits(str(MAX_PHOTOS))} عکس ارسال کنید، در غیر اینصورت \"تایید نهایی\" را بزنید تا آگهی شما در کانال منتشر شود."
+        )
+    else:
+        text = f"فرم شما با {to_persian_digits(str(len(form['photos'])))} عکس ذخیره شد ✅\n"
+        if remain:
+            text += f"می‌توانید {to_persian_digits(str(remain))} عکس دیگر هم ارسال کنید؛ "
+        text += "برای انتشار، \"تایید نهایی\" را بزنید."
+    try:
+        await bot.send_message(user.id, text, reply_markup=user_finish_kb(token))
+    except TelegramAPIError:
+        # کاربر پیام و دکمهٔ تایید را نمی‌بیند (مثلاً ربات را مسدود کرده)؛ آگهیِ
+        # بی‌صاحب در صف نمی‌ماند
+        if PHOTO_WAIT.get(user.id, {}).get("token") == token:
+            PHOTO_WAIT.pop(user.id, None)
+        await claim_pending(token)
+        raise
+    return token
 
 # --------------------------------------------------------------------------- #
 #                         دریافت عکس‌ها                                       #
@@ -313,28 +150,88 @@ async def on_photo(message: types.Message):
     sess = PHOTO_WAIT.get(message.from_user.id)
     if not sess:
         return
-    
-    if "remain" not in sess or not isinstance(sess["remain"], int):
-        sess["remain"] = MAX_PHOTOS
-    
-    if sess["remain"] <= 0:
+
+    if not message.media_group_id:
+        await _accept_photos(message, [message.photo[-1].file_id])
+        return
+
+    # عکس‌های یک آلبوم هرکدام جدا می‌رسند؛ تا پایان مهلت جمع‌شان می‌کنیم
+    loop = asyncio.get_running_loop()
+    buf = MEDIA_GROUP_BUF.get(message.media_group_id)
+    if buf is not None:
+        buf["messages"].append(message)
+        buf["last"] = loop.time()
+        return
+
+    buf = MEDIA_GROUP_BUF[message.media_group_id] = {
+        "messages": [message],
+        "last": loop.time(),
+    }
+
+    # فقط اولین پیام آلبوم منتظر می‌ماند و کل دسته را یک‌جا ثبت می‌کند
+    t0 = loop.time()
+    try:
+        while (delay := buf["last"] + MEDIA_GROUP_DELAY - loop.time()) > 0:
+            await asyncio.sleep(delay)
+    finally:
+        MEDIA_GROUP_BUF.pop(message.media_group_id, None)
+        add_span("wait", "album.debounce", loop.time() - t0)
+
+    album = sorted(buf["messages"], key=lambda m: m.message_id)
+    await _accept_photos(album[0], [m.photo[-1].file_id for m in album])
+
+
+async def _accept_photos(message: types.Message, file_ids: list[str]) -> None:
+    """
+    ثبت یک یا چند عکس برای آگهی در انتظار و ارسال «یک» پاسخ.
+    ظرفیت از خود آگهی حساب می‌شود و با update_pending نوشته می‌شود؛ اگر عکس
+    دیگری هم‌زمان ثبت شده باشد، آگهی دوباره خوانده و دسته دوباره اعمال می‌شود.
+    """
+    sess = PHOTO_WAIT.get(message.from_user.id)
+    if not sess:
+        return
+
+    token = sess["token"]
+    accepted: list[str] = []
+    closed = False
+
+    def add(info: dict) -> bool | None:
+        nonlocal accepted, closed
+        # تایید نهایی زده شده (در حال انتشار یا منتشرشده)؛ عکس دیگر اضافه نمی‌شود
+        closed = "grp" in info or time.time() - info.get("finishing", 0) < FINISH_STALE
+        if closed:
+            return False
+        photos = info["form"]["photos"]
+        accepted = file_ids[: max(MAX_PHOTOS - len(photos), 0)]
+        if not accepted:
+            return False
+        photos.extend(accepted)
+
+    info = await update_pending(token, add)
+    if not info or closed:
+        PHOTO_WAIT.pop(message.from_user.id, None)
+        return
+
+    remain = max(MAX_PHOTOS - len(info["form"]["photos"]), 0)
+    sess["remain"] = remain
+
+    if not accepted:
         await message.reply(
-            "حداکثر ۵ عکس مجاز است. سپس «✅ تایید نهایی» را بزنید.",
-            reply_markup=user_finish_kb(sess["token"]),
+            f"حداکثر {to_persian_digits(str(MAX_PHOTOS))} عکس مجاز است. سپس «✅ تایید نهایی» را بزنید.",
+            reply_markup=user_finish_kb(token),
         )
         return
-    
-    file_id = message.photo[-1].file_id
-    token = sess["token"]
-    
-    PENDING[token]["form"]["photos"].append(file_id)
-    sess["remain"] -= 1
-    left = max(sess["remain"], 0)
-    
-    await message.reply(
-        f"عکس ثبت شد. باقی‌مانده: {left}",
-        reply_markup=user_finish_kb(token),
-    )
+
+    dropped = len(file_ids) - len(accepted)
+    left = to_persian_digits(str(remain))
+    if len(accepted) == 1:
+        text = f"عکس ثبت شد. باقی‌مانده: {left}"
+    else:
+        text = f"{to_persian_digits(str(len(accepted)))} عکس ثبت شد. باقی‌مانده: {left}"
+    if dropped:
+        text += f"\n{to_persian_digits(str(dropped))} عکس اضافه (بیش از سقف مجاز) نادیده گرفته شد."
+
+    await message.reply(text, reply_markup=user_finish_kb(token))
 
 
 # --------------------------------------------------------------------------- #
@@ -348,7 +245,7 @@ async def publish_to_destination(
     show_price: bool,
     show_desc: bool,
 ):
-    number, iso = next_daily_number()
+    number, iso = await next_ad_number()
     j = to_jalali(iso)
     
     caption = build_caption(
@@ -360,7 +257,7 @@ async def publish_to_destination(
     )
 
     # ✅ مقصد فعال از storage (نه TARGET_GROUP_ID ثابت)
-    dest = int(get_active_destination() or 0)
+    dest = int(await aget_active_destination() or 0)
     if not dest:
         dest = int(SETTINGS.TARGET_GROUP_ID or 0)
 
@@ -403,21 +300,32 @@ async def send_review_to_admins(
     token: str,
     photos: list[str],
     grp: dict,
-) -> int:
-    count = 0
+) -> list[tuple[int, int]]:
+    """
+    ارسال آگهی و پنل بررسی برای همهٔ ادمین‌ها؛ (chat_id, message_id) پنل‌ها
+    برمی‌گردد تا فراخواننده آن‌ها را در admin_msgs همان رکوردی بنویسد که
+    ذخیره می‌کند (نه PENDING، که در حالت مشترک با هر load_pending عوض می‌شود).
+    """
+    panels: list[tuple[int, int]] = []
     admins = list_admins()
+
+    # کپشن و متن پنل برای همهٔ ادمین‌ها یکی است؛ یک بار ساخته می‌شوند
+    # (همه ادمین‌ها شماره و یوزرنیم رو می‌بینن)
+    cap = admin_caption(
+        form,
+        grp["number"],
+        grp["jdate"],
+        phone=form.get("phone"),
+        username=form.get("username"),
+    )
+    panel_text = (
+        "📝 ویرایش/اعمال:\n"
+        f"• قیمت فعلی: {html.quote(form.get('price_words') or '—')}\n"
+        f"• توضیحات فعلی: {(html.quote(form.get('desc') or '—'))[:400]}\n"
+    )
     
     for admin_id in admins:
         try:
-            # همه ادمین‌ها شماره و یوزرنیم رو می‌بینن
-            cap = admin_caption(
-                form,
-                grp["number"],
-                grp["jdate"],
-                phone=form.get("phone"),
-                username=form.get("username"),
-            )
-            
             if photos:
                 mg = MediaGroupBuilder()
                 mg.add_photo(media=photos[0], caption=cap, parse_mode="HTML")
@@ -429,39 +337,45 @@ async def send_review_to_admins(
             
             panel = await bot.send_message(
                 admin_id,
-                "📝 ویرایش/اعمال:\n"
-                f"• قیمت فعلی: {html.quote(form.get('price_words') or '—')}\n"
-                f"• توضیحات فعلی: {(html.quote(form.get('desc') or '—'))[:400]}\n",
+                panel_text,
                 reply_markup=admin_review_kb(token),
                 parse_mode="HTML",
             )
             
-            PENDING[token]["admin_msgs"].append(
-                (panel.chat.id, panel.message_id)
-            )
-            count += 1
+            panels.append((panel.chat.id, panel.message_id))
         
         except Exception:
             pass
     
-    return count
+    return panels
 
 
 # --------------------------------------------------------------------------- #
 #                         اتمام کاربر (دکمه تایید نهایی)                      #
 # --------------------------------------------------------------------------- #
 
+# علامت finishing پس از این مدت (ثانیه) رهاشده حساب می‌شود (مثلاً نسخه‌ای که
+# وسط انتشار از کار افتاد) و تایید نهایی دوباره ممکن است
+FINISH_STALE = 120.0
+
+
 @router.callback_query(F.data.startswith("finish:"))
 async def cb_finish(call: types.CallbackQuery):
+    """
+    ۱) برداشتن «نوبت انتشار» با نوشتن علامت finishing روی همان نسخه‌ای که
+       خوانده شد؛ دو ضربهٔ هم‌زمان یا دو نسخهٔ ربات فقط یکی برنده می‌شوند
+    ۲) انتشار در کانال و ارسال برای ادمین‌ها
+    ۳) نوشتن grp و admin_msgs روی آخرین نسخه (در تعارض دوباره خوانده می‌شود)
+    """
     token = call.data.split(":", 1)[1]
     
-    data = PENDING.get(token)
+    data, version = await load_pending(token)
     if not data or data["user_id"] != call.from_user.id:
         await call.answer("جلسه یافت نشد.", show_alert=True)
         return
     
     # مقصد فعال را می‌گیریم
-    dest = int(get_active_destination() or 0)
+    dest = int(await aget_active_destination() or 0)
     if not dest:
         dest = int(SETTINGS.TARGET_GROUP_ID or 0)
 
@@ -469,24 +383,59 @@ async def cb_finish(call: types.CallbackQuery):
         await call.answer("کانال مقصد در تنظیمات تعریف نشده.", show_alert=True)
         return
     
+    claimed = False
+
+    def claim(info: dict) -> bool | None:
+        nonlocal claimed
+        claimed = False
+        if "grp" in info or time.time() - info.get("finishing", 0) < FINISH_STALE:
+            return False
+        info["finishing"] = time.time()
+        claimed = True
+
+    data = await update_pending(token, claim, data, version)
+    if data is None:
+        await call.answer("جلسه یافت نشد.", show_alert=True)
+        return
+    if not claimed:
+        await call.answer("آگهی شما پیش‌تر ثبت شده است.", show_alert=True)
+        return
+    
     form = data["form"]
     
     # انتشار در کانال
-    grp = await publish_to_destination(
-        call.bot,
-        form,
-        show_price=False,
-        show_desc=False,
-    )
-    
-    PENDING[token]["grp"] = grp
-    PENDING[token]["needs"] = {"price": False, "desc": True}
+    try:
+        grp = await publish_to_destination(
+            call.bot,
+            form,
+            show_price=False,
+            show_desc=False,
+        )
+    except Exception:
+        # چیزی منتشر نشد؛ نوبت آزاد می‌شود تا کاربر دوباره تایید کند
+        await update_pending(token, lambda i: i.pop("finishing", None))
+        await call.answer("انتشار آگهی ناموفق بود؛ دوباره تلاش کنید.", show_alert=True)
+        raise
     
     # ارسال برای ادمین‌ها
     photos = form.get("photos") or []
-    await send_review_to_admins(call.bot, form, token, photos, grp)
-    
+    panels = await send_review_to_admins(call.bot, form, token, photos, grp)
+
+    def finish(info: dict) -> None:
+        info.pop("finishing", None)
+        info["grp"] = grp
+        info["needs"] = {"price": False, "desc": True}
+        info["admin_msgs"] = panels
+
     PHOTO_WAIT.pop(call.from_user.id, None)
+    if await update_pending(token, finish) is None:
+        # ادمینی از همین پنل‌ها آگهی را پیش از ثبت grp رد کرد؛ پست کانال هم برداشته می‌شود
+        try:
+            await call.bot.delete_message(grp["chat_id"], grp["msg_id"])
+        except Exception:
+            pass
+        await call.answer("این آگهی پیش‌تر بررسی شده است.", show_alert=True)
+        return
     
     try:
         await call.message.edit_text("ثبت شد ✅ و برای بررسی به ادمین‌ها ارسال شد.")
@@ -501,14 +450,14 @@ async def cb_finish(call: types.CallbackQuery):
 # --------------------------------------------------------------------------- #
 
 @router.callback_query(F.data.startswith("admin_edit_price:"))
-async def cb_admin_edit_price(call: types.CallbackQuery):
+async def cb_admin_edit_price(call: types.CallbackQuery, identity: Identity):
     """ویرایش قیمت توسط ادمین"""
-    if not is_admin(call.from_user.id):
+    if not identity.is_admin:
         await call.answer("شما ادمین نیستید.", show_alert=True)
         return
     
     token = call.data.split(":", 1)[1]
-    data = PENDING.get(token)
+    data, version = await load_pending(token)
     
     if not data:
         await call.answer("❌ درخواست یافت نشد یا منقضی شده است.", show_alert=True)
@@ -519,14 +468,14 @@ async def cb_admin_edit_price(call: types.CallbackQuery):
 
 
 @router.callback_query(F.data.startswith("admin_edit_desc:"))
-async def cb_admin_edit_desc(call: types.CallbackQuery):
+async def cb_admin_edit_desc(call: types.CallbackQuery, identity: Identity):
     """ویرایش توضیحات توسط ادمین"""
-    if not is_admin(call.from_user.id):
+    if not identity.is_admin:
         await call.answer("شما ادمین نیستید.", show_alert=True)
         return
     
     token = call.data.split(":", 1)[1]
-    data = PENDING.get(token)
+    data, version = await load_pending(token)
     
     if not data:
         await call.answer("❌ درخواست یافت نشد یا منقضی شده است.", show_alert=True)
@@ -537,14 +486,14 @@ async def cb_admin_edit_desc(call: types.CallbackQuery):
 
 
 @router.callback_query(F.data.startswith("admin_apply_price:"))
-async def cb_admin_apply_price(call: types.CallbackQuery):
+async def cb_admin_apply_price(call: types.CallbackQuery, identity: Identity):
     """اعمال قیمت در کانال"""
-    if not is_admin(call.from_user.id):
+    if not identity.is_admin:
         await call.answer("شما ادمین نیستید.", show_alert=True)
         return
     
     token = call.data.split(":", 1)[1]
-    data = PENDING.get(token)
+    data, version = await load_pending(token)
     
     if not data:
         await call.answer("❌ درخواست یافت نشد یا منقضی شده است.", show_alert=True)
@@ -573,21 +522,24 @@ async def cb_admin_apply_price(call: types.CallbackQuery):
             caption=new_caption,
             parse_mode="HTML",
         )
-        data["needs"]["price"] = True
+        # در تعارض نسخه دوباره خوانده و اعمال می‌شود؛ فقط نبودِ آگهی یعنی «بررسی شده»
+        if await update_pending(token, lambda i: i["needs"].update(price=True), data, version) is None:
+            await call.answer("این آگهی پیش‌تر بررسی شده است.", show_alert=True)
+            return
         await call.answer("✅ قیمت اعمال شد.", show_alert=True)
     except Exception as e:
         await call.answer(f"❌ خطا: {e}", show_alert=True)
 
 
 @router.callback_query(F.data.startswith("admin_apply_desc:"))
-async def cb_admin_apply_desc(call: types.CallbackQuery):
+async def cb_admin_apply_desc(call: types.CallbackQuery, identity: Identity):
     """اعمال توضیحات در کانال"""
-    if not is_admin(call.from_user.id):
+    if not identity.is_admin:
         await call.answer("شما ادمین نیستید.", show_alert=True)
         return
     
     token = call.data.split(":", 1)[1]
-    data = PENDING.get(token)
+    data, version = await load_pending(token)
     
     if not data:
         await call.answer("❌ درخواست یافت نشد یا منقضی شده است.", show_alert=True)
@@ -616,7 +568,10 @@ async def cb_admin_apply_desc(call: types.CallbackQuery):
             caption=new_caption,
             parse_mode="HTML",
         )
-        data["needs"]["desc"] = True
+        # در تعارض نسخه دوباره خوانده و اعمال می‌شود؛ فقط نبودِ آگهی یعنی «بررسی شده»
+        if await update_pending(token, lambda i: i["needs"].update(desc=True), data, version) is None:
+            await call.answer("این آگهی پیش‌تر بررسی شده است.", show_alert=True)
+            return
         await call.answer("✅ توضیحات اعمال شد.", show_alert=True)
     except Exception as e:
         await call.answer(f"❌ خطا: {e}", show_alert=True)
@@ -0,0 +1,159 @@
+from __future__ import annotations
+import time
+from typing import Callable
+
+from .metrics import API_INFLIGHT, OUTBOUND_QUEUE
+
+# --------------------------------------------------------------------------- #
+#                     ثبت بررسی‌های آمادگی (readiness) نسخه                    #
+# --------------------------------------------------------------------------- #
+# هر زیرسیستم یک تابع بی‌آرگومان ثبت می‌کند که (ok, جزئیات) برمی‌گرداند؛
+# readiness() همه را اجرا می‌کند و نسخه فقط وقتی آماده است که همه ok باشند.
+# بررسی‌ها روی حلقه اجرا می‌شوند، پس باید فقط وضعیت حافظه را بخوانند.
+
+ReadinessCheck = Callable[[], "tuple[bool, dict]"]
+
+_CHECKS: dict[str, ReadinessCheck] = {}
+
+
+def register_check(name: str, check: ReadinessCheck) -> None:
+    _CHECKS[name] = check
+
+
+def readiness() -> tuple[bool, dict]:
+    ready = True
+    details: dict[str, dict] = {}
+    for name, check in _CHECKS.items():
+        try:
+            ok, info = check()
+        except Exception as e:
+            ok, info = False, {"error": repr(e)}
+        ready = ready and ok
+        details[name] = {"ok": ok, **info}
+    return ready, details
+
+
+# --------------------------------------------------------------------------- #
+#                  سلامت منبع آپدیت‌ها (polling) برای /healthz و /readyz       #
+# --------------------------------------------------------------------------- #
+# منابع داده:
+#   fetch_ok / fetch_failed  ← ApiMetricsMiddleware برای هر getUpdates
+#     (aiogram خطای getUpdates را خودش با backoff تکرار می‌کند و polling
+#     نمی‌افتد؛ پس «رشتهٔ خطا» فقط از همین‌جا دیده می‌شود)
+#   update_done              ← UpdateTimingMiddleware پس از هر آپدیت
+#   polling_started/stopped/crashed ← supervise_polling (app/polling.py)
+#
+# آمادگی: polling در حال اجرا، آخرین getUpdates موفق تازه، رشتهٔ خطا کمتر از
+# max_fetch_errors. زنده بودن: ناظر polling هنوز تسلیم نشده است؛ قطعی خود
+# تلگرام نسخه را «مرده» نمی‌کند (همهٔ نسخه‌ها را با هم ری‌استارت نکنیم).
+
+
+class UpdatesHealth:
+    def __init__(self, *, max_fetch_errors: int = 3, fetch_stale: float = 60.0, max_crashes: int = 5) -> None:
+        self.max_fetch_errors = max_fetch_errors
+        self.fetch_stale = fetch_stale
+        self.max_crashes = max_crashes
+        self.mode = "polling"
+        self.running = False
+        self.gave_up = False
+        self.started_at: float | None = None
+        self.restarts = 0
+        self.crash_streak = 0
+        self.last_crash: str | None = None
+        self.last_fetch_ok: float | None = None
+        self.fetch_error_streak = 0
+        self.last_fetch_error: str | None = None
+        self.last_update_at: float | None = None
+        self.updates_total = 0
+        self.update_error_streak = 0
+
+    def configure(self, *, max_fetch_errors: int, fetch_stale: float) -> None:
+        self.max_fetch_errors = max(max_fetch_errors, 1)
+        self.fetch_stale = fetch_stale
+
+    # ------------------------------ رویدادها ------------------------------ #
+
+    def fetch_ok(self) -> None:
+        self.last_fetch_ok = time.time()
+        self.fetch_error_streak = 0
+
+    def fetch_failed(self, outcome: str) -> None:
+        self.fetch_error_streak += 1
+        self.last_fetch_error = outcome
+
+    def update_done(self, failed: bool) -> None:
+        self.last_update_at = time.time()
+        self.updates_total += 1
+        self.update_error_streak = self.update_error_streak + 1 if failed else 0
+
+    def polling_started(self) -> None:
+        self.running = True
+        self.started_at = time.time()
+
+    def polling_stopped(self) -> None:
+        self.running = False
+
+    def polling_crashed(self, error: BaseException, *, stable: bool) -> None:
+        self.running = False
+        self.restarts += 1
+        self.crash_streak = 1 if stable else self.crash_streak + 1
+        self.last_crash = f"{type(error).__name__}: {error}"
+        self.gave_up = self.crash_streak >= self.max_crashes
+
+    # ------------------------------- گزارش ------------------------------- #
+
+    def status(self) -> dict:
+        now = time.time()
+        age = lambda ts: round(now - ts, 3) if ts else None  # noqa: E731
+        return {
+            "mode": self.mode,
+            "running": self.running,
+            "started_at": self.started_at,
+            "restarts": self.restarts,
+            "crash_streak": self.crash_streak,
+            "last_crash": self.last_crash,
+            "last_fetch_ok_age_s": age(self.last_fetch_ok),
+            "fetch_error_streak": self.fetch_error_streak,
+            "last_fetch_error": self.last_fetch_error,
+            "last_update_at": self.last_update_at,
+            "last_update_age_s": age(self.last_update_at),
+            "updates_total": self.updates_total,
+            "update_error_streak": self.update_error_streak,
+        }
+
+    def readiness(self) -> tuple[bool, dict]:
+        fresh = self.last_fetch_ok is not None and time.time() - self.last_fetch_ok <= self.fetch_stale
+        ok = self.running and fresh and self.fetch_error_streak < self.max_fetch_errors
+        return ok, self.status()
+
+    def liveness(self) -> tuple[bool, dict]:
+        return not self.gave_up, self.status()
+
+
+UPDATES_HEALTH = UpdatesHealth()
+register_check("updates", UPDATES_HEALTH.readiness)
+
+
+# --------------------------------------------------------------------------- #
+#                   عمق صف ارسال (RateLimiter) و درخواست‌های در جریان          #
+# --------------------------------------------------------------------------- #
+
+
+class OutboundHealth:
+    def __init__(self, max_queue: int = 500) -> None:
+        self.max_queue = max_queue
+
+    def status(self) -> dict:
+        return {
+            "queue_depth": int(OUTBOUND_QUEUE.values.get((), 0)),
+            "inflight": int(API_INFLIGHT.values.get((), 0)),
+            "max_queue": self.max_queue,
+        }
+
+    def readiness(self) -> tuple[bool, dict]:
+        status = self.status()
+        return status["queue_depth"] < self.max_queue, status
+
+
+OUTBOUND_HEALTH = OutboundHealth()
+register_check("outbound", OUTBOUND_HEALTH.readiness)
@@ -1,27 +1,116 @@
+from __future__ import annotations
+import json
+from functools import lru_cache
+
+from pydantic import PrivateAttr
 from aiogram.types import (
     ReplyKeyboardMarkup, KeyboardButton, WebAppInfo,
     InlineKeyboardMarkup, InlineKeyboardButton
 )
 
+# --------------------------------------------------------------------------- #
+#                  رجیستری کیبوردها (یک بار ساخت، بارها ارسال)                 #
+# --------------------------------------------------------------------------- #
+# کیبوردهای ثابت برای هر حالت (ادمین/Owner/…) یک بار ساخته و کش می‌شوند.
+# هر کیبورد JSON نهایی خودش را هم همراه دارد تا PreparedMarkupSession
+# (app/session.py) آن را بدون model_dump/json.dumps دوباره بفرستد.
+# مدل‌های aiogram فریز هستند، پس اشتراک یک نمونه بین درخواست‌ها امن است.
+
+
+class PreparedReplyKeyboard(ReplyKeyboardMarkup):
+    _json: str = PrivateAttr(default="")
+
+
+class PreparedInlineKeyboard(InlineKeyboardMarkup):
+    _json: str = PrivateAttr(default="")
+
+
+def _dumps(markup) -> str:
+    # همان خروجی AiohttpSession: فیلدهای None حذف و با json.dumps سریال می‌شوند
+    return json.dumps(markup.model_dump(exclude_none=True))
+
+
+def _prepare(markup):
+    markup._json = _dumps(markup)
+    return markup
+
+
+def prepared_json(markup) -> str | None:
+    """JSON از پیش ساخته‌شدهٔ کیبورد؛ برای کیبوردهای معمولی None"""
+    return getattr(markup, "_json", None) or None
+
+
+# جای توکن در الگو؛ json.dumps آن را به «\u0000» تبدیل می‌کند
+_TOKEN_SLOT = "\x00"
+
+
+class TokenKeyboard:
+    """
+    الگوی کیبورد شیشه‌ای که callback_data هر دکمه «پیشوند:توکن» است.
+    مدل و JSON الگو یک بار ساخته می‌شوند؛ برای هر توکن دکمه‌ها با model_copy
+    از الگو کپی و توکن در JSON جاگذاری می‌شود. کیبورد هر توکن هم کش می‌شود
+    (یک آگهی برای همهٔ ادمین‌ها و پس از هر ویرایش با همان کیبورد ارسال می‌شود).
+    توکن‌ها uuid4().hex هستند و نیازی به escape در JSON ندارند.
+    """
+
+    def __init__(self, rows: list[list[tuple[str, str]]], *, cache_size: int = 256) -> None:
+        self.rows = rows
+        self._template = PreparedInlineKeyboard(inline_keyboard=[
+            [InlineKeyboardButton(text=text, callback_data=f"{prefix}:{_TOKEN_SLOT}")
+             for text, prefix in row]
+            for row in rows
+        ])
+        self._parts = _dumps(self._template).split(json.dumps(_TOKEN_SLOT)[1:-1])
+        self._build = lru_cache(maxsize=cache_size)(self._render)
+
+    def _render(self, token: str) -> PreparedInlineKeyboard:
+        markup = self._template.model_copy(update={"inline_keyboard": [
+            [btn.model_copy(update={"callback_data": f"{prefix}:{token}"})
+             for btn, (_, prefix) in zip(buttons, row)]
+            for buttons, row in zip(self._template.inline_keyboard, self.rows)
+        ]})
+        markup._json = token.join(self._parts)
+        return markup
+
+    def __call__(self, token: str) -> PreparedInlineKeyboard:
+        return self._build(token)
+
+
 # --------------------------------------------------------------------------- #
 #                             کیبورد اصلی                                     #
 # --------------------------------------------------------------------------- #
 
-def start_keyboard(webapp_url: str, is_admin: bool) -> ReplyKeyboardMarkup:
+FORM_BUTTON = "📝 فرم ثبت آگهی"
+
+
+@lru_cache(maxsize=None)
+def start_keyboard(is_admin: bool) -> PreparedReplyKeyboard:
     """
-    کیبورد اصلی ربات – شامل دکمه فرم و دکمه پنل مدیریتی (برای ادمین‌ها)
+    کیبورد اصلی ربات – شامل دکمه فرم و دکمه پنل مدیریتی (برای ادمین‌ها).
+    دکمهٔ فرم متنی است و ربات در پاسخ form_kb را می‌فرستد: WebAppی که از
+    دکمهٔ کیبورد معمولی باز شود initData ندارد و نمی‌تواند از /api/form
+    (با عکس) استفاده کند.
     """
-    row = [KeyboardButton(text="📝 فرم ثبت آگهی", web_app=WebAppInfo(url=webapp_url))]
+    row = [KeyboardButton(text=FORM_BUTTON)]
     if is_admin:
         row.append(KeyboardButton(text="⚙️ پنل مدیریتی"))
-    return ReplyKeyboardMarkup(keyboard=[row], resize_keyboard=True)
+    return _prepare(PreparedReplyKeyboard(keyboard=[row], resize_keyboard=True))
+
+
+@lru_cache(maxsize=None)
+def form_kb(url: str) -> PreparedInlineKeyboard:
+    """دکمهٔ شیشه‌ای باز کردن فرم (WebApp با initData)"""
+    return _prepare(PreparedInlineKeyboard(inline_keyboard=[
+        [InlineKeyboardButton(text="📝 باز کردن فرم ثبت آگهی", web_app=WebAppInfo(url=url))]
+    ]))
 
 
 # --------------------------------------------------------------------------- #
 #                        ریشه پنل مدیریتی                                     #
 # --------------------------------------------------------------------------- #
 
-def admin_root_kb(is_owner: bool) -> ReplyKeyboardMarkup:
+@lru_cache(maxsize=None)
+def admin_root_kb(is_owner: bool) -> PreparedReplyKeyboard:
     """
     منوی اصلی پنل مدیر.
     - مدیریت ادمین‌ها: برای همه (چون ادمین معمولی باید لیست را ببیند)
@@ -36,7 +125,7 @@ def admin_root_kb(is_owner: bool) -> ReplyKeyboardMarkup:
     # ردیف دوم: مدیریت ادمین‌ها (برای همه) و بازگشت
     # نکته: ادمین معمولی فقط می‌تواند لیست را ببیند (در کیبورد بعدی محدود می‌شود)
     rows = [
-        [KeyboardButton(text="👤 مدیریت ادمین‌ها")],
+        [KeyboardButton(text="👤 مدیریت ادمین‌ها"), KeyboardButton(text="🗂 صف بررسی")],
     ]
     
     if top_owner:
@@ -44,14 +133,26 @@ def admin_root_kb(is_owner: bool) -> ReplyKeyboardMarkup:
         
     rows.append([KeyboardButton(text="🔙 بازگشت")])
     
-    return ReplyKeyboardMarkup(keyboard=rows, resize_keyboard=True)
+    return _prepare(PreparedReplyKeyboard(keyboard=rows, resize_keyboard=True))
+
+
+# --------------------------------------------------------------------------- #
+#                  داشبورد صف بررسی (WebApp از دکمهٔ شیشه‌ای)                 #
+# --------------------------------------------------------------------------- #
+
+@lru_cache(maxsize=None)
+def admin_dashboard_kb(url: str) -> PreparedInlineKeyboard:
+    return _prepare(PreparedInlineKeyboard(inline_keyboard=[
+        [InlineKeyboardButton(text="🗂 باز کردن صف بررسی", web_app=WebAppInfo(url=url))]
+    ]))
 
 
 # --------------------------------------------------------------------------- #
 #                       زیرمنو: مدیریت ادمین‌ها                                #
 # --------------------------------------------------------------------------- #
 
-def admin_admins_kb(is_owner: bool) -> ReplyKeyboardMarkup:
+@lru_cache(maxsize=None)
+def admin_admins_kb(is_owner: bool) -> PreparedReplyKeyboard:
     """
     اگر Owner باشد: همه دکمه‌ها (لیست، افزودن، حذف)
     اگر ادمین معمولی باشد: فقط دکمه «لیست ادمین‌ها»
@@ -67,42 +168,45 @@ def admin_admins_kb(is_owner: bool) -> ReplyKeyboardMarkup:
         row1 = [KeyboardButton(text="📋 لیست ادمین‌ها")]
 
     row2 = [KeyboardButton(text="🔙 بازگشت به پنل")]
-    return ReplyKeyboardMarkup(keyboard=[row1, row2], resize_keyboard=True)
+    return _prepare(PreparedReplyKeyboard(keyboard=[row1, row2], resize_keyboard=True))
 
 
 # --------------------------------------------------------------------------- #
 #           زیرمنو: مدیریت کانال‌های مجاز ارسال (برای OWNER)                  #
 # --------------------------------------------------------------------------- #
 
-def admin_allowed_kb() -> ReplyKeyboardMarkup:
+@lru_cache(maxsize=None)
+def admin_allowed_kb() -> PreparedReplyKeyboard:
     row1 = [
         KeyboardButton(text="➕ افزودن کانال مجاز"),
         KeyboardButton(text="🗑 حذف کانال مجاز"),
         KeyboardButton(text="📋 لیست کانال‌های مجاز"),
     ]
     row2 = [KeyboardButton(text="🔙 بازگشت به پنل")]
-    return ReplyKeyboardMarkup(keyboard=[row1, row2], resize_keyboard=True)
+    return _prepare(PreparedReplyKeyboard(keyboard=[row1, row2], resize_keyboard=True))
 
 
 # --------------------------------------------------------------------------- #
 #           زیرمنو: کانال‌های من (عضویت اجباری)                                #
 # --------------------------------------------------------------------------- #
 
-def admin_my_channels_kb() -> ReplyKeyboardMarkup:
+@lru_cache(maxsize=None)
+def admin_my_channels_kb() -> PreparedReplyKeyboard:
     row1 = [
         KeyboardButton(text="➕ افزودن کانال من"),
         KeyboardButton(text="🗑 حذف کانال من"),
         KeyboardButton(text="📋 لیست کانال‌های من"),
     ]
     row2 = [KeyboardButton(text="🔙 بازگشت به پنل")]
-    return ReplyKeyboardMarkup(keyboard=[row1, row2], resize_keyboard=True)
+    return _prepare(PreparedReplyKeyboard(keyboard=[row1, row2], resize_keyboard=True))
 
 
 # --------------------------------------------------------------------------- #
 #           زیرمنو: مدیریت مقصدها (برای OWNER)                                #
 # --------------------------------------------------------------------------- #
 
-def admin_destinations_kb() -> ReplyKeyboardMarkup:
+@lru_cache(maxsize=None)
+def admin_destinations_kb() -> PreparedReplyKeyboard:
     row1 = [
         KeyboardButton(text="📋 لیست مقصدها"),
         KeyboardButton(text="➕ افزودن مقصد"),
@@ -112,33 +216,24 @@ def admin_destinations_kb() -> ReplyKeyboardMarkup:
         KeyboardButton(text="🗑 حذف مقصد"),
     ]
     row3 = [KeyboardButton(text="🔙 بازگشت به پنل")]
-    return ReplyKeyboardMarkup(keyboard=[row1, row2, row3], resize_keyboard=True)
+    return _prepare(PreparedReplyKeyboard(keyboard=[row1, row2, row3], resize_keyboard=True))
 
 
 # --------------------------------------------------------------------------- #
 #                دکمه انتشار نهایی برای کاربر (پس از ارسال عکس‌ها)             #
 # --------------------------------------------------------------------------- #
 
-def user_finish_kb(token: str) -> InlineKeyboardMarkup:
-    return InlineKeyboardMarkup(inline_keyboard=[
-        [InlineKeyboardButton(text="✅ تایید نهایی", callback_data=f"finish:{token}")]
-    ])
+user_finish_kb = TokenKeyboard([
+    [("✅ تایید نهایی", "finish")],
+])
 
 
 # --------------------------------------------------------------------------- #
 #                     کیبورد بررسی و ویرایش برای ادمین‌ها                      #
 # --------------------------------------------------------------------------- #
 
-def admin_review_kb(token: str) -> InlineKeyboardMarkup:
-    row1 = [
-        InlineKeyboardButton(text="✏️ ویرایش قیمت", callback_data=f"edit_price:{token}"),
-        InlineKeyboardButton(text="📝 ویرایش توضیحات", callback_data=f"edit_desc:{token}"),
-    ]
-    row2 = [
-        InlineKeyboardButton(text="✅ اعمال روی پست گروه", callback_data=f"publish:{token}")
-    ]
-    row3 = [
-        InlineKeyboardButton(text="❌ رد", callback_data=f"reject:{token}")
-    ]
-
-    return InlineKeyboardMarkup(inline_keyboard=[row1, row2, row3])
\ No newline at end of file
+admin_review_kb = TokenKeyboard([
+    [("✏️ ویرایش قیمت", "edit_price"), ("📝 ویرایش توضیحات", "edit_desc")],
+    [("✅ اعمال روی پست گروه", "publish")],
+    [("❌ رد", "reject")],
+])
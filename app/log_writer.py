@@ -0,0 +1,79 @@
+from __future__ import annotations
+import atexit
+import queue
+import threading
+from collections import defaultdict
+from pathlib import Path
+
+# --------------------------------------------------------------------------- #
+#            نوشتن خطوط JSONL لاگ‌ها روی یک رشتهٔ جدا (بیرون از حلقه)          #
+# --------------------------------------------------------------------------- #
+# SLOW_LOG و UPDATE_RECORDER روی حلقه فقط خط را می‌سازند و در صف می‌گذارند؛
+# mkdir/stat/چرخش/append این‌جا انجام می‌شود. رشتهٔ نویسنده هر بار همهٔ خطوط
+# منتظر را برمی‌دارد و برای هر فایل با «یک» open می‌نویسد. عمداً از
+# STORAGE_EXECUTOR (app/storage/io.py) جداست تا لاگ هر آپدیت پشت عملیات
+# انباره‌ها صف نکشد. خطای دیسک مثل قبل نادیده گرفته می‌شود؛ هنگام خروج
+# پردازه (atexit) صف خالی می‌شود.
+
+
+def _append(path: Path, lines: list[str], max_bytes: int) -> None:
+    """افزودن خطوط با چرخش ساده: پس از max_bytes فایل فعلی ← .1"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    if path.exists() and path.stat().st_size > max_bytes:
+        path.replace(path.with_suffix(path.suffix + ".1"))
+    with path.open("a", encoding="utf-8") as f:
+        f.write("".join(line + "\n" for line in lines))
+
+
+class LogWriter:
+    def __init__(self) -> None:
+        self._queue: queue.SimpleQueue[tuple[Path, str, int] | None] = queue.SimpleQueue()
+        self._thread: threading.Thread | None = None
+        self._lock = threading.Lock()
+
+    def append(self, path: Path, line: str, max_bytes: int) -> None:
+        """در صف گذاشتن یک خط (بدون «\\n»)؛ هیچ کار دیسکی روی فراخواننده نیست"""
+        if self._thread is None:
+            self._start()
+        self._queue.put((path, line, max_bytes))
+
+    def _start(self) -> None:
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="log-writer", daemon=True)
+                self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            item = self._queue.get()
+            batch: dict[tuple[Path, int], list[str]] = defaultdict(list)
+            stop = False
+            while item is not None:
+                path, line, max_bytes = item
+                batch[(path, max_bytes)].append(line)
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+            else:
+                stop = True
+            for (path, max_bytes), lines in batch.items():
+                try:
+                    _append(path, lines, max_bytes)
+                except OSError:
+                    pass
+            if stop:
+                return
+
+    def close(self, timeout: float = 5.0) -> None:
+        """نوشتن خطوط باقی‌مانده و توقف رشته"""
+        thread = self._thread
+        if thread is None:
+            return
+        self._queue.put(None)
+        thread.join(timeout)
+        self._thread = None
+
+
+LOG_WRITER = LogWriter()
+atexit.register(LOG_WRITER.close)
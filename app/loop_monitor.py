@@ -0,0 +1,173 @@
+from __future__ import annotations
+import asyncio
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+
+from .health import register_check
+from .metrics import REGISTRY
+
+# --------------------------------------------------------------------------- #
+#              پایش تأخیر حلقهٔ asyncio و آشکارساز فراخوانی‌های مسدودکننده     #
+# --------------------------------------------------------------------------- #
+# کاوشگر: یک task که مدام interval ثانیه می‌خوابد و بیدار شدن دیرتر از موعد
+# (lag) را با perf_counter می‌سنجد؛ هر بیدار شدن یک «ضربان» (beat) هم هست.
+#
+# حالت عیب‌یابی (block_debug): یک رشتهٔ نگهبان بیرون از حلقه ضربان را
+# می‌پاید؛ اگر بیش از block_threshold ضربانی نیامد، یعنی یک callback حلقه را
+# نگه داشته است. همان لحظه پشتهٔ رشتهٔ حلقه (همان کد مسدودکننده، مثلاً
+# read_text در app/storage) ثبت می‌شود و با ضربان بعدی مدت واقعی انسداد.
+#
+# readiness: اگر کاوشگر زنده نباشد یا p99 تأخیر پنجرهٔ اخیر از ready_lag بیشتر
+# شود، نسخه «آماده» گزارش نمی‌شود (app/health.py).
+
+LAG_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+LOOP_LAG = REGISTRY.histogram(
+    "bot_event_loop_lag_seconds",
+    "Event-loop scheduling delay measured by the lag probe",
+    buckets=LAG_BUCKETS,
+)
+LOOP_BLOCKS = REGISTRY.counter(
+    "bot_event_loop_blocked_total",
+    "Times the loop was blocked longer than the block threshold (block debug mode only)",
+)
+
+
+def _percentile(sorted_values: list[float], p: float) -> float:
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * p))]
+
+
+class LoopMonitor:
+    def __init__(
+        self,
+        *,
+        interval: float = 0.05,
+        window: float = 60.0,
+        block_debug: bool = False,
+        block_threshold: float = 0.1,
+        ready_lag: float = 1.0,
+    ) -> None:
+        self.interval = interval
+        self.block_debug = block_debug
+        self.block_threshold = block_threshold
+        self.ready_lag = ready_lag
+        # (زمان monotonic، lag) نمونه‌های پنجرهٔ اخیر
+        self.samples: deque[tuple[float, float]] = deque(maxlen=max(int(window / interval), 1))
+        self.blocks: deque[dict] = deque(maxlen=50)
+        self.beat = 0.0
+        self._open_block: dict | None = None
+        self._task: asyncio.Task | None = None
+        self._watchdog: threading.Thread | None = None
+        self._stop = threading.Event()
+
+    def configure(
+        self,
+        *,
+        interval_ms: float,
+        block_debug: bool,
+        block_ms: float,
+        ready_lag_ms: float,
+    ) -> None:
+        """تنظیم از روی SETTINGS (پیش از start)"""
+        window = (self.samples.maxlen or 1) * self.interval
+        self.interval = max(interval_ms, 1.0) / 1e3
+        self.block_debug = block_debug
+        self.block_threshold = block_ms / 1e3
+        self.ready_lag = ready_lag_ms / 1e3
+        self.samples = deque(self.samples, maxlen=max(int(window / self.interval), 1))
+
+    # ------------------------------ کاوشگر ------------------------------ #
+
+    async def _probe(self) -> None:
+        while True:
+            t0 = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            lag = max(time.perf_counter() - t0 - self.interval, 0.0)
+            now = self.beat = time.monotonic()
+            self.samples.append((now, lag))
+            LOOP_LAG.observe(lag)
+            block = self._open_block
+            if block is not None:
+                # مدت واقعی انسداد همین تأخیر بیدار شدن است
+                block["blocked_ms"] = round(lag * 1e3, 3)
+                self._open_block = None
+
+    # ------------------------- نگهبان (حالت عیب‌یابی) ------------------------- #
+
+    def _watch(self, loop: asyncio.AbstractEventLoop, loop_thread: int) -> None:
+        reported = None
+        while not self._stop.wait(self.block_threshold / 4):
+            beat = self.beat
+            stalled = time.monotonic() - beat - self.interval
+            if stalled <= self.block_threshold or beat == reported:
+                continue
+            reported = beat
+            frame = sys._current_frames().get(loop_thread)
+            stack = "".join(traceback.format_stack(frame)) if frame is not None else ""
+            del frame
+            event = {"ts": time.time(), "blocked_ms": round(stalled * 1e3, 3), "stack": stack}
+            self.blocks.append(event)
+            self._open_block = event
+            # متریک‌ها فقط روی حلقه تغییر می‌کنند؛ پس از آزاد شدن حلقه شمرده می‌شود
+            try:
+                loop.call_soon_threadsafe(LOOP_BLOCKS.inc)
+            except RuntimeError:
+                return
+
+    # ------------------------------- کنترل ------------------------------- #
+
+    def start(self) -> None:
+        """باید از درون حلقهٔ در حال اجرا صدا زده شود"""
+        if self._task is not None:
+            return
+        self.beat = time.monotonic()
+        self._task = asyncio.get_running_loop().create_task(self._probe(), name="loop-lag-probe")
+        if self.block_debug:
+            self._stop.clear()
+            self._watchdog = threading.Thread(
+                target=self._watch,
+                args=(asyncio.get_running_loop(), threading.get_ident()),
+                name="loop-block-watchdog",
+                daemon=True,
+            )
+            self._watchdog.start()
+
+    async def stop(self) -> None:
+        self._stop.set()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    # ------------------------------ گزارش ------------------------------ #
+
+    def stats(self, recent: float | None = None) -> dict:
+        """آمار تأخیر پنجره (یا recent ثانیهٔ آخر) به میلی‌ثانیه"""
+        cutoff = time.monotonic() - recent if recent else 0.0
+        lags = sorted(lag for ts, lag in self.samples if ts >= cutoff)
+        return {
+            "samples": len(lags),
+            "p50_ms": round(_percentile(lags, 0.50) * 1e3, 3),
+            "p99_ms": round(_percentile(lags, 0.99) * 1e3, 3),
+            "max_ms": round((lags[-1] if lags else 0.0) * 1e3, 3),
+            "since_beat_ms": round((time.monotonic() - self.beat) * 1e3, 3) if self.beat else None,
+        }
+
+    def readiness(self) -> tuple[bool, dict]:
+        stats = self.stats(recent=10.0)
+        alive = self._task is not None and not self._task.done()
+        stale = stats["since_beat_ms"] is None or stats["since_beat_ms"] > max(self.interval * 20, 2.0) * 1e3
+        ok = alive and not stale and stats["p99_ms"] <= self.ready_lag * 1e3
+        return ok, {"probe_alive": alive, "ready_lag_ms": self.ready_lag * 1e3, **stats}
+
+
+LOOP_MONITOR = LoopMonitor()
+register_check("event_loop", LOOP_MONITOR.readiness)
@@ -0,0 +1,243 @@
+from __future__ import annotations
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Iterable, Iterator
+
+from .spans import add_span
+
+# --------------------------------------------------------------------------- #
+#           شمارنده‌ها و هیستوگرام‌های ساده با خروجی متنی Prometheus          #
+# --------------------------------------------------------------------------- #
+# بدون وابستگی خارجی. هر متریک یک dict از «تاپل برچسب‌ها» به مقدار است؛ ثبت
+# یک مشاهده یک جست‌وجوی dict و (برای هیستوگرام) یک bisect است و رشتهٔ خروجی
+# فقط هنگام خواندن /metrics ساخته می‌شود. همهٔ تغییرها روی رشتهٔ حلقهٔ asyncio
+# انجام می‌شوند، پس قفل لازم نیست؛ مشاهده‌هایی که روی رشتهٔ دیگری رخ می‌دهند
+# به حلقه برگردانده می‌شوند: storage_io روی رشتهٔ storage-io فقط جمع می‌کند و
+# run_io (app/storage/io.py) پس از پایان کار آن‌ها را روی حلقه ثبت می‌کند؛
+# نگهبان app/loop_monitor.py هم با call_soon_threadsafe.
+
+Labels = tuple[str, ...]
+
+# مرزهای پیش‌فرض هیستوگرام تأخیر (ثانیه)
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _fmt_labels(names: Labels, values: Labels, extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _fmt_value(v: float) -> str:
+    if v == float("inf"):
+        return "+Inf"
+    return repr(float(v)) if not float(v).is_integer() else str(int(v))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str, labelnames: Labels = ()) -> None:
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+
+    def samples(self) -> Iterable[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        head = f"# HELP {self.name} {self.help}\n# TYPE {self.name} {self.kind}\n"
+        return head + "".join(line + "\n" for line in self.samples())
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: Labels = ()) -> None:
+        super().__init__(name, help, labelnames)
+        self.values: dict[Labels, float] = {}
+
+    def inc(self, labels: Labels = (), amount: float = 1) -> None:
+        self.values[labels] = self.values.get(labels, 0) + amount
+
+    def samples(self) -> Iterable[str]:
+        for labels, v in sorted(self.values.items()):
+            yield f"{self.name}{_fmt_labels(self.labelnames, labels)} {_fmt_value(v)}"
+
+
+class Gauge(_Metric):
+    """
+    مقدار لحظه‌ای؛ یا با set/inc/dec، یا با collect که هنگام خواندن
+    (و نه در مسیر آپدیت) مقدارها را برمی‌گرداند: [(labels, value), ...]
+    """
+    kind = "gauge"
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labelnames: Labels = (),
+        collect: Callable[[], Iterable[tuple[Labels, float]]] | None = None,
+    ) -> None:
+        super().__init__(name, help, labelnames)
+        self.values: dict[Labels, float] = {}
+        self.collect = collect
+
+    def set(self, value: float, labels: Labels = ()) -> None:
+        self.values[labels] = value
+
+    def inc(self, labels: Labels = (), amount: float = 1) -> None:
+        self.values[labels] = self.values.get(labels, 0) + amount
+
+    def dec(self, labels: Labels = (), amount: float = 1) -> None:
+        self.values[labels] = self.values.get(labels, 0) - amount
+
+    def samples(self) -> Iterable[str]:
+        values = dict(self.collect()) if self.collect else self.values
+        for labels, v in sorted(values.items()):
+            yield f"{self.name}{_fmt_labels(self.labelnames, labels)} {_fmt_value(v)}"
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(
+        self, name: str, help: str, labelnames: Labels = (), buckets=LATENCY_BUCKETS
+    ) -> None:
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # برای هر برچسب: [شمارش غیرتجمعی هر سطل (+Inf در انتها)، مجموع]
+        self.values: dict[Labels, list] = {}
+
+    def observe(self, value: float, labels: Labels = ()) -> None:
+        cur = self.values.get(labels)
+        if cur is None:
+            cur = self.values[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+        cur[0][bisect_left(self.buckets, value)] += 1
+        cur[1] += value
+
+    def samples(self) -> Iterable[str]:
+        for labels, (counts, total) in sorted(self.values.items()):
+            acc = 0
+            for bound, n in zip((*self.buckets, float("inf")), counts):
+                acc += n
+                le = f'le="{_fmt_value(bound)}"'
+                yield f"{self.name}_bucket{_fmt_labels(self.labelnames, labels, le)} {acc}"
+            yield f"{self.name}_sum{_fmt_labels(self.labelnames, labels)} {_fmt_value(total)}"
+            yield f"{self.name}_count{_fmt_labels(self.labelnames, labels)} {acc}"
+
+
+class Registry:
+    def __init__(self) -> None:
+        self._metrics: dict[str, _Metric] = {}
+
+    def _add(self, metric: _Metric) -> _Metric:
+        if metric.name in self._metrics:
+            raise RuntimeError(f"متریک تکراری: {metric.name}")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help: str, labelnames: Labels = ()) -> Counter:
+        return self._add(Counter(name, help, labelnames))
+
+    def gauge(self, name: str, help: str, labelnames: Labels = (), collect=None) -> Gauge:
+        return self._add(Gauge(name, help, labelnames, collect))
+
+    def histogram(self, name: str, help: str, labelnames: Labels = (), buckets=LATENCY_BUCKETS) -> Histogram:
+        return self._add(Histogram(name, help, labelnames, buckets))
+
+    def render(self) -> str:
+        return "".join(m.render() for m in self._metrics.values())
+
+
+REGISTRY = Registry()
+
+# ----------------------------- متریک‌های ربات ------------------------------ #
+
+UPDATE_LATENCY = REGISTRY.histogram(
+    "bot_update_duration_seconds",
+    "End-to-end update processing time (all middlewares and the handler) by update type",
+    ("type",),
+)
+HANDLER_LATENCY = REGISTRY.histogram(
+    "bot_handler_duration_seconds",
+    "Handler latency by router module and handler name",
+    ("router", "handler"),
+)
+HANDLER_ERRORS = REGISTRY.counter(
+    "bot_handler_errors_total",
+    "Handlers that raised, by router module, handler and exception type",
+    ("router", "handler", "error"),
+)
+
+API_CALLS = REGISTRY.counter(
+    "bot_api_requests_total", "Telegram Bot API requests by method", ("method",)
+)
+API_ERRORS = REGISTRY.counter(
+    "bot_api_errors_total",
+    "Failed Telegram Bot API requests by method and exception type",
+    ("method", "error"),
+)
+API_LATENCY = REGISTRY.histogram(
+    "bot_api_request_duration_seconds", "Telegram Bot API latency by method", ("method",)
+)
+API_INFLIGHT = REGISTRY.gauge(
+    "bot_api_requests_in_flight", "Telegram Bot API requests currently awaiting a response"
+)
+
+OUTBOUND_QUEUE = REGISTRY.gauge(
+    "bot_outbound_queue_depth",
+    "Bot API requests of bulk moderation waiting for a rate-limiter slot",
+)
+
+STORAGE_OPS = REGISTRY.counter(
+    "bot_storage_ops_total", "JSON storage file reads/writes by store", ("store", "op")
+)
+
+STORAGE_PENDING = REGISTRY.gauge(
+    "bot_storage_io_pending",
+    "Storage calls queued or running on the storage I/O thread",
+)
+
+
+# مشاهده‌های storage_io روی رشتهٔ storage-io: (store, op, ثانیه)
+_DEFERRED: ContextVar[list | None] = ContextVar("storage_io_deferred", default=None)
+
+
+def _record_storage(store: str, op: str, seconds: float) -> None:
+    STORAGE_OPS.inc((store, op))
+    add_span("storage", f"{store}.{op}", seconds)
+
+
+@contextmanager
+def storage_io(store: str, op: str) -> Iterator[None]:
+    """شمارش و زمان‌سنجی یک خواندن/نوشتن فایل در app/storage (span نوع storage)"""
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        seconds = time.perf_counter() - t0
+        deferred = _DEFERRED.get()
+        if deferred is None:
+            _record_storage(store, op, seconds)
+        else:
+            deferred.append((store, op, seconds))
+
+
+def call_deferred(ops: list, fn: Callable, *args, **kwargs):
+    """اجرای fn بیرون از حلقه؛ مشاهده‌های storage_io فقط در ops جمع می‌شوند"""
+    _DEFERRED.set(ops)
+    return fn(*args, **kwargs)
+
+
+def replay_storage_io(ops: list) -> None:
+    """ثبت مشاهده‌های جمع‌شده با call_deferred (روی حلقه)"""
+    for store, op, seconds in ops:
+        _record_storage(store, op, seconds)
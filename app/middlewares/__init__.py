@@ -0,0 +1,31 @@
+from aiogram import Dispatcher
+
+from ..state_backend import get_backend
+from ..update_log import UPDATE_RECORDER
+from .identity import Identity, IdentityMiddleware
+from .metrics import HandlerMetricsMiddleware, setup_handler_metrics
+from .recording import UpdateRecordMiddleware
+from .shared_state import SharedStateMiddleware
+from .timing import UpdateTimingMiddleware
+
+__all__ = [
+    "HandlerMetricsMiddleware",
+    "Identity",
+    "IdentityMiddleware",
+    "SharedStateMiddleware",
+    "UpdateRecordMiddleware",
+    "UpdateTimingMiddleware",
+    "setup_middlewares",
+]
+
+
+def setup_middlewares(dp: Dispatcher) -> None:
+    """ثبت میان‌افزارهای سراسری روی Dispatcher"""
+    # بیرونی‌ترین: زمان همهٔ لایه‌های بعدی را هم می‌شمارد
+    dp.update.outer_middleware(UpdateTimingMiddleware())
+    if get_backend().shared:
+        dp.update.outer_middleware(SharedStateMiddleware())
+    dp.update.outer_middleware(IdentityMiddleware())
+    if UPDATE_RECORDER.enabled:
+        dp.update.outer_middleware(UpdateRecordMiddleware())
+    setup_handler_metrics(dp)
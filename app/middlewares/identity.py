@@ -0,0 +1,60 @@
+from __future__ import annotations
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable
+
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject
+
+from ..state_backend import get_backend
+from ..storage import is_admin, is_owner
+
+# مدت اعتبار نتیجهٔ مثبت بررسی عضویت (ثانیه).
+# نتیجهٔ منفی کش نمی‌شود تا «🔁 بررسی عضویت» بلافاصله پس از عضویت کار کند.
+MEMBERSHIP_TTL = 300
+
+
+@dataclass(frozen=True, slots=True)
+class Identity:
+    """
+    نقش فرستندهٔ آپدیت؛ یک بار در هر آپدیت محاسبه و به هندلرها تزریق می‌شود.
+    is_member: True ← عضو (یا ادمین)، None ← نامعلوم (باید از API پرسید)
+    """
+    user_id: int
+    is_admin: bool
+    is_owner: bool
+    is_member: bool | None
+
+
+async def cached_membership(user_id: int) -> bool | None:
+    cur = await get_backend().get("membership", user_id)
+    return True if cur is not None and cur.value else None
+
+
+async def remember_membership(user_id: int, ok: bool) -> None:
+    if ok:
+        await get_backend().put("membership", user_id, True, ttl=MEMBERSHIP_TTL)
+
+
+async def resolve_identity(user_id: int) -> Identity:
+    admin = is_admin(user_id)
+    return Identity(
+        user_id=user_id,
+        is_admin=admin,
+        is_owner=is_owner(user_id),
+        is_member=True if admin else await cached_membership(user_id),
+    )
+
+
+class IdentityMiddleware(BaseMiddleware):
+    """تزریق data["identity"] برای هر آپدیتی که فرستنده دارد"""
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: dict[str, Any],
+    ) -> Any:
+        user = data.get("event_from_user")
+        if user is not None:
+            data["identity"] = await resolve_identity(user.id)
+        return await handler(event, data)
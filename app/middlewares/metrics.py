@@ -0,0 +1,64 @@
+from __future__ import annotations
+import time
+from typing import Any, Awaitable, Callable
+
+from aiogram import BaseMiddleware, Dispatcher
+from aiogram.types import TelegramObject
+
+from ..api_trace import CURRENT_HANDLER
+from ..metrics import HANDLER_ERRORS, HANDLER_LATENCY
+from ..spans import CURRENT_SPANS
+
+
+def handler_labels(data: dict[str, Any]) -> tuple[str, str]:
+    """
+    (ماژول روتر، نام هندلر) برای برچسب متریک‌ها.
+    روترها بی‌نام‌اند (نامشان id است)، پس نام ماژول هندلر برچسب پایدارتری است.
+    برای پیش‌مسیریابی متن، هندلر واقعی همان text_route است.
+    """
+    fn = data["handler"].callback
+    route = data.get("text_route")
+    if route is not None:
+        fn = route
+    return fn.__module__.rsplit(".", 1)[-1], fn.__name__
+
+
+class HandlerMetricsMiddleware(BaseMiddleware):
+    """
+    میان‌افزار داخلی (inner): فقط پس از عبور فیلترها و برای هندلر انتخاب‌شده
+    اجرا می‌شود؛ هزینه‌اش دو perf_counter و یک ثبت در هیستوگرام است.
+    """
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: dict[str, Any],
+    ) -> Any:
+        labels = handler_labels(data)
+        name = ".".join(labels)
+        # برای ApiTrace: درخواست‌های Bot API این هندلر به نامش ثبت می‌شوند
+        ctx = CURRENT_HANDLER.set(name)
+        spans = CURRENT_SPANS.get()
+        if spans is not None:
+            spans.handler = name
+        t0 = time.perf_counter()
+        try:
+            return await handler(event, data)
+        except Exception as e:
+            HANDLER_ERRORS.inc((*labels, type(e).__name__))
+            raise
+        finally:
+            HANDLER_LATENCY.observe(time.perf_counter() - t0, labels)
+            CURRENT_HANDLER.reset(ctx)
+
+
+def setup_handler_metrics(dp: Dispatcher) -> None:
+    """
+    ثبت HandlerMetricsMiddleware روی همهٔ رویدادهای Dispatcher؛ aiogram
+    میان‌افزارهای داخلی والد را روی هندلرهای همهٔ روترهای فرزند هم اجرا می‌کند.
+    """
+    mw = HandlerMetricsMiddleware()
+    for name, observer in dp.observers.items():
+        if name != "update":
+            observer.middleware(mw)
@@ -0,0 +1,30 @@
+from __future__ import annotations
+from typing import Any, Awaitable, Callable
+
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject, Update
+
+from ..update_log import UPDATE_RECORDER
+
+
+class UpdateRecordMiddleware(BaseMiddleware):
+    """
+    ثبت هر آپدیت ورودی (پیش از هندلر) در UPDATE_RECORDER برای بازپخش.
+    پس از IdentityMiddleware ثبت می‌شود تا نقش ادمین/مالک هم کنار آپدیت بماند.
+    """
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: dict[str, Any],
+    ) -> Any:
+        if isinstance(event, Update):
+            identity = data.get("identity")
+            role = None
+            if identity is not None:
+                role = "o" if identity.is_owner else "a" if identity.is_admin else None
+            UPDATE_RECORDER.record(
+                event.model_dump(mode="json", by_alias=True, exclude_none=True), role
+            )
+        return await handler(event, data)
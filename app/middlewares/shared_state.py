@@ -0,0 +1,57 @@
+from __future__ import annotations
+import copy
+from typing import Any, Awaitable, Callable
+
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject
+
+from ..handlers.state import WAIT_STATES
+from ..state_backend import get_backend
+
+
+class SharedStateMiddleware(BaseMiddleware):
+    """
+    همگام‌سازی وضعیت‌های انتظارِ کاربر با انبارهٔ مشترک.
+
+    پیش از هندلر، رکورد واحد «wait» کاربر از انباره خوانده و در دیکشنری‌های
+    state.py قرار می‌گیرد (تا فیلترهای همگام مثل uid in DEST_WAIT کار کنند)؛
+    پس از هندلر، اگر تغییری رخ داده بود، همان رکورد (با شرط نسخه) دوباره
+    نوشته می‌شود.
+    """
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: dict[str, Any],
+    ) -> Any:
+        backend = get_backend()
+        user = data.get("event_from_user")
+        if user is None or not backend.shared:
+            return await handler(event, data)
+
+        uid = user.id
+        rec = await backend.get("wait", uid)
+        loaded = rec.value if rec else {}
+        before = copy.deepcopy(loaded)
+
+        for name, states in WAIT_STATES.items():
+            if name in loaded:
+                states[uid] = loaded[name]
+            else:
+                states.pop(uid, None)
+
+        try:
+            return await handler(event, data)
+        finally:
+            after = {
+                name: states[uid] for name, states in WAIT_STATES.items() if uid in states
+            }
+            # نوشتن مشروط به نسخهٔ خوانده‌شده؛ اگر نسخهٔ دیگری از ربات در این
+            # فاصله رکورد را عوض کرده باشد، تغییر او می‌ماند و این یکی کنار می‌رود
+            version = rec.version if rec else 0
+            if after != before:
+                if after:
+                    await backend.put("wait", uid, after, expected=version)
+                elif rec:
+                    await backend.delete("wait", uid, expected=version)
@@ -0,0 +1,45 @@
+from __future__ import annotations
+import time
+from typing import Any, Awaitable, Callable
+
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject, Update
+
+from ..health import UPDATES_HEALTH
+from ..metrics import UPDATE_LATENCY
+from ..spans import CURRENT_SPANS, SLOW_LOG, UpdateSpans, slow_entry
+
+
+class UpdateTimingMiddleware(BaseMiddleware):
+    """
+    زمان کل هر آپدیت (از ورود به Dispatcher تا پایان هندلر) به تفکیک
+    api / storage / wait / cpu؛ آپدیت‌های کندتر از آستانه در SLOW_LOG ثبت می‌شوند.
+    زمان آخرین آپدیت پردازش‌شده هم برای /healthz ثبت می‌شود.
+    باید بیرونی‌ترین میان‌افزار باشد تا زمان میان‌افزارهای دیگر را هم بشمارد.
+    """
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: dict[str, Any],
+    ) -> Any:
+        spans = UpdateSpans()
+        ctx = CURRENT_SPANS.set(spans)
+        t0 = time.perf_counter()
+        failed = True
+        try:
+            result = await handler(event, data)
+            failed = False
+            return result
+        finally:
+            total = time.perf_counter() - t0
+            CURRENT_SPANS.reset(ctx)
+            if isinstance(event, Update):
+                UPDATES_HEALTH.update_done(failed)
+                UPDATE_LATENCY.observe(total, (event.event_type,))
+                if total >= SLOW_LOG.threshold:
+                    user = data.get("event_from_user")
+                    SLOW_LOG.record(
+                        slow_entry(event.event_type, event.update_id, user.id if user else None, total, spans)
+                    )
@@ -0,0 +1,142 @@
+from __future__ import annotations
+import itertools
+import re
+from typing import Mapping
+
+# --------------------------------------------------------------------------- #
+#            نرمال‌سازی متن فارسی/عربی (یک‌جا، با جدول‌های از پیش ساخته)      #
+# --------------------------------------------------------------------------- #
+# همهٔ اعتبارسنجی‌ها، جست‌وجو و کپشن‌ها از همین ماژول استفاده می‌کنند.
+# هر ترکیب از گزینه‌ها یک جدول str.maketrans دارد که در زمان import ساخته
+# می‌شود؛ پس normalize فقط یک str.translate است.
+
+PERSIAN_DIGITS = "۰۱۲۳۴۵۶۷۸۹"
+ARABIC_DIGITS = "٠١٢٣٤٥٦٧٨٩"
+
+# نویسه‌های مخفی جهت‌نما که تلگرام/کیبوردها اضافه می‌کنند و regex را خراب می‌کنند
+HIDDEN_MARKS = (
+    "\u200e"  # LTR mark
+    "\u200f"  # RTL mark
+    "\u202a"  # LRE
+    "\u202b"  # RLE
+    "\u202c"  # PDF
+    "\u202d"  # LRO
+    "\u202e"  # RLO
+    "\u2066"  # LRI
+    "\u2067"  # RLI
+    "\u2068"  # FSI
+    "\u2069"  # PDI
+    "\u061c"  # ALM
+)
+
+_DIGIT_MAP = {
+    **{ord(c): str(i) for i, c in enumerate(PERSIAN_DIGITS)},
+    **{ord(c): str(i) for i, c in enumerate(ARABIC_DIGITS)},
+}
+_BIDI_MAP = {ord(c): None for c in HIDDEN_MARKS}
+_LETTER_MAP = {
+    0x064A: "ی",  # ي عربی
+    0x0649: "ی",  # ى (الف مقصوره)
+    0x0643: "ک",  # ك عربی
+    0x0629: "ه",  # ة (تای گرد)
+}
+_DECIMAL_MAP = {ord(","): ".", 0x066B: ".", 0x066C: "."}
+
+_TABLES: dict[tuple[bool, bool, bool, bool], dict[int, str | None]] = {}
+for _flags in itertools.product((False, True), repeat=4):
+    _t: dict[int, str | None] = {}
+    for _on, _part in zip(_flags, (_DIGIT_MAP, _BIDI_MAP, _LETTER_MAP, _DECIMAL_MAP)):
+        if _on:
+            _t.update(_part)
+    _TABLES[_flags] = _t
+
+# کلید جست‌وجو: علاوه بر همهٔ موارد بالا (به‌جز اعشار)، «آ/أ/إ» → «ا»،
+# نیم‌فاصله → فاصله و حذف کشیده (ـ)
+_SEARCH_TABLE = {
+    **_TABLES[(True, True, True, False)],
+    0x0622: "ا", 0x0623: "ا", 0x0625: "ا",
+    0x200C: " ",
+    0x0640: None,
+}
+
+_TO_PERSIAN = str.maketrans("0123456789" + ARABIC_DIGITS, PERSIAN_DIGITS * 2)
+_NON_LATIN_DIGIT_RX = re.compile(f"[{PERSIAN_DIGITS}{ARABIC_DIGITS}]")
+
+
+def table(
+    *, digits: bool = True, bidi: bool = True, letters: bool = False, decimal: bool = False
+) -> dict[int, str | None]:
+    """جدول str.translate از پیش ساخته‌شده برای یک ترکیب از گزینه‌ها"""
+    return _TABLES[(digits, bidi, letters, decimal)]
+
+
+def normalize(
+    text: str | None,
+    *,
+    digits: bool = True,
+    bidi: bool = True,
+    letters: bool = False,
+    decimal: bool = False,
+) -> str:
+    """
+    یک گذر روی متن:
+    digits  ← ارقام فارسی/عربی → لاتین
+    bidi    ← حذف نویسه‌های مخفی جهت‌نما
+    letters ← یکسان‌سازی حروف عربی به فارسی (ي→ی، ك→ک، …)
+    decimal ← جداکننده‌های «,» «٫» «٬» → «.»
+    """
+    if not text:
+        return ""
+    return text.translate(_TABLES[(digits, bidi, letters, decimal)])
+
+
+def normalize_payload(
+    payload: Mapping[str, object],
+    spec: Mapping[str, dict | None],
+    aliases: Mapping[str, tuple[str, ...]] | None = None,
+) -> dict[str, str]:
+    """
+    نسخهٔ دسته‌ای: همهٔ فیلدهای spec یک‌جا به رشته تبدیل، نرمال و strip می‌شوند.
+    spec: {نام فیلد: table(...)} ؛ None یعنی فقط strip
+    aliases: {نام فیلد: کلیدهای ورودی به ترتیب}؛ اولین مقدار غیرخالی برداشته
+             می‌شود (فیلدهای بدون alias فقط از کلید هم‌نام خوانده می‌شوند)
+    مقدار خالی/نبودِ کلید (None، ""، 0) به "" تبدیل می‌شود.
+    """
+    out: dict[str, str] = {}
+    for name, tbl in spec.items():
+        keys = aliases.get(name) if aliases else None
+        if keys:
+            raw = next((payload[k] for k in keys if payload.get(k)), None)
+        else:
+            raw = payload.get(name)
+        value = "" if not raw else (raw if type(raw) is str else str(raw))
+        out[name] = (value.translate(tbl) if tbl is not None else value).strip()
+    return out
+
+
+def search_key(text: str | None) -> str:
+    """کلید یکسان برای جست‌وجو/مقایسه: نرمال، حروف کوچک، فاصله‌های تکی"""
+    if not text:
+        return ""
+    return " ".join(text.translate(_SEARCH_TABLE).casefold().split())
+
+
+def to_persian_digits(s: str) -> str:
+    """تبدیل ارقام لاتین (و عربی) به فارسی"""
+    if not s:
+        return ""
+    return s.translate(_TO_PERSIAN)
+
+
+def contains_persian_digits(s: str) -> bool:
+    return bool(_NON_LATIN_DIGIT_RX.search(s or ""))
+
+
+def normalize_digits(s: str) -> str:
+    """تبدیل ارقام فارسی و عربی به لاتین"""
+    return normalize(s, digits=True, bidi=False)
+
+
+def clean_text(s: str) -> str:
+    """حذف تمام کاراکترهای مخفی تلگرام که regex را خراب می‌کند"""
+    return normalize(s, digits=False, bidi=True)
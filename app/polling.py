@@ -0,0 +1,50 @@
+from __future__ import annotations
+import asyncio
+import logging
+import random
+import time
+
+from aiogram import Bot, Dispatcher
+
+from .health import UPDATES_HEALTH
+
+# --------------------------------------------------------------------------- #
+#                 اجرای polling زیر نظر ناظر با راه‌اندازی مجدد                #
+# --------------------------------------------------------------------------- #
+# اگر dp.start_polling با استثنا بیرون بیاید (مثلاً خطای bot.get_me هنگام
+# شروع یا باگی در حلقهٔ polling) پس از backoff نمایی دوباره اجرا می‌شود.
+# اجرایی که بیش از STABLE_RUN ثانیه دوام آورده backoff و شمارش را صفر می‌کند؛
+# پس از max_crashes شکست پیاپی UPDATES_HEALTH.gave_up روشن و /healthz قرمز
+# می‌شود تا پلتفرم نسخه را ری‌استارت کند.
+# خروج عادی start_polling (سیگنال SIGINT/SIGTERM) یعنی توقف و ناظر برمی‌گردد.
+
+log = logging.getLogger(__name__)
+
+BACKOFF_MIN = 1.0
+BACKOFF_MAX = 60.0
+STABLE_RUN = 60.0
+
+
+async def supervise_polling(dp: Dispatcher, bot: Bot, **polling_kwargs) -> None:
+    delay = BACKOFF_MIN
+    while not UPDATES_HEALTH.gave_up:
+        UPDATES_HEALTH.polling_started()
+        t0 = time.monotonic()
+        try:
+            # نشست Bot بین اجراها (و مسیرهای وب) مشترک است؛ بسته نشود
+            await dp.start_polling(bot, close_bot_session=False, **polling_kwargs)
+        except asyncio.CancelledError:
+            UPDATES_HEALTH.polling_stopped()
+            raise
+        except Exception as e:
+            stable = time.monotonic() - t0 >= STABLE_RUN
+            if stable:
+                delay = BACKOFF_MIN
+            UPDATES_HEALTH.polling_crashed(e, stable=stable)
+            log.exception("polling crashed (restart #%d, next in %.1fs)", UPDATES_HEALTH.restarts, delay)
+            await asyncio.sleep(delay * random.uniform(0.9, 1.1))
+            delay = min(delay * 2, BACKOFF_MAX)
+            continue
+        UPDATES_HEALTH.polling_stopped()
+        return
+    log.error("polling gave up after %d consecutive crashes", UPDATES_HEALTH.crash_streak)
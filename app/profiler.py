@@ -0,0 +1,117 @@
+from __future__ import annotations
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+from types import CodeType, FrameType
+
+# --------------------------------------------------------------------------- #
+#            پروفایلر نمونه‌بردار (روشن/خاموش از /debug/profile/…)            #
+# --------------------------------------------------------------------------- #
+# یک رشتهٔ جدا هر interval ثانیه پشتهٔ رشتهٔ حلقهٔ asyncio را از
+# sys._current_frames() می‌خواند و شمارش «پشتهٔ فشرده» (collapsed stack:
+# قاب‌ها از ریشه با «;» و در انتها تعداد) را نگه می‌دارد؛ خروجی مستقیم به
+# flamegraph.pl یا speedscope داده می‌شود. وقتی حلقه بیکار است پشته در
+# select است؛ همین سهم بیکاری را هم نشان می‌دهد.
+# هزینه: یک پیمایش پشته در هر نمونه (با interval پیش‌فرض ۵ms حدود ۲۰۰ بار در
+# ثانیه)، بیرون از رشتهٔ حلقه. اگر stop صدا زده نشود، پس از max_duration
+# خودبه‌خود متوقف می‌شود. هنگام کد CPU‌بر، رشتهٔ نمونه‌بردار فقط در هر
+# sys.getswitchinterval() (پیش‌فرض ۵ms) GIL می‌گیرد؛ نرخ واقعی همین است.
+
+PROFILE_DIR = Path("/tmp/bot_data/profiles")
+DEFAULT_INTERVAL = 0.005
+MAX_DURATION = 600.0
+
+
+class ProfilerBusy(Exception):
+    pass
+
+
+class SamplingProfiler:
+    def __init__(self) -> None:
+        self._thread: threading.Thread | None = None
+        self._stop = threading.Event()
+        self._labels: dict[CodeType, str] = {}
+        self.stacks: Counter[str] = Counter()
+        self.samples = 0
+        self.started_at = 0.0
+        self.interval = DEFAULT_INTERVAL
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def _label(self, code: CodeType) -> str:
+        label = self._labels.get(code)
+        if label is None:
+            label = self._labels[code] = f"{code.co_name} ({os.path.basename(code.co_filename)})"
+        return label
+
+    def _collapse(self, frame: FrameType | None) -> str:
+        parts = []
+        while frame is not None:
+            parts.append(self._label(frame.f_code))
+            frame = frame.f_back
+        parts.reverse()
+        return ";".join(parts)
+
+    def _run(self, target: int, deadline: float) -> None:
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(target)
+            if frame is not None:
+                self.stacks[self._collapse(frame)] += 1
+                self.samples += 1
+            del frame
+            if time.monotonic() >= deadline:
+                break
+
+    def start(self, *, interval: float = DEFAULT_INTERVAL, max_duration: float = MAX_DURATION) -> None:
+        """شروع نمونه‌برداری از رشتهٔ فراخوان (همان رشتهٔ حلقهٔ asyncio)"""
+        if self.running:
+            raise ProfilerBusy()
+        if self._thread is not None:
+            # دور قبلی با max_duration تمام شده و خروجی‌اش برداشته نشده بود
+            self._thread.join()
+        self.stacks = Counter()
+        self.samples = 0
+        self.interval = max(interval, 0.001)
+        self.started_at = time.time()
+        self._stop.clear()
+        deadline = time.monotonic() + min(max_duration, MAX_DURATION)
+        self._thread = threading.Thread(
+            target=self._run,
+            args=(threading.get_ident(), deadline),
+            name="sampling-profiler",
+            daemon=True,
+        )
+        self._thread.start()
+
+    def stop(self) -> tuple[str, Path | None]:
+        """توقف و نوشتن خروجی فشرده در PROFILE_DIR؛ (متن، مسیر فایل)"""
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+        text = "".join(f"{stack} {n}\n" for stack, n in self.stacks.most_common())
+        if not text:
+            return text, None
+        path = PROFILE_DIR / time.strftime("profile-%Y%m%d-%H%M%S.folded", time.localtime(self.started_at))
+        try:
+            PROFILE_DIR.mkdir(parents=True, exist_ok=True)
+            path.write_text(text, encoding="utf-8")
+        except OSError:
+            path = None
+        return text, path
+
+    def status(self) -> dict:
+        return {
+            "running": self.running,
+            "samples": self.samples,
+            "interval_ms": round(self.interval * 1e3, 3),
+            "started_at": self.started_at or None,
+        }
+
+
+PROFILER = SamplingProfiler()
@@ -0,0 +1,100 @@
+from __future__ import annotations
+import os
+import time
+from typing import Any
+
+from aiohttp import FormData
+from aiogram import Bot
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware
+from aiogram.methods import TelegramMethod
+from aiogram.types import BufferedInputFile, FSInputFile, InputFile
+
+from .api_trace import API_TRACE, PAYLOAD_SIZE
+from .health import UPDATES_HEALTH
+from .keyboards import prepared_json
+from .metrics import API_CALLS, API_ERRORS, API_INFLIGHT, API_LATENCY
+from .spans import add_span
+
+# --------------------------------------------------------------------------- #
+#           سشن HTTP که JSON از پیش ساخته‌شدهٔ کیبوردها را دوباره نمی‌سازد     #
+# --------------------------------------------------------------------------- #
+
+
+class PreparedMarkupSession(AiohttpSession):
+    """
+    اگر reply_markup از رجیستری کیبوردها باشد (app/keyboards.py)، JSON آن
+    مستقیم در فرم قرار می‌گیرد و بقیهٔ فیلدها مثل AiohttpSession آماده می‌شوند.
+    حجم فیلدهای فرم (و فایل‌ها، اگر معلوم باشد) برای ApiTrace ثبت می‌شود.
+    """
+
+    def build_form_data(self, bot: Bot, method: TelegramMethod[Any]) -> FormData:
+        markup_json = prepared_json(getattr(method, "reply_markup", None))
+        exclude = {"reply_markup"} if markup_json is not None else None
+
+        form = FormData(quote_fields=False)
+        files: dict[str, InputFile] = {}
+        size = 0
+        for key, value in method.model_dump(warnings=False, exclude=exclude).items():
+            value = self.prepare_value(value, bot=bot, files=files)
+            if not value:
+                continue
+            form.add_field(key, value)
+            size += len(value.encode()) if isinstance(value, str) else 0
+        if markup_json is not None:
+            form.add_field("reply_markup", markup_json)
+            size += len(markup_json.encode())
+        for key, value in files.items():
+            form.add_field(
+                key,
+                value.read(bot),
+                filename=value.filename or key,
+            )
+            size += _file_size(value)
+        # برای ApiTrace: build_form_data در همان task درخواست اجرا می‌شود
+        PAYLOAD_SIZE.set(size)
+        return form
+
+
+def _file_size(f: InputFile) -> int:
+    if isinstance(f, FSInputFile):
+        try:
+            return os.path.getsize(f.path)
+        except OSError:
+            return 0
+    if isinstance(f, BufferedInputFile):
+        return len(f.data)
+    return 0
+
+
+class ApiMetricsMiddleware(BaseRequestMiddleware):
+    """
+    شمارش، خطا و تأخیر هر درخواست Bot API به تفکیک متد (برای /metrics) و ثبت
+    رکورد کامل درخواست در API_TRACE (متد، چت، هندلر، تأخیر، حجم، تکرار، نتیجه)؛
+    نتیجهٔ getUpdates هم به UPDATES_HEALTH (رشتهٔ خطای polling) گزارش می‌شود
+    """
+
+    async def __call__(self, make_request, bot, method):
+        name = method.__api_method__
+        API_CALLS.inc((name,))
+        API_INFLIGHT.inc()
+        PAYLOAD_SIZE.set(0)
+        outcome = "ok"
+        t0 = time.perf_counter()
+        try:
+            result = await make_request(bot, method)
+            if name == "getUpdates":
+                UPDATES_HEALTH.fetch_ok()
+            return result
+        except Exception as e:
+            outcome = type(e).__name__
+            API_ERRORS.inc((name, outcome))
+            if name == "getUpdates":
+                UPDATES_HEALTH.fetch_failed(outcome)
+            raise
+        finally:
+            latency = time.perf_counter() - t0
+            API_INFLIGHT.dec()
+            API_LATENCY.observe(latency, (name,))
+            API_TRACE.record(name, getattr(method, "chat_id", None), latency, outcome)
+            add_span("api", name, latency)
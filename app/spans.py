@@ -0,0 +1,111 @@
+from __future__ import annotations
+import json
+import time
+from collections import deque
+from contextvars import ContextVar
+from pathlib import Path
+
+from .api_trace import chat_ref
+from .log_writer import LOG_WRITER
+
+# --------------------------------------------------------------------------- #
+#        تفکیک زمان هر آپدیت: انتظار Bot API، ورودی/خروجی انباره، CPU         #
+# --------------------------------------------------------------------------- #
+# UpdateTimingMiddleware برای هر آپدیت یک UpdateSpans در CURRENT_SPANS می‌گذارد.
+# لایه‌های پایین‌تر زمان خود را با add_span به آن اضافه می‌کنند:
+#   api     ← ApiMetricsMiddleware (app/session.py)
+#   storage ← storage_io (فایل‌های JSON) و TimedBackend (انبارهٔ وضعیت)
+#   wait    ← انتظارهای بی‌کار: صف رشتهٔ storage-io (run_io) و مهلت تجمیع آلبوم
+# «cpu» باقی‌مانده است: کل زمان منهای api، storage و wait (await‌های سنجیده‌نشده
+# هم در آن می‌مانند). taskهایی که درون آپدیت ساخته می‌شوند همان شیء را
+# از context به ارث می‌برند؛ پس با gather جمع api می‌تواند از کل بیشتر باشد.
+
+# حداکثر تعداد span جزئی که برای هر آپدیت نگه داشته می‌شود
+MAX_SPANS = 64
+
+
+class UpdateSpans:
+    __slots__ = ("handler", "api", "api_calls", "storage", "storage_ops", "wait", "spans")
+
+    def __init__(self) -> None:
+        self.handler = "-"
+        self.api = 0.0
+        self.api_calls = 0
+        self.storage = 0.0
+        self.storage_ops = 0
+        self.wait = 0.0
+        self.spans: list[tuple[str, str, float]] = []
+
+    def add(self, kind: str, name: str, seconds: float) -> None:
+        if kind == "api":
+            self.api += seconds
+            self.api_calls += 1
+        elif kind == "wait":
+            self.wait += seconds
+        else:
+            self.storage += seconds
+            self.storage_ops += 1
+        if len(self.spans) < MAX_SPANS:
+            self.spans.append((kind, name, seconds))
+
+
+CURRENT_SPANS: ContextVar[UpdateSpans | None] = ContextVar("update_spans", default=None)
+
+
+def add_span(kind: str, name: str, seconds: float) -> None:
+    spans = CURRENT_SPANS.get()
+    if spans is not None:
+        spans.add(kind, name, seconds)
+
+
+# --------------------------------------------------------------------------- #
+#                       لاگ ساخت‌یافتهٔ آپدیت‌های کند (JSONL)                 #
+# --------------------------------------------------------------------------- #
+
+SLOW_LOG_FILE = Path("/tmp/bot_data/slow_updates.jsonl")
+SLOW_LOG_MAX_BYTES = 5 * 1024 * 1024
+
+
+class SlowLog:
+    """
+    هر آپدیتِ کندتر از آستانه یک خط JSON در فایل (با چرخش ساده به .1 پس از
+    SLOW_LOG_MAX_BYTES) و آخرین رکوردها در حافظه برای /debug/slow-updates.
+    خود نوشتن با LOG_WRITER روی رشتهٔ جداست (app/log_writer.py).
+    """
+
+    def __init__(self, path: Path = SLOW_LOG_FILE, *, threshold_ms: float = 1000, keep: int = 100) -> None:
+        self.path = path
+        self.threshold = threshold_ms / 1e3
+        self.recent: deque[dict] = deque(maxlen=keep)
+
+    def configure(self, *, threshold_ms: float, path: Path | None = None) -> None:
+        self.threshold = threshold_ms / 1e3
+        if path is not None:
+            self.path = path
+
+    def record(self, entry: dict) -> None:
+        self.recent.append(entry)
+        LOG_WRITER.append(self.path, json.dumps(entry, ensure_ascii=False), SLOW_LOG_MAX_BYTES)
+
+
+def slow_entry(event_type: str, update_id: int, user_id: int | None, total: float, s: UpdateSpans) -> dict:
+    ms = lambda sec: round(sec * 1e3, 3)  # noqa: E731
+    return {
+        "ts": time.time(),
+        "update_id": update_id,
+        "type": event_type,
+        # شناسهٔ مستعار (مثل /debug/api-calls)، نه شناسهٔ خام کاربر
+        "user": chat_ref(user_id),
+        "handler": s.handler,
+        "total_ms": ms(total),
+        "api_ms": ms(s.api),
+        "api_calls": s.api_calls,
+        "storage_ms": ms(s.storage),
+        "storage_ops": s.storage_ops,
+        "wait_ms": ms(s.wait),
+        "cpu_ms": ms(max(total - s.api - s.storage - s.wait, 0.0)),
+        "spans": [{"kind": k, "name": n, "ms": ms(sec)} for k, n, sec in s.spans],
+    }
+
+
+SLOW_LOG = SlowLog()
@@ -0,0 +1,55 @@
+from .base import StateBackend, Versioned
+from .memory import MemoryBackend
+from .redis_backend import RedisBackend
+from .local import LocalRedis
+from .timed import TimedBackend
+
+__all__ = [
+    "StateBackend",
+    "Versioned",
+    "MemoryBackend",
+    "PER_REPLICA_STORES",
+    "RedisBackend",
+    "LocalRedis",
+    "TimedBackend",
+    "build_backend",
+    "get_backend",
+    "set_backend",
+]
+
+_BACKEND: StateBackend = MemoryBackend()
+
+# انباره‌های app/storage که با انبارهٔ مشترک همگام نمی‌شوند
+PER_REPLICA_STORES = ("admins", "destinations", "required_channels", "allowed_channels", "car_models")
+
+
+def build_backend(url: str) -> StateBackend:
+    """
+    ساخت انباره از روی آدرس:
+        ""  یا  memory://            ← درون‌حافظه‌ای (تک‌نسخه)
+        redis://… / rediss://…        ← Redis واقعی
+        local://                      ← LocalRedis (مسیر اشتراکی، بدون سرور)
+    انباره‌های مشترک (ورودی/خروجی واقعی) با TimedBackend زمان‌سنجی می‌شوند.
+
+    آنچه در انباره است: آگهی‌های در انتظار، وضعیت‌های انتظار کاربر، شمارهٔ
+    آگهی و کش عضویت. انباره‌های app/storage (ادمین‌ها، مقصدها، کانال‌های
+    عضویت/مجاز، نام خودروها) هنوز فایل‌های JSON هر نسخه‌اند و «مشترک نیستند»:
+    تغییر آن‌ها از پنل فقط روی همان نسخه اثر دارد (PER_REPLICA_STORES).
+    """
+    url = (url or "").strip()
+    if not url or url.startswith("memory://"):
+        return MemoryBackend()
+    if url.startswith(("redis://", "rediss://", "unix://")):
+        return TimedBackend(RedisBackend.from_url(url))
+    if url.startswith("local://"):
+        return TimedBackend(RedisBackend(LocalRedis()))
+    raise RuntimeError(f"STATE_BACKEND_URL نامعتبر است: {url}")
+
+
+def get_backend() -> StateBackend:
+    return _BACKEND
+
+
+def set_backend(backend: StateBackend) -> None:
+    global _BACKEND
+    _BACKEND = backend
@@ -0,0 +1,58 @@
+from __future__ import annotations
+from dataclasses import dataclass
+from typing import Any
+
+
+@dataclass(frozen=True)
+class Versioned:
+    """مقدار ذخیره‌شده به‌همراه شمارهٔ نسخه (برای قفل خوش‌بینانه)"""
+    value: Any
+    version: int
+
+
+class StateBackend:
+    """
+    رابط مشترک انبارهٔ وضعیتِ حین اجرا.
+
+    - هر کلید در یک «فضای نام» (ns) قرار می‌گیرد: pending، wait، counter، cache ...
+    - هر put نسخهٔ کلید را یک واحد زیاد می‌کند.
+    - expected در put/delete:
+        None ← بدون شرط
+        0    ← فقط اگر کلید وجود نداشته باشد
+        n    ← فقط اگر نسخهٔ فعلی دقیقاً n باشد
+    - shared=True یعنی چند نسخهٔ ربات این انباره را با هم شریک‌اند.
+    """
+
+    shared: bool = False
+
+    async def get(self, ns: str, key: str | int) -> Versioned | None:
+        raise NotImplementedError
+
+    async def put(
+        self,
+        ns: str,
+        key: str | int,
+        value: Any,
+        *,
+        expected: int | None = None,
+        ttl: float | None = None,
+    ) -> int | None:
+        """نسخهٔ جدید را برمی‌گرداند؛ اگر شرط expected برقرار نبود None."""
+        raise NotImplementedError
+
+    async def delete(
+        self, ns: str, key: str | int, *, expected: int | None = None
+    ) -> bool:
+        raise NotImplementedError
+
+    async def incr(
+        self, ns: str, key: str | int, amount: int = 1, *, initial: int = 0
+    ) -> int:
+        """افزایش اتمی شمارنده؛ اگر کلید نبود از initial شروع می‌شود."""
+        raise NotImplementedError
+
+    async def keys(self, ns: str) -> list[str]:
+        raise NotImplementedError
+
+    async def close(self) -> None:
+        pass
@@ -0,0 +1,83 @@
+from __future__ import annotations
+import fnmatch
+import time
+from typing import AsyncIterator
+
+from .redis_backend import DELETE_SCRIPT, INCR_SCRIPT, PUT_SCRIPT
+
+
+class LocalRedis:
+    """
+    جایگزین محلیِ Redis برای تست و اجرای آفلاین.
+
+    فقط همان زیرمجموعه‌ای از دستورات را دارد که RedisBackend استفاده می‌کند؛
+    اسکریپت‌های Lua با معادل پایتونی‌شان اجرا می‌شوند. چند RedisBackend
+    می‌توانند یک LocalRedis را شریک شوند تا چند نسخهٔ ربات شبیه‌سازی شود.
+    """
+
+    def __init__(self) -> None:
+        # key → [value, expires_at | None] ؛ value برای hash یک dict است
+        self._data: dict[str, list] = {}
+        self._scripts = {
+            PUT_SCRIPT: self._put,
+            DELETE_SCRIPT: self._delete,
+            INCR_SCRIPT: self._incr,
+        }
+
+    def _live(self, key: str) -> list | None:
+        item = self._data.get(key)
+        if item is not None and item[1] is not None and item[1] <= time.monotonic():
+            del self._data[key]
+            return None
+        return item
+
+    # ---------------------- دستورات Redis ---------------------- #
+
+    async def hmget(self, key: str, fields: list[str]) -> list[str | None]:
+        item = self._live(key)
+        h = item[0] if item and isinstance(item[0], dict) else {}
+        return [h.get(f) for f in fields]
+
+    async def eval(self, script: str, numkeys: int, *keys_and_args):
+        try:
+            impl = self._scripts[script]
+        except KeyError:
+            raise NotImplementedError("LocalRedis: اسکریپت ناشناخته") from None
+        return impl(list(keys_and_args[:numkeys]), [str(a) for a in keys_and_args[numkeys:]])
+
+    async def scan_iter(self, match: str | None = None, **_) -> AsyncIterator[str]:
+        for key in list(self._data):
+            if self._live(key) is not None and (match is None or fnmatch.fnmatchcase(key, match)):
+                yield key
+
+    async def aclose(self) -> None:
+        pass
+
+    # ------------------ معادل پایتونی اسکریپت‌ها ------------------ #
+
+    def _put(self, keys: list[str], args: list[str]):
+        item = self._live(keys[0])
+        cur = int(item[0]["v"]) if item else 0
+        exp = int(args[1])
+        if exp >= 0 and cur != exp:
+            return None
+        ttl_ms = int(args[2])
+        expires = time.monotonic() + ttl_ms / 1000 if ttl_ms > 0 else None
+        self._data[keys[0]] = [{"v": str(cur + 1), "d": args[0]}, expires]
+        return cur + 1
+
+    def _delete(self, keys: list[str], args: list[str]):
+        item = self._live(keys[0])
+        if item is None:
+            return 0
+        exp = int(args[0])
+        if exp >= 0 and int(item[0]["v"]) != exp:
+            return 0
+        del self._data[keys[0]]
+        return 1
+
+    def _incr(self, keys: list[str], args: list[str]):
+        item = self._live(keys[0])
+        value = (int(item[0]) if item else int(args[1])) + int(args[0])
+        self._data[keys[0]] = [str(value), item[1] if item else None]
+        return value
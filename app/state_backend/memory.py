@@ -0,0 +1,72 @@
+from __future__ import annotations
+import time
+from typing import Any
+
+from .base import StateBackend, Versioned
+
+
+class MemoryBackend(StateBackend):
+    """
+    انبارهٔ درون‌حافظه‌ای (پیش‌فرض، برای اجرای تک‌نسخه‌ای).
+    مقدارها کپی نمی‌شوند؛ همان شیء دیکشنری نگه داشته می‌شود.
+    """
+
+    shared = False
+
+    def __init__(self) -> None:
+        # (ns, key) → [version, value, expires_at | None]
+        self._data: dict[tuple[str, str], list] = {}
+
+    def _live(self, ns: str, key: str | int) -> list | None:
+        item = self._data.get((ns, str(key)))
+        if item is None:
+            return None
+        if item[2] is not None and item[2] <= time.monotonic():
+            del self._data[(ns, str(key))]
+            return None
+        return item
+
+    async def get(self, ns: str, key: str | int) -> Versioned | None:
+        item = self._live(ns, key)
+        if item is None:
+            return None
+        return Versioned(item[1], item[0])
+
+    async def put(
+        self,
+        ns: str,
+        key: str | int,
+        value: Any,
+        *,
+        expected: int | None = None,
+        ttl: float | None = None,
+    ) -> int | None:
+        item = self._live(ns, key)
+        current = item[0] if item else 0
+        if expected is not None and current != expected:
+            return None
+        expires = time.monotonic() + ttl if ttl else None
+        self._data[(ns, str(key))] = [current + 1, value, expires]
+        return current + 1
+
+    async def delete(
+        self, ns: str, key: str | int, *, expected: int | None = None
+    ) -> bool:
+        item = self._live(ns, key)
+        if item is None:
+            return False
+        if expected is not None and item[0] != expected:
+            return False
+        del self._data[(ns, str(key))]
+        return True
+
+    async def incr(
+        self, ns: str, key: str | int, amount: int = 1, *, initial: int = 0
+    ) -> int:
+        item = self._live(ns, key)
+        value = (int(item[1]) if item else int(initial)) + amount
+        self._data[(ns, str(key))] = [(item[0] if item else 0) + 1, value, None]
+        return value
+
+    async def keys(self, ns: str) -> list[str]:
+        return [k for (n, k) in list(self._data) if n == ns and self._live(n, k)]
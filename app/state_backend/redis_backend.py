@@ -0,0 +1,121 @@
+from __future__ import annotations
+import json
+from typing import Any
+
+from .base import StateBackend, Versioned
+
+# --------------------------------------------------------------------------- #
+#   اسکریپت‌های Lua: هر عملیات شرطی در خود Redis و به‌صورت اتمی اجرا می‌شود   #
+# --------------------------------------------------------------------------- #
+
+# KEYS[1]=key  ARGV[1]=data  ARGV[2]=expected (-1 = بدون شرط)  ARGV[3]=ttl_ms
+PUT_SCRIPT = """
+local cur = tonumber(redis.call('HGET', KEYS[1], 'v') or '0')
+local exp = tonumber(ARGV[2])
+if exp >= 0 and cur ~= exp then return false end
+local nv = cur + 1
+redis.call('HSET', KEYS[1], 'v', nv, 'd', ARGV[1])
+if tonumber(ARGV[3]) > 0 then
+  redis.call('PEXPIRE', KEYS[1], ARGV[3])
+else
+  redis.call('PERSIST', KEYS[1])
+end
+return nv
+"""
+
+# KEYS[1]=key  ARGV[1]=expected (-1 = بدون شرط)
+DELETE_SCRIPT = """
+local cur = redis.call('HGET', KEYS[1], 'v')
+if not cur then return 0 end
+local exp = tonumber(ARGV[1])
+if exp >= 0 and tonumber(cur) ~= exp then return 0 end
+return redis.call('DEL', KEYS[1])
+"""
+
+# KEYS[1]=key  ARGV[1]=amount  ARGV[2]=initial
+INCR_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 0 then
+  redis.call('SET', KEYS[1], ARGV[2])
+end
+return redis.call('INCRBY', KEYS[1], ARGV[1])
+"""
+
+
+class RedisBackend(StateBackend):
+    """
+    انبارهٔ شبکه‌ای روی Redis برای اجرای چند نسخه از ربات پشت وب‌هوک.
+
+    هر کلید یک hash با دو فیلد است: v (نسخه) و d (JSON مقدار).
+    شمارنده‌ها کلید رشته‌ای ساده‌اند و فقط با incr خوانده/نوشته می‌شوند.
+    """
+
+    shared = True
+
+    def __init__(self, client: Any, *, prefix: str = "bot") -> None:
+        # client: redis.asyncio.Redis (با decode_responses=True) یا LocalRedis
+        self._r = client
+        self._prefix = prefix
+
+    @classmethod
+    def from_url(cls, url: str, *, prefix: str = "bot") -> "RedisBackend":
+        try:
+            from redis import asyncio as aioredis
+        except ImportError as exc:
+            raise RuntimeError(
+                "برای STATE_BACKEND_URL از نوع redis:// بستهٔ redis را نصب کنید."
+            ) from exc
+        return cls(aioredis.from_url(url, decode_responses=True), prefix=prefix)
+
+    def _key(self, ns: str, key: str | int) -> str:
+        return f"{self._prefix}:{ns}:{key}"
+
+    async def get(self, ns: str, key: str | int) -> Versioned | None:
+        version, data = await self._r.hmget(self._key(ns, key), ["v", "d"])
+        if version is None or data is None:
+            return None
+        return Versioned(json.loads(data), int(version))
+
+    async def put(
+        self,
+        ns: str,
+        key: str | int,
+        value: Any,
+        *,
+        expected: int | None = None,
+        ttl: float | None = None,
+    ) -> int | None:
+        res = await self._r.eval(
+            PUT_SCRIPT,
+            1,
+            self._key(ns, key),
+            json.dumps(value, ensure_ascii=False),
+            -1 if expected is None else int(expected),
+            int(ttl * 1000) if ttl else 0,
+        )
+        return int(res) if res else None
+
+    async def delete(
+        self, ns: str, key: str | int, *, expected: int | None = None
+    ) -> bool:
+        res = await self._r.eval(
+            DELETE_SCRIPT,
+            1,
+            self._key(ns, key),
+            -1 if expected is None else int(expected),
+        )
+        return bool(res)
+
+    async def incr(
+        self, ns: str, key: str | int, amount: int = 1, *, initial: int = 0
+    ) -> int:
+        res = await self._r.eval(
+            INCR_SCRIPT, 1, self._key(ns, key), int(amount), int(initial)
+        )
+        return int(res)
+
+    async def keys(self, ns: str) -> list[str]:
+        head = f"{self._prefix}:{ns}:"
+        return [k[len(head):] async for k in self._r.scan_iter(match=head + "*")]
+
+    async def close(self) -> None:
+        await self._r.aclose()
@@ -0,0 +1,67 @@
+from __future__ import annotations
+import time
+from typing import Any
+
+from ..spans import add_span
+from .base import StateBackend, Versioned
+
+
+class TimedBackend(StateBackend):
+    """
+    پوشش زمان‌سنج روی یک انبارهٔ دیگر: هر فراخوانی یک span نوع storage
+    («backend.get:pending» و …) در تفکیک زمان آپدیت جاری ثبت می‌کند.
+    """
+
+    def __init__(self, inner: StateBackend) -> None:
+        self.inner = inner
+        self.shared = inner.shared
+
+    async def get(self, ns: str, key: str | int) -> Versioned | None:
+        t0 = time.perf_counter()
+        try:
+            return await self.inner.get(ns, key)
+        finally:
+            add_span("storage", f"backend.get:{ns}", time.perf_counter() - t0)
+
+    async def put(
+        self,
+        ns: str,
+        key: str | int,
+        value: Any,
+        *,
+        expected: int | None = None,
+        ttl: float | None = None,
+    ) -> int | None:
+        t0 = time.perf_counter()
+        try:
+            return await self.inner.put(ns, key, value, expected=expected, ttl=ttl)
+        finally:
+            add_span("storage", f"backend.put:{ns}", time.perf_counter() - t0)
+
+    async def delete(
+        self, ns: str, key: str | int, *, expected: int | None = None
+    ) -> bool:
+        t0 = time.perf_counter()
+        try:
+            return await self.inner.delete(ns, key, expected=expected)
+        finally:
+            add_span("storage", f"backend.delete:{ns}", time.perf_counter() - t0)
+
+    async def incr(
+        self, ns: str, key: str | int, amount: int = 1, *, initial: int = 0
+    ) -> int:
+        t0 = time.perf_counter()
+        try:
+            return await self.inner.incr(ns, key, amount, initial=initial)
+        finally:
+            add_span("storage", f"backend.incr:{ns}", time.perf_counter() - t0)
+
+    async def keys(self, ns: str) -> list[str]:
+        t0 = time.perf_counter()
+        try:
+            return await self.inner.keys(ns)
+        finally:
+            add_span("storage", f"backend.keys:{ns}", time.perf_counter() - t0)
+
+    async def close(self) -> None:
+        await self.inner.close()
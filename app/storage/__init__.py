@@ -6,6 +6,8 @@ from .admins import (
     is_admin,
     is_owner,
     get_owner_id,
+    aadd_admin,
+    aremove_admin,
 )
 
 from .allowed_channels import (
@@ -14,10 +16,24 @@ from .allowed_channels import (
     is_channel_allowed,
     add_allowed_channel,
     remove_allowed_channel,
+    alist_allowed_channels,
+    ais_channel_allowed,
+    aadd_allowed_channel,
+    aremove_allowed_channel,
+)
+
+from .car_models import (
+    list_car_models,
+    record_car_model,
+    alist_car_models,
+    arecord_car_model,
 )
 
 from .counter import (
+    current_daily_number,
     next_daily_number,
+    acurrent_daily_number,
+    anext_daily_number,
 )
 
 from .destinations import (
@@ -28,6 +44,12 @@ from .destinations import (
     set_active_destination,
     get_active_destination,
     get_active_id_and_title,
+    alist_destinations,
+    aadd_destination,
+    aremove_destination,
+    aset_active_destination,
+    aget_active_destination,
+    aget_active_id_and_title,
 )
 
 from .required_channels import (
@@ -37,4 +59,10 @@ from .required_channels import (
     get_required_channel_ids,
     add_required_channel,
     remove_required_channel,
-)
\ No newline at end of file
+    alist_required_channels,
+    aget_required_channel_ids,
+    aadd_required_channel,
+    aremove_required_channel,
+)
+
+from .io import STORAGE_EXECUTOR, run_io
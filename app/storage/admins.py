@@ -2,18 +2,23 @@ from __future__ import annotations
 import json
 from pathlib import Path
 
+from ..metrics import storage_io
+from .io import run_io
+
 DATA = Path("/tmp/bot_data")
 ADMINS_FILE = DATA / "admins.json"
 
-_ADMIN_SET: set[int] = set()
+# روی حلقه هم خوانده می‌شود (is_admin)؛ فقط جایگزین می‌شود، درجا تغییر نمی‌کند
+_ADMIN_SET: frozenset[int] = frozenset()
 _OWNER_ID: int = 0
 
 
 def _persist() -> None:
     try:
-        ADMINS_FILE.write_text(
-            json.dumps(sorted(_ADMIN_SET), ensure_ascii=False), encoding="utf-8"
-        )
+        with storage_io("admins", "write"):
+            ADMINS_FILE.write_text(
+                json.dumps(sorted(_ADMIN_SET), ensure_ascii=False), encoding="utf-8"
+            )
     except Exception:
         pass
 
@@ -26,13 +31,15 @@ def bootstrap_admins(initial_env_admins: set[int], owner_id: int) -> None:
     saved: set[int] = set()
     if ADMINS_FILE.exists():
         try:
-            saved = set(json.loads(ADMINS_FILE.read_text(encoding="utf-8")) or [])
+            with storage_io("admins", "read"):
+                saved = set(json.loads(ADMINS_FILE.read_text(encoding="utf-8")) or [])
         except Exception:
             pass
 
-    _ADMIN_SET = set(initial_env_admins or set()) | saved
+    admins = set(initial_env_admins or set()) | saved
     if _OWNER_ID:
-        _ADMIN_SET.add(_OWNER_ID)
+        admins.add(_OWNER_ID)
+    _ADMIN_SET = frozenset(admins)
     _persist()
 
 
@@ -43,20 +50,22 @@ def list_admins() -> list[int]:
 
 
 def add_admin(uid: int) -> bool:
+    global _ADMIN_SET
     uid = int(uid)
     if uid in _ADMIN_SET:
         return False
-    _ADMIN_SET.add(uid)
+    _ADMIN_SET = _ADMIN_SET | {uid}
     _persist()
     return True
 
 
 def remove_admin(uid: int) -> bool:
+    global _ADMIN_SET
     uid = int(uid)
     if uid == _OWNER_ID:
         return False
     if uid in _ADMIN_SET:
-        _ADMIN_SET.remove(uid)
+        _ADMIN_SET = _ADMIN_SET - {uid}
         _persist()
         return True
     return False
@@ -72,3 +81,13 @@ def get_owner_id() -> int:
 
 def is_owner(uid: int) -> bool:
     return int(uid) == _OWNER_ID
+
+
+# -- API ناهمگام (فایل روی رشتهٔ انباره؛ io.py) --------------------------------
+
+async def aadd_admin(uid: int) -> bool:
+    return await run_io(add_admin, uid)
+
+
+async def aremove_admin(uid: int) -> bool:
+    return await run_io(remove_admin, uid)
@@ -2,33 +2,39 @@ from __future__ import annotations
 import json
 from pathlib import Path
 
+from ..metrics import storage_io
+from .io import run_io
+
 DATA = Path("/tmp/bot_data")
 ALLOWED_FILE = DATA / "allowed_channels.json"
 
-_ALLOWED: set[int] = set()
+_ALLOWED: frozenset[int] = frozenset()
 
 
 def _load() -> None:
     global _ALLOWED
     if ALLOWED_FILE.exists():
         try:
-            ids = json.loads(ALLOWED_FILE.read_text(encoding="utf-8")) or []
-            _ALLOWED = {int(x) for x in ids}
+            with storage_io("allowed_channels", "read"):
+                ids = json.loads(ALLOWED_FILE.read_text(encoding="utf-8")) or []
+            _ALLOWED = frozenset(int(x) for x in ids)
         except Exception:
             pass
 
 
 def _save() -> None:
     try:
-        ALLOWED_FILE.write_text(json.dumps(sorted(_ALLOWED), ensure_ascii=False), encoding="utf-8")
+        with storage_io("allowed_channels", "write"):
+            ALLOWED_FILE.write_text(json.dumps(sorted(_ALLOWED), ensure_ascii=False), encoding="utf-8")
     except Exception:
         pass
 
 
 def bootstrap_allowed_channels(default_id: int | None) -> None:
+    global _ALLOWED
     _load()
     if default_id:
-        _ALLOWED.add(int(default_id))
+        _ALLOWED = _ALLOWED | {int(default_id)}
         _save()
 
 
@@ -45,20 +51,40 @@ def is_channel_allowed(chat_id: int) -> bool:
 
 
 def add_allowed_channel(chat_id: int) -> bool:
+    global _ALLOWED
     _load()
     cid = int(chat_id)
     if cid in _ALLOWED:
         return False
-    _ALLOWED.add(cid)
+    _ALLOWED = _ALLOWED | {cid}
     _save()
     return True
 
 
 def remove_allowed_channel(chat_id: int) -> bool:
+    global _ALLOWED
     _load()
     cid = int(chat_id)
     if cid not in _ALLOWED:
         return False
-    _ALLOWED.remove(cid)
+    _ALLOWED = _ALLOWED - {cid}
     _save()
     return True
+
+
+# -- API ناهمگام (فایل روی رشتهٔ انباره؛ io.py) --------------------------------
+
+async def alist_allowed_channels() -> list[int]:
+    return await run_io(list_allowed_channels)
+
+
+async def ais_channel_allowed(chat_id: int) -> bool:
+    return await run_io(is_channel_allowed, chat_id)
+
+
+async def aadd_allowed_channel(chat_id: int) -> bool:
+    return await run_io(add_allowed_channel, chat_id)
+
+
+async def aremove_allowed_channel(chat_id: int) -> bool:
+    return await run_io(remove_allowed_channel, chat_id)
@@ -0,0 +1,64 @@
+from __future__ import annotations
+import json
+from pathlib import Path
+
+from ..metrics import storage_io
+from .io import run_io
+
+DATA = Path("/tmp/bot_data")
+DATA.mkdir(parents=True, exist_ok=True)
+CAR_MODELS_FILE = DATA / "car_models.json"
+
+# نام خودرو (همان‌طور که در آگهی منتشر شد) → تعداد آگهی‌ها
+_MODELS: dict[str, int] = {}
+
+
+def _load() -> None:
+    global _MODELS
+    if CAR_MODELS_FILE.exists():
+        try:
+            with storage_io("car_models", "read"):
+                data = json.loads(CAR_MODELS_FILE.read_text(encoding="utf-8")) or {}
+            if isinstance(data, dict):
+                _MODELS = {str(k): int(v) for k, v in data.items()}
+        except Exception:
+            pass
+
+
+def _save() -> None:
+    try:
+        with storage_io("car_models", "write"):
+            CAR_MODELS_FILE.write_text(json.dumps(_MODELS, ensure_ascii=False), encoding="utf-8")
+    except Exception:
+        pass
+
+
+# -- API ---------------------------------------------------------------------
+
+def list_car_models() -> dict[str, int]:
+    """تاریخچهٔ نام خودروهای آگهی‌های منتشرشده با تعدادشان"""
+    _load()
+    return dict(_MODELS)
+
+
+def record_car_model(name: str) -> int:
+    """ثبت یک آگهی منتشرشده برای این نام؛ تعداد جدید را برمی‌گرداند."""
+    name = (name or "").strip()
+    if not name:
+        return 0
+    global _MODELS
+    _load()
+    count = _MODELS.get(name, 0) + 1
+    _MODELS = {**_MODELS, name: count}
+    _save()
+    return count
+
+
+# -- API ناهمگام (فایل روی رشتهٔ انباره؛ io.py) --------------------------------
+
+async def alist_car_models() -> dict[str, int]:
+    return await run_io(list_car_models)
+
+
+async def arecord_car_model(name: str) -> int:
+    return await run_io(record_car_model, name)
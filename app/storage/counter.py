@@ -3,11 +3,27 @@ import json
 from pathlib import Path
 from datetime import date
 
+from ..metrics import storage_io
+from .io import run_io
+
 DATA = Path("/tmp/bot_data")
 DATA.mkdir(parents=True, exist_ok=True)
 DAILY_FILE = DATA / "daily.json"
 
 
+def current_daily_number() -> int:
+    """آخرین شمارهٔ ثبت‌شده (بدون افزایش)."""
+    if DAILY_FILE.exists():
+        try:
+            with storage_io("counter", "read"):
+                saved = json.loads(DAILY_FILE.read_text(encoding="utf-8")) or {}
+            if isinstance(saved, dict):
+                return int(saved.get("num", 0))
+        except Exception:
+            pass
+    return 0
+
+
 def next_daily_number() -> tuple[int, str]:
     """
     شمارندهٔ سراسری آگهی (بدون ریست روزانه).
@@ -24,7 +40,8 @@ def next_daily_number() -> tuple[int, str]:
     # اگر فایل قبلاً ساخته شده است، عدد قبلی را می‌خوانیم
     if DAILY_FILE.exists():
         try:
-            saved = json.loads(DAILY_FILE.read_text(encoding="utf-8")) or {}
+            with storage_io("counter", "read"):
+                saved = json.loads(DAILY_FILE.read_text(encoding="utf-8")) or {}
             if isinstance(saved, dict):
                 num = int(saved.get("num", 0))
         except Exception:
@@ -38,9 +55,20 @@ def next_daily_number() -> tuple[int, str]:
 
     # ذخیره روی دیسک
     try:
-        DAILY_FILE.write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
+        with storage_io("counter", "write"):
+            DAILY_FILE.write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
     except Exception:
         pass
 
     # برگرداندن شماره و تاریخ امروز
     return num, today
+
+
+# -- API ناهمگام (فایل روی رشتهٔ انباره؛ io.py) --------------------------------
+
+async def acurrent_daily_number() -> int:
+    return await run_io(current_daily_number)
+
+
+async def anext_daily_number() -> tuple[int, str]:
+    return await run_io(next_daily_number)
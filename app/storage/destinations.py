@@ -2,6 +2,9 @@ from __future__ import annotations
 import json
 from pathlib import Path
 
+from ..metrics import storage_io
+from .io import run_io
+
 DATA = Path("/tmp/bot_data")
 DESTS_FILE = DATA / "destinations.json"
 
@@ -12,24 +15,29 @@ def _load() -> None:
     global _DESTS
     if DESTS_FILE.exists():
         try:
-            _DESTS = json.loads(DESTS_FILE.read_text(encoding="utf-8")) or _DESTS
+            with storage_io("destinations", "read"):
+                _DESTS = json.loads(DESTS_FILE.read_text(encoding="utf-8")) or _DESTS
         except Exception:
             pass
 
 
 def _save() -> None:
     try:
-        DESTS_FILE.write_text(json.dumps(_DESTS, ensure_ascii=False), encoding="utf-8")
+        with storage_io("destinations", "write"):
+            DESTS_FILE.write_text(json.dumps(_DESTS, ensure_ascii=False), encoding="utf-8")
     except Exception:
         pass
 
 
 def bootstrap_destinations(default_id: int, default_title: str = "") -> None:
+    global _DESTS
     _load()
-    if not _DESTS["list"] and default_id:
-        _DESTS["list"].append({"id": int(default_id), "title": str(default_title)})
-    if not _DESTS.get("active") and default_id:
-        _DESTS["active"] = int(default_id)
+    dests = {**_DESTS, "list": list(_DESTS["list"])}
+    if not dests["list"] and default_id:
+        dests["list"].append({"id": int(default_id), "title": str(default_title)})
+    if not dests.get("active") and default_id:
+        dests["active"] = int(default_id)
+    _DESTS = dests
     _save()
 
 
@@ -41,22 +49,28 @@ def list_destinations() -> list[dict]:
 
 
 def add_destination(chat_id: int, title: str = "") -> bool:
+    global _DESTS
     _load()
     cid = int(chat_id)
-    for it in _DESTS["list"]:
+    for i, it in enumerate(_DESTS["list"]):
         if int(it.get("id")) == cid:
             if title and it.get("title") != title:
-                it["title"] = title
+                items = list(_DESTS["list"])
+                items[i] = {**it, "title": title}
+                _DESTS = {**_DESTS, "list": items}
                 _save()
             return False
-    _DESTS["list"].append({"id": cid, "title": str(title)})
-    if not _DESTS.get("active"):
-        _DESTS["active"] = cid
+    _DESTS = {
+        **_DESTS,
+        "list": [*_DESTS["list"], {"id": cid, "title": str(title)}],
+        "active": _DESTS.get("active") or cid,
+    }
     _save()
     return True
 
 
 def remove_destination(chat_id: int) -> bool:
+    global _DESTS
     _load()
     cid = int(chat_id)
 
@@ -64,20 +78,20 @@ def remove_destination(chat_id: int) -> bool:
     if idx is None:
         return False
 
-    _DESTS["list"].pop(idx)
+    items = [it for i, it in enumerate(_DESTS["list"]) if i != idx]
+    active = _DESTS.get("active")
 
     # اگر active همین بود، یک مقصد دیگر را active کن
-    if int(_DESTS.get("active") or 0) == cid:
-        if _DESTS["list"]:
-            _DESTS["active"] = int(_DESTS["list"][0]["id"])
-        else:
-            _DESTS["active"] = 0
+    if int(active or 0) == cid:
+        active = int(items[0]["id"]) if items else 0
 
+    _DESTS = {**_DESTS, "list": items, "active": active}
     _save()
     return True
 
 
 def set_active_destination(chat_id: int) -> bool:
+    global _DESTS
     _load()
     cid = int(chat_id)
 
@@ -85,7 +99,7 @@ def set_active_destination(chat_id: int) -> bool:
     if not any(int(it.get("id", 0)) == cid for it in _DESTS.get("list", [])):
         return False
 
-    _DESTS["active"] = cid
+    _DESTS = {**_DESTS, "active": cid}
     _save()
     return True
 
@@ -100,3 +114,29 @@ def get_active_id_and_title() -> tuple[int, str]:
     aid = int(_DESTS.get("active") or 0)
     title = next((it.get("title") or "" for it in _DESTS["list"] if int(it["id"]) == aid), "")
     return aid, title
+
+
+# -- API ناهمگام (فایل روی رشتهٔ انباره؛ io.py) --------------------------------
+
+async def alist_destinations() -> list[dict]:
+    return await run_io(list_destinations)
+
+
+async def aadd_destination(chat_id: int, title: str = "") -> bool:
+    return await run_io(add_destination, chat_id, title)
+
+
+async def aremove_destination(chat_id: int) -> bool:
+    return await run_io(remove_destination, chat_id)
+
+
+async def aset_active_destination(chat_id: int) -> bool:
+    return await run_io(set_active_destination, chat_id)
+
+
+async def aget_active_destination() -> int:
+    return await run_io(get_active_destination)
+
+
+async def aget_active_id_and_title() -> tuple[int, str]:
+    return await run_io(get_active_id_and_title)
@@ -0,0 +1,54 @@
+from __future__ import annotations
+import asyncio
+import contextvars
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, TypeVar
+
+from ..metrics import STORAGE_PENDING, call_deferred, replay_storage_io
+from ..spans import add_span
+
+T = TypeVar("T")
+
+# --------------------------------------------------------------------------- #
+#          اجرای توابع انباره (خواندن/نوشتن فایل‌های JSON) بیرون از حلقه       #
+# --------------------------------------------------------------------------- #
+# توابع همگام هر ماژول همان پیاده‌سازی اصلی‌اند؛ نسخه‌های a* (مثل
+# aget_active_destination) همان‌ها را روی یک رشتهٔ اختصاصی اجرا می‌کنند.
+# فقط «یک» رشته: عملیات انباره‌ها پشت سر هم اجرا می‌شوند، پس چرخهٔ
+# خواندن-تغییر-نوشتن (مثل next_daily_number) مثل قبل اتمی می‌ماند.
+# context فراخواننده (CURRENT_SPANS) هم منتقل می‌شود تا span‌های storage
+# هنوز به آپدیت جاری نسبت داده شوند؛ خود متریک‌ها و span‌ها پس از پایان کار
+# روی حلقه ثبت می‌شوند (متریک‌ها و UpdateSpans قفل ندارند). مدت ماندن در صف
+# این رشته هم span جدای «wait» است تا در slow_updates جزو cpu شمرده نشود.
+#
+# کش‌های حافظه‌ای ماژول‌ها (_ADMIN_SET، _DESTS، _REQ، …) روی این رشته تغییر
+# می‌کنند ولی روی حلقه هم خوانده می‌شوند؛ پس هیچ‌وقت درجا تغییر نمی‌کنند
+# (copy-on-write): هر تغییر یک شیء تازه می‌سازد و فقط ارجاع سراسری عوض می‌شود،
+# و خواننده همیشه یک نسخهٔ کامل و ثابت را می‌بیند.
+#
+# هندلرها فقط نسخه‌های a* را صدا می‌زنند؛ نسخه‌های همگام برای بوت‌استرپ،
+# ابزارها و کد قدیمی باقی‌اند. توابعی که فقط حافظه را می‌خوانند (is_admin،
+# list_admins، …) نسخهٔ ناهمگام ندارند.
+
+STORAGE_EXECUTOR = ThreadPoolExecutor(max_workers=1, thread_name_prefix="storage-io")
+
+
+async def run_io(fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    ctx = contextvars.copy_context()
+    ops: list = []
+    started: list[float] = []
+
+    def call() -> T:
+        started.append(time.perf_counter())
+        return ctx.run(call_deferred, ops, fn, *args, **kwargs)
+
+    STORAGE_PENDING.inc()
+    submitted = time.perf_counter()
+    try:
+        return await asyncio.get_running_loop().run_in_executor(STORAGE_EXECUTOR, call)
+    finally:
+        STORAGE_PENDING.dec()
+        if started:
+            add_span("wait", "storage.queue", started[0] - submitted)
+        replay_storage_io(ops)
@@ -1,6 +1,9 @@
 from __future__ import annotations
 import json
 from pathlib import Path
+
+from ..metrics import storage_io
+from .io import run_io
 from aiogram import Bot
 
 DATA = Path("/tmp/bot_data")
@@ -14,7 +17,8 @@ def _load() -> None:
     global _REQ
     if REQUIRED_FILE.exists():
         try:
-            raw = json.loads(REQUIRED_FILE.read_text(encoding="utf-8")) or []
+            with storage_io("required_channels", "read"):
+                raw = json.loads(REQUIRED_FILE.read_text(encoding="utf-8")) or []
         except Exception:
             raw = []
 
@@ -32,7 +36,8 @@ def _load() -> None:
 def _save() -> None:
     """Save required channels to file."""
     try:
-        REQUIRED_FILE.write_text(json.dumps(_REQ, ensure_ascii=False), encoding="utf-8")
+        with storage_io("required_channels", "write"):
+            REQUIRED_FILE.write_text(json.dumps(_REQ, ensure_ascii=False), encoding="utf-8")
     except Exception:
         pass
 
@@ -43,6 +48,7 @@ def bootstrap_required_channels(
     """
     این تابع باید وجود داشته باشد چون storage/__init__.py آن را import می‌کند.
     """
+    global _REQ
     _load()
     if not default_id:
         _save()
@@ -52,13 +58,14 @@ def bootstrap_required_channels(
 
     # اگر کانال اصلی قبلاً وجود ندارد، اضافه کن
     if not any(int(ch["id"]) == cid for ch in _REQ):
-        _REQ.append(
+        _REQ = [
+            *_REQ,
             {
                 "id": cid,
                 "title": str(default_title),
                 "username": str(default_username).lstrip("@"),
-            }
-        )
+            },
+        ]
 
     _save()
 
@@ -71,10 +78,12 @@ async def sync_required_channels(bot: Bot) -> None:
     """
     اگر title یا username در فایل خالی باشد، از Telegram API گرفته و ذخیره می‌کند.
     """
-    _load()
-    changed = False
+    await run_io(_load)
+    found: dict[int, tuple[str, str]] = {}
 
     for ch in _REQ:
+        if ch.get("title") and ch.get("username"):
+            continue
         cid = int(ch["id"])
 
         try:
@@ -84,17 +93,35 @@ async def sync_required_channels(bot: Bot) -> None:
         except:
             continue
 
-        # اگر title در فایل خالی بود → از API بگیر
-        if api_title and not ch.get("title"):
-            ch["title"] = api_title
-            changed = True
+        found[cid] = (api_title, api_username)
+
+    if found:
+        await run_io(_fill_missing, found)
 
-        # اگر username خالی بود → از API بگیر
-        if api_username and not ch.get("username"):
-            ch["username"] = api_username
-            changed = True
+
+def _fill_missing(found: dict[int, tuple[str, str]]) -> None:
+    """
+    پر کردن title/username خالی از روی مقادیر API (روی رشتهٔ انباره، روی
+    آخرین نسخهٔ فایل، نه فهرستی که پیش از await‌ها خوانده شده بود)
+    """
+    global _REQ
+    _load()
+    changed = False
+    channels = []
+    for ch in _REQ:
+        api_title, api_username = found.get(int(ch["id"]), ("", ""))
+        new = {
+            **ch,
+            # اگر title در فایل خالی بود → از API بگیر
+            "title": ch.get("title") or api_title,
+            # اگر username خالی بود → از API بگیر
+            "username": ch.get("username") or api_username,
+        }
+        changed |= new != ch
+        channels.append(new)
 
     if changed:
+        _REQ = channels
         _save()
 
 
@@ -113,33 +140,34 @@ def get_required_channel_ids() -> list[int]:
 
 
 def add_required_channel(chat_id: int, *, title: str = "", username: str = "") -> bool:
+    global _REQ
     _load()
     cid = int(chat_id)
 
     # اگر کانال موجود باشد → فقط update
-    for ch in _REQ:
+    for i, ch in enumerate(_REQ):
         if int(ch["id"]) == cid:
-            changed = False
+            new = dict(ch)
             if title and ch["title"] != title:
-                ch["title"] = title
-                changed = True
+                new["title"] = title
 
             if username and ch["username"] != username:
-                ch["username"] = username.lstrip("@")
-                changed = True
+                new["username"] = username.lstrip("@")
 
-            if changed:
+            if new != ch:
+                _REQ = [*_REQ[:i], new, *_REQ[i + 1:]]
                 _save()
 
             return False
 
     # اضافه کردن
-    _REQ.append({"id": cid, "title": title, "username": username.lstrip("@")})
+    _REQ = [*_REQ, {"id": cid, "title": title, "username": username.lstrip("@")}]
     _save()
     return True
 
 
 def remove_required_channel(chat_id: int) -> bool:
+    global _REQ
     _load()
     cid = int(chat_id)
     idx = next((i for i, ch in enumerate(_REQ) if int(ch["id"]) == cid), None)
@@ -147,6 +175,24 @@ def remove_required_channel(chat_id: int) -> bool:
     if idx is None:
         return False
 
-    _REQ.pop(idx)
+    _REQ = _REQ[:idx] + _REQ[idx + 1:]
     _save()
     return True
+
+
+# -- API ناهمگام (فایل روی رشتهٔ انباره؛ io.py) --------------------------------
+
+async def alist_required_channels() -> list[dict]:
+    return await run_io(list_required_channels)
+
+
+async def aget_required_channel_ids() -> list[int]:
+    return await run_io(get_required_channel_ids)
+
+
+async def aadd_required_channel(chat_id: int, *, title: str = "", username: str = "") -> bool:
+    return await run_io(add_required_channel, chat_id, title=title, username=username)
+
+
+async def aremove_required_channel(chat_id: int) -> bool:
+    return await run_io(remove_required_channel, chat_id)
@@ -0,0 +1,161 @@
+from __future__ import annotations
+import hashlib
+import json
+import re
+import secrets
+import time
+from pathlib import Path
+from typing import Any
+
+from .log_writer import LOG_WRITER
+
+# --------------------------------------------------------------------------- #
+#        ضبط آپدیت‌های ورودی در یک لاگ فشرده و ناشناس (برای tools/replay)      #
+# --------------------------------------------------------------------------- #
+# هر خط JSONL:  {"t": زمان unix, "r": "a"|"o" (ادمین/مالک), "u": آپدیت}
+# آپدیت همان JSON خام Bot API است (بدون فیلدهای None) پس از ناشناس‌سازی:
+#   • شناسهٔ کاربران و چت‌های خصوصی ← شبه‌شناسهٔ ثابت (هش نمک‌دار)؛ نام‌ها حذف
+#   • متن و کپشن ← حروف به «x»/«ب»، ارقام حفظ؛ ولی هر دنبالهٔ ارقام با ۷+ رقم
+#     (حتی با فاصله/خط تیره/نقطه بین گروه‌ها، مثل «0912 345 6789») جز دو رقم
+#     اول صفر می‌شود (با همان خط ارقام)؛ متن دکمه‌های کیبورد و دستورها دست نمی‌خورند
+#   • دادهٔ callback ← پیشوند تا «:» حفظ، ارقام بقیه صفر (شناسهٔ چت، …)
+#   • فرم WebApp ← فیلدهای خودرو حفظ، بقیه (تلفن، توضیحات، …) مثل متن
+#   • file_id‌ها ← هش؛ contact/location/… حذف
+# شکل ترافیک (نوع آپدیت، دکمه‌ها، طول متن‌ها، آلبوم‌ها، زمان‌بندی) حفظ می‌شود.
+#
+# نمک از UPDATE_LOG_SALT؛ اگر خالی باشد در هر اجرا تصادفی است (شبه‌شناسه‌ها
+# فقط درون همان اجرا پایدارند). چرخش ساده مثل SLOW_LOG: پس از max_bytes ← .1
+# ناشناس‌سازی روی حلقه است ولی نوشتن فایل با LOG_WRITER روی رشتهٔ جدا.
+
+UPDATE_LOG_MAX_BYTES = 50 * 1024 * 1024
+
+# فیلدهای فرم که اطلاعات شخصی نیستند و روی مسیر اعتبارسنجی اثر دارند
+FORM_KEEP = frozenset({"category", "car", "year", "color", "km", "insurance", "gear"})
+DROP_KEYS = frozenset({
+    "contact", "location", "venue", "last_name", "username", "bio",
+    "phone_number", "url", "invite_link", "sender_chat", "forward_origin",
+})
+# گروه‌های رقمی با جداکنندهٔ کوتاه بین‌شان یک «عدد» حساب می‌شوند
+_NUMBER = re.compile(r"\d+(?:[\s\-./()]{1,3}\d+)*")
+_DIGIT = re.compile(r"\d")
+
+
+def _zero(m: re.Match) -> str:
+    # صفرِ همان خط ارقام (لاتین، فارسی، عربی)
+    c = m.group()
+    return chr(ord(c) - int(c))
+
+
+def _mask_number(m: re.Match) -> str:
+    number = m.group()
+    digits = [i for i, c in enumerate(number) if c.isdigit()]
+    if len(digits) < 7:
+        return number
+    keep = digits[1] + 1
+    return number[:keep] + _DIGIT.sub(_zero, number[keep:])
+
+
+def mask_text(text: str) -> str:
+    """هم‌طول با ورودی؛ کلاس نویسه‌ها (حرف لاتین/غیرلاتین، رقم، فاصله) حفظ می‌شود"""
+    text = _NUMBER.sub(_mask_number, text)
+    return "".join(("x" if c.isascii() else "ب") if c.isalpha() else c for c in text)
+
+
+def mask_callback_data(data: str) -> str:
+    """پیشوند مسیریابی (مثل «info:») حفظ؛ ارقام بقیه صفر، هم‌طول با ورودی"""
+    prefix, sep, rest = data.partition(":")
+    if not sep:
+        return _DIGIT.sub(_zero, data)
+    return prefix + sep + _DIGIT.sub(_zero, rest)
+
+
+def anonymize_text(text: str) -> str:
+    # import دیرهنگام: handlers خودشان به middlewares وابسته‌اند
+    from .handlers.text_dispatch import TEXT_DISPATCH
+    if text in TEXT_DISPATCH.buttons:
+        return text
+    if text.startswith("/"):
+        command, sep, rest = text.partition(" ")
+        return command + sep + mask_text(rest)
+    return mask_text(text)
+
+
+class UpdateRecorder:
+    def __init__(self, path: Path | None = None, *, salt: str = "", max_bytes: int = UPDATE_LOG_MAX_BYTES) -> None:
+        self.path = path
+        self.salt = (salt or secrets.token_hex(16)).encode()
+        self.max_bytes = max_bytes
+        self.written = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.path is not None
+
+    def configure(self, *, path: str, salt: str = "") -> None:
+        self.path = Path(path) if path else None
+        if salt:
+            self.salt = salt.encode()
+
+    # ----------------------------- ناشناس‌سازی ----------------------------- #
+
+    def pseudo_id(self, uid: int) -> int:
+        digest = hashlib.blake2b(str(uid).encode(), key=self.salt, digest_size=8).digest()
+        return 1_000_000_000 + int.from_bytes(digest, "big") % 8_000_000_000
+
+    def _token(self, value: str) -> str:
+        return hashlib.blake2b(value.encode(), key=self.salt, digest_size=9).hexdigest()
+
+    def _form(self, data: str) -> str:
+        try:
+            form = json.loads(data)
+        except ValueError:
+            return mask_text(data)
+        if not isinstance(form, dict):
+            return mask_text(data)
+        out = {k: v if k in FORM_KEEP else (mask_text(v) if isinstance(v, str) else v) for k, v in form.items()}
+        return json.dumps(out, ensure_ascii=False)
+
+    def _scrub(self, obj: Any, key: str = "") -> Any:
+        if isinstance(obj, list):
+            return [self._scrub(v, key) for v in obj]
+        if not isinstance(obj, dict):
+            if key in ("text", "caption") and isinstance(obj, str):
+                return anonymize_text(obj)
+            if key in ("data", "callback_data") and isinstance(obj, str):
+                return mask_callback_data(obj)
+            if key in ("file_id", "file_unique_id", "chat_instance") and isinstance(obj, str):
+                return self._token(obj)
+            return obj
+        person = "is_bot" in obj or obj.get("type") == "private"
+        out: dict = {}
+        for k, v in obj.items():
+            if k in DROP_KEYS:
+                continue
+            if person and k == "id" and isinstance(v, int) and v > 0 and not obj.get("is_bot"):
+                out[k] = self.pseudo_id(v)
+            elif person and k == "first_name":
+                out[k] = "u"
+            elif k == "web_app_data" and isinstance(v, dict):
+                out[k] = {**v, "data": self._form(v.get("data") or "")}
+            else:
+                out[k] = self._scrub(v, k)
+        return out
+
+    def entry(self, update: dict, role: str | None = None) -> dict:
+        entry: dict[str, Any] = {"t": round(time.time(), 3)}
+        if role:
+            entry["r"] = role
+        entry["u"] = self._scrub(update)
+        return entry
+
+    # ------------------------------- نوشتن ------------------------------- #
+
+    def record(self, update: dict, role: str | None = None) -> None:
+        if self.path is None:
+            return
+        line = json.dumps(self.entry(update, role), ensure_ascii=False, separators=(",", ":"))
+        LOG_WRITER.append(self.path, line, self.max_bytes)
+        self.written += 1
+
+
+UPDATE_RECORDER = UpdateRecorder()
@@ -0,0 +1,5 @@
+from .static import ASSETS, dashboard_url, webapp_url
+
+# مسیرهای HTTP در app/web/server.py ثبت می‌شوند (setup_web)؛ این‌جا فقط
+# چیزهایی است که هندلرهای ربات لازم دارند، تا import چرخه‌ای پیش نیاید.
+__all__ = ["ASSETS", "dashboard_url", "webapp_url"]
@@ -0,0 +1,238 @@
+from __future__ import annotations
+import json
+import time
+
+from aiohttp import web
+
+from ..handlers.moderation import bulk_moderate
+from ..handlers.state import list_pending
+from ..middlewares.identity import Identity, resolve_identity
+from ..normalize import search_key
+from .form_api import BOT_KEY
+from .init_data import verify_init_data
+
+# --------------------------------------------------------------------------- #
+#                API صف بررسی آگهی‌ها برای داشبورد ادمین (admin.html)          #
+# --------------------------------------------------------------------------- #
+# همهٔ درخواست‌ها سرآیند X-Telegram-Init-Data (initData همان WebApp) دارند و
+# فقط ادمین‌ها پذیرفته می‌شوند.
+#
+# GET  /api/admin/pending
+#      ?status=review|draft|all  &category=  &has_photos=1|0  &has_desc=1|0
+#      &min_age=<ثانیه>  &max_age=<ثانیه>  &limit=<≤50>  &cursor=<next_cursor>
+#      → {"items": [...], "next_cursor": "..." | null, "total": n}
+#      ترتیب: قدیمی‌ترین اول (created_at، سپس token)
+# POST /api/admin/pending/bulk
+#      {"action": "publish"|"reject", "tokens": [...]}
+#      یا {"action": ..., "filter": {همان پارامترهای GET}} ← مثلاً «همهٔ آگهی‌های
+#      قدیمی‌تر از X بدون توضیحات»؛ قدیمی‌ترین MAX_BULK مورد انتخاب می‌شوند
+#      → {"results": {token: "done"|"missing"|"failed"}, "summary": {...}}
+#      با Accept: application/x-ndjson پاسخ جریانی است: یک خط progress پس از
+#      هر آگهی و در پایان یک خط summary (برای نوار پیشرفت داشبورد)
+
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 50
+MAX_BULK = 200
+
+ACTIONS = ("publish", "reject")
+NDJSON = "application/x-ndjson"
+
+
+def _error(status: int, message: str) -> web.Response:
+    return web.json_response({"ok": False, "error": message}, status=status)
+
+
+async def _admin(request: web.Request) -> Identity | web.Response:
+    bot = request.app[BOT_KEY]
+    init = verify_init_data(request.headers.get("X-Telegram-Init-Data", ""), bot.token)
+    if init is None:
+        return _error(401, "اعتبار جلسهٔ تلگرام تایید نشد؛ داشبورد را دوباره از ربات باز کنید.")
+    identity = await resolve_identity(init["user"]["id"])
+    if not identity.is_admin:
+        return _error(403, "دسترسی ندارید.")
+    return identity
+
+
+def _status(info: dict) -> str:
+    # تا «تایید نهایی» کاربر، آگهی پیش‌نویس است؛ پس از آن در صف بررسی ادمین‌ها
+    return "review" if "grp" in info else "draft"
+
+
+def _item(token: str, info: dict, now: float) -> dict:
+    form = info.get("form") or {}
+    created = float(info.get("created_at") or 0)
+    return {
+        "token": token,
+        "status": _status(info),
+        "created_at": created,
+        "age": int(now - created) if created else None,
+        "number": (info.get("grp") or {}).get("number"),
+        "category": form.get("category"),
+        "car": form.get("car"),
+        "year": form.get("year"),
+        "color": form.get("color"),
+        "km": form.get("km"),
+        "gear": form.get("gear"),
+        "insurance": form.get("insurance"),
+        "price_words": form.get("price_words"),
+        "desc": (form.get("desc") or "")[:400],
+        "phone": form.get("phone"),
+        "username": form.get("username"),
+        "photos": len(form.get("photos") or []),
+    }
+
+
+def _flag(value: str | None) -> bool | None:
+    if value in (None, ""):
+        return None
+    return value not in ("0", "false", "no")
+
+
+def _seconds(value: str | None) -> float | None:
+    try:
+        return float(value) if value not in (None, "") else None
+    except ValueError:
+        return None
+
+
+def _matches(info: dict, q, now: float) -> bool:
+    status, category, has_photos, has_desc, min_age, max_age = q
+    if status != "all" and _status(info) != status:
+        return False
+    form = info.get("form") or {}
+    if category and search_key(form.get("category")) != category:
+        return False
+    if has_photos is not None and bool(form.get("photos")) != has_photos:
+        return False
+    if has_desc is not None and bool((form.get("desc") or "").strip()) != has_desc:
+        return False
+    age = now - float(info.get("created_at") or 0)
+    if min_age is not None and age < min_age:
+        return False
+    if max_age is not None and age > max_age:
+        return False
+    return True
+
+
+def _parse_cursor(raw: str) -> tuple[float, str] | None:
+    created, _, token = raw.partition(":")
+    try:
+        return float(created), token
+    except ValueError:
+        return None
+
+
+def _query(p) -> tuple | None:
+    """پارامترهای فیلتر (از query string یا بدنهٔ bulk)؛ None اگر status نامعتبر باشد"""
+    status = p.get("status") or "review"
+    if status not in ("review", "draft", "all"):
+        return None
+    return (
+        status,
+        search_key(p.get("category")),
+        _flag(p.get("has_photos")),
+        _flag(p.get("has_desc")),
+        _seconds(p.get("min_age")),
+        _seconds(p.get("max_age")),
+    )
+
+
+async def _select(q: tuple, now: float) -> list[tuple[float, str, dict]]:
+    """آگهی‌های مطابق فیلتر، قدیمی‌ترین اول"""
+    return sorted(
+        (float(info.get("created_at") or 0), token, info)
+        for token, info in (await list_pending()).items()
+        if _matches(info, q, now)
+    )
+
+
+async def pending_list(request: web.Request) -> web.Response:
+    identity = await _admin(request)
+    if isinstance(identity, web.Response):
+        return identity
+
+    p = request.query
+    q = _query(p)
+    if q is None:
+        return _error(400, "status نامعتبر است.")
+    try:
+        limit = min(max(int(p.get("limit", DEFAULT_LIMIT)), 1), MAX_LIMIT)
+    except ValueError:
+        limit = DEFAULT_LIMIT
+    after = _parse_cursor(p["cursor"]) if p.get("cursor") else None
+
+    now = time.time()
+    rows = await _select(q, now)
+    if after is not None:
+        rows = [r for r in rows if (r[0], r[1]) > after]
+
+    page = rows[:limit]
+    next_cursor = f"{page[-1][0]!r}:{page[-1][1]}" if len(rows) > limit else None
+    return web.json_response({
+        "items": [_item(token, info, now) for _, token, info in page],
+        "next_cursor": next_cursor,
+        "total": len(rows),
+    })
+
+
+async def pending_bulk(request: web.Request) -> web.StreamResponse:
+    identity = await _admin(request)
+    if isinstance(identity, web.Response):
+        return identity
+
+    try:
+        body = json.loads(await request.read() or b"{}")
+    except ValueError:
+        body = None
+    if not isinstance(body, dict):
+        return _error(400, "بدنهٔ درخواست JSON معتبر نیست.")
+    action = body.get("action")
+    if action not in ACTIONS:
+        return _error(400, "action باید publish یا reject باشد.")
+
+    remaining = 0
+    if isinstance(body.get("filter"), dict):
+        q = _query({k: str(v) for k, v in body["filter"].items() if v is not None})
+        if q is None:
+            return _error(400, "status نامعتبر است.")
+        rows = await _select(q, time.time())
+        tokens = [token for _, token, _ in rows[:MAX_BULK]]
+        remaining = max(len(rows) - MAX_BULK, 0)
+    else:
+        tokens = body.get("tokens")
+        if not isinstance(tokens, list) or not all(isinstance(t, str) for t in tokens):
+            return _error(400, "tokens باید فهرستی از شناسه‌ها باشد.")
+        if len(tokens) > MAX_BULK:
+            return _error(413, f"حداکثر {MAX_BULK} آگهی در هر درخواست.")
+        tokens = list(dict.fromkeys(tokens))
+
+    bot = request.app[BOT_KEY]
+    summary = {k: 0 for k in ("done", "missing", "failed")}
+
+    stream = None
+    if NDJSON in request.headers.get("Accept", ""):
+        stream = web.StreamResponse(headers={"Content-Type": NDJSON, "Cache-Control": "no-store"})
+        await stream.prepare(request)
+
+    async def progress(token: str, outcome: str) -> None:
+        summary[outcome] += 1
+        if stream is not None:
+            line = {"type": "progress", "token": token, "outcome": outcome,
+                    "processed": sum(summary.values()), "total": len(tokens)}
+            await stream.write(json.dumps(line, ensure_ascii=False).encode() + b"\n")
+
+    results = await bulk_moderate(bot, action, tokens, on_progress=progress)
+    final = {"results": results, "summary": summary, "remaining": remaining}
+    if stream is None:
+        return web.json_response(final)
+    try:
+        await stream.write(json.dumps({"type": "summary", **final}, ensure_ascii=False).encode() + b"\n")
+        await stream.write_eof()
+    except ConnectionResetError:
+        pass  # کلاینت رفته؛ کار دسته انجام شده است
+    return stream
+
+
+def register(app: web.Application) -> None:
+    app.router.add_get("/api/admin/pending", pending_list)
+    app.router.add_post("/api/admin/pending/bulk", pending_bulk)
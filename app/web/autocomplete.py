@@ -0,0 +1,29 @@
+from __future__ import annotations
+
+from aiohttp import web
+
+from ..car_index import CAR_INDEX
+
+# --------------------------------------------------------------------------- #
+#                 پیشنهاد خودکار نام خودرو برای فیلد car در WebApp             #
+# --------------------------------------------------------------------------- #
+# GET /api/car-models?q=<پیشوند>&limit=<≤20>  →  {"items": ["پژو 206 تیپ 2", …]}
+
+MAX_LIMIT = 20
+MAX_QUERY = 40
+
+
+async def car_models(request: web.Request) -> web.Response:
+    q = request.query.get("q", "")[:MAX_QUERY]
+    try:
+        limit = min(max(int(request.query.get("limit", "10")), 1), MAX_LIMIT)
+    except ValueError:
+        limit = 10
+    return web.json_response(
+        {"items": CAR_INDEX.suggest(q, limit)},
+        headers={"Cache-Control": "public, max-age=60"},
+    )
+
+
+def register(app: web.Application) -> None:
+    app.router.add_get("/api/car-models", car_models)
@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+from aiohttp import web
+
+from ..loop_monitor import LOOP_MONITOR
+from ..profiler import DEFAULT_INTERVAL, MAX_DURATION, PROFILER, ProfilerBusy
+from ..spans import SLOW_LOG
+from .metrics import debug_denied
+
+# --------------------------------------------------------------------------- #
+#                مسیرهای عیب‌یابی: پروفایلر نمونه‌بردار و آپدیت‌های کند        #
+# --------------------------------------------------------------------------- #
+# POST /debug/profile/start?interval_ms=5&duration=60
+# POST /debug/profile/stop   → متن collapsed stacks (همان فایل ذخیره‌شده)
+# GET  /debug/profile        → وضعیت
+# GET  /debug/slow-updates?limit=20 → آخرین آپدیت‌های کند با تفکیک span
+# GET  /debug/loop?recent=60 → تأخیر حلقه و انسدادهای ثبت‌شده (با پشته)
+# همه پشت debug_denied (app/web/metrics.py): بدون METRICS_TOKEN بسته‌اند (404)،
+# نه باز مثل /metrics؛ پشته‌ها و پروفایل‌ها جزئیات داخلی کد را نشان می‌دهند.
+
+
+def _number(value: str | None, default: float) -> float:
+    try:
+        return float(value) if value not in (None, "") else default
+    except ValueError:
+        return default
+
+
+async def profile_start(request: web.Request) -> web.Response:
+    if (denied := debug_denied(request)) is not None:
+        return denied
+    interval = _number(request.query.get("interval_ms"), DEFAULT_INTERVAL * 1e3) / 1e3
+    duration = _number(request.query.get("duration"), 60.0)
+    try:
+        PROFILER.start(interval=interval, max_duration=min(duration, MAX_DURATION))
+    except ProfilerBusy:
+        return web.json_response({"ok": False, "error": "profiler already running"}, status=409)
+    return web.json_response({"ok": True, **PROFILER.status()})
+
+
+async def profile_stop(request: web.Request) -> web.Response:
+    if (denied := debug_denied(request)) is not None:
+        return denied
+    text, path = PROFILER.stop()
+    headers = {"Cache-Control": "no-store"}
+    if path is not None:
+        headers["Content-Disposition"] = f'attachment; filename="{path.name}"'
+        headers["X-Profile-File"] = str(path)
+    return web.Response(text=text, content_type="text/plain", headers=headers)
+
+
+async def profile_status(request: web.Request) -> web.Response:
+    if (denied := debug_denied(request)) is not None:
+        return denied
+    return web.json_response(PROFILER.status())
+
+
+async def slow_updates(request: web.Request) -> web.Response:
+    if (denied := debug_denied(request)) is not None:
+        return denied
+    limit = int(_number(request.query.get("limit"), 20))
+    items = list(SLOW_LOG.recent)[-limit:] if limit > 0 else []
+    return web.json_response(
+        {"threshold_ms": SLOW_LOG.threshold * 1e3, "items": items[::-1]},
+        headers={"Cache-Control": "no-store"},
+    )
+
+
+async def loop_status(request: web.Request) -> web.Response:
+    if (denied := debug_denied(request)) is not None:
+        return denied
+    recent = _number(request.query.get("recent"), 0.0) or None
+    ready, details = LOOP_MONITOR.readiness()
+    return web.json_response(
+        {
+            "lag": LOOP_MONITOR.stats(recent=recent),
+            "ready": ready,
+            "readiness": details,
+            "block_debug": LOOP_MONITOR.block_debug,
+            "block_threshold_ms": LOOP_MONITOR.block_threshold * 1e3,
+            "blocks": list(LOOP_MONITOR.blocks)[::-1],
+        },
+        headers={"Cache-Control": "no-store"},
+    )
+
+
+def register(app: web.Application) -> None:
+    app.router.add_post("/debug/profile/start", profile_start)
+    app.router.add_post("/debug/profile/stop", profile_stop)
+    app.router.add_get("/debug/profile", profile_status)
+    app.router.add_get("/debug/slow-updates", slow_updates)
+    app.router.add_get("/debug/loop", loop_status)
@@ -0,0 +1,197 @@
+from __future__ import annotations
+import json
+
+from pathlib import Path
+
+from aiogram import Bot, types
+from aiogram.exceptions import TelegramAPIError
+from aiohttp import BodyPartReader, web
+
+from ..config import SETTINGS
+from ..handlers.form_schema import validate_form
+from ..handlers.membership import _user_is_member, build_join_kb
+from ..handlers.state import MAX_PHOTOS, save_photo_wait
+from ..handlers.user_flow import accept_form
+from ..middlewares.identity import resolve_identity
+from .init_data import verify_init_data
+from .uploads import CHUNK, UploadError, discard, spool_part, stage_photos
+
+# --------------------------------------------------------------------------- #
+#              ثبت فرم آگهی با HTTP (به‌جای tg.sendData در WebApp)             #
+# --------------------------------------------------------------------------- #
+# POST /api/form
+#   application/json      {"init_data": "<Telegram.WebApp.initData>", "form": {...}}
+#   multipart/form-data   init_data، form (JSON) و سپس تا MAX_PHOTOS بخش photo
+#                         (init_data می‌تواند در سرآیند X-Telegram-Init-Data هم بیاید)
+#   200 {"ok": true, "photos": n}          ← آگهی ساخته و پیام تایید فرستاده شد
+#   422 {"ok": false, "errors": {...}}     ← خطای فیلدها (همان validate_form)
+#   401/403/400/413/415 {"ok": false, "error": "..."}
+#   502 {"ok": false, "error": "..."}      ← ارسال عکس‌ها یا پیام تایید به تلگرام نشد
+# فرم نامعتبر هیچ درخواستی به تلگرام نمی‌زند و عکس‌هایش هم خوانده نمی‌شوند.
+# initData فقط وقتی هست که WebApp از دکمهٔ شیشه‌ای (keyboards.form_kb) باز شود.
+
+BOT_KEY = web.AppKey("bot", Bot)
+
+# فرم کامل با توضیحات طولانی هم چند کیلوبایت بیشتر نیست
+MAX_BODY = 16 * 1024
+
+
+class _Rejected(Exception):
+    def __init__(self, response: web.Response) -> None:
+        self.response = response
+
+
+def _error(status: int, message: str) -> web.Response:
+    return web.json_response({"ok": False, "error": message}, status=status)
+
+
+def _verify(bot: Bot, init_raw: str) -> types.User:
+    """امضای initData؛ در صورت خطا _Rejected"""
+    init = verify_init_data(init_raw, bot.token)
+    if init is None:
+        raise _Rejected(_error(401, "اعتبار جلسهٔ تلگرام تایید نشد؛ فرم را دوباره از ربات باز کنید."))
+    return types.User.model_validate({**init["user"], "is_bot": False})
+
+
+def _validate(form: object) -> dict:
+    res = validate_form(form)
+    if not res.ok:
+        raise _Rejected(web.json_response({"ok": False, "errors": res.errors}, status=422))
+    return res.form
+
+
+def _check(bot: Bot, init_raw: str, form: object) -> tuple[types.User, dict]:
+    """امضای initData و اعتبار فرم؛ در صورت خطا _Rejected"""
+    return _verify(bot, init_raw), _validate(form)
+
+
+async def _ensure_member(bot: Bot, user: types.User) -> None:
+    identity = await resolve_identity(user.id)
+    if not await _user_is_member(bot, user.id, identity):
+        try:
+            await bot.send_message(
+                user.id,
+                "⛔ ابتدا در کانال‌های موردنیاز عضو شوید، سپس دوباره اقدام کنید.",
+                reply_markup=await build_join_kb(bot),
+            )
+        except TelegramAPIError:
+            # پیام راهنما نرسید (مثلاً ربات مسدود شده)؛ پاسخ HTTP همان 403 است
+            pass
+        raise _Rejected(_error(403, "ابتدا در کانال‌های موردنیاز عضو شوید."))
+
+
+async def _read_json(request: web.Request) -> tuple[str, object]:
+    if (request.content_length or 0) > MAX_BODY:
+        raise _Rejected(_error(413, "حجم فرم بیش از حد مجاز است."))
+    raw = await request.read()
+    if len(raw) > MAX_BODY:
+        raise _Rejected(_error(413, "حجم فرم بیش از حد مجاز است."))
+    try:
+        body = json.loads(raw or b"{}")
+    except ValueError:
+        body = None
+    if not isinstance(body, dict):
+        raise _Rejected(_error(400, "بدنهٔ درخواست JSON معتبر نیست."))
+    init_raw = body.get("init_data") or request.headers.get("X-Telegram-Init-Data", "")
+    return init_raw, body.get("form")
+
+
+async def _read_text(part: BodyPartReader) -> str:
+    data = bytearray()
+    while chunk := await part.read_chunk(CHUNK):
+        data += chunk
+        if len(data) > MAX_BODY:
+            raise _Rejected(_error(413, "حجم فرم بیش از حد مجاز است."))
+    return data.decode("utf-8", "replace")
+
+
+async def _read_multipart(
+    request: web.Request, bot: Bot, paths: list[Path]
+) -> tuple[types.User, dict]:
+    """
+    init_data و form باید پیش از عکس‌ها بیایند؛ با رسیدن اولین عکس (یا پایان
+    درخواست) هویت، عضویت و فرم بررسی می‌شوند، پس عکسِ درخواست نامعتبر
+    هیچ‌وقت خوانده و روی دیسک نوشته نمی‌شود. اگر initData در سرآیند باشد،
+    هویت و عضویت پیش از خواندن هر بخشی بررسی می‌شوند.
+    """
+    fields: dict[str, str] = {}
+    user: types.User | None = None
+    form: dict | None = None
+
+    header = request.headers.get("X-Telegram-Init-Data", "")
+    if header:
+        user = _verify(bot, header)
+        await _ensure_member(bot, user)
+
+    async def check() -> None:
+        nonlocal user, form
+        if user is None:
+            user = _verify(bot, fields.get("init_data", ""))
+            await _ensure_member(bot, user)
+        form = _validate(_loads(fields.get("form")))
+
+    reader = await request.multipart()
+
+    async for part in reader:
+        if not isinstance(part, BodyPartReader):
+            raise _Rejected(_error(400, "ساختار multipart پشتیبانی نمی‌شود."))
+        if part.name in ("init_data", "form") and part.filename is None:
+            fields[part.name] = await _read_text(part)
+            continue
+        if part.name != "photo":
+            await part.release()
+            continue
+
+        if form is None:
+            await check()
+        if len(paths) >= MAX_PHOTOS:
+            raise _Rejected(_error(413, f"حداکثر {MAX_PHOTOS} عکس مجاز است."))
+        try:
+            paths.append(await spool_part(part))
+        except UploadError as e:
+            raise _Rejected(_error(e.status, e.message))
+
+    if form is None:
+        await check()
+    return user, form
+
+
+def _loads(raw: str | None) -> object:
+    try:
+        return json.loads(raw or "{}")
+    except ValueError:
+        return None
+
+
+async def submit_form(request: web.Request) -> web.Response:
+    bot = request.app[BOT_KEY]
+    paths: list[Path] = []
+    try:
+        if request.content_type == "multipart/form-data":
+            # هویت و عضویت همان‌جا، پیش از خواندن عکس‌ها بررسی می‌شوند
+            user, form = await _read_multipart(request, bot, paths)
+        else:
+            user, form = _check(bot, *await _read_json(request))
+            await _ensure_member(bot, user)
+
+        try:
+            photos = await stage_photos(bot, SETTINGS.STAGING_CHAT_ID or user.id, paths) if paths else []
+        except TelegramAPIError:
+            return _error(502, "ارسال عکس‌ها به تلگرام ناموفق بود.")
+    except _Rejected as e:
+        return e.response
+    finally:
+        await discard(paths)
+
+    try:
+        await accept_form(bot, user, form, photos=photos)
+    except TelegramAPIError:
+        # accept_form آگهی و انتظار عکس را پس گرفته است؛ کاربر باید ربات را باز کند
+        return _error(502, "ارسال پیام تایید در تلگرام ممکن نشد؛ ربات را باز (یا از مسدودی خارج) کنید و دوباره بفرستید.")
+    await save_photo_wait(user.id)
+    return web.json_response({"ok": True, "photos": len(photos)})
+
+
+def register(app: web.Application, bot: Bot) -> None:
+    app[BOT_KEY] = bot
+    app.router.add_post("/api/form", submit_form)
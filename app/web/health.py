@@ -0,0 +1,38 @@
+from __future__ import annotations
+
+from aiohttp import web
+
+from ..health import OUTBOUND_HEALTH, UPDATES_HEALTH, readiness
+
+# --------------------------------------------------------------------------- #
+#                   /healthz (زنده بودن) و /readyz (آمادگی) برای پلتفرم        #
+# --------------------------------------------------------------------------- #
+# /healthz فقط وقتی 503 می‌دهد که نسخه واقعاً مرده است (ناظر polling تسلیم
+# شده)؛ قفل شدن حلقه را خود timeout همین درخواست نشان می‌دهد.
+# /readyz همهٔ بررسی‌های ثبت‌شده در app/health.py را اجرا می‌کند: polling،
+# صف ارسال و تأخیر حلقه. هر دو بدون توکن‌اند (کاوشگرهای پلتفرم).
+
+_NO_STORE = {"Cache-Control": "no-store"}
+
+
+async def healthz(_: web.Request) -> web.Response:
+    alive, status = UPDATES_HEALTH.liveness()
+    return web.json_response(
+        {"ok": alive, "updates": status, "outbound": OUTBOUND_HEALTH.status()},
+        status=200 if alive else 503,
+        headers=_NO_STORE,
+    )
+
+
+async def readyz(_: web.Request) -> web.Response:
+    ready, checks = readiness()
+    return web.json_response(
+        {"ok": ready, "checks": checks},
+        status=200 if ready else 503,
+        headers=_NO_STORE,
+    )
+
+
+def register(app: web.Application) -> None:
+    app.router.add_get("/healthz", healthz)
+    app.router.add_get("/readyz", readyz)
@@ -0,0 +1,57 @@
+from __future__ import annotations
+import hashlib
+import hmac
+import json
+import time
+from functools import lru_cache
+from urllib.parse import parse_qsl
+
+# --------------------------------------------------------------------------- #
+#                 اعتبارسنجی initData تلگرام (Telegram WebApp)                #
+# --------------------------------------------------------------------------- #
+# secret_key = HMAC_SHA256(key="WebAppData", msg=bot_token)
+# hash       = hex(HMAC_SHA256(key=secret_key, msg=data_check_string))
+# data_check_string = همهٔ فیلدها به‌جز hash، مرتب‌شده، به شکل «k=v» با «\n»
+
+# initData قدیمی‌تر از این (ثانیه) پذیرفته نمی‌شود
+MAX_AGE = 24 * 3600
+
+
+@lru_cache(maxsize=8)
+def _secret_key(bot_token: str) -> bytes:
+    """کلید مشتق‌شده فقط به توکن ربات وابسته است؛ یک بار محاسبه می‌شود."""
+    return hmac.new(b"WebAppData", bot_token.encode(), hashlib.sha256).digest()
+
+
+def verify_init_data(
+    init_data: str, bot_token: str, *, max_age: int = MAX_AGE, now: float | None = None
+) -> dict | None:
+    """
+    بررسی امضای initData؛ در صورت اعتبار، فیلدها (با user به‌صورت dict)
+    و در غیر این صورت None برمی‌گرداند.
+    """
+    if not init_data or not bot_token:
+        return None
+    try:
+        fields = dict(parse_qsl(init_data, keep_blank_values=True, strict_parsing=True))
+    except ValueError:
+        return None
+
+    received = fields.pop("hash", "")
+    check_string = "\n".join(f"{k}={fields[k]}" for k in sorted(fields))
+    expected = hmac.new(_secret_key(bot_token), check_string.encode(), hashlib.sha256).hexdigest()
+    if not hmac.compare_digest(expected, received):
+        return None
+
+    try:
+        auth_date = int(fields.get("auth_date", "0"))
+        user = json.loads(fields["user"]) if "user" in fields else None
+    except (ValueError, TypeError):
+        return None
+    if max_age and (now if now is not None else time.time()) - auth_date > max_age:
+        return None
+    if not isinstance(user, dict) or not isinstance(user.get("id"), int):
+        return None
+
+    fields["user"] = user
+    return fields
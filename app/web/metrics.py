@@ -0,0 +1,88 @@
+from __future__ import annotations
+import hmac
+
+from aiohttp import web
+
+from ..config import SETTINGS
+from ..handlers.state import INPUT_WAIT, MEDIA_GROUP_BUF, PENDING, PHOTO_WAIT
+from ..api_trace import API_TRACE
+from ..metrics import HANDLER_LATENCY, REGISTRY
+
+# --------------------------------------------------------------------------- #
+#                    GET /metrics  (قالب متنی Prometheus 0.0.4)               #
+# --------------------------------------------------------------------------- #
+# GET /debug/api-calls?recent=<n>  → خلاصهٔ ApiTrace (JSON): به تفکیک متد، به
+#      تفکیک هندلر (با میانگین درخواست به‌ازای هر اجرا) و n رکورد آخر
+# اگر METRICS_TOKEN تنظیم شده باشد، سرآیند «Authorization: Bearer <token>» لازم است.
+# مسیرهای /debug/* بسته شکست می‌خورند: بدون METRICS_TOKEN همیشه 404 می‌دهند.
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _state_sizes():
+    """اندازهٔ دیکشنری‌های وضعیت؛ فقط هنگام خواندن /metrics شمرده می‌شوند"""
+    yield ("pending",), len(PENDING)
+    yield ("photo_wait",), len(PHOTO_WAIT)
+    yield ("media_group_buf",), len(MEDIA_GROUP_BUF)
+    kinds: dict[str, int] = {}
+    for st in list(INPUT_WAIT.values()):
+        kind = st.get("kind", "")
+        kinds[kind] = kinds.get(kind, 0) + 1
+    for kind, n in kinds.items():
+        yield (f"input_wait:{kind}",), n
+
+
+REGISTRY.gauge(
+    "bot_state_entries",
+    "Entries in the in-process state dicts (PENDING, PHOTO_WAIT, input waits, ...)",
+    ("dict",),
+    collect=_state_sizes,
+)
+
+
+def authorized(request: web.Request) -> bool:
+    if not SETTINGS.METRICS_TOKEN:
+        return True
+    auth = request.headers.get("Authorization", "")
+    return hmac.compare_digest(auth, f"Bearer {SETTINGS.METRICS_TOKEN}")
+
+
+def debug_denied(request: web.Request) -> web.Response | None:
+    """محافظ /debug/*: بدون توکن تنظیم‌شده 404، با توکن نادرست 401، وگرنه None"""
+    if not SETTINGS.METRICS_TOKEN:
+        return web.Response(status=404, text="not found")
+    if not authorized(request):
+        return web.Response(status=401, text="unauthorized")
+    return None
+
+
+async def metrics(request: web.Request) -> web.Response:
+    if not authorized(request):
+        return web.Response(status=401, text="unauthorized")
+    return web.Response(
+        body=REGISTRY.render().encode(),
+        headers={"Content-Type": CONTENT_TYPE, "Cache-Control": "no-store"},
+    )
+
+
+def _invocations() -> dict[str, int]:
+    """تعداد اجرای هر هندلر از هیستوگرام تأخیر (همان کلید CURRENT_HANDLER)"""
+    return {".".join(labels): sum(counts) for labels, (counts, _) in HANDLER_LATENCY.values.items()}
+
+
+async def api_calls(request: web.Request) -> web.Response:
+    if (denied := debug_denied(request)) is not None:
+        return denied
+    try:
+        recent = min(max(int(request.query.get("recent", "50")), 0), API_TRACE.ring.maxlen)
+    except ValueError:
+        recent = 50
+    return web.json_response(
+        API_TRACE.snapshot(recent=recent, invocations=_invocations()),
+        headers={"Cache-Control": "no-store"},
+    )
+
+
+def register(app: web.Application) -> None:
+    app.router.add_get("/metrics", metrics)
+    app.router.add_get("/debug/api-calls", api_calls)
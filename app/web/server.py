@@ -0,0 +1,34 @@
+from aiogram import Bot
+from aiohttp import web
+
+from ..api_trace import CURRENT_HANDLER
+from . import admin_api, autocomplete, debug, form_api, health, metrics
+from .static import ASSETS
+
+
+@web.middleware
+async def trace_handler(request: web.Request, handler):
+    """درخواست‌های Bot API که از مسیرهای وب فرستاده می‌شوند به نام همان مسیر ثبت شوند"""
+    route = request.match_info.route
+    name = route.resource.canonical if route.resource is not None else request.path
+    ctx = CURRENT_HANDLER.set(f"http {request.method} {name}")
+    try:
+        return await handler(request)
+    finally:
+        CURRENT_HANDLER.reset(ctx)
+
+
+def setup_web(app: web.Application, bot: Bot) -> web.Application:
+    """
+    ثبت مسیرهای وب روی اپ aiohttp: فایل‌های webapp/، API فرم، پیشنهاد خودرو،
+    داشبورد ادمین، /metrics، /healthz و /readyz و مسیرهای عیب‌یابی /debug/…
+    """
+    app.middlewares.append(trace_handler)
+    ASSETS.load().register(app)
+    form_api.register(app, bot)
+    autocomplete.register(app)
+    admin_api.register(app)
+    metrics.register(app)
+    health.register(app)
+    debug.register(app)
+    return app
@@ -0,0 +1,192 @@
+from __future__ import annotations
+import asyncio
+import gzip
+import hashlib
+import mimetypes
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from aiohttp import web
+
+from ..config import SETTINGS
+
+try:  # وابستگی اختیاری؛ بدون آن فقط gzip ساخته می‌شود
+    import brotli
+except ImportError:  # pragma: no cover
+    brotli = None
+
+# --------------------------------------------------------------------------- #
+#             سرو کردن webapp/ از همین سرور aiohttp (فشرده + کش‌پذیر)         #
+# --------------------------------------------------------------------------- #
+# در شروع برنامه هر فایل یک بار خوانده، هش و به gzip/brotli فشرده می‌شود.
+#   /webapp/<name>            ← آدرس ثابت؛ Cache-Control: no-cache + ETag → 304
+#   /webapp/<digest>/<name>   ← آدرس هش‌دار؛ immutable برای یک سال
+# دکمهٔ «فرم ثبت آگهی» به آدرس هش‌دار اشاره می‌کند، پس بازدید دوباره بدون
+# هیچ درخواستی از کش مرورگر باز می‌شود و با هر تغییر فایل، آدرس هم عوض می‌شود.
+
+WEBAPP_DIR = Path(__file__).resolve().parents[2] / "webapp"
+SPOOL_DIR = Path("/tmp/bot_data/webapp_cache")
+
+IMMUTABLE = "public, max-age=31536000, immutable"
+REVALIDATE = "no-cache"
+
+# ترتیب ترجیح هنگام یکسان بودن q در Accept-Encoding
+_ENCODINGS = ("br", "gzip")
+
+
+@dataclass(slots=True)
+class Variant:
+    encoding: str | None
+    etag: str
+    body: bytes | None = None  # نسخهٔ داغ در حافظه
+    path: Path | None = None   # اگر نسخهٔ داغ خاموش باشد، از دیسک خوانده می‌شود
+
+    async def read(self) -> bytes:
+        if self.body is not None:
+            return self.body
+        return await asyncio.to_thread(self.path.read_bytes)
+
+
+@dataclass(slots=True)
+class Asset:
+    name: str
+    digest: str
+    content_type: str
+    variants: dict[str | None, Variant] = field(default_factory=dict)
+
+
+def _accepted(header: str) -> set[str]:
+    """کدگذاری‌های مجاز از Accept-Encoding (q=0 یعنی ممنوع)"""
+    out: set[str] = set()
+    for part in header.split(","):
+        token, _, params = part.strip().partition(";")
+        token = token.strip().lower()
+        q = params.strip().replace(" ", "")
+        if not token or q in ("q=0", "q=0.0", "q=0.00", "q=0.000"):
+            continue
+        out.add(token)
+    if "*" in out:
+        out.update(_ENCODINGS)
+    return out
+
+
+def _etag_matches(header: str, etag: str) -> bool:
+    if header.strip() == "*":
+        return True
+    return any(tag.strip().removeprefix("W/") == etag for tag in header.split(","))
+
+
+class StaticAssets:
+    def __init__(self, root: Path = WEBAPP_DIR, *, hot: bool = True) -> None:
+        self.root = root
+        self.hot = hot
+        self.assets: dict[str, Asset] = {}
+        self.prefix = "/webapp"
+
+    def load(self) -> "StaticAssets":
+        """خواندن، هش و فشرده‌سازی همهٔ فایل‌ها (یک بار در شروع برنامه)"""
+        assets: dict[str, Asset] = {}
+        for path in sorted(self.root.iterdir()) if self.root.is_dir() else ():
+            if not path.is_file() or path.name.startswith("."):
+                continue
+            raw = path.read_bytes()
+            digest = hashlib.sha256(raw).hexdigest()[:16]
+            ctype = mimetypes.guess_type(path.name)[0] or "application/octet-stream"
+            if ctype.startswith("text/") or ctype in ("application/javascript", "application/json"):
+                ctype += "; charset=utf-8"
+            asset = Asset(name=path.name, digest=digest, content_type=ctype)
+
+            encoded: dict[str | None, bytes] = {None: raw, "gzip": gzip.compress(raw, 9, mtime=0)}
+            if brotli is not None:
+                encoded["br"] = brotli.compress(raw, quality=11)
+            for enc, body in encoded.items():
+                # نسخهٔ فشرده‌ای که کوچک‌تر نیست ارزش سرو کردن ندارد
+                if enc is not None and len(body) >= len(raw):
+                    continue
+                etag = f'"{digest}-{enc}"' if enc else f'"{digest}"'
+                variant = Variant(encoding=enc, etag=etag)
+                if self.hot:
+                    variant.body = body
+                else:
+                    SPOOL_DIR.mkdir(parents=True, exist_ok=True)
+                    variant.path = SPOOL_DIR / f"{digest}.{enc or 'raw'}"
+                    variant.path.write_bytes(body)
+                asset.variants[enc] = variant
+            assets[path.name] = asset
+        self.assets = assets
+        return self
+
+    def url(self, base: str, name: str = "index.html") -> str | None:
+        """آدرس هش‌دار فایل روی سرور عمومی base"""
+        asset = self.assets.get(name)
+        if asset is None:
+            return None
+        return f"{base.rstrip('/')}{self.prefix}/{asset.digest}/{name}"
+
+    def _pick(self, asset: Asset, request: web.Request) -> Variant:
+        accepted = _accepted(request.headers.get("Accept-Encoding", ""))
+        for enc in _ENCODINGS:
+            if enc in accepted and enc in asset.variants:
+                return asset.variants[enc]
+        return asset.variants[None]
+
+    async def respond(self, request: web.Request, asset: Asset, cache_control: str) -> web.StreamResponse:
+        variant = self._pick(asset, request)
+        headers = {
+            "ETag": variant.etag,
+            "Cache-Control": cache_control,
+            "Vary": "Accept-Encoding",
+        }
+        if _etag_matches(request.headers.get("If-None-Match", ""), variant.etag):
+            return web.Response(status=304, headers=headers)
+
+        headers["Content-Type"] = asset.content_type
+        if variant.encoding:
+            headers["Content-Encoding"] = variant.encoding
+        return web.Response(body=await variant.read(), headers=headers)
+
+    # ------------------------------ هندلرها ------------------------------ #
+
+    async def handle_plain(self, request: web.Request) -> web.StreamResponse:
+        asset = self.assets.get(request.match_info.get("name") or "index.html")
+        if asset is None:
+            raise web.HTTPNotFound()
+        return await self.respond(request, asset, REVALIDATE)
+
+    async def handle_hashed(self, request: web.Request) -> web.StreamResponse:
+        name = request.match_info["name"]
+        asset = self.assets.get(name)
+        if asset is None:
+            raise web.HTTPNotFound()
+        if request.match_info["digest"] != asset.digest:
+            # کیبوردهای قدیمی به نسخهٔ قبلی اشاره می‌کنند → نسخهٔ فعلی
+            raise web.HTTPFound(f"{self.prefix}/{asset.digest}/{name}")
+        return await self.respond(request, asset, IMMUTABLE)
+
+    def register(self, app: web.Application, prefix: str = "/webapp") -> None:
+        self.prefix = prefix
+        app.router.add_get(f"{prefix}/", self.handle_plain)
+        app.router.add_get(f"{prefix}/{{digest:[0-9a-f]{{16}}}}/{{name}}", self.handle_hashed)
+        app.router.add_get(f"{prefix}/{{name}}", self.handle_plain)
+
+
+ASSETS = StaticAssets(hot=SETTINGS.WEBAPP_HOT_COPY)
+
+
+def webapp_url(name: str = "index.html") -> str:
+    """
+    آدرس فرم برای دکمهٔ WebApp: اگر PUBLIC_BASE_URL تنظیم شده باشد آدرس
+    هش‌دار همین سرور، وگرنه WEBAPP_URL (میزبانی بیرونی).
+    """
+    if SETTINGS.PUBLIC_BASE_URL:
+        url = ASSETS.url(SETTINGS.PUBLIC_BASE_URL, name)
+        if url:
+            return url
+    return SETTINGS.WEBAPP_URL
+
+
+def dashboard_url() -> str:
+    """آدرس داشبورد ادمین (admin.html)؛ فقط وقتی همین سرور سرو می‌کند"""
+    if not SETTINGS.PUBLIC_BASE_URL:
+        return ""
+    return ASSETS.url(SETTINGS.PUBLIC_BASE_URL, "admin.html") or ""
@@ -0,0 +1,122 @@
+from __future__ import annotations
+import asyncio
+import os
+import tempfile
+from pathlib import Path
+from typing import BinaryIO
+
+from aiogram import Bot
+from aiogram.exceptions import TelegramAPIError
+from aiogram.types import FSInputFile
+from aiogram.utils.media_group import MediaGroupBuilder
+from aiohttp import BodyPartReader
+
+# --------------------------------------------------------------------------- #
+#          دریافت جریانی عکس‌ها از WebApp و گرفتن file_id از تلگرام          #
+# --------------------------------------------------------------------------- #
+# هر عکس تکه‌تکه از multipart خوانده و مستقیم در فایل موقت نوشته می‌شود
+# (هیچ‌وقت کل فایل در حافظه نیست). سپس همهٔ عکس‌ها با «یک» درخواست به چت
+# staging فرستاده می‌شوند تا file_id بگیرند و فایل‌های موقت پاک می‌شوند.
+# خود پیام‌های staging هم بلافاصله با یک deleteMessages پاک می‌شوند (file_id
+# معتبر می‌ماند)؛ بدون STAGING_CHAT_ID این چت خود کاربر است و عکس‌ها نباید
+# آن‌جا بمانند.
+# کار با فایل‌ها با asyncio.to_thread بیرون از حلقه است (نه روی رشتهٔ
+# storage-io، تا نوشتن عکس ۱۰ مگابایتی صف انباره‌ها را معطل نکند).
+
+UPLOAD_DIR = Path("/tmp/bot_data/uploads")
+
+# سقف عکس در Bot API
+MAX_PHOTO_BYTES = 10 * 1024 * 1024
+CHUNK = 64 * 1024
+
+# بایت‌هایی از ابتدای فایل که برای تشخیص نوع لازم است (WebP: RIFF....WEBP)
+_HEAD = 12
+
+_SIGNATURES = (
+    b"\xff\xd8\xff",        # JPEG
+    b"\x89PNG\r\n\x1a\n",   # PNG
+)
+
+
+class UploadError(Exception):
+    def __init__(self, status: int, message: str) -> None:
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+def _is_image(head: bytes) -> bool:
+    if head.startswith(_SIGNATURES):
+        return True
+    return head[:4] == b"RIFF" and head[8:12] == b"WEBP"
+
+
+def _open_spool() -> tuple[Path, BinaryIO]:
+    UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
+    fd, name = tempfile.mkstemp(dir=UPLOAD_DIR, suffix=".img")
+    return Path(name), os.fdopen(fd, "wb")
+
+
+def _abort_spool(path: Path, f: BinaryIO) -> None:
+    f.close()
+    path.unlink(missing_ok=True)
+
+
+async def spool_part(part: BodyPartReader, *, limit: int = MAX_PHOTO_BYTES) -> Path:
+    """
+    نوشتن یک بخش multipart در فایل موقت با سقف حجم و بررسی نوع تصویر.
+    نوع فایل از همان بایت‌های اول بررسی می‌شود و تا آن موقع چیزی روی دیسک
+    نمی‌رود؛ همهٔ کارهای فایل (ساخت، نوشتن، بستن) روی رشتهٔ جدا انجام می‌شوند.
+    """
+    head = b""
+    while len(head) < _HEAD and (chunk := await part.read_chunk(CHUNK)):
+        head += chunk
+    if not head:
+        raise UploadError(400, "فایل عکس خالی است.")
+    if not _is_image(head[:_HEAD]):
+        raise UploadError(415, "فقط عکس‌های JPEG، PNG یا WebP پذیرفته می‌شوند.")
+
+    path, f = await asyncio.to_thread(_open_spool)
+    size = 0
+    try:
+        chunk = head
+        while chunk:
+            size += len(chunk)
+            if size > limit:
+                raise UploadError(413, "حجم هر عکس حداکثر ۱۰ مگابایت است.")
+            await asyncio.to_thread(f.write, chunk)
+            chunk = await part.read_chunk(CHUNK)
+        await asyncio.to_thread(f.close)
+    except BaseException:
+        await asyncio.shield(asyncio.to_thread(_abort_spool, path, f))
+        raise
+    return path
+
+
+def _discard(paths: list[Path]) -> None:
+    for p in paths:
+        p.unlink(missing_ok=True)
+
+
+async def discard(paths: list[Path]) -> None:
+    if paths:
+        await asyncio.to_thread(_discard, paths)
+
+
+async def stage_photos(bot: Bot, chat_id: int, paths: list[Path]) -> list[str]:
+    """
+    ارسال یک‌بارهٔ عکس‌ها به چت staging و برگرداندن file_id بزرگ‌ترین اندازه؛
+    پیام‌های staging سپس پاک می‌شوند (شکست پاک کردن نادیده گرفته می‌شود).
+    """
+    if len(paths) == 1:
+        msgs = [await bot.send_photo(chat_id, FSInputFile(paths[0]), disable_notification=True)]
+    else:
+        mg = MediaGroupBuilder()
+        for p in paths:
+            mg.add_photo(media=FSInputFile(p))
+        msgs = await bot.send_media_group(chat_id, mg.build(), disable_notification=True)
+    try:
+        await bot.delete_messages(chat_id, [m.message_id for m in msgs])
+    except TelegramAPIError:
+        pass
+    return [m.photo[-1].file_id for m in msgs if m.photo]
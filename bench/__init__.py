@@ -0,0 +1 @@
+# benchmarks — اجرا: python -m bench (همه، با --check/--save/--compare) یا python -m bench.<name>
@@ -0,0 +1,121 @@
+from __future__ import annotations
+import argparse
+import importlib
+import json
+import os
+import pkgutil
+import sys
+from pathlib import Path
+
+# app/config هنگام import به WEBAPP_URL نیاز دارد؛ بنچمارک‌ها آفلاین‌اند
+os.environ.setdefault("WEBAPP_URL", "https://example.invalid/webapp")
+
+from . import _harness  # noqa: E402
+
+# --------------------------------------------------------------------------- #
+#       اجرای همهٔ بنچمارک‌ها + ذخیرهٔ خط مبنا و مقایسه با آن (پسرفت‌ها)        #
+# --------------------------------------------------------------------------- #
+# python -m bench                        همهٔ bench_*.py
+# python -m bench storage routing        فقط ماژول‌هایی که نامشان شامل این‌هاست
+# python -m bench --quick                min_time کوتاه‌تر (بررسی سریع، نه اندازه‌گیری)
+# python -m bench --save base.json       ذخیرهٔ نتایج (ns/op) به‌عنوان خط مبنا
+# python -m bench --compare base.json    مقایسه؛ کندتر از threshold → خروج با کد 1
+# python -m bench --check                فقط بررسی‌های درستی (CHECKS) بدون اندازه‌گیری
+#
+# هر ماژول می‌تواند CHECKS (تاپلی از تابع‌های بی‌آرگومان) داشته باشد، مثل
+# «خروجی طلایی» کپشن‌ها/کیبوردها در برابر پیاده‌سازی قبلی. این‌ها پیش از هر
+# اندازه‌گیری اجرا می‌شوند و شکست هر کدام یعنی خروج با کد 1.
+
+
+def _modules(filters: list[str]) -> list[str]:
+    here = Path(__file__).parent
+    names = sorted(m.name for m in pkgutil.iter_modules([str(here)]) if m.name.startswith("bench_"))
+    if filters:
+        names = [n for n in names if any(f in n for f in filters)]
+    return names
+
+
+def run_checks(names: list[str]) -> list[str]:
+    """اجرای CHECKS ماژول‌ها؛ نام بررسی‌های شکست‌خورده را برمی‌گرداند"""
+    failed: list[str] = []
+    for name in names:
+        module = importlib.import_module(f"{__package__}.{name}")
+        for check in getattr(module, "CHECKS", ()):
+            label = f"{name}.{check.__name__}"
+            try:
+                check()
+            except Exception as exc:
+                failed.append(label)
+                print(f"FAIL {label}: {exc!r:.500}", file=sys.stderr)
+            else:
+                print(f"ok   {label}")
+    return failed
+
+
+def compare(base: dict[str, float], current: dict[str, float], threshold: float) -> list[str]:
+    """چاپ تغییر هر مورد نسبت به خط مبنا؛ نام موارد پسرفت‌کرده را برمی‌گرداند"""
+    regressed: list[str] = []
+    print(f"\n{'case':<56} {'base':>12} {'now':>12} {'delta':>8}")
+    for name, now in current.items():
+        old = base.get(name)
+        if old is None:
+            print(f"{name:<56} {'-':>12} {now:>12.1f} {'new':>8}")
+            continue
+        delta = now / old - 1.0
+        mark = ""
+        if delta > threshold:
+            regressed.append(name)
+            mark = "  REGRESSION"
+        print(f"{name:<56} {old:>12.1f} {now:>12.1f} {delta:>+7.1%}{mark}")
+    return regressed
+
+
+def main() -> int:
+    p = argparse.ArgumentParser(prog="python -m bench", description="offline microbenchmarks")
+    p.add_argument("filters", nargs="*", help="substring of module names, e.g. storage")
+    p.add_argument("--quick", action="store_true", help="short runs (smoke test, noisy numbers)")
+    p.add_argument("--check", action="store_true", help="run correctness checks only, no timing")
+    p.add_argument("--save", metavar="FILE", help="write results as a baseline JSON")
+    p.add_argument("--compare", metavar="FILE", help="compare against a saved baseline")
+    p.add_argument(
+        "--threshold", type=float, default=0.25,
+        help="relative slowdown counted as a regression (default 0.25 = +25%%)",
+    )
+    args = p.parse_args()
+
+    if args.quick:
+        _harness.TIME_SCALE = 0.1
+    names = _modules(args.filters)
+    if not names:
+        print("no benchmark module matched", file=sys.stderr)
+        return 2
+
+    failed = run_checks(names)
+    if failed:
+        print(f"\n{len(failed)} check(s) failed", file=sys.stderr)
+        return 1
+    if args.check:
+        return 0
+
+    for name in names:
+        print(f"# {name}")
+        importlib.import_module(f"{__package__}.{name}").main()
+
+    results = dict(_harness.RESULTS)
+    if args.save:
+        Path(args.save).write_text(
+            json.dumps({"unit": "ns/op", "results": results}, indent=2, sort_keys=True),
+            encoding="utf-8",
+        )
+        print(f"\nbaseline saved: {args.save} ({len(results)} cases)")
+    if args.compare:
+        base = json.loads(Path(args.compare).read_text(encoding="utf-8"))["results"]
+        regressed = compare(base, results, args.threshold)
+        if regressed:
+            print(f"\n{len(regressed)} regression(s) over +{args.threshold:.0%}", file=sys.stderr)
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,61 @@
+from __future__ import annotations
+import asyncio
+import time
+from typing import Any, Awaitable, Callable
+
+# --------------------------------------------------------------------------- #
+#          ابزار مشترک بنچمارک‌ها: زمان هر فراخوانی (بهترینِ چند تکرار)       #
+# --------------------------------------------------------------------------- #
+# report هر نتیجه را در RESULTS هم نگه می‌دارد تا اجراکنندهٔ مجموعه
+# (python -m bench) بتواند آن را ذخیره یا با خط مبنا مقایسه کند.
+# TIME_SCALE همهٔ min_timeها را ضرب می‌کند (--quick در اجراکننده).
+
+RESULTS: dict[str, float] = {}
+TIME_SCALE = 1.0
+
+
+def _calibrate(run: Callable[[int], float], min_time: float) -> int:
+    number = 1
+    while run(number) < min_time / 10:
+        number *= 10
+    return number
+
+
+def measure(fn: Callable[[], Any], *, min_time: float = 0.2, repeat: int = 5) -> float:
+    """زمان هر فراخوانی fn به نانوثانیه (کمینهٔ repeat دور)"""
+    def run(n: int) -> float:
+        t0 = time.perf_counter()
+        for _ in range(n):
+            fn()
+        return time.perf_counter() - t0
+
+    number = _calibrate(run, min_time * TIME_SCALE)
+    return min(run(number) for _ in range(repeat)) / number * 1e9
+
+
+def ameasure(
+    fn: Callable[[], Awaitable[Any]], *, min_time: float = 0.2, repeat: int = 5
+) -> float:
+    """نسخهٔ async از measure؛ همه‌چیز روی یک event loop اجرا می‌شود"""
+    loop = asyncio.new_event_loop()
+
+    async def batch(n: int) -> float:
+        t0 = time.perf_counter()
+        for _ in range(n):
+            await fn()
+        return time.perf_counter() - t0
+
+    def run(n: int) -> float:
+        return loop.run_until_complete(batch(n))
+
+    try:
+        number = _calibrate(run, min_time * TIME_SCALE)
+        return min(run(number) for _ in range(repeat)) / number * 1e9
+    finally:
+        loop.close()
+
+
+def report(name: str, ns_per_op: float) -> None:
+    """خروجی پایدار: یک خط برای هر مورد → «نام  ns/op  op/s»"""
+    RESULTS[name] = ns_per_op
+    print(f"{name:<56} {ns_per_op:>14.1f} ns/op {1e9 / ns_per_op:>14,.0f} op/s")
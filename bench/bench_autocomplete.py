@@ -0,0 +1,77 @@
+from __future__ import annotations
+import random
+import time
+
+from app.car_index import PrefixIndex, _seed_models
+
+from ._harness import measure, report
+
+# --------------------------------------------------------------------------- #
+#   پیشنهاد خودکار نام خودرو: تأخیر هر پرس‌وجو (p50/p99) روی ۵۰ هزار مدل      #
+#   یکتا و هزینهٔ افزودن افزایشی. هدف: p99 زیر ۵ میلی‌ثانیه.                 #
+# --------------------------------------------------------------------------- #
+
+N_MODELS = 50_000
+N_QUERIES = 20_000
+P99_BUDGET_MS = 5.0
+
+_TRIMS = ("تیپ", "پلاس", "اتوماتیک", "دنده‌ای", "GL", "GLX", "SE", "LX", "توربو", "هیبرید")
+
+
+def synthetic_models(n: int, seed: int = 1) -> list[tuple[str, int]]:
+    """n نام یکتا از ترکیب فهرست اولیه با تیپ و عدد، با وزن‌های دم‌بلند"""
+    rnd = random.Random(seed)
+    base = _seed_models()
+    out: dict[str, int] = {}
+    while len(out) < n:
+        name = f"{rnd.choice(base)} {rnd.choice(_TRIMS)} {rnd.randint(1, 999)}"
+        out[name] = int(rnd.paretovariate(1.2))
+    return list(out.items())
+
+
+def percentile(sorted_values: list[float], p: float) -> float:
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * p))]
+
+
+def main() -> None:
+    rnd = random.Random(2)
+    items = synthetic_models(N_MODELS)
+
+    t0 = time.perf_counter()
+    index = PrefixIndex()
+    index.extend(items)
+    print(f"autocomplete.build.{N_MODELS}: {(time.perf_counter() - t0) * 1e3:.1f} ms")
+
+    names = [name for name, _ in items]
+    queries = []
+    for _ in range(N_QUERIES):
+        name = rnd.choice(names)
+        words = name.split()
+        start = rnd.randrange(len(words))
+        tail = " ".join(words[start:])
+        queries.append(tail[: rnd.randint(1, min(8, len(tail)))])
+
+    # بدترین حالت: کش پیشوندهای کوتاه پیش از هر پرس‌وجو خالی می‌شود
+    # (همان وضعیتی که بلافاصله پس از انتشار هر آگهی پیش می‌آید)
+    lat = []
+    for q in queries:
+        index._cache.clear()
+        t = time.perf_counter_ns()
+        index.suggest(q)
+        lat.append((time.perf_counter_ns() - t) / 1e6)
+    lat.sort()
+    p50, p99 = percentile(lat, 0.50), percentile(lat, 0.99)
+    print(f"autocomplete.suggest.cold p50={p50:.3f} ms p99={p99:.3f} ms max={lat[-1]:.3f} ms")
+    assert p99 < P99_BUDGET_MS, f"p99 {p99:.2f} ms > {P99_BUDGET_MS} ms"
+
+    it = iter(queries * 1000)
+    report("autocomplete.suggest.warm", measure(lambda: index.suggest(next(it))))
+    counter = iter(range(10**9))
+    report(
+        "autocomplete.add.new_model",
+        measure(lambda: index.add(f"مدل آزمایشی {next(counter)}"), min_time=0.05),
+    )
+
+
+if __name__ == "__main__":
+    main()
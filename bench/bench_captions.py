@@ -0,0 +1,153 @@
+from __future__ import annotations
+import itertools
+
+from aiogram import html
+
+from app.handlers.captions import admin_caption, build_caption
+
+from ._harness import measure, report
+
+# --------------------------------------------------------------------------- #
+#   کپشن‌ها: بررسی «خروجی طلایی» در برابر پیاده‌سازی قبلی + زمان رندر هر کپشن  #
+# --------------------------------------------------------------------------- #
+
+FORMS = {
+    "full": {
+        "category": "سواری", "car": "پژو 206 تیپ 5", "year": "1401", "color": "سفید",
+        "km": "45000", "insurance": "8", "gear": "دستی",
+        "desc": "بدون رنگ\nفنی سالم <تعویض روغن> & لاستیک نو",
+        "phone": "09121234567", "username": "@seller_1",
+        "price_num": 850_500_000, "price_words": "850 میلیون و 500 هزار تومان",
+    },
+    "minimal": {
+        "category": "وانت", "car": "نیسان", "year": "2020", "color": "آبی",
+        "km": "0", "insurance": "", "gear": "", "desc": "",
+        "phone": "", "username": "",
+        "price_num": 0, "price_words": "",
+    },
+}
+
+
+# --------------------------- پیاده‌سازی قبلی -------------------------------- #
+
+def _legacy_to_persian_digits(s: str) -> str:
+    if not s:
+        return ""
+    persian = "۰۱۲۳۴۵۶۷۸۹"
+    return "".join(persian[int(c)] if c.isdigit() else c for c in s)
+
+
+def legacy_build_caption(form, number, jdate, *, show_price, show_desc):
+    ins_text = f"{form.get('insurance')} ماه" if form.get("insurance") else "—"
+    contact_2_name = "کیوان"
+    contact_2_phone = "09127475355"
+    year_display = _legacy_to_persian_digits(form['year'])
+    parts = [
+        f"🏷 <b>{html.quote(form['category'])}</b>",
+        f"{html.quote(form['car'])}",
+        f"\u200F{year_display}\u200F",
+        f"{html.quote(form['color'])}",
+    ]
+    if show_price and form.get("price_words"):
+        parts.append(f"قیمت: {html.quote(form['price_words'])}")
+    parts.extend([
+        f"کارکرد: {html.quote(form['km'])} کیلومتر",
+        f"مهلت بیمه: {html.quote(ins_text)}",
+        f"گیربکس: {html.quote(form.get('gear') or '—')}",
+    ])
+    if show_desc and (form.get("desc") or "").strip():
+        parts.append("")
+        parts.append(f"<b>توضیحات:</b>")
+        parts.append(f"{html.quote(form['desc'])}")
+    parts.append("")
+    parts.append(f"☎️ <b>تماس:</b>")
+    parts.append(f"{contact_2_name} - \u200e{contact_2_phone}\u200e")
+    parts.append("───────────────────")
+    parts.append(f"🔖 <b>آگهی شماره #{number}</b>")
+    parts.append(f"📅 <i>{jdate}</i>")
+    return "\n".join(parts)
+
+
+def legacy_admin_caption(form, number, jdate, *, phone=None, username=None):
+    ins_text = f"{form.get('insurance')} ماه" if form.get("insurance") else "—"
+    lines: list[str] = []
+    lines.append(f"📞 {html.quote(phone or '—')}")
+    uname = (username or "").lstrip("@")
+    lines.append(f"👤 @{html.quote(uname)}" if uname else "👤 بدون نام کاربری")
+    lines.append("")
+    lines.append("🧪 <b>موارد نیازمند بررسی:</b>")
+    lines.append(f"💵 قیمت: {html.quote(form.get('price_words') or '—')}")
+    lines.append(f"📝 توضیحات:\n{html.quote(form.get('desc') or '—')}")
+    lines.append("—" * 10)
+    lines.append("📋 <b>خلاصه آگهی</b>")
+    lines.append(f"نام خودرو: {html.quote(form['car'])}")
+    lines.append(
+        f"سال/رنگ/کارکرد: "
+        f"{html.quote(form['year'])} / {html.quote(form['color'])} / {html.quote(form['km'])}km"
+    )
+    lines.append(
+        f"بیمه/گیربکس: {html.quote(ins_text)} / {html.quote(form.get('gear') or '—')}"
+    )
+    lines.append(f"\n🗓️ <i>{jdate}</i> • ⏱ #{number}")
+    return "\n".join(lines)
+
+
+# ------------------------------ خروجی طلایی -------------------------------- #
+
+def check_golden() -> int:
+    """هر ترکیب فرم/قیمت/توضیح باید بایت‌به‌بایت با نسخهٔ قبلی یکی باشد"""
+    checked = 0
+    for form, show_price, show_desc in itertools.product(
+        FORMS.values(), (False, True), (False, True)
+    ):
+        args = (form, 1234, "1403/07/28")
+        new = build_caption(*args, show_price=show_price, show_desc=show_desc)
+        old = legacy_build_caption(*args, show_price=show_price, show_desc=show_desc)
+        assert new.encode() == old.encode(), (new, old)
+        checked += 1
+    for form in FORMS.values():
+        for phone, username in ((form["phone"], form["username"]), (None, None)):
+            new = admin_caption(form, 7, "1403/07/28", phone=phone, username=username)
+            old = legacy_admin_caption(form, 7, "1403/07/28", phone=phone, username=username)
+            assert new.encode() == old.encode(), (new, old)
+            checked += 1
+    return checked
+
+
+# بررسی‌های درستی؛ python -m bench پیش از اندازه‌گیری اجرایشان می‌کند (دروازه)
+CHECKS = (check_golden,)
+
+
+def main() -> None:
+    form = FORMS["full"]
+    edited = dict(form)
+    revision = itertools.count()
+
+    def edit_and_render():
+        # ویرایش توضیح توسط ادمین: هر بار متن تازه، فقط قطعهٔ توضیحات عوض می‌شود
+        edited["desc"] = f"{form['desc']} {next(revision)}"
+        return build_caption(edited, 1234, "1403/07/28", show_price=True, show_desc=True)
+
+    cases = {
+        "build_caption": (
+            lambda: legacy_build_caption(form, 1234, "1403/07/28", show_price=True, show_desc=True),
+            lambda: build_caption(form, 1234, "1403/07/28", show_price=True, show_desc=True),
+        ),
+        "build_caption_after_edit": (
+            lambda: legacy_build_caption(edited, 1234, "1403/07/28", show_price=True, show_desc=True),
+            edit_and_render,
+        ),
+        "admin_caption": (
+            lambda: legacy_admin_caption(form, 7, "1403/07/28", phone="0912", username="@a"),
+            lambda: admin_caption(form, 7, "1403/07/28", phone="0912", username="@a"),
+        ),
+    }
+    for name, (legacy, new) in cases.items():
+        report(f"captions.{name}.legacy", measure(legacy))
+        report(f"captions.{name}.template", measure(new))
+
+
+if __name__ == "__main__":
+    for check in CHECKS:
+        check()
+    main()
@@ -0,0 +1,103 @@
+from __future__ import annotations
+from datetime import datetime
+
+from aiogram import Bot, Dispatcher, F, Router
+from aiogram.filters import CommandStart
+from aiogram.types import Chat, Message, PhotoSize, Update, User
+
+from app.handlers.state import INPUT_WAIT
+from app.handlers.text_dispatch import TEXT_DISPATCH, TextDispatch
+
+from ._harness import ameasure, report
+
+# --------------------------------------------------------------------------- #
+#  هزینهٔ مسیریابی هر پیام: درخت روترِ قدیمی (فیلتر به‌ازای هر دکمه) در برابر   #
+#  جدول TEXT_DISPATCH. هندلرها خالی‌اند تا فقط هزینهٔ مسیریابی سنجیده شود.    #
+# --------------------------------------------------------------------------- #
+
+UID = 42
+
+
+async def _noop(*_, **__):
+    return None
+
+
+def _tail_router() -> Router:
+    """روترهای بعدی (start/user_flow) که در هر دو درخت مشترک‌اند"""
+    r = Router()
+    r.message(CommandStart())(_noop)
+    r.message(F.web_app_data)(_noop)
+    r.message(F.photo)(_noop)
+    return r
+
+
+def legacy_dispatcher(waits: dict[str, dict]) -> Dispatcher:
+    """بازسازی درخت قدیمی: یک فیلتر F.text == … برای هر دکمه و یک lambda برای هر انتظار"""
+    r = Router()
+    for text in TEXT_DISPATCH.buttons:
+        r.message(F.text == text)(_noop)
+    for kind, (_, pattern) in TEXT_DISPATCH.waits.items():
+        states = waits[kind]
+        filters = [F.text.regexp(pattern.pattern)] if pattern else [F.text]
+        r.message(*filters, F.from_user.id.func(lambda uid, s=states: uid in s))(_noop)
+    dp = Dispatcher()
+    dp.include_router(r)
+    dp.include_router(_tail_router())
+    return dp
+
+
+def table_dispatcher() -> Dispatcher:
+    td = TextDispatch()
+    for text in TEXT_DISPATCH.buttons:
+        td.button(text)(_noop)
+    for kind, (_, pattern) in TEXT_DISPATCH.waits.items():
+        td.wait(kind, pattern=pattern.pattern if pattern else None)(_noop)
+    r = Router()
+    r.message(F.text, td.filter)(_noop)
+    dp = Dispatcher()
+    dp.include_router(r)
+    dp.include_router(_tail_router())
+    return dp
+
+
+def _update(n: int, **fields) -> Update:
+    msg = Message(
+        message_id=n,
+        date=datetime.now(),
+        chat=Chat(id=UID, type="private"),
+        from_user=User(id=UID, is_bot=False, first_name="bench"),
+        **fields,
+    )
+    return Update(update_id=n, message=msg)
+
+
+def main() -> None:
+    bot = Bot("123456:" + "A" * 35)
+    last_button = list(TEXT_DISPATCH.buttons)[-1]
+    wait_kind = list(TEXT_DISPATCH.waits)[-1]
+
+    cases = {
+        "first_button": _update(1, text=list(TEXT_DISPATCH.buttons)[0]),
+        "last_button": _update(2, text=last_button),
+        "wait_input": _update(3, text="https://t.me/example_channel"),
+        "unmatched_text": _update(4, text="سلام"),
+        "photo": _update(5, photo=[PhotoSize(file_id="x", file_unique_id="x", width=1, height=1)]),
+    }
+
+    legacy_waits = {kind: {} for kind in TEXT_DISPATCH.waits}
+    trees = {"legacy": legacy_dispatcher(legacy_waits), "table": table_dispatcher()}
+
+    for case, upd in cases.items():
+        for tree, dp in trees.items():
+            INPUT_WAIT.clear()
+            legacy_waits[wait_kind].clear()
+            if case == "wait_input":
+                INPUT_WAIT[UID] = {"kind": wait_kind}
+                legacy_waits[wait_kind][UID] = {}
+            ns = ameasure(lambda: dp.feed_update(bot, upd))
+            report(f"dispatch.{case}.{tree}", ns)
+    INPUT_WAIT.clear()
+
+
+if __name__ == "__main__":
+    main()
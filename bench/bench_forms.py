@@ -0,0 +1,107 @@
+from __future__ import annotations
+import re
+
+from app.handlers.common import contains_persian_digits, price_words
+from app.handlers.form_schema import validate_form
+
+from ._harness import measure, report
+
+# --------------------------------------------------------------------------- #
+#     اعتبارسنجی فرم: پیاده‌سازی قبلی (کپی برای مقایسه) در برابر شِمای فرم     #
+# --------------------------------------------------------------------------- #
+
+PAYLOADS = {
+    "valid_latin": {
+        "category": "سواری", "car": "پژو 206 تیپ 5", "year": "1401", "color": "سفید",
+        "km": "45000", "insurance": "8", "gear": "دستی", "desc": "بدون رنگ، فنی سالم",
+        "phone": "09121234567", "million_price": "850.5",
+    },
+    "valid_persian_digits": {
+        "category": "شاسی‌بلند", "car": "هیوندای توسان", "year": "۱۳۹۸", "color": "مشکی",
+        "km": "۱۲۰۰۰۰", "insurance": "", "gear": "اتوماتیک", "desc": "",
+        "phone": "۰۹۱۲۷۴۷۵۳۵۵", "price": "۲۵۰۰",
+    },
+    "invalid_many": {
+        "category": "سواری", "car": "x", "year": "99", "color": "red",
+        "km": "abc", "insurance": "123", "gear": "", "desc": "",
+        "phone": "123", "million_price": "1.23456",
+    },
+}
+
+
+def _legacy_normalize_digits(s: str) -> str:
+    if not s:
+        return ""
+    persian = "۰۱۲۳۴۵۶۷۸۹"
+    arabic = "٠١٢٣٤٥٦٧٨٩"
+    trans_table = {ord(p): str(i) for i, p in enumerate(persian)}
+    trans_table.update({ord(a): str(i) for i, a in enumerate(arabic)})
+    return s.translate(trans_table)
+
+
+def legacy_validate(payload: dict):
+    cat = (payload.get("category") or "").strip()
+    car = (payload.get("car") or "").strip()
+    year = (payload.get("year") or "").strip()
+    color = (payload.get("color") or "").strip()
+    km = (payload.get("km") or "").strip()
+    ins = (payload.get("insurance") or "").strip()
+    gear = (payload.get("gear") or "").strip()
+    desc = (payload.get("desc") or "").strip()
+    phone = (payload.get("phone") or "").strip()
+    price_raw = str(payload.get("million_price") or payload.get("price") or "").strip()
+    year = _legacy_normalize_digits(year)
+    km = _legacy_normalize_digits(km)
+    ins = _legacy_normalize_digits(ins)
+    phone = _legacy_normalize_digits(phone)
+    price_raw = _legacy_normalize_digits(price_raw)
+    price_raw = price_raw.replace(",", ".").replace("٫", ".").replace("٬", ".")
+    if (
+        contains_persian_digits(year) or contains_persian_digits(km)
+        or contains_persian_digits(ins) or contains_persian_digits(phone)
+        or contains_persian_digits(price_raw)
+    ):
+        return False, "لطفاً فقط از اعداد لاتین استفاده کنید.", None
+    if not re.fullmatch(r"[آ-یA-Za-z0-9۰-۹٠-٩\s]{2,40}", car):
+        return False, "نام خودرو نامعتبر است.", None
+    if not re.fullmatch(r"(1[34]\d{2}|20[012]\d)", year):
+        return False, "سال ساخت باید ۴ رقم باشد (مثلاً 1403 یا 2024).", None
+    if not re.fullmatch(r"[آ-ی\s]{1,12}", color):
+        return False, "رنگ باید حروف فارسی باشد.", None
+    if not re.fullmatch(r"\d{1,6}", km):
+        return False, "کارکرد نامعتبر است.", None
+    if ins and not re.fullmatch(r"\d{1,2}", ins):
+        return False, "مهلت بیمه نامعتبر است.", None
+    if not re.fullmatch(r"09\d{9}", phone):
+        return False, "شماره تماس باید ۱۱ رقم باشد.", None
+    if not re.fullmatch(r"\d+(\.\d{1,3})?", price_raw):
+        return False, "فرمت قیمت صحیح نیست.", None
+    toman = int(float(price_raw) * 1_000_000)
+    return True, None, {
+        "category": cat, "car": car, "year": year, "color": color, "km": km,
+        "insurance": ins, "gear": gear, "desc": desc, "phone": phone,
+        "username": "", "photos": [], "price_num": toman, "price_words": price_words(toman),
+    }
+
+
+def check_equivalence() -> None:
+    """نتیجهٔ شِما باید با پیاده‌سازی قبلی یکی باشد (اولین خطا / فرم نهایی)"""
+    for name, payload in PAYLOADS.items():
+        ok, err, form = legacy_validate(payload)
+        res = validate_form(payload)
+        assert (res.ok, res.first_error, res.form) == (ok, err, form), name
+
+
+CHECKS = (check_equivalence,)
+
+
+def main() -> None:
+    for name, payload in PAYLOADS.items():
+        report(f"forms.{name}.legacy", measure(lambda: legacy_validate(payload)))
+        report(f"forms.{name}.schema", measure(lambda: validate_form(payload)))
+
+
+if __name__ == "__main__":
+    for check in CHECKS:
+        check()
+    main()
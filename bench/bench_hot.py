@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+from app.handlers.captions import admin_caption, build_caption, to_persian_year
+from app.handlers.common import parse_price, price_words, to_jalali
+from app.handlers.user_flow import validate_and_normalize
+from app.normalize import (
+    clean_text,
+    contains_persian_digits,
+    normalize,
+    normalize_digits,
+    search_key,
+    to_persian_digits,
+)
+
+from ._harness import measure, report
+from .bench_captions import FORMS
+
+# --------------------------------------------------------------------------- #
+#   توابع داغ مسیر آگهی: اعتبارسنجی فرم، کپشن‌ها، قیمت، تاریخ و نرمال‌سازها  #
+# --------------------------------------------------------------------------- #
+
+PAYLOADS = {
+    "valid": {
+        "category": "سواری", "car": "پژو ۲۰۶ تیپ ۵", "year": "۱۴۰۱", "color": "سفید",
+        "km": "۴۵٬۰۰۰", "insurance": "8", "gear": "دستی", "desc": "فنی سالم",
+        "phone": "۰۹۱۲۱۲۳۴۵۶۷", "million_price": "۸۵۰٫۵",
+    },
+    "invalid": {
+        "category": "سواری", "car": "", "year": "99", "color": "white",
+        "km": "x", "insurance": "", "gear": "", "desc": "", "phone": "1", "million_price": "",
+    },
+}
+TEXT_FA = "‏پژو ۲۰۶‏ تيپ ۵ — كاركرد ۴۵٬۰۰۰ كيلومتر‎"
+
+
+def main() -> None:
+    for name, payload in PAYLOADS.items():
+        report(f"hot.validate_and_normalize.{name}", measure(lambda: validate_and_normalize(payload)))
+
+    form = FORMS["full"]
+    report(
+        "hot.build_caption.full",
+        measure(lambda: build_caption(form, 1234, "1403/07/28", show_price=True, show_desc=True)),
+    )
+    report(
+        "hot.build_caption.hidden",
+        measure(lambda: build_caption(form, 1234, "1403/07/28", show_price=False, show_desc=False)),
+    )
+    report(
+        "hot.admin_caption",
+        measure(lambda: admin_caption(form, 7, "1403/07/28", phone="09121234567", username="@a")),
+    )
+
+    for label, n in (("million", 850_000_000), ("mixed", 1_250_500_000), ("small", 500_000)):
+        report(f"hot.price_words.{label}", measure(lambda: price_words(n)))
+    report("hot.parse_price", measure(lambda: parse_price("۸۵۰٫۵")))
+    report("hot.to_jalali", measure(lambda: to_jalali("2024-10-19")))
+    report("hot.to_persian_year", measure(lambda: to_persian_year("1401")))
+
+    report("hot.normalize.default", measure(lambda: normalize(TEXT_FA)))
+    report("hot.normalize.letters_decimal", measure(lambda: normalize(TEXT_FA, letters=True, decimal=True)))
+    report("hot.normalize_digits", measure(lambda: normalize_digits(TEXT_FA)))
+    report("hot.clean_text", measure(lambda: clean_text(TEXT_FA)))
+    report("hot.search_key", measure(lambda: search_key(TEXT_FA)))
+    report("hot.to_persian_digits", measure(lambda: to_persian_digits("1403/07/28")))
+    report("hot.contains_persian_digits", measure(lambda: contains_persian_digits(TEXT_FA)))
+
+
+if __name__ == "__main__":
+    main()
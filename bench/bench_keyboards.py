@@ -0,0 +1,145 @@
+from __future__ import annotations
+from uuid import uuid4
+
+from aiogram import Bot
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.methods import SendMessage
+from aiogram.types import (
+    InlineKeyboardButton, InlineKeyboardMarkup, KeyboardButton, ReplyKeyboardMarkup, WebAppInfo,
+)
+
+from app import keyboards
+from app.session import PreparedMarkupSession
+
+from ._harness import measure, report
+
+# --------------------------------------------------------------------------- #
+#   هزینهٔ کیبورد در هر درخواست خروجی: ساخت مدل + سریال‌سازی فرم درخواست.     #
+#   سازنده‌های قبلی (کپی برای مقایسه) + AiohttpSession در برابر رجیستری +     #
+#   PreparedMarkupSession.                                                    #
+# --------------------------------------------------------------------------- #
+
+WEBAPP_URL = "https://example.com/webapp/"
+
+
+def legacy_start_keyboard(is_admin: bool) -> ReplyKeyboardMarkup:
+    row = [KeyboardButton(text="📝 فرم ثبت آگهی")]
+    if is_admin:
+        row.append(KeyboardButton(text="⚙️ پنل مدیریتی"))
+    return ReplyKeyboardMarkup(keyboard=[row], resize_keyboard=True)
+
+
+def legacy_form_kb(webapp_url: str) -> InlineKeyboardMarkup:
+    return InlineKeyboardMarkup(inline_keyboard=[
+        [InlineKeyboardButton(text="📝 باز کردن فرم ثبت آگهی", web_app=WebAppInfo(url=webapp_url))]
+    ])
+
+
+def legacy_admin_root_kb(is_owner: bool) -> ReplyKeyboardMarkup:
+    top_owner = []
+    if is_owner:
+        top_owner.append(KeyboardButton(text="📣 کانال‌های من"))
+        top_owner.append(KeyboardButton(text="🎯 مدیریت مقصدها"))
+    rows = [[KeyboardButton(text="👤 مدیریت ادمین‌ها"), KeyboardButton(text="🗂 صف بررسی")]]
+    if top_owner:
+        rows.insert(0, top_owner)
+    rows.append([KeyboardButton(text="🔙 بازگشت")])
+    return ReplyKeyboardMarkup(keyboard=rows, resize_keyboard=True)
+
+
+def legacy_user_finish_kb(token: str) -> InlineKeyboardMarkup:
+    return InlineKeyboardMarkup(inline_keyboard=[
+        [InlineKeyboardButton(text="✅ تایید نهایی", callback_data=f"finish:{token}")]
+    ])
+
+
+def legacy_admin_review_kb(token: str) -> InlineKeyboardMarkup:
+    return InlineKeyboardMarkup(inline_keyboard=[
+        [
+            InlineKeyboardButton(text="✏️ ویرایش قیمت", callback_data=f"edit_price:{token}"),
+            InlineKeyboardButton(text="📝 ویرایش توضیحات", callback_data=f"edit_desc:{token}"),
+        ],
+        [InlineKeyboardButton(text="✅ اعمال روی پست گروه", callback_data=f"publish:{token}")],
+        [InlineKeyboardButton(text="❌ رد", callback_data=f"reject:{token}")],
+    ])
+
+
+def _form_fields(session, bot: Bot, markup) -> dict[str, str]:
+    form = session.build_form_data(bot, SendMessage(chat_id=1, text="سلام", reply_markup=markup))
+    return {opts["name"]: value for opts, _, value in form._fields}
+
+
+# ------------------------------ خروجی طلایی -------------------------------- #
+
+def check_golden(bot: Bot | None = None) -> int:
+    """فرم درخواست با کیبورد رجیستری باید با سازندهٔ قبلی + AiohttpSession یکی باشد"""
+    bot = bot or Bot("123456:" + "A" * 35)
+    plain, prepared = AiohttpSession(), PreparedMarkupSession()
+    token = uuid4().hex
+    pairs = [
+        (legacy_start_keyboard(a), keyboards.start_keyboard(a))
+        for a in (False, True)
+    ] + [
+        (legacy_admin_root_kb(o), keyboards.admin_root_kb(o)) for o in (False, True)
+    ] + [
+        (legacy_form_kb(WEBAPP_URL), keyboards.form_kb(WEBAPP_URL)),
+        (legacy_user_finish_kb(token), keyboards.user_finish_kb(token)),
+        (legacy_admin_review_kb(token), keyboards.admin_review_kb(token)),
+    ] + [
+        # باقی کیبوردها: JSON آماده باید همان سریال‌سازی معمولی خود مدل باشد
+        (kb, kb) for kb in (
+            keyboards.admin_admins_kb(False), keyboards.admin_admins_kb(True),
+            keyboards.admin_allowed_kb(), keyboards.admin_my_channels_kb(),
+            keyboards.admin_destinations_kb(),
+        )
+    ]
+    for old, new in pairs:
+        assert keyboards.prepared_json(new) is not None
+        expected = _form_fields(plain, bot, old)
+        assert _form_fields(prepared, bot, new) == expected, (new, expected)
+    return len(pairs)
+
+
+CHECKS = (check_golden,)
+
+
+def main() -> None:
+    bot = Bot("123456:" + "A" * 35)
+    plain, prepared = AiohttpSession(), PreparedMarkupSession()
+    token = uuid4().hex
+
+    def request(session, markup) -> None:
+        session.build_form_data(bot, SendMessage(chat_id=1, text="سلام", reply_markup=markup))
+
+    cases = {
+        "admin_root": (
+            lambda: request(plain, legacy_admin_root_kb(True)),
+            lambda: request(prepared, keyboards.admin_root_kb(True)),
+        ),
+        "start": (
+            lambda: request(plain, legacy_start_keyboard(True)),
+            lambda: request(prepared, keyboards.start_keyboard(True)),
+        ),
+        "admin_review": (
+            lambda: request(plain, legacy_admin_review_kb(token)),
+            lambda: request(prepared, keyboards.admin_review_kb(token)),
+        ),
+        # توکن تازه در هر فراخوانی (بدترین حالت، بدون کش توکن)
+        "admin_review.new_token": (
+            lambda: request(plain, legacy_admin_review_kb(uuid4().hex)),
+            lambda: request(prepared, keyboards.admin_review_kb(uuid4().hex)),
+        ),
+        "no_markup": (
+            lambda: request(plain, None),
+            lambda: request(prepared, None),
+        ),
+    }
+    for name, (legacy, new) in cases.items():
+        report(f"keyboards.{name}.legacy", measure(legacy))
+        report(f"keyboards.{name}.registry", measure(new))
+
+
+if __name__ == "__main__":
+    for check in CHECKS:
+        check()
+    main()
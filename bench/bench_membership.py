@@ -0,0 +1,75 @@
+from __future__ import annotations
+import asyncio
+
+from aiogram.types import ChatMemberLeft, ChatMemberMember
+
+from app.handlers.membership import _user_is_member
+from app.middlewares.identity import Identity
+from app.storage import required_channels
+
+from ._harness import ameasure, report
+from .bench_storage import isolated_storage, seed
+
+# --------------------------------------------------------------------------- #
+#    _user_is_member با Bot ساختگی: مسیر کش‌شده، عضو در ۱ و ۵ کانال، غیرعضو    #
+# --------------------------------------------------------------------------- #
+
+UID = 4242
+
+
+class MemberBot:
+    """فقط get_chat_member؛ وضعیت هر کانال از پیش ساخته شده است"""
+
+    def __init__(self, left: set[int] = frozenset()) -> None:
+        # مثل پاسخ واقعی API از JSON ساخته می‌شوند (status رشته است، نه enum)
+        user = {"id": UID, "is_bot": False, "first_name": "bench"}
+        self.member = ChatMemberMember.model_validate({"status": "member", "user": user})
+        self.left = ChatMemberLeft.model_validate({"status": "left", "user": user})
+        self.left_in = left
+        self.calls = 0
+
+    async def get_chat_member(self, chat_id: int, user_id: int):
+        self.calls += 1
+        return self.left if chat_id in self.left_in else self.member
+
+
+def _channels(n: int) -> list[int]:
+    for cid in required_channels.get_required_channel_ids():
+        required_channels.remove_required_channel(cid)
+    ids = [-1004000000000 - i for i in range(n)]
+    for cid in ids:
+        required_channels.add_required_channel(cid, title=f"c{cid}", username=f"c{abs(cid)}")
+    return ids
+
+
+def main() -> None:
+    cached = Identity(user_id=UID, is_admin=False, is_owner=False, is_member=True)
+    unknown = Identity(user_id=UID, is_admin=False, is_owner=False, is_member=None)
+
+    with isolated_storage():
+        seed()
+        bot = MemberBot()
+        report("membership.cached", ameasure(lambda: _user_is_member(bot, UID, cached)))
+
+        for n in (1, 5):
+            ids = _channels(n)
+            bot = MemberBot()
+            report(f"membership.member.{n}_channels", ameasure(lambda: _user_is_member(bot, UID, unknown)))
+            bot = MemberBot(left={ids[0]})
+            report(f"membership.not_member.{n}_channels", ameasure(lambda: _user_is_member(bot, UID, unknown)))
+
+        # بدون identity (مسیر قدیمی): نقش و عضویتِ کش‌شده از انبارهٔ وضعیت خوانده می‌شوند
+        bot = MemberBot()
+        report("membership.resolve_identity.cached", ameasure(lambda: _user_is_member(bot, UID + 1)))
+
+        # تعداد درخواست به‌ازای هر بررسی باید ثابت بماند
+        bot = MemberBot()
+        asyncio.run(_user_is_member(bot, UID, unknown))
+        assert bot.calls == 5, bot.calls
+        bot = MemberBot()
+        asyncio.run(_user_is_member(bot, UID, cached))
+        assert bot.calls == 0, bot.calls
+
+
+if __name__ == "__main__":
+    main()
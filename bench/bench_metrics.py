@@ -0,0 +1,44 @@
+from __future__ import annotations
+
+from aiogram import Bot
+from aiogram.methods import SendMessage
+
+from app.metrics import REGISTRY
+from app.middlewares.metrics import setup_handler_metrics
+from app.session import ApiMetricsMiddleware
+
+from ._harness import ameasure, measure, report
+from .bench_dispatch import _update, table_dispatcher
+
+# --------------------------------------------------------------------------- #
+#   هزینهٔ اندازه‌گیری: یک آپدیت با/بدون متریک هندلر، یک درخواست Bot API       #
+#   با/بدون ApiMetricsMiddleware (بدون شبکه) و ساخت خروجی /metrics.            #
+# --------------------------------------------------------------------------- #
+
+
+async def _fake_request(bot, method):
+    return True
+
+
+def main() -> None:
+    bot = Bot("123456:" + "A" * 35)
+    upd = _update(1, text="سلام")
+    button = _update(2, text="👤 مدیریت ادمین‌ها")
+
+    plain = table_dispatcher()
+    metered = table_dispatcher()
+    setup_handler_metrics(metered)
+    for case, u in (("handled", button), ("unhandled", upd)):
+        report(f"metrics.update.{case}.plain", ameasure(lambda: plain.feed_update(bot, u)))
+        report(f"metrics.update.{case}.metered", ameasure(lambda: metered.feed_update(bot, u)))
+
+    method = SendMessage(chat_id=1, text="x")
+    mw = ApiMetricsMiddleware()
+    report("metrics.api_request.plain", ameasure(lambda: _fake_request(bot, method)))
+    report("metrics.api_request.metered", ameasure(lambda: mw(_fake_request, bot, method)))
+
+    report("metrics.render", measure(REGISTRY.render, min_time=0.05))
+
+
+if __name__ == "__main__":
+    main()
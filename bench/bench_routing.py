@@ -0,0 +1,106 @@
+from __future__ import annotations
+import os
+
+# SETTINGS هنگام import خوانده می‌شود؛ بدون آدرس WebApp، /start مسیر دیگری می‌رود
+os.environ.setdefault("WEBAPP_URL", "https://bench.invalid/webapp/")
+
+import json  # noqa: E402
+from datetime import datetime  # noqa: E402
+
+from aiogram import Bot, Dispatcher  # noqa: E402
+from aiogram.client.session.base import BaseSession  # noqa: E402
+from aiogram.methods import GetChatMember, TelegramMethod  # noqa: E402
+from aiogram.types import (  # noqa: E402
+    CallbackQuery,
+    Chat,
+    ChatMemberMember,
+    Message,
+    PhotoSize,
+    Update,
+    User,
+    WebAppData,
+)
+
+from app.handlers import router as root_router  # noqa: E402
+from app.handlers.state import PENDING, PHOTO_WAIT  # noqa: E402
+from app.handlers.text_dispatch import TEXT_DISPATCH  # noqa: E402
+from app.middlewares import setup_middlewares  # noqa: E402
+
+from ._harness import ameasure, report  # noqa: E402
+from .bench_storage import isolated_storage, seed  # noqa: E402
+
+# --------------------------------------------------------------------------- #
+#   هزینهٔ کامل هر نوع پیام در درخت واقعی روترها (میان‌افزارها + هندلر)        #
+# --------------------------------------------------------------------------- #
+# سشن ساختگی بدون شبکه پاسخ از پیش ساخته‌شده برمی‌گرداند؛ پس عدد هر مورد
+# مسیریابی + میان‌افزارها + CPU هندلر (و ورودی/خروجی انباره) است.
+# bench_dispatch فقط هزینهٔ مسیریابی پیام‌های متنی را جدا می‌سنجد.
+
+UID = 7_000_001
+FORM = {
+    "category": "سواری", "car": "پژو 206", "year": "1401", "color": "سفید", "km": "45000",
+    "insurance": "", "gear": "دستی", "desc": "", "phone": "09121234567", "million_price": "850.5",
+}
+
+
+class NullSession(BaseSession):
+    def __init__(self) -> None:
+        super().__init__()
+        chat = Chat(id=UID, type="private")
+        self.message = Message(message_id=1, date=datetime.now(), chat=chat, text="ok")
+        self.member = ChatMemberMember.model_validate(
+            {"status": "member", "user": {"id": UID, "is_bot": False, "first_name": "b"}}
+        )
+
+    async def make_request(self, bot: Bot, method: TelegramMethod, timeout: int | None = None):
+        if isinstance(method, GetChatMember):
+            return self.member
+        returning = getattr(method, "__returning__", None)
+        return self.message if returning is Message else True
+
+    async def stream_content(self, *args, **kwargs):
+        yield b""
+
+    async def close(self) -> None:
+        pass
+
+
+def _message(n: int, **fields) -> Update:
+    user = User(id=UID, is_bot=False, first_name="bench", username="bench")
+    msg = Message(message_id=n, date=datetime.now(), chat=Chat(id=UID, type="private"), from_user=user, **fields)
+    return Update(update_id=n, message=msg)
+
+
+def _callback(n: int, data: str) -> Update:
+    user = User(id=UID, is_bot=False, first_name="bench")
+    msg = Message(message_id=n, date=datetime.now(), chat=Chat(id=UID, type="private"), text="x")
+    return Update(update_id=n, callback_query=CallbackQuery(id=str(n), from_user=user, chat_instance="1", message=msg, data=data))
+
+
+def main() -> None:
+    bot = Bot("123456:" + "A" * 35, session=NullSession())
+    dp = Dispatcher()
+    dp.include_router(root_router)
+    setup_middlewares(dp)
+
+    photo = [PhotoSize(file_id="f", file_unique_id="u", width=90, height=90)]
+    cases = {
+        "command_start": _message(1, text="/start"),
+        "button_text": _message(2, text=list(TEXT_DISPATCH.buttons)[0]),
+        "unmatched_text": _message(3, text="سلام"),
+        "web_app_data": _message(4, web_app_data=WebAppData(data=json.dumps(FORM), button_text="فرم")),
+        "web_app_data_invalid": _message(5, web_app_data=WebAppData(data="{}", button_text="فرم")),
+        "photo_no_session": _message(6, photo=photo),
+        "callback_check_membership": _callback(7, "check_membership"),
+        "callback_unknown": _callback(8, "nope"),
+    }
+    with isolated_storage():
+        seed()
+        for case, upd in cases.items():
+            report(f"routing.{case}", ameasure(lambda: dp.feed_update(bot, upd), min_time=0.1))
+            PENDING.clear()
+            PHOTO_WAIT.clear()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+from __future__ import annotations
+import asyncio
+import copy
+import tempfile
+from contextlib import contextmanager
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Iterator
+
+from app.storage import admins, allowed_channels, car_models, counter, destinations, required_channels
+
+from ._harness import ameasure, measure, report
+
+# --------------------------------------------------------------------------- #
+#    هر تابع خواندن/نوشتن app/storage با اندازهٔ واقعی فهرست‌ها                #
+# --------------------------------------------------------------------------- #
+# فایل‌ها موقتاً به یک پوشهٔ موقت برگردانده می‌شوند تا /tmp/bot_data دست
+# نخورد؛ وضعیت درون‌حافظهٔ ماژول‌ها هم پس از اجرا برگردانده می‌شود.
+# جفت‌های افزودن/حذف با هم اندازه گرفته می‌شوند (هر دور دو نوشتن کامل فایل).
+
+FILES = {
+    admins: "ADMINS_FILE",
+    allowed_channels: "ALLOWED_FILE",
+    car_models: "CAR_MODELS_FILE",
+    counter: "DAILY_FILE",
+    destinations: "DESTS_FILE",
+    required_channels: "REQUIRED_FILE",
+}
+STATE = {
+    admins: ("_ADMIN_SET", "_OWNER_ID"),
+    allowed_channels: ("_ALLOWED",),
+    car_models: ("_MODELS",),
+    destinations: ("_DESTS",),
+    required_channels: ("_REQ",),
+}
+
+# اندازه‌ها: چند ده ادمین و کانال، یک مقصد فعال در میان چند مقصد، چند صد مدل خودرو
+N_ADMINS = 20
+N_ALLOWED = 30
+N_DESTS = 8
+N_REQUIRED = 5
+N_MODELS = 500
+
+
+@contextmanager
+def isolated_storage() -> Iterator[Path]:
+    saved_files = {m: getattr(m, attr) for m, attr in FILES.items()}
+    saved_state = {(m, n): copy.deepcopy(getattr(m, n)) for m, names in STATE.items() for n in names}
+    with tempfile.TemporaryDirectory(prefix="bench_storage_") as tmp:
+        for m, attr in FILES.items():
+            setattr(m, attr, Path(tmp) / saved_files[m].name)
+        try:
+            yield Path(tmp)
+        finally:
+            for m, attr in FILES.items():
+                setattr(m, attr, saved_files[m])
+            for (m, n), value in saved_state.items():
+                setattr(m, n, value)
+
+
+def seed() -> None:
+    """پر کردن انباره‌ها با اندازه‌های واقعی"""
+    admins.bootstrap_admins({1000 + i for i in range(N_ADMINS)}, owner_id=1000)
+    allowed_channels.bootstrap_allowed_channels(None)
+    for i in range(N_ALLOWED):
+        allowed_channels.add_allowed_channel(-1001000000000 - i)
+    destinations.bootstrap_destinations(-1002000000000, "مقصد ۰")
+    for i in range(1, N_DESTS):
+        destinations.add_destination(-1002000000000 - i, f"مقصد {i}")
+    required_channels.bootstrap_required_channels(None)
+    for i in range(N_REQUIRED):
+        required_channels.add_required_channel(-1003000000000 - i, title=f"کانال {i}", username=f"ch_{i}")
+    car_models._MODELS = {f"مدل خودرو {i}": i % 17 + 1 for i in range(N_MODELS)}
+    car_models._save()
+    counter.next_daily_number()
+
+
+class _ChatBot:
+    """Bot ساختگی برای sync_required_channels: عنوان و نام کاربری ثابت"""
+
+    async def get_chat(self, chat_id: int) -> SimpleNamespace:
+        return SimpleNamespace(title=f"کانال {chat_id}", username=f"ch{abs(chat_id)}", full_name="")
+
+
+def main() -> None:
+    with isolated_storage():
+        seed()
+
+        # ------------------------------ admins ------------------------------ #
+        report("storage.admins.list_admins", measure(admins.list_admins))
+        report("storage.admins.is_admin", measure(lambda: admins.is_admin(1000 + N_ADMINS // 2)))
+        report("storage.admins.is_owner", measure(lambda: admins.is_owner(1000)))
+        report("storage.admins.get_owner_id", measure(admins.get_owner_id))
+        report(
+            "storage.admins.add_remove",
+            measure(lambda: (admins.add_admin(99), admins.remove_admin(99)), min_time=0.1),
+        )
+        report(
+            "storage.admins.bootstrap",
+            measure(lambda: admins.bootstrap_admins(set(), owner_id=1000), min_time=0.1),
+        )
+
+        # ------------------------- allowed_channels ------------------------- #
+        report("storage.allowed.list", measure(allowed_channels.list_allowed_channels))
+        report("storage.allowed.is_allowed", measure(lambda: allowed_channels.is_channel_allowed(-1001000000005)))
+        report(
+            "storage.allowed.add_remove",
+            measure(lambda: (allowed_channels.add_allowed_channel(-1), allowed_channels.remove_allowed_channel(-1)), min_time=0.1),
+        )
+
+        # ---------------------------- car_models ---------------------------- #
+        report("storage.car_models.list", measure(car_models.list_car_models))
+        report("storage.car_models.record", measure(lambda: car_models.record_car_model("مدل خودرو 7"), min_time=0.1))
+
+        # ------------------------------ counter ----------------------------- #
+        report("storage.counter.current", measure(counter.current_daily_number))
+        report("storage.counter.next", measure(counter.next_daily_number, min_time=0.1))
+
+        # --------------------------- destinations --------------------------- #
+        report("storage.destinations.list", measure(destinations.list_destinations))
+        report("storage.destinations.get_active", measure(destinations.get_active_destination))
+        report("storage.destinations.get_active_id_and_title", measure(destinations.get_active_id_and_title))
+        report(
+            "storage.destinations.set_active",
+            measure(lambda: destinations.set_active_destination(-1002000000000), min_time=0.1),
+        )
+        report(
+            "storage.destinations.add_remove",
+            measure(lambda: (destinations.add_destination(-5, "x"), destinations.remove_destination(-5)), min_time=0.1),
+        )
+
+        # ------------------------- required_channels ------------------------ #
+        report("storage.required.list", measure(required_channels.list_required_channels))
+        report("storage.required.ids", measure(required_channels.get_required_channel_ids))
+        report(
+            "storage.required.add_remove",
+            measure(
+                lambda: (
+                    required_channels.add_required_channel(-7, title="t", username="u"),
+                    required_channels.remove_required_channel(-7),
+                ),
+                min_time=0.1,
+            ),
+        )
+        bot = _ChatBot()
+
+        async def sync():
+            # مسیر رایج هنگام شروع: عنوان‌ها از قبل پر هستند، فقط خواندن و get_chat
+            await required_channels.sync_required_channels(bot)
+
+        report("storage.required.sync_unchanged", ameasure(sync, min_time=0.1))
+
+
+if __name__ == "__main__":
+    main()
@@ -4,6 +4,11 @@ from aiohttp import web
 
 from app.config import build_bot_and_dispatcher
 from app.handlers import router as root_router
+from app.health import UPDATES_HEALTH
+from app.loop_monitor import LOOP_MONITOR
+from app.middlewares import setup_middlewares
+from app.polling import supervise_polling
+from app.web.server import setup_web
 
 # ⬅️ مهم: تابع همگام‌سازی کانال‌ها را وارد کن
 from app.storage.required_channels import sync_required_channels
@@ -16,15 +21,18 @@ async def main():
     await sync_required_channels(bot)
 
     dp.include_router(root_router)
+    setup_middlewares(dp)
 
     # ------------------------------------------------------------------ #
-    asyncio.create_task(dp.start_polling(bot))
+    LOOP_MONITOR.start()
+    polling = asyncio.create_task(supervise_polling(dp, bot))
 
     async def healthcheck(_):
         return web.Response(text="Bot is running!")
 
     app = web.Application()
     app.router.add_get("/", healthcheck)
+    setup_web(app, bot)
 
     port = int(os.environ.get("PORT", 8080))
     print(f"HTTP server started on 0.0.0.0:{port}")
@@ -33,8 +41,16 @@ async def main():
     await runner.setup()
     await web.TCPSite(runner, "0.0.0.0", port).start()
 
-    while True:
-        await asyncio.sleep(3600)
+    # با SIGINT/SIGTERM polling متوقف می‌شود و برنامه هم تمام می‌شود؛ اگر ناظر
+    # تسلیم شود، /healthz (503) تا ری‌استارت پلتفرم پاسخ می‌دهد
+    try:
+        await polling
+        if UPDATES_HEALTH.gave_up:
+            while True:
+                await asyncio.sleep(3600)
+    finally:
+        await runner.cleanup()
+        await bot.session.close()
 
 
 if __name__ == "__main__":
@@ -0,0 +1 @@
+# ابزارهای آزمون بار و عیب‌یابی — اجرا: python -m tools.<name>
@@ -0,0 +1,34 @@
+from __future__ import annotations
+
+# --------------------------------------------------------------------------- #
+#             ابزار مشترک گزارش: صدک‌ها و جدول تأخیر به میلی‌ثانیه             #
+# --------------------------------------------------------------------------- #
+
+
+def percentile(sorted_values: list[float], p: float) -> float:
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * p))]
+
+
+def latency_summary(samples: list[float]) -> dict:
+    """خلاصهٔ نمونه‌های ثانیه‌ای → میلی‌ثانیه (ترتیب کلیدها ثابت)"""
+    s = sorted(samples)
+    ms = lambda sec: round(sec * 1e3, 2)  # noqa: E731
+    return {
+        "n": len(s),
+        "p50_ms": ms(percentile(s, 0.50)),
+        "p90_ms": ms(percentile(s, 0.90)),
+        "p99_ms": ms(percentile(s, 0.99)),
+        "max_ms": ms(s[-1] if s else 0.0),
+    }
+
+
+def print_latency_table(rows: dict[str, dict], *, errors: dict[str, int] | None = None) -> None:
+    print(f"{'step':<22} {'n':>6} {'p50':>9} {'p90':>9} {'p99':>9} {'max':>9} {'err':>5}  (ms)")
+    for name, r in rows.items():
+        err = (errors or {}).get(name, 0)
+        print(
+            f"{name:<22} {r['n']:>6} {r['p50_ms']:>9.1f} {r['p90_ms']:>9.1f} "
+            f"{r['p99_ms']:>9.1f} {r['max_ms']:>9.1f} {err:>5}"
+        )
@@ -0,0 +1,387 @@
+from __future__ import annotations
+import argparse
+import asyncio
+import os
+import random
+import sys
+import tempfile
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Iterator
+
+from aiohttp.test_utils import TestServer
+
+from .fake_api import FakeTelegram
+from .loadgen import sample_form
+from .replay import sandbox_storage
+
+# --------------------------------------------------------------------------- #
+#        بودجهٔ فراخوانی‌های Bot API برای هر مسیر کاربر (بررسی CI-مانند)       #
+# --------------------------------------------------------------------------- #
+# هر سناریو یک مسیر مشخص را با همان روترها و میان‌افزارهای ربات (feed_update)
+# روی tools/fake_api.py اجرا می‌کند؛ ApiAccountant فقط فراخوانی‌های «بخش
+# اندازه‌گیری‌شده» را می‌شمارد (آماده‌سازی، مثل /start و فرم پیش از
+# «تایید نهایی»، حساب نمی‌شود). نتیجه با BUDGETS مقایسه می‌شود:
+#   total   ← سقف کل فراخوانی‌ها
+#   <متد>   ← سقف همان متد (مثلاً getChatMember: 0 برای کاربر برگشتی)
+# فراتر رفتن از بودجه = خروج با کد 1. اگر تغییری عمداً فراخوانی اضافه
+# می‌کند، بودجه باید در همین فایل (و در همان commit) بالا برود؛ --update
+# مقادیر فعلی را برای جایگزینی چاپ می‌کند. کمتر از بودجه فقط هشدار است.
+#
+# انباره‌ها در یک پوشهٔ موقت خالی ساخته می‌شوند: یک مقصد، یک کانال اجباری و
+# ادمین‌های سناریو؛ تأخیر fake صفر و محدودیت نرخ خاموش است (بدون 429 و تکرار).
+#
+# اجرا:  python -m tools.api_budget            (یا: -k finish برای فیلتر نام)
+
+TOKEN = "123456:" + "B" * 35
+DEST = -100_777_000_001
+REQUIRED = -100_777_000_002
+ADMIN_BASE = 770_000_000
+USER_BASE = 7_000_000_000
+
+BUDGETS: dict[str, dict[str, int]] = {
+    "start.new_member": {"total": 2, "getChatMember": 1},
+    "start.returning_member": {"total": 1, "getChatMember": 0},
+    "start.not_member": {"total": 2},
+    "membership.check_after_join": {"total": 3, "getChatMember": 1},
+    "ad.web_app_data": {"total": 1},
+    "ad.photo": {"total": 1},
+    "ad.album_3": {"total": 1},
+    "finish.0_photos_1_admin": {"total": 5},
+    "finish.3_photos_1_admin": {"total": 5},
+    "finish.3_photos_5_admins": {"total": 13},
+    "finish.album_3_5_admins": {"total": 13},
+    "admin.edit_price": {"total": 4},
+    "admin.publish": {"total": 4},
+    "admin.reject": {"total": 4},
+}
+
+
+class ApiAccountant:
+    """
+    میان‌افزار سشن که فراخوانی‌های API را در Counter فعال (ContextVar) می‌شمارد؛
+    taskهایی که درون measure ساخته می‌شوند (مثل تجمیع آلبوم) هم حساب می‌شوند.
+    """
+
+    def __init__(self) -> None:
+        self._current: ContextVar[Counter[str] | None] = ContextVar("api_accountant", default=None)
+
+    async def __call__(self, make_request, bot, method):
+        calls = self._current.get()
+        if calls is not None:
+            calls[method.__api_method__] += 1
+        return await make_request(bot, method)
+
+    @contextmanager
+    def measure(self) -> Iterator[Counter[str]]:
+        calls: Counter[str] = Counter()
+        token = self._current.set(calls)
+        try:
+            yield calls
+        finally:
+            self._current.reset(token)
+
+
+class Flows:
+    """ساخت آپدیت با سازنده‌های fake و پردازش مستقیم با dp.feed_update"""
+
+    def __init__(self, fake: FakeTelegram, dp: Any, bot: Any, accountant: ApiAccountant) -> None:
+        self.fake = fake
+        self.dp = dp
+        self.bot = bot
+        self.accountant = accountant
+        self.next_uid = USER_BASE
+        self.form_seed = 0
+
+    def new_user(self, *, member: bool = True) -> int:
+        self.next_uid += 1
+        self.fake.add_user(self.next_uid)
+        self.fake.set_member(REQUIRED, self.next_uid, "member" if member else "left")
+        return self.next_uid
+
+    async def _feed(self, push: Callable[[], int]) -> None:
+        from aiogram.types import Update
+
+        push()
+        # polling در کار نیست؛ آپدیتی که سازندهٔ fake همین حالا صف کرد برداشته می‌شود
+        body = self.fake.updates.pop()
+        await self.dp.feed_update(self.bot, Update.model_validate(body, context={"bot": self.bot}))
+
+    async def text(self, uid: int, text: str) -> None:
+        await self._feed(lambda: self.fake.user_text(uid, text))
+
+    async def web_app(self, uid: int) -> None:
+        self.form_seed += 1
+        form = sample_form(random.Random(self.form_seed))
+        await self._feed(lambda: self.fake.web_app_data(uid, form))
+
+    async def photos(self, uid: int, n: int, *, album: bool = False) -> None:
+        if not album:
+            for _ in range(n):
+                await self._feed(lambda: self.fake.user_photo(uid))
+            return
+        group = f"mg{uid}"
+        # پیام‌های آلبوم هم‌زمان می‌رسند؛ اولی تا پایان مهلت تجمیع منتظر می‌ماند
+        await asyncio.gather(*(self._feed(lambda: self.fake.user_photo(uid, media_group_id=group)) for _ in range(n)))
+
+    def button(self, chat_id: int, prefix: str) -> tuple[dict, str]:
+        for sent in reversed(self.fake.sent_to(chat_id)):
+            markup = sent.get("reply_markup") or {}
+            for row in markup.get("inline_keyboard", []):
+                for b in row:
+                    data = b.get("callback_data", "")
+                    if data == prefix or data.startswith(prefix + ":"):
+                        return sent, data
+        raise RuntimeError(f"no {prefix!r} button in chat {chat_id}")
+
+    async def tap(self, uid: int, prefix: str) -> None:
+        message, data = self.button(uid, prefix)
+        await self._feed(lambda: self.fake.callback(uid, message, data))
+
+    # ------------------------- مسیرهای پایه (آماده‌سازی) ------------------------- #
+
+    async def ready_ad(self, *, photos: int = 0, album: bool = False) -> int:
+        """کاربر عضو تا پیش از «تایید نهایی»"""
+        uid = self.new_user()
+        await self.text(uid, "/start")
+        await self.web_app(uid)
+        await self.photos(uid, photos, album=album)
+        return uid
+
+    async def panel(self) -> None:
+        """یک آگهی تاییدشده که پنلش نزد ادمین(های) فعلی است"""
+        uid = await self.ready_ad()
+        await self.tap(uid, "finish")
+
+
+def set_admins(fake: FakeTelegram, n: int) -> list[int]:
+    from app import storage
+
+    for uid in storage.list_admins():
+        storage.remove_admin(uid)
+    admins = [ADMIN_BASE + i for i in range(n)]
+    for uid in admins:
+        storage.add_admin(uid)
+        fake.add_user(uid)
+    return admins
+
+
+# --------------------------------------------------------------------------- #
+#                                سناریوها                                     #
+# --------------------------------------------------------------------------- #
+# هر سناریو (flows, fake) → Counter فراخوانی‌های بخش اندازه‌گیری‌شده
+
+Scenario = Callable[[Flows, FakeTelegram], Awaitable[Counter[str]]]
+SCENARIOS: dict[str, Scenario] = {}
+
+
+def scenario(name: str):
+    def deco(fn: Scenario) -> Scenario:
+        SCENARIOS[name] = fn
+        return fn
+    return deco
+
+
+@scenario("start.new_member")
+async def _start_new(f: Flows, fake: FakeTelegram) -> Counter[str]:
+    uid = f.new_user()
+    with f.accountant.measure() as calls:
+        await f.text(uid, "/start")
+    return calls
+
+
+@scenario("start.returning_member")
+async def _start_returning(f: Flows, fake: FakeTelegram) -> Counter[str]:
+    uid = f.new_user()
+    await f.text(uid, "/start")
+    with f.accountant.measure() as calls:
+        await f.text(uid, "/start")
+    return calls
+
+
+@scenario("start.not_member")
+async def _start_not_member(f: Flows, fake: FakeTelegram) -> Counter[str]:
+    uid = f.new_user(member=False)
+    with f.accountant.measure() as calls:
+        await f.text(uid, "/start")
+    return calls
+
+
+@scenario("membership.check_after_join")
+async def _check_after_join(f: Flows, fake: FakeTelegram) -> Counter[str]:
+    uid = f.new_user(member=False)
+    await f.text(uid, "/start")
+    fake.set_member(REQUIRED, uid, "member")
+    with f.accountant.measure() as calls:
+        await f.tap(uid, "check_membership")
+    return calls
+
+
+@scenario("ad.web_app_data")
+async def _web_app_data(f: Flows, fake: FakeTelegram) -> Counter[str]:
+    uid = f.new_user()
+    await f.text(uid, "/start")
+    with f.accountant.measure() as calls:
+        await f.web_app(uid)
+    return calls
+
+
+@scenario("ad.photo")
+async def _photo(f: Flows, fake: FakeTelegram) -> Counter[str]:
+    uid = await f.ready_ad()
+    with f.accountant.measure() as calls:
+        await f.photos(uid, 1)
+    return calls
+
+
+@scenario("ad.album_3")
+async def _album(f: Flows, fake: FakeTelegram) -> Counter[str]:
+    uid = await f.ready_ad()
+    with f.accountant.measure() as calls:
+        await f.photos(uid, 3, album=True)
+    return calls
+
+
+def _finish(photos: int, admins: int, *, album: bool = False) -> Scenario:
+    async def run(f: Flows, fake: FakeTelegram) -> Counter[str]:
+        set_admins(fake, admins)
+        uid = await f.ready_ad(photos=photos, album=album)
+        with f.accountant.measure() as calls:
+            await f.tap(uid, "finish")
+        return calls
+    return run
+
+
+scenario("finish.0_photos_1_admin")(_finish(0, 1))
+scenario("finish.3_photos_1_admin")(_finish(3, 1))
+scenario("finish.3_photos_5_admins")(_finish(3, 5))
+scenario("finish.album_3_5_admins")(_finish(3, 5, album=True))
+
+
+@scenario("admin.edit_price")
+async def _edit_price(f: Flows, fake: FakeTelegram) -> Counter[str]:
+    (admin,) = set_admins(fake, 1)
+    await f.panel()
+    with f.accountant.measure() as calls:
+        await f.tap(admin, "edit_price")
+        await f.text(admin, "1250")
+    return calls
+
+
+def _decide(action: str) -> Scenario:
+    async def run(f: Flows, fake: FakeTelegram) -> Counter[str]:
+        (admin,) = set_admins(fake, 1)
+        await f.panel()
+        with f.accountant.measure() as calls:
+            await f.tap(admin, action)
+        return calls
+    return run
+
+
+scenario("admin.publish")(_decide("publish"))
+scenario("admin.reject")(_decide("reject"))
+
+
+# --------------------------------------------------------------------------- #
+
+
+def check(name: str, calls: Counter[str]) -> list[str]:
+    """نقض‌های بودجه برای یک سناریو"""
+    budget = BUDGETS.get(name)
+    if budget is None:
+        return [f"{name}: no budget defined"]
+    total = sum(calls.values())
+    problems = []
+    if total > budget.get("total", total):
+        problems.append(f"{name}: {total} calls > budget {budget['total']}")
+    for method, limit in budget.items():
+        if method != "total" and calls.get(method, 0) > limit:
+            problems.append(f"{name}: {method} {calls[method]} > budget {limit}")
+    return problems
+
+
+async def main_async(args: argparse.Namespace) -> dict[str, Counter[str]]:
+    # SETTINGS هنگام import خوانده می‌شود؛ /start بدون آدرس WebApp مسیر دیگری می‌رود
+    os.environ.setdefault("WEBAPP_URL", "https://budget.invalid/webapp/")
+
+    from aiogram import Bot, Dispatcher
+    from aiogram.client.telegram import TelegramAPIServer
+
+    from app import storage
+    from app.handlers import router as root_router
+    from app.middlewares import setup_middlewares
+    from app.session import ApiMetricsMiddleware, PreparedMarkupSession
+    from app.state_backend import build_backend, set_backend
+
+    fake = FakeTelegram(latency_ms=0, flood=False)
+    fake.add_chat(DEST, "channel", "destination")
+    fake.add_chat(REQUIRED, "channel", "required", username="budget_required")
+    server = TestServer(fake.app())
+    await server.start_server()
+
+    results: dict[str, Counter[str]] = {}
+    with tempfile.TemporaryDirectory(prefix="budget_empty_") as empty, sandbox_storage(Path(empty)):
+        storage.bootstrap_admins(initial_env_admins=set(), owner_id=0)
+        storage.bootstrap_destinations(default_id=DEST, default_title="destination")
+        storage.bootstrap_allowed_channels(default_id=None)
+        storage.bootstrap_required_channels(None)
+        storage.add_required_channel(REQUIRED, title="required", username="budget_required")
+        set_backend(build_backend(""))
+
+        accountant = ApiAccountant()
+        session = PreparedMarkupSession()
+        session.api = TelegramAPIServer.from_base(str(server.make_url("")).rstrip("/"))
+        session.middleware(accountant)
+        session.middleware(ApiMetricsMiddleware())
+        bot = Bot(TOKEN, session=session)
+        dp = Dispatcher()
+        dp.include_router(root_router)
+        setup_middlewares(dp)
+
+        flows = Flows(fake, dp, bot, accountant)
+        try:
+            for name, run in SCENARIOS.items():
+                if args.k and not any(k in name for k in args.k):
+                    continue
+                set_admins(fake, 1)
+                results[name] = await run(flows, fake)
+        finally:
+            await session.close()
+            await server.close()
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Check Bot API call budgets per user flow")
+    parser.add_argument("-k", action="append", help="only scenarios whose name contains this (repeatable)")
+    parser.add_argument("--update", action="store_true", help="print current counts as a BUDGETS literal")
+    args = parser.parse_args()
+
+    results = asyncio.run(main_async(args))
+    problems: list[str] = []
+    print(f"{'flow':<30} {'calls':>6} {'budget':>7}  methods")
+    for name, calls in results.items():
+        total = sum(calls.values())
+        budget = BUDGETS.get(name, {}).get("total")
+        found = check(name, calls)
+        problems += found
+        status = "OVER" if found else ("under" if budget is not None and total < budget else "")
+        methods = ", ".join(f"{m}={n}" for m, n in sorted(calls.items()))
+        print(f"{name:<30} {total:>6} {budget if budget is not None else '-':>7}  {methods}  {status}")
+
+    if args.update:
+        print("\nBUDGETS = {")
+        for name, calls in results.items():
+            pinned = {m: n for m, n in BUDGETS.get(name, {}).items() if m != "total"}
+            pinned = {m: calls.get(m, 0) for m in pinned}
+            print(f"    {name!r}: {({'total': sum(calls.values()), **pinned})!r},")
+        print("}")
+    if problems:
+        print("\nbudget violations:\n  " + "\n  ".join(problems), file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
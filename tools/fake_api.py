@@ -0,0 +1,579 @@
+from __future__ import annotations
+import argparse
+import asyncio
+import inspect
+import json
+import math
+import random
+import secrets
+import time
+from collections import Counter, defaultdict
+from typing import Any, Callable
+
+from aiohttp import web
+
+# --------------------------------------------------------------------------- #
+#          جایگزین محلی Bot API تلگرام برای آزمون بار و آزمون انتها‌به‌انتها   #
+# --------------------------------------------------------------------------- #
+# ربات با TELEGRAM_API_BASE=http://127.0.0.1:8081 به این سرور وصل می‌شود
+# (مسیرها مثل تلگرام: POST /bot<token>/<method>). وضعیت چت‌ها، پیام‌ها،
+# عضویت‌ها و صف آپدیت‌ها در حافظه است.
+#
+# واقع‌نمایی:
+#   تأخیر  ← توزیع log-normal حول latency_ms، با ضریب برای هر متد
+#            (آلبوم به‌ازای هر عکس سنگین‌تر)؛ getUpdates long-poll واقعی است.
+#   429    ← مدل محدودیت تلگرام برای ارسال/ویرایش: ~۳۰ پیام در ثانیه کل،
+#            ~۱ پیام در ثانیه (با burst کوتاه) برای هر چت خصوصی و ۲۰ در دقیقه
+#            برای هر گروه/کانال؛ به‌علاوهٔ تزریق تصادفی با flood_prob.
+#   خطاها  ← همان متن‌های Bad Request تلگرام (message is not modified،
+#            message to edit not found، chat not found، …).
+#
+# آپدیت‌ها یا درون همین پردازه با متدهای push (user_text، web_app_data،
+# user_photo، callback، …) ساخته می‌شوند یا از بیرون با POST /_fake/update.
+# GET /_fake/stats شمار فراخوانی هر متد و 429های داده‌شده را برمی‌گرداند.
+# ابزارهای درون‌پردازه (tools/loadgen.py) با on_call هر فراخوانی موفق را می‌بینند.
+#
+# اجرا:  python -m tools.fake_api --port 8081 --latency-ms 40 --flood-prob 0.01
+
+BOT_ID = 100000
+# فیلدهایی که aiogram بدون json.dumps می‌فرستد و نباید تبدیل شوند
+TEXT_FIELDS = frozenset({"text", "caption", "parse_mode", "callback_query_id", "url", "name"})
+# ضریب تأخیر هر متد نسبت به latency_ms (بقیه = ۱)
+LATENCY_FACTOR = {
+    "sendPhoto": 2.0,
+    "sendMediaGroup": 1.5,  # به‌علاوهٔ ۰٫۷ به‌ازای هر عضو آلبوم
+    "getChatMember": 0.6,
+    "getChat": 0.6,
+    "answerCallbackQuery": 0.5,
+}
+FLOOD_METHODS = frozenset(
+    {
+        "sendMessage",
+        "sendPhoto",
+        "sendMediaGroup",
+        "editMessageText",
+        "editMessageCaption",
+        "editMessageReplyMarkup",
+    }
+)
+
+
+class ApiError(Exception):
+    def __init__(self, code: int, description: str, retry_after: int | None = None) -> None:
+        super().__init__(description)
+        self.code = code
+        self.description = description
+        self.retry_after = retry_after
+
+    def payload(self) -> dict:
+        body: dict[str, Any] = {"ok": False, "error_code": self.code, "description": self.description}
+        if self.retry_after is not None:
+            body["parameters"] = {"retry_after": self.retry_after}
+        return body
+
+
+def bad_request(text: str) -> ApiError:
+    return ApiError(400, f"Bad Request: {text}")
+
+
+# --------------------------------------------------------------------------- #
+#                            مدل محدودیت نرخ (429)                            #
+# --------------------------------------------------------------------------- #
+
+
+class _Bucket:
+    __slots__ = ("rate", "burst", "tokens", "ts")
+
+    def __init__(self, rate: float, burst: float) -> None:
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.ts = time.monotonic()
+
+    def take(self, now: float) -> float:
+        """۰ اگر توکن بود؛ وگرنه چند ثانیه تا توکن بعدی"""
+        self.tokens = min(self.burst, self.tokens + (now - self.ts) * self.rate)
+        self.ts = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+
+class FloodControl:
+    def __init__(
+        self,
+        *,
+        global_rate: float = 30.0,
+        private_rate: float = 1.0,
+        private_burst: float = 3.0,
+        group_per_minute: float = 20.0,
+    ) -> None:
+        self.global_bucket = _Bucket(global_rate, global_rate)
+        self.private = (private_rate, private_burst)
+        self.group = (group_per_minute / 60.0, group_per_minute / 4)
+        self.chats: dict[int, _Bucket] = {}
+
+    def check(self, chat_id: int) -> int | None:
+        """retry_after (ثانیهٔ گردشده به بالا) یا None"""
+        now = time.monotonic()
+        bucket = self.chats.get(chat_id)
+        if bucket is None:
+            rate, burst = self.private if chat_id > 0 else self.group
+            bucket = self.chats[chat_id] = _Bucket(rate, burst)
+        wait = bucket.take(now) or self.global_bucket.take(now)
+        return max(1, math.ceil(wait)) if wait else None
+
+
+# --------------------------------------------------------------------------- #
+#                                وضعیت درون‌حافظه                              #
+# --------------------------------------------------------------------------- #
+
+
+class FakeTelegram:
+    def __init__(
+        self,
+        *,
+        latency_ms: float = 40.0,
+        sigma: float = 0.35,
+        flood: bool = True,
+        flood_prob: float = 0.0,
+        member_status: str = "member",
+        seed: int | None = None,
+    ) -> None:
+        self.latency = latency_ms / 1e3
+        self.sigma = sigma
+        self.flood = FloodControl() if flood else None
+        self.flood_prob = flood_prob
+        self.member_status = member_status
+        self.rng = random.Random(seed)
+        self.bot_user = {"id": BOT_ID, "is_bot": True, "first_name": "FakeBot", "username": "fake_bot"}
+        self.reset()
+
+    def reset(self) -> None:
+        self.chats: dict[int, dict] = {}
+        self.members: dict[tuple[int, int], str] = {}
+        self.messages: dict[tuple[int, int], dict] = {}
+        self.next_message_id: dict[int, int] = defaultdict(lambda: 1)
+        self.invite_links: dict[int, str] = {}
+        self.updates: list[dict] = []
+        self.next_update_id = 1
+        self.new_updates = asyncio.Event()
+        self.calls: Counter[str] = Counter()
+        self.flood_errors: Counter[str] = Counter()
+        self.errors: Counter[str] = Counter()
+        # ناظرها پس از هر فراخوانی موفق: (method, params, result)
+        self.on_call: list[Callable[[str, dict, Any], None]] = []
+
+    # ---------------------------- چت‌ها و کاربران ---------------------------- #
+
+    def add_user(self, user_id: int, first_name: str | None = None, username: str | None = None) -> dict:
+        """کاربر + چت خصوصی‌اش (مثل کاربری که ربات را استارت کرده)"""
+        chat = self.chats.get(user_id)
+        if chat is None:
+            chat = {"id": user_id, "type": "private", "first_name": first_name or f"user{user_id}"}
+            if username:
+                chat["username"] = username
+            self.chats[user_id] = chat
+        return chat
+
+    def add_chat(self, chat_id: int, type: str = "channel", title: str | None = None, username: str | None = None) -> dict:
+        chat = {"id": chat_id, "type": type, "title": title or f"chat{chat_id}"}
+        if username:
+            chat["username"] = username
+        self.chats[chat_id] = chat
+        return chat
+
+    def set_member(self, chat_id: int, user_id: int, status: str) -> None:
+        self.members[(chat_id, user_id)] = status
+
+    def user(self, user_id: int) -> dict:
+        chat = self.add_user(user_id)
+        user = {"id": user_id, "is_bot": False, "first_name": chat["first_name"]}
+        if "username" in chat:
+            user["username"] = chat["username"]
+        return user
+
+    def _chat(self, chat_id: Any) -> dict:
+        if isinstance(chat_id, str) and chat_id.startswith("@"):
+            for chat in self.chats.values():
+                if chat.get("username", "").lower() == chat_id[1:].lower():
+                    return chat
+            raise bad_request("chat not found")
+        try:
+            chat = self.chats.get(int(chat_id))
+        except (TypeError, ValueError):
+            chat = None
+        if chat is None:
+            raise bad_request("chat not found")
+        return chat
+
+    def sent_to(self, chat_id: int) -> list[dict]:
+        """پیام‌های موجود (حذف‌نشده) یک چت به ترتیب ارسال"""
+        return [m for (cid, _), m in sorted(self.messages.items()) if cid == chat_id]
+
+    # ------------------------------ آپدیت‌ها ------------------------------ #
+
+    def push_update(self, body: dict) -> int:
+        update_id = self.next_update_id
+        self.next_update_id += 1
+        self.updates.append({"update_id": update_id, **body})
+        self.new_updates.set()
+        return update_id
+
+    def _incoming(self, user_id: int, **fields) -> dict:
+        chat = self.add_user(user_id)
+        message_id = self.next_message_id[user_id]
+        self.next_message_id[user_id] += 1
+        return {
+            "message_id": message_id,
+            "date": int(time.time()),
+            "chat": chat,
+            "from": self.user(user_id),
+            **fields,
+        }
+
+    def user_text(self, user_id: int, text: str) -> int:
+        entities = [{"type": "bot_command", "offset": 0, "length": len(text.split()[0])}] if text.startswith("/") else None
+        message = self._incoming(user_id, text=text)
+        if entities:
+            message["entities"] = entities
+        return self.push_update({"message": message})
+
+    def web_app_data(self, user_id: int, data: dict | str, button_text: str = "فرم") -> int:
+        payload = data if isinstance(data, str) else json.dumps(data, ensure_ascii=False)
+        return self.push_update(
+            {"message": self._incoming(user_id, web_app_data={"data": payload, "button_text": button_text})}
+        )
+
+    def user_photo(self, user_id: int, *, media_group_id: str | None = None) -> int:
+        message = self._incoming(user_id, photo=self._photo_sizes())
+        if media_group_id:
+            message["media_group_id"] = media_group_id
+        return self.push_update({"message": message})
+
+    def callback(self, user_id: int, message: dict, data: str, *, query_id: str | None = None) -> int:
+        return self.push_update(
+            {
+                "callback_query": {
+                    "id": query_id or secrets.token_hex(8),
+                    "from": self.user(user_id),
+                    "chat_instance": str(message["chat"]["id"]),
+                    "message": message,
+                    "data": data,
+                }
+            }
+        )
+
+    # ------------------------------- کمکی‌ها ------------------------------- #
+
+    def _photo_sizes(self) -> list[dict]:
+        unique = secrets.token_hex(6)
+        return [
+            {"file_id": f"AgAC{unique}_{w}", "file_unique_id": f"{unique}{w}", "width": w, "height": w * 3 // 4}
+            for w in (90, 320, 1280)
+        ]
+
+    def _new_message(self, chat: dict, **fields) -> dict:
+        message_id = self.next_message_id[chat["id"]]
+        self.next_message_id[chat["id"]] += 1
+        message = {"message_id": message_id, "date": int(time.time()), "chat": chat, **fields}
+        if chat["type"] != "channel":
+            message["from"] = self.bot_user
+        self.messages[(chat["id"], message_id)] = message
+        return message
+
+    def _stored(self, p: dict) -> dict:
+        chat = self._chat(p.get("chat_id"))
+        message = self.messages.get((chat["id"], int(p.get("message_id") or 0)))
+        if message is None:
+            raise bad_request("message to edit not found")
+        return message
+
+    @staticmethod
+    def _markup(p: dict) -> dict | None:
+        markup = p.get("reply_markup")
+        return markup if isinstance(markup, dict) and "inline_keyboard" in markup else None
+
+    def _delay(self, method: str, p: dict) -> float:
+        factor = LATENCY_FACTOR.get(method, 1.0)
+        if method == "sendMediaGroup":
+            factor += 0.7 * len(p.get("media") or [])
+        return self.rng.lognormvariate(math.log(self.latency * factor), self.sigma) if self.latency > 0 else 0.0
+
+    def _check_flood(self, method: str, p: dict) -> None:
+        if method not in FLOOD_METHODS:
+            return
+        retry_after = None
+        if self.flood_prob and self.rng.random() < self.flood_prob:
+            retry_after = self.rng.randint(1, 3)
+        elif self.flood is not None:
+            try:
+                chat_id = int(p.get("chat_id"))
+            except (TypeError, ValueError):
+                chat_id = 0
+            retry_after = self.flood.check(chat_id)
+        if retry_after is not None:
+            self.flood_errors[method] += 1
+            raise ApiError(429, f"Too Many Requests: retry after {retry_after}", retry_after)
+
+    # ------------------------------- متدها ------------------------------- #
+
+    async def get_updates(self, p: dict) -> list[dict]:
+        offset = int(p.get("offset") or 0)
+        limit = int(p.get("limit") or 100)
+        if offset:
+            self.updates = [u for u in self.updates if u["update_id"] >= offset]
+        if not self.updates:
+            self.new_updates.clear()
+            try:
+                await asyncio.wait_for(self.new_updates.wait(), timeout=float(p.get("timeout") or 0))
+            except asyncio.TimeoutError:
+                pass
+        return self.updates[:limit]
+
+    def get_me(self, p: dict) -> dict:
+        return self.bot_user
+
+    def send_message(self, p: dict) -> dict:
+        chat = self._chat(p.get("chat_id"))
+        text = p.get("text") or ""
+        if not text.strip():
+            raise bad_request("message text is empty")
+        fields: dict[str, Any] = {"text": text}
+        if markup := self._markup(p):
+            fields["reply_markup"] = markup
+        return self._new_message(chat, **fields)
+
+    def send_photo(self, p: dict) -> dict:
+        chat = self._chat(p.get("chat_id"))
+        fields: dict[str, Any] = {"photo": self._photo_sizes()}
+        if p.get("caption"):
+            fields["caption"] = p["caption"]
+        if markup := self._markup(p):
+            fields["reply_markup"] = markup
+        return self._new_message(chat, **fields)
+
+    def send_media_group(self, p: dict) -> list[dict]:
+        chat = self._chat(p.get("chat_id"))
+        media = p.get("media")
+        if not isinstance(media, list) or not 1 <= len(media) <= 10:
+            raise bad_request("wrong number of media in the album")
+        group_id = str(self.rng.getrandbits(60))
+        out = []
+        for item in media:
+            fields: dict[str, Any] = {"photo": self._photo_sizes(), "media_group_id": group_id}
+            if item.get("caption"):
+                fields["caption"] = item["caption"]
+            out.append(self._new_message(chat, **fields))
+        return out
+
+    def _apply_edit(self, message: dict, key: str, value: str, markup: dict | None) -> dict:
+        if message.get(key) == value and message.get("reply_markup") == markup:
+            raise bad_request(
+                "message is not modified: specified new message content and reply markup are "
+                "exactly the same as a current content and reply markup of the message"
+            )
+        message[key] = value
+        if markup is None:
+            message.pop("reply_markup", None)
+        else:
+            message["reply_markup"] = markup
+        message["edit_date"] = int(time.time())
+        return message
+
+    def edit_message_text(self, p: dict) -> dict:
+        message = self._stored(p)
+        if "text" not in message:
+            raise bad_request("there is no text in the message to edit")
+        return self._apply_edit(message, "text", p.get("text") or "", self._markup(p))
+
+    def edit_message_caption(self, p: dict) -> dict:
+        message = self._stored(p)
+        if "photo" not in message:
+            raise bad_request("there is no caption in the message to edit")
+        return self._apply_edit(message, "caption", p.get("caption") or "", self._markup(p))
+
+    def edit_message_reply_markup(self, p: dict) -> dict:
+        message = self._stored(p)
+        markup = self._markup(p)
+        if message.get("reply_markup") == markup:
+            raise bad_request("message is not modified")
+        if markup is None:
+            message.pop("reply_markup", None)
+        else:
+            message["reply_markup"] = markup
+        return message
+
+    def delete_message(self, p: dict) -> bool:
+        chat = self._chat(p.get("chat_id"))
+        if self.messages.pop((chat["id"], int(p.get("message_id") or 0)), None) is None:
+            raise bad_request("message to delete not found")
+        return True
+
+    def delete_messages(self, p: dict) -> bool:
+        chat = self._chat(p.get("chat_id"))
+        for message_id in p.get("message_ids") or []:
+            self.messages.pop((chat["id"], int(message_id)), None)
+        return True
+
+    def get_chat(self, p: dict) -> dict:
+        chat = self._chat(p.get("chat_id"))
+        gifts = dict.fromkeys(
+            ("unlimited_gifts", "limited_gifts", "unique_gifts", "premium_subscription", "gifts_from_channels"),
+            False,
+        )
+        return {**chat, "accent_color_id": 0, "max_reaction_count": 11, "accepted_gift_types": gifts}
+
+    def get_chat_member(self, p: dict) -> dict:
+        chat = self._chat(p.get("chat_id"))
+        user_id = int(p.get("user_id") or 0)
+        status = self.members.get((chat["id"], user_id), self.member_status)
+        member: dict[str, Any] = {"status": status, "user": self.user(user_id)}
+        if status == "creator":
+            member["is_anonymous"] = False
+        elif status == "kicked":
+            member["until_date"] = 0
+        elif status == "administrator":
+            member.update(
+                dict.fromkeys(
+                    (
+                        "can_be_edited", "is_anonymous", "can_manage_chat", "can_delete_messages",
+                        "can_manage_video_chats", "can_restrict_members", "can_promote_members",
+                        "can_change_info", "can_invite_users", "can_post_stories", "can_edit_stories",
+                        "can_delete_stories", "can_send_welcome_messages",
+                    ),
+                    False,
+                )
+            )
+        return member
+
+    def export_chat_invite_link(self, p: dict) -> str:
+        chat = self._chat(p.get("chat_id"))
+        link = self.invite_links[chat["id"]] = f"https://t.me/+{secrets.token_urlsafe(12)}"
+        return link
+
+    def answer_callback_query(self, p: dict) -> bool:
+        return True
+
+    # -------------------------------- HTTP -------------------------------- #
+
+    @property
+    def methods(self) -> dict[str, Callable[[dict], Any]]:
+        return {
+            "getMe": self.get_me,
+            "getUpdates": self.get_updates,
+            "sendMessage": self.send_message,
+            "sendPhoto": self.send_photo,
+            "sendMediaGroup": self.send_media_group,
+            "editMessageText": self.edit_message_text,
+            "editMessageCaption": self.edit_message_caption,
+            "editMessageReplyMarkup": self.edit_message_reply_markup,
+            "deleteMessage": self.delete_message,
+            "deleteMessages": self.delete_messages,
+            "getChat": self.get_chat,
+            "getChatMember": self.get_chat_member,
+            "exportChatInviteLink": self.export_chat_invite_link,
+            "answerCallbackQuery": self.answer_callback_query,
+        }
+
+    @staticmethod
+    async def _params(request: web.Request) -> dict:
+        if request.content_type == "application/json":
+            return await request.json()
+        params: dict[str, Any] = dict(request.query)
+        form = await request.post()
+        for key, value in form.items():
+            if isinstance(value, web.FileField):
+                params[key] = f"attach://{key}"
+            elif key in TEXT_FIELDS:
+                params[key] = value
+            else:
+                try:
+                    params[key] = json.loads(value)
+                except ValueError:
+                    params[key] = value
+        return params
+
+    async def handle(self, request: web.Request) -> web.Response:
+        method = request.match_info["method"]
+        fn = self.methods.get(method)
+        self.calls[method] += 1
+        if fn is None:
+            return web.json_response({"ok": False, "error_code": 404, "description": "Not Found"}, status=404)
+        p = await self._params(request)
+        try:
+            if method != "getUpdates":
+                await asyncio.sleep(self._delay(method, p))
+                self._check_flood(method, p)
+            result = fn(p)
+            if inspect.isawaitable(result):
+                result = await result
+        except ApiError as e:
+            self.errors[f"{method}:{e.code}"] += 1
+            return web.json_response(e.payload(), status=e.code)
+        for hook in self.on_call:
+            hook(method, p, result)
+        return web.json_response({"ok": True, "result": result})
+
+    async def _control_update(self, request: web.Request) -> web.Response:
+        body = await request.json()
+        for update in body if isinstance(body, list) else [body]:
+            update.pop("update_id", None)
+            self.push_update(update)
+        return web.json_response({"ok": True, "pending": len(self.updates)})
+
+    async def _control_stats(self, _: web.Request) -> web.Response:
+        return web.json_response(self.stats())
+
+    async def _control_reset(self, _: web.Request) -> web.Response:
+        self.reset()
+        return web.json_response({"ok": True})
+
+    def stats(self) -> dict:
+        return {
+            "calls": dict(self.calls.most_common()),
+            "flood_429": dict(self.flood_errors),
+            "errors": dict(self.errors),
+            "pending_updates": len(self.updates),
+            "messages": len(self.messages),
+        }
+
+    def app(self) -> web.Application:
+        app = web.Application(client_max_size=50 * 1024 * 1024)
+        app.router.add_route("*", "/bot{token}/{method}", self.handle)
+        app.router.add_post("/_fake/update", self._control_update)
+        app.router.add_get("/_fake/stats", self._control_stats)
+        app.router.add_post("/_fake/reset", self._control_reset)
+        return app
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Fake Telegram Bot API server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument("--latency-ms", type=float, default=40.0)
+    parser.add_argument("--flood-prob", type=float, default=0.0, help="random 429 probability for send/edit")
+    parser.add_argument("--no-flood", action="store_true", help="disable Telegram-like rate limits")
+    parser.add_argument("--member-status", default="member", help="default getChatMember status")
+    parser.add_argument("--chat", action="append", default=[], metavar="ID[:type[:title]]", help="pre-create a chat")
+    parser.add_argument("--user", action="append", type=int, default=[], help="pre-create a private chat (admins)")
+    args = parser.parse_args()
+
+    fake = FakeTelegram(
+        latency_ms=args.latency_ms,
+        flood=not args.no_flood,
+        flood_prob=args.flood_prob,
+        member_status=args.member_status,
+    )
+    for spec in args.chat:
+        cid, _, rest = spec.partition(":")
+        ctype, _, title = rest.partition(":")
+        fake.add_chat(int(cid), ctype or "channel", title or None)
+    for uid in args.user:
+        fake.add_user(uid)
+    web.run_app(fake.app(), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,352 @@
+from __future__ import annotations
+import argparse
+import asyncio
+import json
+import os
+import random
+import time
+from collections import Counter, defaultdict
+from typing import Any, Callable
+
+from aiohttp.test_utils import TestServer
+
+from ._report import latency_summary, print_latency_table
+from .fake_api import FakeTelegram
+
+# --------------------------------------------------------------------------- #
+#            مولد بار سناریومحور برای چرخهٔ کامل یک آگهی (آفلاین)              #
+# --------------------------------------------------------------------------- #
+# خود ربات (همان روترها و میان‌افزارها، با polling واقعی) به tools/fake_api.py
+# درون همین پردازه وصل می‌شود و N کاربر مجازی هم‌زمان هرکدام پشت سر هم آگهی
+# ثبت می‌کنند؛ هر آگهی با یک کاربر تازه:
+#   start        /start (+ بررسی عضویت با getChatMember)
+#   membership   دکمهٔ «بررسی عضویت» (بخشی از کاربران اول عضو نیستند)
+#   web_app_data ارسال فرم از WebApp
+#   photo        ۰ تا ۳ عکس، هرکدام جدا
+#   finish       «تایید نهایی»: انتشار در کانال + پنل همهٔ ادمین‌ها
+#   admin_edit   ادمین: دکمهٔ ویرایش قیمت/توضیحات + پیام متن جدید
+#   publish / reject
+# زمان هر مرحله از تزریق آپدیت تا پاسخ ربات است (پیام به همان چت یا
+# answerCallbackQuery). یک ادمین هم‌زمان فقط یک آگهی را ویرایش می‌کند
+# (ADMIN_EDIT_WAIT به‌ازای ادمین است)؛ انتظار برای ادمین جزو زمان مرحله نیست.
+#
+# --users 1,10,50 چند مرحلهٔ پیاپی با هم‌زمانی بیشتر اجرا می‌کند؛ جایی که
+# ads/s دیگر رشد نمی‌کند نقطهٔ اشباع است.
+#
+# توجه: ربات از همان /tmp/bot_data استفاده می‌کند؛ ادمین‌ها و مقصد موقتی که
+# این ابزار می‌سازد در پایان حذف می‌شوند، اما شمارندهٔ روزانه جلو می‌رود و
+# مدل‌های خودروی نمونه در car_models.json ثبت می‌شوند.
+#
+# اجرا:  python -m tools.loadgen --users 1,10,50 --ads 5 --admins 3
+
+TOKEN = "123456:" + "L" * 35
+ADMIN_BASE = 880_000_000
+USER_BASE = 5_000_000_000
+LOAD_DEST = -100_888_000_001
+CARS = ("پژو 206", "پراید 131", "سمند LX", "تیبا 2", "دنا پلاس", "کوییک")
+
+
+def sample_form(rng: random.Random) -> dict:
+    return {
+        "category": "سواری",
+        "car": rng.choice(CARS),
+        "year": str(rng.randint(1390, 1403)),
+        "color": rng.choice(("سفید", "مشکی", "خاکستری")),
+        "km": str(rng.randint(0, 300) * 1000),
+        "insurance": "",
+        "gear": rng.choice(("دستی", "اتوماتیک")),
+        "desc": "",
+        "phone": "0912" + "".join(str(rng.randint(0, 9)) for _ in range(7)),
+        "million_price": f"{rng.randint(200, 3000)}.{rng.randint(0, 9)}",
+    }
+
+
+def _buttons(markup: Any) -> list[str]:
+    if not isinstance(markup, dict):
+        return []
+    return [b.get("callback_data", "") for row in markup.get("inline_keyboard", []) for b in row]
+
+
+class StepFailed(Exception):
+    pass
+
+
+class Watch:
+    """انتظار برای فراخوانی‌ای از ربات که با شرط بخواند (از طریق fake.on_call)"""
+
+    def __init__(self, fake: FakeTelegram) -> None:
+        self.waiters: list[tuple[Callable[[str, dict, Any], bool], asyncio.Future]] = []
+        fake.on_call.append(self._on_call)
+
+    def _on_call(self, method: str, p: dict, result: Any) -> None:
+        for item in list(self.waiters):
+            match, fut = item
+            if fut.done():
+                self.waiters.remove(item)
+            elif match(method, p, result):
+                fut.set_result(result)
+                self.waiters.remove(item)
+
+    def expect(self, match: Callable[[str, dict, Any], bool]) -> asyncio.Future:
+        fut = asyncio.get_running_loop().create_future()
+        self.waiters.append((match, fut))
+        return fut
+
+
+def message_to(chat_id: int, *, button: str | None = None) -> Callable[[str, dict, Any], bool]:
+    def match(method: str, p: dict, _: Any) -> bool:
+        if method != "sendMessage" or p.get("chat_id") != chat_id:
+            return False
+        return button is None or button in _buttons(p.get("reply_markup"))
+    return match
+
+
+def answered(query_id: str) -> Callable[[str, dict, Any], bool]:
+    return lambda method, p, _: method == "answerCallbackQuery" and p.get("callback_query_id") == query_id
+
+
+class LoadRun:
+    def __init__(self, fake: FakeTelegram, *, admins: list[int], channels: list[int], args: argparse.Namespace) -> None:
+        self.fake = fake
+        self.watch = Watch(fake)
+        self.admins = admins
+        self.channels = channels
+        self.args = args
+        self.rng = random.Random(args.seed)
+        self.admin_locks = {a: asyncio.Lock() for a in admins}
+        self.next_uid = USER_BASE
+        self.next_query = 0
+        self.samples: dict[str, list[float]] = defaultdict(list)
+        self.errors: Counter[str] = Counter()
+        self.ads_done = 0
+
+    async def step(self, name: str, match: Callable[[str, dict, Any], bool], push: Callable[[], Any]) -> Any:
+        fut = self.watch.expect(match)
+        t0 = time.perf_counter()
+        push()
+        try:
+            result = await asyncio.wait_for(fut, self.args.timeout)
+        except asyncio.TimeoutError:
+            self.errors[name] += 1
+            raise StepFailed(name) from None
+        self.samples[name].append(time.perf_counter() - t0)
+        return result
+
+    def _query_id(self) -> str:
+        self.next_query += 1
+        return f"lq{self.next_query}"
+
+    async def tap(self, name: str, user_id: int, message: dict, data: str) -> None:
+        qid = self._query_id()
+        await self.step(name, answered(qid), lambda: self.fake.callback(user_id, message, data, query_id=qid))
+
+    async def one_ad(self) -> None:
+        fake, rng = self.fake, self.rng
+        uid = self.next_uid = self.next_uid + 1
+        joined_late = rng.random() < self.args.nonmember
+        for cid in self.channels:
+            fake.set_member(cid, uid, "left" if joined_late else "member")
+
+        # ۱) /start و ۲) بررسی عضویت
+        start_msg = await self.step("start", message_to(uid), lambda: fake.user_text(uid, "/start"))
+        if joined_late:
+            for cid in self.channels:
+                fake.set_member(cid, uid, "member")
+        await self.tap("membership", uid, start_msg, "check_membership")
+
+        # ۳) فرم WebApp → پیام «تایید نهایی» با توکن آگهی
+        form_msg = await self.step("web_app_data", message_to(uid), lambda: fake.web_app_data(uid, sample_form(rng)))
+        finish = [b for b in _buttons(form_msg.get("reply_markup")) if b.startswith("finish:")]
+        if not finish:
+            # فرم رد شد (پیام خطای اعتبارسنجی)
+            self.errors["web_app_data"] += 1
+            raise StepFailed("web_app_data")
+        token = finish[0].split(":", 1)[1]
+
+        # ۴) ۰ تا ۳ عکس
+        for _ in range(rng.randint(0, self.args.max_photos)):
+            await self.step("photo", message_to(uid), lambda: fake.user_photo(uid))
+
+        # ۵) تایید نهایی؛ پنل ادمین انتخاب‌شده هم منتظر می‌ماند
+        admin = rng.choice(self.admins)
+        panel_fut = self.watch.expect(message_to(admin, button=f"publish:{token}"))
+        await self.tap("finish", uid, form_msg, f"finish:{token}")
+        try:
+            panel = await asyncio.wait_for(panel_fut, self.args.timeout)
+        except asyncio.TimeoutError:
+            self.errors["finish"] += 1
+            raise StepFailed("finish") from None
+
+        # ۶) ویرایش توسط ادمین و ۷) انتشار یا رد
+        async with self.admin_locks[admin]:
+            field = rng.choice(("price", "desc"))
+            t0 = time.perf_counter()
+            await self.tap("admin_edit_tap", admin, panel, f"edit_{field}:{token}")
+            text = f"{rng.randint(200, 3000)}" if field == "price" else "بدون رنگ‌شدگی، بیمه تا پایان سال"
+            panel = await self.step(
+                "admin_edit_text",
+                message_to(admin, button=f"publish:{token}"),
+                lambda: fake.user_text(admin, text),
+            )
+            self.samples["admin_edit"].append(time.perf_counter() - t0)
+            action = "publish" if rng.random() < self.args.publish_ratio else "reject"
+            await self.tap(action, admin, panel, f"{action}:{token}")
+        self.ads_done += 1
+
+    async def user(self, ads: int) -> None:
+        for _ in range(ads):
+            try:
+                await self.one_ad()
+            except StepFailed:
+                pass
+
+    def report(self) -> dict:
+        order = ("start", "membership", "web_app_data", "photo", "finish", "admin_edit", "admin_edit_tap",
+                 "admin_edit_text", "publish", "reject")
+        return {name: latency_summary(self.samples[name]) for name in order if self.samples.get(name)}
+
+
+async def run_stage(fake: FakeTelegram, users: int, args, admins, channels) -> dict:
+    run = LoadRun(fake, admins=admins, channels=channels, args=args)
+    calls_before = Counter(fake.calls)
+    flood_before = sum(fake.flood_errors.values())
+    t0 = time.perf_counter()
+    await asyncio.gather(*(run.user(args.ads) for _ in range(users)))
+    wall = time.perf_counter() - t0
+    calls = Counter(fake.calls)
+    calls.subtract(calls_before)
+    for method in ("getUpdates", "getMe"):
+        calls.pop(method, None)
+    api_calls = sum(calls.values())
+    ads = run.ads_done
+    return {
+        "users": users,
+        "ads": ads,
+        "wall_s": round(wall, 3),
+        "ads_per_s": round(ads / wall, 3) if wall else 0.0,
+        "api_calls_per_ad": round(api_calls / ads, 2) if ads else None,
+        "methods_per_ad": {m: round(n / ads, 2) for m, n in calls.most_common() if n} if ads else {},
+        "flood_429": sum(fake.flood_errors.values()) - flood_before,
+        "errors": dict(run.errors),
+        "steps": run.report(),
+    }
+
+
+def print_stage(stage: dict) -> None:
+    print(
+        f"\n== users={stage['users']}  ads={stage['ads']}  wall={stage['wall_s']}s  "
+        f"ads/s={stage['ads_per_s']}  api_calls/ad={stage['api_calls_per_ad']}  429={stage['flood_429']}"
+    )
+    print_latency_table(stage["steps"], errors=stage["errors"])
+    if stage["methods_per_ad"]:
+        print("per ad: " + ", ".join(f"{m}={n}" for m, n in stage["methods_per_ad"].items()))
+
+
+def saturation(stages: list[dict]) -> dict | None:
+    """اولین مرحله‌ای که ads/s کمتر از ۱۰٪ نسبت به قبلی رشد کرده"""
+    best = None
+    for prev, cur in zip(stages, stages[1:]):
+        if prev["ads_per_s"] and cur["ads_per_s"] < prev["ads_per_s"] * 1.10:
+            return prev
+        best = cur
+    return best
+
+
+async def main_async(args: argparse.Namespace) -> dict:
+    # SETTINGS هنگام import خوانده می‌شود؛ /start بدون آدرس WebApp مسیر دیگری می‌رود
+    os.environ.setdefault("WEBAPP_URL", "https://loadgen.invalid/webapp/")
+
+    from aiogram import Bot, Dispatcher
+    from aiogram.client.telegram import TelegramAPIServer
+
+    from app import storage
+    from app.config import SETTINGS
+    from app.handlers import router as root_router
+    from app.middlewares import setup_middlewares
+    from app.session import ApiMetricsMiddleware, PreparedMarkupSession
+    from app.state_backend import build_backend, set_backend
+
+    fake = FakeTelegram(
+        latency_ms=args.latency_ms,
+        flood=args.flood,
+        flood_prob=args.flood_prob,
+        seed=args.seed,
+    )
+    server = TestServer(fake.app())
+    await server.start_server()
+
+    # ----------------------- آماده‌سازی داده‌ها ----------------------- #
+    set_backend(build_backend(""))
+    added_admins = [ADMIN_BASE + i for i in range(args.admins) if storage.add_admin(ADMIN_BASE + i)]
+    admins = [ADMIN_BASE + i for i in range(args.admins)]
+    for uid in storage.list_admins():
+        fake.add_user(uid)
+    dest = int(storage.get_active_destination() or 0) or SETTINGS.TARGET_GROUP_ID
+    temp_dest = not dest
+    if temp_dest:
+        dest = LOAD_DEST
+        storage.add_destination(dest, "loadgen")
+        storage.set_active_destination(dest)
+    fake.add_chat(dest, "channel", "destination")
+    channels = storage.get_required_channel_ids() or ([SETTINGS.TARGET_GROUP_ID] if SETTINGS.TARGET_GROUP_ID else [])
+    for cid in channels:
+        if cid not in fake.chats:
+            fake.add_chat(cid, "channel", f"required {cid}", username=f"req{abs(cid)}")
+
+    session = PreparedMarkupSession()
+    session.api = TelegramAPIServer.from_base(str(server.make_url("")).rstrip("/"))
+    session.middleware(ApiMetricsMiddleware())
+    bot = Bot(TOKEN, session=session)
+    dp = Dispatcher()
+    dp.include_router(root_router)
+    setup_middlewares(dp)
+    polling = asyncio.create_task(dp.start_polling(bot, handle_signals=False, close_bot_session=False))
+
+    stages = []
+    try:
+        for users in args.users:
+            stage = await run_stage(fake, users, args, admins, channels)
+            print_stage(stage)
+            stages.append(stage)
+    finally:
+        await dp.stop_polling()
+        await polling
+        await session.close()
+        await server.close()
+        for uid in added_admins:
+            storage.remove_admin(uid)
+        if temp_dest:
+            storage.remove_destination(dest)
+
+    sat = saturation(stages)
+    if sat is not None and len(stages) > 1:
+        print(f"\nsaturation ≈ {sat['ads_per_s']} ads/s at {sat['users']} concurrent users")
+    return {"config": {k: v for k, v in vars(args).items() if k != "json"}, "stages": stages,
+            "saturation": sat and {"users": sat["users"], "ads_per_s": sat["ads_per_s"]}}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Ad lifecycle load generator against the fake Bot API")
+    parser.add_argument("--users", default="1,10", help="comma-separated concurrency stages")
+    parser.add_argument("--ads", type=int, default=5, help="ads per virtual user per stage")
+    parser.add_argument("--admins", type=int, default=3)
+    parser.add_argument("--max-photos", type=int, default=3)
+    parser.add_argument("--publish-ratio", type=float, default=0.8)
+    parser.add_argument("--nonmember", type=float, default=0.3, help="share of users who join after /start")
+    parser.add_argument("--latency-ms", type=float, default=40.0)
+    parser.add_argument("--flood", action="store_true", help="enable Telegram-like 429 rate limits")
+    parser.add_argument("--flood-prob", type=float, default=0.0)
+    parser.add_argument("--timeout", type=float, default=15.0, help="per-step timeout (s)")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", help="write the full report to this file")
+    args = parser.parse_args()
+    args.users = [int(x) for x in args.users.split(",") if x.strip()]
+
+    result = asyncio.run(main_async(args))
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
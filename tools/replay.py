@@ -0,0 +1,437 @@
+from __future__ import annotations
+import argparse
+import asyncio
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Any, Iterator
+
+from aiohttp.test_utils import TestServer
+
+from ._report import latency_summary, print_latency_table
+from .fake_api import FakeTelegram
+
+# --------------------------------------------------------------------------- #
+#     بازپخش لاگ آپدیت‌های ضبط‌شده (app/update_log.py) از مسیر Dispatcher      #
+# --------------------------------------------------------------------------- #
+# آپدیت‌ها با همان روترها و میان‌افزارهای ربات (dp.feed_update) پردازش
+# می‌شوند و ربات به tools/fake_api.py درون همین پردازه وصل است:
+#   • زمان‌بندی اصلی حفظ می‌شود (--speed 10 یعنی ده برابر سریع‌تر، 0 یعنی
+#     بی‌درنگ)؛ فاصله‌های طولانی‌تر از --max-gap کوتاه می‌شوند
+#   • آپدیت‌های هر کاربر به ترتیب و پس از پایان آپدیت قبلی همان کاربر اجرا
+#     می‌شوند (مثل پاسخ دادن کاربر واقعی به ربات)
+#   • توکن دکمه‌های شیشه‌ای در هر اجرا تازه ساخته می‌شود؛ callbackها به آخرین
+#     پیام ربات در همان چت که دکمه‌ای با همان پیشوند دارد «بازبسته» می‌شوند.
+#     اگر آن دکمه هنوز فرستاده نشده (مثلاً پنل ادمین در حال ارسال است)، تا
+#     --rebind-wait ثانیه منتظر می‌ماند؛ وگرنه callback همان‌طور (منقضی) می‌رود
+#   • کاربران با نقش «a»/«o» در لاگ ادمین/مالک می‌شوند
+# ترتیب میان کاربران فقط از زمان‌بندی لاگ می‌آید؛ با --speed 0 ممکن است ادمین
+# پیش از رسیدن پنل آگهی دکمه بزند و نتیجه از اجرایی به اجرای دیگر فرق کند.
+# --serial آپدیت‌ها را یکی‌یکی به ترتیب لاگ پردازش می‌کند: کند، اما دنبالهٔ
+# فراخوانی‌ها تکرارپذیر است و برای --diff میان دو نسخه مناسب‌تر است.
+# انباره‌ها از یک کپی موقت از --data خوانده و نوشته می‌شوند (اصل دست نمی‌خورد).
+#
+# خروجی: throughput، توزیع تأخیر هر نوع آپدیت و فراخوانی‌های API به ترتیب
+# برای هر آپدیت. با --out ذخیره و با --diff دو اجرا (دو نسخهٔ کد) مقایسه شود:
+#   git checkout main    && python -m tools.replay updates.jsonl --serial --out a.json
+#   git checkout feature && python -m tools.replay updates.jsonl --serial --out b.json
+#   python -m tools.replay --diff a.json b.json
+# فراخوانی‌های taskهایی که هندلر می‌سازد (مثل تجمیع آلبوم) هم به همان آپدیت
+# نسبت داده می‌شوند، اما زمانشان جزو تأخیر آن آپدیت نیست.
+
+TOKEN = "123456:" + "R" * 35
+
+# فهرست فراخوانی‌های API آپدیتِ در حال پردازش (taskهای فرزند هم به ارث می‌برند)
+CALLS: ContextVar[list[str] | None] = ContextVar("replay_calls", default=None)
+
+
+def load_log(paths: list[str]) -> list[dict]:
+    """خواندن یک یا چند فایل لاگ (مثلاً updates.jsonl.1 updates.jsonl) به ترتیب زمان"""
+    entries = []
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue
+                if isinstance(entry, dict) and isinstance(entry.get("u"), dict):
+                    entries.append(entry)
+    entries.sort(key=lambda e: e.get("t", 0))
+    return entries
+
+
+def kind_of(update: dict) -> str:
+    message = update.get("message")
+    if message is not None:
+        for key in ("web_app_data", "photo"):
+            if key in message:
+                return f"message.{key}"
+        text = message.get("text")
+        if text is not None:
+            return "message.command" if text.startswith("/") else "message.text"
+        return "message.other"
+    query = update.get("callback_query")
+    if query is not None:
+        return "callback." + (query.get("data") or "").partition(":")[0]
+    return next((k for k in update if k != "update_id"), "unknown")
+
+
+def user_of(update: dict) -> int | None:
+    for key, body in update.items():
+        if isinstance(body, dict) and isinstance(body.get("from"), dict):
+            return body["from"].get("id")
+    return None
+
+
+def _callback_datas(message: dict) -> list[str]:
+    markup = message.get("reply_markup")
+    if not isinstance(markup, dict):
+        return []
+    return [b.get("callback_data", "") for row in markup.get("inline_keyboard", []) for b in row]
+
+
+# --------------------------------------------------------------------------- #
+#                         کپی موقت انباره‌ها                                  #
+# --------------------------------------------------------------------------- #
+
+
+@contextmanager
+def sandbox_storage(source: Path) -> Iterator[Path]:
+    from app.storage import admins, allowed_channels, car_models, counter, destinations, required_channels
+
+    files = {
+        admins: "ADMINS_FILE",
+        allowed_channels: "ALLOWED_FILE",
+        car_models: "CAR_MODELS_FILE",
+        counter: "DAILY_FILE",
+        destinations: "DESTS_FILE",
+        required_channels: "REQUIRED_FILE",
+    }
+    saved = {m: getattr(m, attr) for m, attr in files.items()}
+    with tempfile.TemporaryDirectory(prefix="replay_data_") as tmp:
+        for m, attr in files.items():
+            src = source / saved[m].name
+            if src.exists():
+                shutil.copy(src, tmp)
+            setattr(m, attr, Path(tmp) / saved[m].name)
+        try:
+            yield Path(tmp)
+        finally:
+            for m, attr in files.items():
+                setattr(m, attr, saved[m])
+
+
+class Replay:
+    def __init__(self, fake: FakeTelegram, dp: Any, bot: Any, args: argparse.Namespace) -> None:
+        self.fake = fake
+        self.dp = dp
+        self.bot = bot
+        self.args = args
+        self.kinds: list[str] = []
+        self.calls: list[list[str]] = []
+        self.samples: dict[str, list[float]] = defaultdict(list)
+        self.errors: Counter[str] = Counter()
+        self.rebound = 0
+        self.stale: Counter[str] = Counter()
+        # دکمه‌هایی که یک بار زده شده‌اند: (chat_id, message_id, data)
+        self.tapped: set[tuple[int, int, str]] = set()
+        self.bot_sent = asyncio.Event()
+        fake.on_call.append(lambda method, p, result: self.bot_sent.set())
+
+    def _find_button(self, query: dict) -> dict | None:
+        data = query.get("data") or ""
+        prefix, sep, _ = data.partition(":")
+        message = query.get("message") or {}
+        chat_id = (message.get("chat") or {}).get("id")
+        for sent in reversed(self.fake.sent_to(chat_id)):
+            for candidate in _callback_datas(sent):
+                key = (chat_id, sent["message_id"], candidate)
+                if key in self.tapped:
+                    continue
+                if candidate == data or (sep and candidate.startswith(prefix + ":")):
+                    self.tapped.add(key)
+                    return {**query, "data": candidate, "message": sent}
+        return None
+
+    async def _rebind(self, query: dict) -> dict:
+        """جایگزینی داده و پیام callback با دکمهٔ متناظر از همین اجرا"""
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.args.rebind_wait
+        while True:
+            self.bot_sent.clear()
+            found = self._find_button(query)
+            if found is not None:
+                self.rebound += 1
+                return found
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                self.stale["callback." + (query.get("data") or "").partition(":")[0]] += 1
+                return query
+            try:
+                await asyncio.wait_for(self.bot_sent.wait(), remaining)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _prepare(self, raw: dict) -> dict:
+        update = json.loads(json.dumps(raw))
+        update["update_id"] = self.fake.next_update_id
+        self.fake.next_update_id += 1
+        message = update.get("message")
+        if message is not None:
+            chat = message["chat"]
+            if chat.get("type") == "private":
+                self.fake.add_user(chat["id"])
+            message["message_id"] = self.fake.next_message_id[chat["id"]]
+            self.fake.next_message_id[chat["id"]] += 1
+            message["date"] = int(time.time())
+        if "callback_query" in update:
+            update["callback_query"] = await self._rebind(update["callback_query"])
+        return update
+
+    async def _one(self, index: int, raw: dict) -> None:
+        from aiogram.types import Update
+
+        kind = self.kinds[index]
+        calls = self.calls[index]
+        update = Update.model_validate(await self._prepare(raw), context={"bot": self.bot})
+        token = CALLS.set(calls)
+        t0 = time.perf_counter()
+        try:
+            await self.dp.feed_update(self.bot, update)
+        except Exception as e:
+            self.errors[kind] += 1
+            calls.append(f"!{type(e).__name__}")
+        finally:
+            self.samples[kind].append(time.perf_counter() - t0)
+            CALLS.reset(token)
+
+    async def _user(self, items: list[tuple[int, float, dict]], start: float) -> None:
+        loop = asyncio.get_running_loop()
+        for index, at, raw in items:
+            delay = start + at - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            await self._one(index, raw)
+
+    async def run(self, entries: list[dict]) -> float:
+        # زمان‌بندی نسبی با سقف فاصله‌ها و ضریب سرعت
+        schedule: list[float] = []
+        at = 0.0
+        prev = entries[0]["t"] if entries else 0.0
+        for e in entries:
+            gap = min(max(e["t"] - prev, 0.0), self.args.max_gap)
+            prev = e["t"]
+            at += gap / self.args.speed if self.args.speed > 0 else 0.0
+            schedule.append(at)
+
+        per_user: dict[Any, list[tuple[int, float, dict]]] = defaultdict(list)
+        for index, (e, at) in enumerate(zip(entries, schedule)):
+            self.kinds.append(kind_of(e["u"]))
+            self.calls.append([])
+            chain = "all" if self.args.serial else user_of(e["u"]) or f"anon{index}"
+            per_user[chain].append((index, at, e["u"]))
+
+        loop = asyncio.get_running_loop()
+        t0 = time.perf_counter()
+        start = loop.time()
+        await asyncio.gather(*(self._user(items, start) for items in per_user.values()))
+        wall = time.perf_counter() - t0
+        await asyncio.sleep(self.args.drain)
+        return wall
+
+    def report(self, wall: float) -> dict:
+        methods = Counter(c for calls in self.calls for c in calls if not c.startswith("!"))
+        return {
+            "updates": len(self.kinds),
+            "wall_s": round(wall, 3),
+            "updates_per_s": round(len(self.kinds) / wall, 2) if wall > 0 else 0.0,
+            "latency": latency_summary([s for v in self.samples.values() for s in v]),
+            "by_kind": {k: latency_summary(v) for k, v in sorted(self.samples.items())},
+            "errors": dict(self.errors),
+            "rebound_callbacks": self.rebound,
+            "stale_callbacks": dict(self.stale),
+            "api_calls": sum(methods.values()),
+            "methods": dict(methods.most_common()),
+            "api_errors": dict(self.fake.errors),
+            "kinds": self.kinds,
+            "calls": self.calls,
+        }
+
+
+def print_run(result: dict) -> None:
+    print(
+        f"{result['updates']} updates in {result['wall_s']}s → {result['updates_per_s']} updates/s, "
+        f"{result['api_calls']} API calls, {result['rebound_callbacks']} callbacks rebound, "
+        f"{sum(result['stale_callbacks'].values())} stale"
+    )
+    print_latency_table({"all": result["latency"], **result["by_kind"]}, errors=result["errors"])
+    print("\nAPI calls: " + ", ".join(f"{m}={n}" for m, n in result["methods"].items()))
+    if result["stale_callbacks"]:
+        print("stale callbacks: " + ", ".join(f"{k}={n}" for k, n in result["stale_callbacks"].items()))
+    if result["api_errors"]:
+        print("API errors: " + ", ".join(f"{m}={n}" for m, n in result["api_errors"].items()))
+
+
+# --------------------------------------------------------------------------- #
+#                          مقایسهٔ دو اجرا                                    #
+# --------------------------------------------------------------------------- #
+
+
+def diff_runs(a: dict, b: dict, *, show: int = 10) -> int:
+    """چاپ تفاوت دو اجرا؛ تعداد آپدیت‌هایی که فراخوانی‌هایشان فرق کرده برمی‌گردد"""
+    print(f"{'':<22} {'A':>12} {'B':>12} {'delta':>9}")
+    for key in ("updates_per_s", "api_calls"):
+        va, vb = a[key], b[key]
+        delta = f"{(vb / va - 1):+.1%}" if va else "-"
+        print(f"{key:<22} {va:>12} {vb:>12} {delta:>9}")
+
+    print(f"\n{'latency (ms)':<22} {'A p50':>8} {'B p50':>8} {'A p99':>8} {'B p99':>8}")
+    for kind in sorted({"all", *a["by_kind"], *b["by_kind"]}):
+        ra = a["latency"] if kind == "all" else a["by_kind"].get(kind)
+        rb = b["latency"] if kind == "all" else b["by_kind"].get(kind)
+        cell = lambda r, k: f"{r[k]:>8.1f}" if r else f"{'-':>8}"  # noqa: E731
+        print(f"{kind:<22} {cell(ra, 'p50_ms')} {cell(rb, 'p50_ms')} {cell(ra, 'p99_ms')} {cell(rb, 'p99_ms')}")
+
+    print(f"\n{'API method':<26} {'A':>8} {'B':>8} {'delta':>8}")
+    for method in sorted({*a["methods"], *b["methods"]}):
+        na, nb = a["methods"].get(method, 0), b["methods"].get(method, 0)
+        mark = "" if na == nb else f"{nb - na:>+8}"
+        print(f"{method:<26} {na:>8} {nb:>8} {mark}")
+
+    if len(a["calls"]) != len(b["calls"]):
+        print(f"\nruns replayed different logs ({len(a['calls'])} vs {len(b['calls'])} updates)")
+        return max(len(a["calls"]), len(b["calls"]))
+    changed = [i for i, (ca, cb) in enumerate(zip(a["calls"], b["calls"])) if Counter(ca) != Counter(cb)]
+    by_kind = Counter(a["kinds"][i] for i in changed)
+    print(f"\n{len(changed)} of {len(a['calls'])} updates made different API calls")
+    for kind, n in by_kind.most_common():
+        print(f"  {kind:<22} {n}")
+    for i in changed[:show]:
+        print(f"  #{i} {a['kinds'][i]}\n     A: {' '.join(a['calls'][i]) or '-'}\n     B: {' '.join(b['calls'][i]) or '-'}")
+    return len(changed)
+
+
+# --------------------------------------------------------------------------- #
+
+
+async def main_async(args: argparse.Namespace) -> dict:
+    # SETTINGS هنگام import خوانده می‌شود؛ /start بدون آدرس WebApp مسیر دیگری می‌رود
+    os.environ.setdefault("WEBAPP_URL", "https://replay.invalid/webapp/")
+
+    from aiogram import Bot, Dispatcher
+    from aiogram.client.session.middlewares.base import BaseRequestMiddleware
+    from aiogram.client.telegram import TelegramAPIServer
+
+    from app import storage
+    from app.config import SETTINGS
+    from app.handlers import router as root_router
+    from app.middlewares import setup_middlewares
+    from app.session import ApiMetricsMiddleware, PreparedMarkupSession
+    from app.state_backend import build_backend, set_backend
+    from app.storage import admins as admin_store
+
+    class RecordCalls(BaseRequestMiddleware):
+        async def __call__(self, make_request, bot, method):
+            calls = CALLS.get()
+            if calls is not None:
+                calls.append(method.__api_method__)
+            return await make_request(bot, method)
+
+    entries = load_log(args.log)
+    if not entries:
+        raise SystemExit("empty update log")
+
+    fake = FakeTelegram(latency_ms=args.latency_ms, flood=args.flood, member_status=args.member_status, seed=args.seed)
+    server = TestServer(fake.app())
+    await server.start_server()
+
+    with sandbox_storage(Path(args.data)):
+        storage.bootstrap_admins(initial_env_admins=SETTINGS.ADMIN_IDS, owner_id=SETTINGS.OWNER_ID)
+        storage.bootstrap_destinations(default_id=SETTINGS.TARGET_GROUP_ID)
+        storage.bootstrap_allowed_channels(default_id=SETTINGS.TARGET_GROUP_ID)
+        storage.bootstrap_required_channels(default_id=SETTINGS.TARGET_GROUP_ID)
+        set_backend(build_backend(""))
+        for e in entries:
+            uid = user_of(e["u"])
+            if uid is None or not e.get("r"):
+                continue
+            storage.add_admin(uid)
+            if e["r"] == "o":
+                admin_store._OWNER_ID = uid
+        for uid in storage.list_admins():
+            fake.add_user(uid)
+        chats = {storage.get_active_destination(), *storage.get_required_channel_ids(), SETTINGS.TARGET_GROUP_ID}
+        for d in storage.list_destinations():
+            chats.add(int(d.get("id") or 0))
+        for cid in filter(None, chats):
+            if cid not in fake.chats:
+                fake.add_chat(cid, "channel", f"chat {cid}", username=f"c{abs(cid)}")
+
+        session = PreparedMarkupSession()
+        session.api = TelegramAPIServer.from_base(str(server.make_url("")).rstrip("/"))
+        session.middleware(RecordCalls())
+        session.middleware(ApiMetricsMiddleware())
+        bot = Bot(TOKEN, session=session)
+        dp = Dispatcher()
+        dp.include_router(root_router)
+        setup_middlewares(dp)
+
+        replay = Replay(fake, dp, bot, args)
+        try:
+            wall = await replay.run(entries)
+        finally:
+            await session.close()
+            await server.close()
+
+    result = replay.report(wall)
+    result["config"] = {k: v for k, v in vars(args).items() if k not in ("out", "diff")}
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Replay a recorded update log against the fake Bot API")
+    parser.add_argument("log", nargs="*", help="update log file(s), oldest first")
+    parser.add_argument("--speed", type=float, default=1.0, help="time scale (10 = 10x faster, 0 = no pauses)")
+    parser.add_argument("--serial", action="store_true", help="one update at a time in log order (repeatable calls)")
+    parser.add_argument("--max-gap", type=float, default=5.0, help="cap idle gaps in the log (s, before --speed)")
+    parser.add_argument(
+        "--rebind-wait", type=float, default=None,
+        help="max wait for a callback's button (s; default 5, or 1 with --serial)",
+    )
+    parser.add_argument("--drain", type=float, default=1.0, help="wait for background tasks after the last update (s)")
+    parser.add_argument("--latency-ms", type=float, default=40.0)
+    parser.add_argument("--flood", action="store_true", help="enable Telegram-like 429 rate limits")
+    parser.add_argument("--member-status", default="member", help="getChatMember status for every user")
+    parser.add_argument("--data", default="/tmp/bot_data", help="storage directory to copy (never written)")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--out", help="write the run (incl. per-update API calls) to this JSON file")
+    parser.add_argument("--diff", nargs=2, metavar=("A", "B"), help="compare two saved runs")
+    parser.add_argument("--strict", action="store_true", help="with --diff: exit 1 if any update's API calls differ")
+    args = parser.parse_args()
+
+    if args.diff:
+        a, b = (json.loads(Path(p).read_text(encoding="utf-8")) for p in args.diff)
+        changed = diff_runs(a, b)
+        sys.exit(1 if args.strict and changed else 0)
+    if not args.log:
+        parser.error("an update log is required (or --diff A B)")
+    if args.rebind_wait is None:
+        args.rebind_wait = 1.0 if args.serial else 5.0
+
+    result = asyncio.run(main_async(args))
+    print_run(result)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(result, f, ensure_ascii=False)
+
+
+if __name__ == "__main__":
+    main()